@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+##
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of the University of Ghent (http://ugent.be/hpc).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+##
+"""
+This script benchmarks concurrent checksum verification (cfr. --parallel-checksums),
+by verifying checksums for a set of generated small and large tarballs using different numbers of threads.
+
+By default, 500 small tarballs and 5 large ones are generated; the location where they are created
+should be on the filesystem of interest (e.g., where source files are stored).
+
+This script is not installed along with EasyBuild; run it from a checkout of the EasyBuild framework repository,
+e.g. 'python benchmarks/benchmark_checksums.py --help'.
+"""
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+
+from vsc.utils import fancylogger
+from vsc.utils.generaloption import simple_option
+
+import easybuild.tools.filetools as filetools
+from easybuild.tools.filetools import compute_checksum, verify_checksums
+
+
+def create_tarball(path, size):
+    """Create tarball at specified path, containing a single file with (incompressible) data of specified size."""
+    datafile = path + '.data'
+    handle = open(datafile, 'wb')
+    remaining = size
+    while remaining > 0:
+        blocksize = min(remaining, 16 * 1024 * 1024)
+        handle.write(os.urandom(blocksize))
+        remaining -= blocksize
+    handle.close()
+
+    tar = tarfile.open(path, 'w')
+    tar.add(datafile, arcname=os.path.basename(datafile))
+    tar.close()
+    os.remove(datafile)
+
+
+def main():
+    """the main function"""
+    fancylogger.logToScreen(enable=True, stdout=True)
+    fancylogger.setLogLevelWarning()
+
+    options = {
+        'checksum-type': ("Type of checksum to verify", 'choice', 'store', 'md5',
+                          sorted(filetools.CHECKSUM_ALGORITHMS.keys())),
+        'large': ("Number of large tarballs", 'int', 'store', 5, 'L'),
+        'large-size': ("Size of large tarballs (in MB)", 'int', 'store', 512),
+        'path': ("Location to create tarballs in (default: temporary directory)", None, 'store', None, 'p'),
+        'small': ("Number of small tarballs", 'int', 'store', 500, 'S'),
+        'small-size': ("Size of small tarballs (in KB)", 'int', 'store', 256),
+        'threads': ("List of numbers of threads to benchmark with", 'strlist', 'store', ['1', '2', '4', '8'], 't'),
+    }
+    go = simple_option(options)
+    opts = go.options
+
+    cleanup = opts.path is None
+    path = opts.path or tempfile.mkdtemp(prefix='eb-benchmark-checksums-')
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    checksum_specs = []
+    try:
+        print "Creating %d small (%d KB) and %d large (%d MB) tarballs in %s..." % (opts.small, opts.small_size,
+                                                                                   opts.large, opts.large_size, path)
+        tarballs = [('small%d.tar' % i, opts.small_size * 1024) for i in range(opts.small)]
+        tarballs += [('large%d.tar' % i, opts.large_size * 1024 * 1024) for i in range(opts.large)]
+        for fn, size in tarballs:
+            tarball = os.path.join(path, fn)
+            create_tarball(tarball, size)
+            checksum_specs.append((tarball, (opts.checksum_type, compute_checksum(tarball, opts.checksum_type))))
+
+        total_size = sum(os.path.getsize(tarball) for (tarball, _) in checksum_specs)
+        print "Verifying %s checksums for %d files (%.1f MB in total)" % (opts.checksum_type, len(checksum_specs),
+                                                                         total_size / (1024.0 * 1024))
+
+        for nworkers in [int(n) for n in opts.threads]:
+            # make sure checksums are actually recomputed
+            filetools._checksums_cache.clear()
+            start = time.time()
+            failed = verify_checksums(checksum_specs, nworkers=nworkers)
+            elapsed = time.time() - start
+            if failed:
+                print "Checksum verification failed for: %s" % ', '.join(path for (path, _, _) in failed)
+            print "%3d thread(s): %6.2f s (%7.1f MB/s)" % (nworkers, elapsed, total_size / (1024.0 * 1024 * elapsed))
+
+        # also report verification time when checksums are cached (i.e. for unchanged files)
+        start = time.time()
+        verify_checksums(checksum_specs, nworkers=1)
+        print "cached       : %6.2f s" % (time.time() - start)
+
+    finally:
+        if cleanup:
+            shutil.rmtree(path)
+        else:
+            for tarball, _ in checksum_specs:
+                os.remove(tarball)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+##
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of the University of Ghent (http://ugent.be/hpc).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+##
+"""
+Benchmark for resolving dependencies of a large number of easyconfigs (cfr. resolve_dependencies).
+
+A synthetic dependency graph is used, in which each node depends on a couple of nodes that precede it
+(i.e., with an offset of 1, 7, 100 and 999); the list of specs passed to resolve_dependencies is shuffled.
+No easyconfig files or modules are required, all dependencies are resolved within the synthetic graph.
+
+This script is not installed along with EasyBuild; run it from a checkout of the EasyBuild framework repository,
+e.g. 'python benchmarks/benchmark_dependency_graph.py --help'.
+"""
+import random
+import time
+
+from vsc.utils import fancylogger
+from vsc.utils.generaloption import simple_option
+
+import easybuild.tools.options as eboptions
+from easybuild.tools import config
+from easybuild.tools.modules import modules_tool
+from easybuild.tools.robot import resolve_dependencies
+
+
+# offsets of the nodes each node in the synthetic dependency graph depends on
+DEP_OFFSETS = (1, 7, 100, 999)
+
+
+def mkdepspec(name):
+    """Create a dep spec with given name."""
+    return {
+        'name': name,
+        'version': '1.0',
+        'versionsuffix': '',
+        'toolchain': {'name': 'dummy', 'version': 'dummy'},
+        'full_mod_name': '%s/1.0' % name,
+    }
+
+
+def mkspec(name, deps):
+    """Create a spec with given name/deps."""
+    spec = mkdepspec(name)
+    return {
+        'ec': spec,
+        'spec': '%s.eb' % name,
+        'full_mod_name': spec['full_mod_name'],
+        'dependencies': [mkdepspec(dep) for dep in deps],
+    }
+
+
+def main():
+    """the main function"""
+    fancylogger.logToScreen(enable=True, stdout=True)
+    fancylogger.setLogLevelWarning()
+
+    options = {
+        'nodes': ("Number of nodes in synthetic dependency graph", 'int', 'store', 10000, 'n'),
+        'repeat': ("Number of times to resolve dependencies", 'int', 'store', 3, 'r'),
+        'seed': ("Seed for shuffling list of specs", 'int', 'store', 1234),
+    }
+    go = simple_option(options)
+    opts = go.options
+
+    # initialise EasyBuild configuration (using defaults), without robot search path
+    eb_go = eboptions.parse_options(args=[])
+    config.init(eb_go.options, eb_go.get_options_by_section('config'))
+    config.init_build_options(build_options={'robot_path': None, 'silent': True}, cmdline_options=eb_go.options)
+    modtool = modules_tool()
+
+    ecs = []
+    for i in range(opts.nodes):
+        ecs.append(mkspec('node%d' % i, ['node%d' % (i - j) for j in DEP_OFFSETS if i - j >= 0]))
+    random.seed(opts.seed)
+    random.shuffle(ecs)
+
+    cnt = sum(len(ec['dependencies']) for ec in ecs)
+    print "Resolving dependencies for synthetic graph with %d nodes and %d edges..." % (len(ecs), cnt)
+
+    for idx in range(opts.repeat):
+        start = time.time()
+        res = resolve_dependencies(ecs, modtool, retain_all_deps=True)
+        elapsed = time.time() - start
+        if len(res) != len(ecs):
+            print "Expected %d resolved specs, found %d" % (len(ecs), len(res))
+        print "run %d: %6.2f s" % (idx + 1, elapsed)
+
+
+if __name__ == '__main__':
+    main()
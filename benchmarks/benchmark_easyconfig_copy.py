@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+##
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of the University of Ghent (http://ugent.be/hpc).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+##
+"""
+Benchmark for copying parsed easyconfigs (cfr. EasyConfig.copy), which is done:
+* once per extension, when installing a bundle of extensions (cfr. Extension.__init__);
+* for each easyconfig that is obtained from the cache of processed easyconfigs (cfr. process_easyconfig),
+  e.g. when resolving dependencies with the robot.
+
+Both scenarios are benchmarked using synthetic easyconfig files (a bundle of R extensions,
+and a chain of easyconfigs that depend on each other), using EasyConfig.copy as well as a copy that is obtained
+by parsing the easyconfig file again (the way EasyConfig.copy used to work), for comparison.
+The easyconfig files use the ConfigureMake easyblock, so EasyBuild easyblocks must be available.
+
+This script is not installed along with EasyBuild; run it from a checkout of the EasyBuild framework repository,
+e.g. 'python benchmarks/benchmark_easyconfig_copy.py --help'.
+"""
+import copy
+import os
+import shutil
+import tempfile
+import time
+
+from vsc.utils import fancylogger
+from vsc.utils.generaloption import simple_option
+
+import easybuild.tools.options as eboptions
+from easybuild.framework.easyconfig.easyconfig import EasyConfig, process_easyconfig
+from easybuild.tools import config
+from easybuild.tools.filetools import write_file
+from easybuild.tools.modules import modules_tool
+from easybuild.tools.robot import resolve_dependencies
+
+
+# offsets of the easyconfigs each easyconfig in the synthetic dependency chain depends on
+DEP_OFFSETS = (1, 7, 100)
+
+EC_TEMPLATE = '\n'.join([
+    "easyblock = 'ConfigureMake'",
+    "name = '%(name)s'",
+    "version = '1.0'",
+    "homepage = 'http://example.com'",
+    "description = 'synthetic easyconfig for %%(name)s'",
+    "toolchain = {'name': 'dummy', 'version': 'dummy'}",
+    "source_urls = ['http://example.com/%%(name)s']",
+    "sources = [SOURCELOWER_TAR_GZ]",
+    "dependencies = %(deps)s",
+    "exts_defaultclass = 'RPackage'",
+    "exts_list = %(exts)s",
+    "moduleclass = 'tools'",
+])
+
+
+def reparse_copy(ec):
+    """Copy EasyConfig instance by parsing the easyconfig file again (the way EasyConfig.copy used to work)."""
+    res = EasyConfig(ec.path, validate=ec.validation, hidden=ec.hidden, rawtxt=ec.rawtxt)
+    res._values = copy.deepcopy(ec._values)
+    return res
+
+
+def time_it(func, repeat):
+    """Run specified function the specified number of times, return the minimal time it took."""
+    timings = []
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        timings.append(time.time() - start)
+    return min(timings)
+
+
+def bench_bundle(path, extensions, repeat):
+    """Benchmark copying the easyconfig for a bundle of extensions, once per extension."""
+    exts = [('ext%d' % i, '1.%d' % i) for i in range(extensions)]
+    ec_file = os.path.join(path, 'Rbundle-1.0.eb')
+    write_file(ec_file, EC_TEMPLATE % {'name': 'Rbundle', 'deps': [], 'exts': exts})
+    ec = process_easyconfig(ec_file)[0]['ec']
+
+    def copy_per_ext(copy_func):
+        """Copy easyconfig for each extension, like Extension.__init__ does."""
+        def func():
+            for (name, version) in exts:
+                ext_cfg = copy_func(ec)
+                ext_cfg['name'] = name
+                ext_cfg['version'] = version
+        return func
+
+    print "Copying easyconfig for bundle with %d extensions, once per extension:" % extensions
+    print "  EasyConfig.copy: %6.2f s" % time_it(copy_per_ext(lambda ec: ec.copy()), repeat)
+    print "  reparsing      : %6.2f s" % time_it(copy_per_ext(reparse_copy), repeat)
+
+
+def bench_robot(path, nodes, modtool, repeat):
+    """Benchmark resolving dependencies with the robot, using processed easyconfigs that are already cached."""
+    for i in range(nodes):
+        deps = [('node%d' % (i - j), '1.0') for j in DEP_OFFSETS if i - j >= 0]
+        write_file(os.path.join(path, 'node%d-1.0.eb' % i), EC_TEMPLATE % {'name': 'node%d' % i, 'deps': deps,
+                                                                           'exts': []})
+
+    ecs = process_easyconfig(os.path.join(path, 'node%d-1.0.eb' % (nodes - 1)))
+
+    def resolve():
+        """Resolve dependencies, all easyconfigs are obtained from the cache of processed easyconfigs."""
+        res = resolve_dependencies(ecs, modtool, retain_all_deps=True)
+        if len(res) != nodes:
+            print "Expected %d resolved easyconfigs, found %d" % (nodes, len(res))
+
+    # parse all easyconfigs once up front, which fills the cache of processed easyconfigs
+    resolve()
+
+    print "Resolving dependencies for %d easyconfigs (all obtained from cache of processed easyconfigs):" % nodes
+    print "  EasyConfig.copy: %6.2f s" % time_it(resolve, repeat)
+    orig_copy = EasyConfig.copy
+    EasyConfig.copy = reparse_copy
+    try:
+        print "  reparsing      : %6.2f s" % time_it(resolve, repeat)
+    finally:
+        EasyConfig.copy = orig_copy
+
+
+def main():
+    """the main function"""
+    fancylogger.logToScreen(enable=True, stdout=True)
+    fancylogger.setLogLevelWarning()
+
+    options = {
+        'extensions': ("Number of extensions in synthetic bundle", 'int', 'store', 600, 'e'),
+        'nodes': ("Number of easyconfigs to resolve dependencies for", 'int', 'store', 2000, 'n'),
+        'repeat': ("Number of times to repeat each benchmark (minimal time is reported)", 'int', 'store', 3, 'r'),
+    }
+    go = simple_option(options)
+    opts = go.options
+
+    path = tempfile.mkdtemp(prefix='eb-benchmark-copy-')
+
+    # initialise EasyBuild configuration (using defaults), with location of synthetic easyconfigs as robot path
+    eb_go = eboptions.parse_options(args=[])
+    config.init(eb_go.options, eb_go.get_options_by_section('config'))
+    build_options = {'robot_path': [path], 'silent': True, 'validate': False}
+    config.init_build_options(build_options=build_options, cmdline_options=eb_go.options)
+    modtool = modules_tool()
+
+    try:
+        bench_bundle(path, opts.extensions, opts.repeat)
+        bench_robot(path, opts.nodes, modtool, opts.repeat)
+    finally:
+        shutil.rmtree(path)
+
+
+if __name__ == '__main__':
+    main()
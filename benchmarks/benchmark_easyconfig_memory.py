@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+##
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of the University of Ghent (http://ugent.be/hpc).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+##
+"""
+Benchmark for the memory used by parsed easyconfigs (cfr. EasyConfig), as held in memory by the robot.
+
+All easyconfig files found in the specified location (e.g., a checkout of the easybuild-easyconfigs repository)
+are parsed and retained; the increase in resident memory is reported as a total and per EasyConfig instance.
+For comparison, the memory required for a private copy of the table of default easyconfig parameters
+(which each EasyConfig instance used to carry along) is reported as well.
+
+This script is not installed along with EasyBuild; run it from a checkout of the EasyBuild framework repository,
+e.g. 'python benchmarks/benchmark_easyconfig_memory.py /path/to/easybuild-easyconfigs'.
+"""
+import copy
+import gc
+import os
+import resource
+import sys
+import time
+
+from vsc.utils import fancylogger
+from vsc.utils.generaloption import simple_option
+
+import easybuild.tools.options as eboptions
+from easybuild.framework.easyconfig.default import DEFAULT_CONFIG
+from easybuild.framework.easyconfig.easyconfig import EasyConfig
+from easybuild.tools import config
+from easybuild.tools.build_log import EasyBuildError
+
+
+def rss():
+    """Return current resident memory (in bytes) of this process."""
+    handle = open('/proc/self/statm')
+    res = int(handle.read().split()[1]) * resource.getpagesize()
+    handle.close()
+    return res
+
+
+def find_easyconfigs(path):
+    """Return sorted list of easyconfig files in specified location."""
+    res = []
+    for (dirpath, dirnames, filenames) in os.walk(path):
+        # skip hidden directories (e.g., .git)
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+        res.extend(os.path.join(dirpath, fn) for fn in sorted(filenames) if fn.endswith('.eb'))
+    return res
+
+
+def main():
+    """the main function"""
+    fancylogger.logToScreen(enable=True, stdout=True)
+    fancylogger.setLogLevelWarning()
+
+    options = {
+        'max': ("Maximum number of easyconfig files to parse (0 implies no limit)", 'int', 'store', 0, 'm'),
+        'copies': ("Number of private copies of table of default easyconfig parameters to create for comparison",
+                   'int', 'store', 1000, 'c'),
+    }
+    go = simple_option(options)
+    opts = go.options
+    if len(go.args) != 1:
+        sys.stderr.write("Usage: %s [options] <path to easyconfigs repository>\n" % sys.argv[0])
+        sys.exit(1)
+
+    # initialise EasyBuild configuration (using defaults)
+    eb_go = eboptions.parse_options(args=[])
+    config.init(eb_go.options, eb_go.get_options_by_section('config'))
+    config.init_build_options(build_options={'silent': True}, cmdline_options=eb_go.options)
+
+    paths = find_easyconfigs(go.args[0])
+    if opts.max:
+        paths = paths[:opts.max]
+    print "Parsing %d easyconfig files found in %s..." % (len(paths), go.args[0])
+
+    # parse one easyconfig file upfront, so memory for imported modules etc. is not taken into account
+    ecs, failed = [], []
+    if paths:
+        EasyConfig(paths[0], validate=False)
+
+    gc.collect()
+    start_rss = rss()
+    start = time.time()
+    for path in paths:
+        try:
+            ecs.append(EasyConfig(path, validate=False))
+        except EasyBuildError, err:
+            failed.append((path, err))
+    elapsed = time.time() - start
+    gc.collect()
+    used = rss() - start_rss
+
+    print "Parsed %d easyconfig files in %.2f s (%d failed to parse)" % (len(ecs), elapsed, len(failed))
+    if ecs:
+        print "Memory used: %.1f MB in total, %d bytes per EasyConfig instance" % (used / (1024.0 * 1024),
+                                                                                   used / len(ecs))
+
+    if opts.copies > 0:
+        gc.collect()
+        start_rss = rss()
+        copies = [copy.deepcopy(DEFAULT_CONFIG) for _ in range(opts.copies)]
+        gc.collect()
+        used = rss() - start_rss
+        print "Private copy of table of default easyconfig parameters (%d entries): %d bytes" % (len(copies[0]),
+                                                                                                used / len(copies))
+
+
+if __name__ == '__main__':
+    main()
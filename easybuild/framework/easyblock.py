@@ -55,7 +55,6 @@ from easybuild.tools import config, filetools
 from easybuild.framework.easyconfig import EASYCONFIGS_PKG_SUBDIR
 from easybuild.framework.easyconfig.easyconfig import ITERATE_OPTIONS, EasyConfig, ActiveMNS, get_easyblock_class
 from easybuild.framework.easyconfig.easyconfig import get_module_path, letter_dir_for, resolve_template
-from easybuild.framework.easyconfig.parser import fetch_parameters_from_easyconfig
 from easybuild.framework.easyconfig.tools import get_paths_for
 from easybuild.framework.easyconfig.templates import TEMPLATE_NAMES_EASYBLOCK_RUN_STEP
 from easybuild.tools.build_details import get_build_stats
@@ -66,10 +65,14 @@ from easybuild.tools.config import install_path, log_path, package_path, source_
 from easybuild.tools.environment import restore_env, sanitize_env
 from easybuild.tools.filetools import DEFAULT_CHECKSUM
 from easybuild.tools.filetools import adjust_permissions, apply_patch, convert_name, derive_alt_pypi_url
-from easybuild.tools.filetools import compute_checksum, download_file, encode_class_name, extract_file
+from easybuild.tools.filetools import compute_checksum, download_file, download_files, encode_class_name, extract_file
+from easybuild.tools.filetools import extract_files
 from easybuild.tools.filetools import is_alt_pypi_url, mkdir, move_logs, read_file, remove_file, rmtree2, write_file
-from easybuild.tools.filetools import verify_checksum, weld_paths
+from easybuild.tools.filetools import verify_checksums, weld_paths
 from easybuild.tools.run import run_cmd
+from easybuild.tools.sourcestore import add_to_source_store, find_in_source_store, link_from_source_store
+from easybuild.tools.sourcestore import SOURCE_STORE_CHECKSUM, source_store_path
+from easybuild.tools.sourcetreecache import SOURCE_TREE_CACHE_CHECKSUM, source_tree_cache
 from easybuild.tools.jenkins import write_to_xml
 from easybuild.tools.module_generator import ModuleGeneratorLua, ModuleGeneratorTcl, module_generator, dependencies_for
 from easybuild.tools.module_naming_scheme.utilities import det_full_ec_version
@@ -155,7 +158,12 @@ class EasyBlock(object):
         self.exts = None
         self.exts_all = None
         self.ext_instances = []
+        self.extracted_ext_srcs = {}
         self.skip = None
+
+        # key for cache of extracted and patched source trees, and whether source tree was obtained from it
+        self.src_tree_cache_key = None
+        self.src_tree_from_cache = False
         self.module_extra_extensions = ''  # extra stuff for module file required by extensions
 
         # easyconfig for this application
@@ -333,14 +341,15 @@ class EasyBlock(object):
                 source = src_entry
 
             # check if the sources can be located
-            path = self.obtain_file(source)
+            checksum = self.get_checksum_for(checksums, filename=source, index=index)
+            path = self.obtain_file(source, checksum=checksum)
             if path:
                 self.log.debug('File %s found for source %s' % (path, source))
                 self.src.append({
                     'name': source,
                     'path': path,
                     'cmd': cmd,
-                    'checksum': self.get_checksum_for(checksums, filename=source, index=index),
+                    'checksum': checksum,
                     # always set a finalpath
                     'finalpath': self.builddir,
                 })
@@ -385,13 +394,14 @@ class EasyBlock(object):
             else:
                 patch_file = patch_spec
 
-            path = self.obtain_file(patch_file, extension=extension)
+            checksum = self.get_checksum_for(checksums, filename=patch_file, index=index)
+            path = self.obtain_file(patch_file, extension=extension, checksum=checksum)
             if path:
                 self.log.debug('File %s found for patch %s' % (path, patch_spec))
                 patchspec = {
                     'name': patch_file,
                     'path': path,
-                    'checksum': self.get_checksum_for(checksums, filename=patch_file, index=index),
+                    'checksum': checksum,
                 }
                 if suff:
                     if copy_file:
@@ -419,6 +429,8 @@ class EasyBlock(object):
         Find source file for extensions.
         """
         exts_sources = []
+        # checksums for sources and patches of extensions are verified all at once (concurrently)
+        checksum_specs = []
         self.cfg.enable_templating = False
         exts_list = self.cfg['exts_list']
         self.cfg.enable_templating = True
@@ -438,8 +450,6 @@ class EasyBlock(object):
                     ext_version = ext[1]
                     ext_options = {}
 
-                    def_src_tmpl = "%(name)s-%(version)s.tar.gz"
-
                     if len(ext) == 3:
                         ext_options = ext[2]
 
@@ -456,40 +466,31 @@ class EasyBlock(object):
 
                     checksums = ext_options.get('checksums', None)
 
-                    if ext_options.get('source_tmpl', None):
-                        fn = resolve_template(ext_options['source_tmpl'], ext_src)
-                    else:
-                        fn = resolve_template(def_src_tmpl, ext_src)
-
                     if ext_options.get('nosource', None):
                         exts_sources.append(ext_src)
                     else:
-                        source_urls = [resolve_template(url, ext_src) for url in ext_options.get('source_urls', [])]
-                        src_fn = self.obtain_file(fn, extension=True, urls=source_urls)
+                        fn, source_urls = self._det_ext_source(ext_src)
+                        fn_checksum = self.get_checksum_for(checksums, filename=fn, index=0)
+                        src_fn = self.obtain_file(fn, extension=True, urls=source_urls, checksum=fn_checksum)
 
                         if src_fn:
                             ext_src.update({'src': src_fn})
 
                             if checksums:
-                                fn_checksum = self.get_checksum_for(checksums, filename=src_fn, index=0)
-                                if verify_checksum(src_fn, fn_checksum):
-                                    self.log.info('Checksum for ext source %s verified' % fn)
-                                else:
-                                    raise EasyBuildError('Checksum for ext source %s failed', fn)
+                                checksum_specs.append((src_fn, fn_checksum))
 
-                            ext_patches = self.fetch_patches(patch_specs=ext_options.get('patches', []), extension=True)
+                            ext_patch_specs = ext_options.get('patches', [])
+                            patch_checksums = checksums[1:] if checksums else None
+                            ext_patches = self.fetch_patches(patch_specs=ext_patch_specs, extension=True,
+                                                             checksums=patch_checksums)
                             if ext_patches:
                                 self.log.debug('Found patches for extension %s: %s' % (ext_name, ext_patches))
                                 ext_src.update({'patches': ext_patches})
 
                                 if checksums:
-                                    self.log.debug('Verifying checksums for extension patches...')
                                     for index, ext_patch in enumerate(ext_patches):
                                         checksum = self.get_checksum_for(checksums[1:], filename=ext_patch, index=index)
-                                        if verify_checksum(ext_patch, checksum):
-                                            self.log.info('Checksum for extension patch %s verified' % ext_patch)
-                                        else:
-                                            raise EasyBuildError('Checksum for extension patch %s failed', ext_patch)
+                                        checksum_specs.append((ext_patch, checksum))
                             else:
                                 self.log.debug('No patches found for extension %s.' % ext_name)
 
@@ -504,16 +505,305 @@ class EasyBlock(object):
             else:
                 raise EasyBuildError("Extension specified in unknown format (not a string/list/tuple)")
 
+        if checksum_specs:
+            self.log.debug("Verifying checksums for sources and patches of extensions...")
+            self.verify_file_checksums(checksum_specs)
+
         return exts_sources
 
-    def obtain_file(self, filename, extension=False, urls=None):
+    def verify_file_checksums(self, checksum_specs):
+        """
+        Verify checksums for specified files concurrently (cfr. --parallel-checksums).
+        All files for which checksum verification failed are reported at once.
+
+        :param checksum_specs: list of (path, checksums) tuples
+        """
+        failed = verify_checksums(checksum_specs)
+        if failed:
+            failed_txt = '\n'.join("* %s using %s: %s" % failure for failure in failed)
+            raise EasyBuildError("Checksum verification for %d out of %d files failed:\n%s",
+                                 len(failed), len(checksum_specs), failed_txt)
+        else:
+            self.log.info("Checksum verification passed for: %s", ', '.join(path for (path, _) in checksum_specs))
+
+    def _det_ext_source(self, ext_src):
+        """
+        Determine name of source file and list of source URLs for an extension.
+
+        :param ext_src: dict with name, version and (dict of) options for extension
+        """
+        def_src_tmpl = "%(name)s-%(version)s.tar.gz"
+
+        ext_options = ext_src['options']
+        fn = resolve_template(ext_options.get('source_tmpl', None) or def_src_tmpl, ext_src)
+        source_urls = [resolve_template(url, ext_src) for url in ext_options.get('source_urls', [])]
+
+        return fn, source_urls
+
+    def _det_files_to_fetch(self):
+        """
+        Determine list of all files that need to be fetched: sources, patches, and sources & patches for extensions.
+
+        :return: list of (filename, extension, urls, checksum) tuples, with urls the additional source URLs to consider
+        """
+        def patch_file(patch_spec):
+            """Determine patch file from patch specification."""
+            if isinstance(patch_spec, (list, tuple)):
+                return patch_spec[0]
+            else:
+                return patch_spec
+
+        checksums = self.cfg['checksums']
+        files = []
+        for index, src_entry in enumerate(self.cfg['sources']):
+            if isinstance(src_entry, (list, tuple)):
+                src_entry = src_entry[0]
+            files.append((src_entry, False, None, self.get_checksum_for(checksums, index=index)))
+
+        if isinstance(checksums, (list, tuple)):
+            # if checksums are provided as a list, first entries are assumed to be for sources
+            checksums = checksums[len(self.cfg['sources']):]
+        for index, patch_spec in enumerate(self.cfg['patches']):
+            files.append((patch_file(patch_spec), False, None, self.get_checksum_for(checksums, index=index)))
+
+        self.cfg.enable_templating = False
+        exts_list = self.cfg['exts_list']
+        self.cfg.enable_templating = True
+
+        for ext in exts_list:
+            # malformed extension specifications are reported by fetch_extension_sources
+            if isinstance(ext, (list, tuple)) and len(ext) in [2, 3]:
+                ext_options = {}
+                if len(ext) == 3:
+                    ext_options = ext[2]
+                if isinstance(ext_options, dict) and not ext_options.get('nosource', None):
+                    fn, source_urls = self._det_ext_source({'name': ext[0], 'version': ext[1], 'options': ext_options})
+                    checksums = ext_options.get('checksums', None) or []
+                    files.append((fn, True, source_urls, self.get_checksum_for(checksums, index=0)))
+                    for index, patch_spec in enumerate(ext_options.get('patches', [])):
+                        checksum = self.get_checksum_for(checksums[1:], index=index)
+                        files.append((patch_file(patch_spec), True, None, checksum))
+
+        return files
+
+    def _det_checksum_types(self):
+        """
+        Determine types of checksums specified in the easyconfig (incl. for extensions), which should be computed
+        for downloaded files. The default checksum type is always included, since it is computed in fetch_step.
+        """
+        def add_checksum_types(checksum_specs, types):
+            """Add types of checksums in specified list of checksums to set of checksum types."""
+            for checksum_spec in checksum_specs or []:
+                if isinstance(checksum_spec, list):
+                    add_checksum_types(checksum_spec, types)
+                elif isinstance(checksum_spec, tuple) and len(checksum_spec) == 2:
+                    types.add(checksum_spec[0])
+
+        checksum_types = set([DEFAULT_CHECKSUM])
+        # checksum required to add downloaded files to the source store (if enabled);
+        # aliases in the source store are only created for types of checksums specified in the easyconfig
+        if source_store_path():
+            checksum_types.add(SOURCE_STORE_CHECKSUM)
+        if isinstance(self.cfg['checksums'], (list, tuple)):
+            add_checksum_types(self.cfg['checksums'], checksum_types)
+
+        self.cfg.enable_templating = False
+        exts_list = self.cfg['exts_list']
+        self.cfg.enable_templating = True
+
+        for ext in exts_list:
+            if isinstance(ext, (list, tuple)) and len(ext) == 3 and isinstance(ext[2], dict):
+                add_checksum_types(ext[2].get('checksums', None), checksum_types)
+
+        return sorted(checksum_types)
+
+    def prefetch_files(self):
+        """
+        Concurrently download all sources and patches (incl. those for extensions) that are not available yet,
+        so obtain_file can simply pick them up afterwards.
+
+        Only done when multiple parallel downloads are allowed (cfr. --parallel-downloads).
+        Failing downloads are not fatal here, they are retried (and reported) by obtain_file.
+        """
+        if self.dry_run or (build_option('parallel_downloads') or 1) <= 1:
+            return
+
+        downloads = []
+        for filename, extension, urls, checksum in self._det_files_to_fetch():
+            if find_in_source_store(checksum):
+                # no need to download files that are available in the source store
+                continue
+
+            elif filename.startswith("http://") or filename.startswith("ftp://"):
+                url = filename
+                filename = url.split('/')[-1]
+                targetpath = os.path.join(self._det_download_dir(extension=extension), filename)
+                if not os.path.exists(targetpath):
+                    downloads.append((filename, [url], targetpath))
+
+            elif self._find_file(filename, extension=extension)[0] is None:
+                targetpath = os.path.join(self._det_download_dir(extension=extension), filename)
+                downloads.append((filename, self._det_download_urls(filename, urls=urls), targetpath))
+
+        if downloads:
+            self.log.info("Prefetching %d files: %s", len(downloads), [dl[0] for dl in downloads])
+            res = download_files(downloads, checksum_types=self._det_checksum_types())
+            failed = [dl[0] for (dl, path) in zip(downloads, res) if path is None]
+            if failed:
+                self.log.warning("Failed to prefetch %d files: %s", len(failed), ', '.join(failed))
+        else:
+            self.log.info("No files to prefetch, all sources and patches are available")
+
+    def _det_download_dir(self, extension=False):
+        """Determine directory to download files to."""
+        download_dir = os.path.join(source_paths()[0], letter_dir_for(self.name), self.name)
+        if extension:
+            download_dir = os.path.join(download_dir, 'extensions')
+        return download_dir
+
+    def _det_download_urls(self, filename, urls=None):
+        """
+        Determine list of full URLs to try and download the specified file from.
+
+        :param filename: name of file to download
+        :param urls: list of source URLs to consider before the source URLs specified in the easyconfig
+        """
+        source_urls = list(urls or []) + self.cfg['source_urls']
+
+        full_urls = []
+        for url in source_urls:
+            if isinstance(url, basestring):
+                if url[-1] in ['=', '/']:
+                    fullurl = "%s%s" % (url, filename)
+                else:
+                    fullurl = "%s/%s" % (url, filename)
+            elif isinstance(url, tuple):
+                # URLs that require a suffix, e.g., SourceForge download links
+                # e.g. http://sourceforge.net/projects/math-atlas/files/Stable/3.8.4/atlas3.8.4.tar.bz2/download
+                fullurl = "%s/%s/%s" % (url[0], filename, url[1])
+            else:
+                self.log.warning("Source URL %s is of unknown type, so ignoring it." % url)
+                continue
+
+            # PyPI URLs may need to be converted due to change in format of these URLs,
+            # cfr. https://bitbucket.org/pypa/pypi/issues/438
+            if PYPI_PKG_URL_PATTERN in fullurl and not is_alt_pypi_url(fullurl):
+                alt_url = derive_alt_pypi_url(fullurl)
+                if alt_url:
+                    _log.debug("Using alternate PyPI URL for %s: %s", fullurl, alt_url)
+                    fullurl = alt_url
+                else:
+                    _log.debug("Failed to derive alternate PyPI URL for %s, so retaining the original", fullurl)
+
+            full_urls.append(fullurl)
+
+        return full_urls
+
+    def _find_file(self, filename, extension=False):
+        """
+        Try and find file with given name in the various locations where it may be available.
+
+        :return: tuple with path to file (None if the file was not found) and list of paths that were considered
+        """
+        foundfile = None
+        failedpaths = []
+
+        # always look first in the dir of the current eb file
+        ebpath = [os.path.dirname(self.cfg.path)]
+
+        # always consider robot + easyconfigs install paths as a fall back (e.g. for patch files, test cases, ...)
+        common_filepaths = []
+        if self.robot_path:
+            common_filepaths.extend(self.robot_path)
+        common_filepaths.extend(get_paths_for(subdir=EASYCONFIGS_PKG_SUBDIR, robot_path=self.robot_path))
+
+        for path in ebpath + common_filepaths + source_paths():
+            # create list of candidate filepaths
+            namepath = os.path.join(path, self.name)
+            letterpath = os.path.join(path, letter_dir_for(self.name), self.name)
+
+            # most likely paths
+            candidate_filepaths = [
+                letterpath,  # easyblocks-style subdir
+                namepath,  # subdir with software name
+                path,  # directly in directory
+            ]
+
+            # see if file can be found at that location
+            for cfp in candidate_filepaths:
+
+                fullpath = os.path.join(cfp, filename)
+
+                # also check in 'extensions' subdir for extensions
+                if extension:
+                    fullpaths = [
+                        os.path.join(cfp, "extensions", filename),
+                        os.path.join(cfp, "packages", filename),  # legacy
+                        fullpath
+                    ]
+                else:
+                    fullpaths = [fullpath]
+
+                for fp in fullpaths:
+                    if os.path.isfile(fp):
+                        self.log.info("Found file %s at %s" % (filename, fp))
+                        foundfile = os.path.abspath(fp)
+                        break  # no need to try further
+                    else:
+                        failedpaths.append(fp)
+
+            if foundfile:
+                break  # no need to try other source paths
+
+        return foundfile, failedpaths
+
+    def obtain_file(self, filename, extension=False, urls=None, checksum=None):
         """
         Locate the file with the given name
         - searches in different subdirectories of source path
         - supports fetching file from the web if path is specified as an url (i.e. starts with "http://:")
+        - if the source store is enabled, files are located via their checksum first (if specified),
+          and files that are found in (or downloaded to) the source paths are added to it
+        """
+        path = self._obtain_file_from_source_store(filename, checksum, extension=extension)
+
+        if path is None:
+            path = self._obtain_file(filename, extension=extension, urls=urls)
+
+            if path and not self.dry_run and source_store_path():
+                # only files in source paths are added to source store, since they are linked into it
+                for srcpath in source_paths():
+                    if os.path.realpath(path).startswith(os.path.join(os.path.realpath(srcpath), '')):
+                        add_to_source_store(path, checksums=checksum)
+                        break
+
+        return path
+
+    def _obtain_file_from_source_store(self, filename, checksum, extension=False):
         """
-        srcpaths = source_paths()
+        Try and obtain file with the given name via its checksum from the source store (cfr. --source-store).
 
+        The file is made available in the location where it would otherwise be downloaded to.
+        :return: path to file, or None if it is not available in the source store
+        """
+        entry = find_in_source_store(checksum)
+        if entry is None:
+            return None
+
+        filename = os.path.basename(filename)
+        if self.dry_run:
+            self.dry_run_msg("  * %s found in source store at %s", filename, entry)
+            path = entry
+        else:
+            path = link_from_source_store(entry, os.path.join(self._det_download_dir(extension=extension), filename))
+            self.log.info("Found file %s with checksum %s in source store: %s", filename, checksum, path)
+
+        return path
+
+    def _obtain_file(self, filename, extension=False, urls=None):
+        """
+        Locate the file with the given name in the source paths & co, or download it.
+        """
         # should we download or just try and find it?
         if filename.startswith("http://") or filename.startswith("ftp://"):
 
@@ -523,9 +813,7 @@ class EasyBlock(object):
             filename = url.split('/')[-1]
 
             # figure out where to download the file to
-            filepath = os.path.join(srcpaths[0], letter_dir_for(self.name), self.name)
-            if extension:
-                filepath = os.path.join(filepath, "extensions")
+            filepath = self._det_download_dir(extension=extension)
             self.log.info("Creating path %s to download file to" % filepath)
             mkdir(filepath, parents=True)
 
@@ -538,7 +826,7 @@ class EasyBlock(object):
                     return fullpath
 
                 else:
-                    if download_file(filename, url, fullpath):
+                    if download_file(filename, url, fullpath, checksum_types=self._det_checksum_types()):
                         return fullpath
 
             except IOError, err:
@@ -546,55 +834,7 @@ class EasyBlock(object):
 
         else:
             # try and find file in various locations
-            foundfile = None
-            failedpaths = []
-
-            # always look first in the dir of the current eb file
-            ebpath = [os.path.dirname(self.cfg.path)]
-
-            # always consider robot + easyconfigs install paths as a fall back (e.g. for patch files, test cases, ...)
-            common_filepaths = []
-            if self.robot_path:
-                common_filepaths.extend(self.robot_path)
-            common_filepaths.extend(get_paths_for(subdir=EASYCONFIGS_PKG_SUBDIR, robot_path=self.robot_path))
-
-            for path in ebpath + common_filepaths + srcpaths:
-                # create list of candidate filepaths
-                namepath = os.path.join(path, self.name)
-                letterpath = os.path.join(path, letter_dir_for(self.name), self.name)
-
-                # most likely paths
-                candidate_filepaths = [
-                    letterpath,  # easyblocks-style subdir
-                    namepath,  # subdir with software name
-                    path,  # directly in directory
-                ]
-
-                # see if file can be found at that location
-                for cfp in candidate_filepaths:
-
-                    fullpath = os.path.join(cfp, filename)
-
-                    # also check in 'extensions' subdir for extensions
-                    if extension:
-                        fullpaths = [
-                            os.path.join(cfp, "extensions", filename),
-                            os.path.join(cfp, "packages", filename),  # legacy
-                            fullpath
-                        ]
-                    else:
-                        fullpaths = [fullpath]
-
-                    for fp in fullpaths:
-                        if os.path.isfile(fp):
-                            self.log.info("Found file %s at %s" % (filename, fp))
-                            foundfile = os.path.abspath(fp)
-                            break  # no need to try further
-                        else:
-                            failedpaths.append(fp)
-
-                if foundfile:
-                    break  # no need to try other source paths
+            foundfile, failedpaths = self._find_file(filename, extension=extension)
 
             if foundfile:
                 if self.dry_run:
@@ -602,44 +842,12 @@ class EasyBlock(object):
                 return foundfile
             else:
                 # try and download source files from specified source URLs
-                if urls:
-                    source_urls = urls
-                else:
-                    source_urls = []
-                source_urls.extend(self.cfg['source_urls'])
-
-                targetdir = os.path.join(srcpaths[0], self.name.lower()[0], self.name)
+                targetdir = self._det_download_dir(extension=extension)
                 mkdir(targetdir, parents=True)
+                targetpath = os.path.join(targetdir, filename)
+                checksum_types = self._det_checksum_types()
 
-                for url in source_urls:
-
-                    if extension:
-                        targetpath = os.path.join(targetdir, "extensions", filename)
-                    else:
-                        targetpath = os.path.join(targetdir, filename)
-
-                    if isinstance(url, basestring):
-                        if url[-1] in ['=', '/']:
-                            fullurl = "%s%s" % (url, filename)
-                        else:
-                            fullurl = "%s/%s" % (url, filename)
-                    elif isinstance(url, tuple):
-                        # URLs that require a suffix, e.g., SourceForge download links
-                        # e.g. http://sourceforge.net/projects/math-atlas/files/Stable/3.8.4/atlas3.8.4.tar.bz2/download
-                        fullurl = "%s/%s/%s" % (url[0], filename, url[1])
-                    else:
-                        self.log.warning("Source URL %s is of unknown type, so ignoring it." % url)
-                        continue
-
-                    # PyPI URLs may need to be converted due to change in format of these URLs,
-                    # cfr. https://bitbucket.org/pypa/pypi/issues/438
-                    if PYPI_PKG_URL_PATTERN in fullurl and not is_alt_pypi_url(fullurl):
-                        alt_url = derive_alt_pypi_url(fullurl)
-                        if alt_url:
-                            _log.debug("Using alternate PyPI URL for %s: %s", fullurl, alt_url)
-                            fullurl = alt_url
-                        else:
-                            _log.debug("Failed to derive alternate PyPI URL for %s, so retaining the original", fullurl)
+                for fullurl in self._det_download_urls(filename, urls=urls):
 
                     if self.dry_run:
                         self.dry_run_msg("  * %s will be downloaded to %s", filename, targetpath)
@@ -652,11 +860,11 @@ class EasyBlock(object):
                         self.log.debug("Trying to download file %s from %s to %s ..." % (filename, fullurl, targetpath))
                         downloaded = False
                         try:
-                            if download_file(filename, fullurl, targetpath):
+                            if download_file(filename, fullurl, targetpath, checksum_types=checksum_types):
                                 downloaded = True
 
                         except IOError, err:
-                            self.log.debug("Failed to download %s from %s: %s" % (filename, url, err))
+                            self.log.debug("Failed to download %s from %s: %s" % (filename, fullurl, err))
                             failedpaths.append(fullurl)
                             continue
 
@@ -1300,6 +1508,60 @@ class EasyBlock(object):
                 self.log.info("Skipping %s" % name)
         self.exts = res
 
+    def extract_extension_sources(self):
+        """
+        Extract sources of extensions concurrently (cfr. --parallel-extract), before the extensions are installed.
+
+        Each source is extracted to the location that is used by ExtensionEasyBlock.run, which picks up the result.
+        Only sources of extensions installed with a class that unpacks the source are extracted
+        (see ExtensionEasyBlock.UNPACKS_SRC), other extensions are installed straight from the source file.
+        Sources that would end up in the same (or an already existing) directory are left alone,
+        since the resulting base directory depends on the order in which they are extracted.
+        """
+        self.extracted_ext_srcs = {}
+
+        nworkers = build_option('parallel_extract') or 1
+        if nworkers <= 1 or self.dry_run:
+            return
+
+        targetdirs = {}
+        for ext in self.exts:
+            if isinstance(ext.get('src'), basestring) and self.ext_class_unpacks_src(ext):
+                targetdir = os.path.join(self.builddir, remove_unwanted_chars(ext['name']))
+                targetdirs.setdefault(targetdir, []).append(ext['src'])
+
+        extractions = [(srcs[0], targetdir, None) for (targetdir, srcs) in sorted(targetdirs.items())
+                       if len(srcs) == 1 and not os.path.exists(targetdir)]
+        if len(extractions) > 1:
+            self.log.info("Extracting sources for %d extensions using %d processes", len(extractions), nworkers)
+            results = extract_files(extractions, nworkers=nworkers)
+            for (src, targetdir, _), (ext_dir, err) in zip(extractions, results):
+                if err is None:
+                    self.extracted_ext_srcs[(src, targetdir)] = ext_dir
+                else:
+                    # extension will try to extract its source again when it's being installed
+                    self.log.debug("Failed to extract %s up front: %s", src, err)
+
+    def ext_class_unpacks_src(self, ext):
+        """
+        Check whether the class that will be used to install the specified extension unpacks its source,
+        using the same order of preference as extensions_step: extension-specific class, class map, default class.
+        """
+        try:
+            cls = get_easyblock_class(None, name=ext['name'], default_fallback=False, error_on_failed_import=False)
+            if cls is None:
+                if ext['name'] in self.cfg['exts_classmap']:
+                    class_name = self.cfg['exts_classmap'][ext['name']]
+                    cls = get_class_for(get_module_path(class_name), class_name)
+                else:
+                    class_name = self.cfg['exts_defaultclass']
+                    cls = get_class_for(get_module_path(class_name, generic=True), class_name)
+        except (EasyBuildError, ImportError, NameError, TypeError), err:
+            self.log.debug("Failed to determine class for extension %s: %s", ext['name'], err)
+            return False
+
+        return getattr(cls, 'UNPACKS_SRC', False)
+
     #
     # MISCELLANEOUS UTILITY FUNCTIONS
     #
@@ -1482,6 +1744,9 @@ class EasyBlock(object):
             # actual list of sources is printed via _obtain_file_dry_run method
             self.dry_run_msg("\nList of sources:")
 
+        # download missing sources and patches (incl. those for extensions) concurrently, if enabled
+        self.prefetch_files()
+
         # fetch sources
         if self.cfg['sources']:
             self.fetch_sources(self.cfg['sources'], checksums=self.cfg['checksums'])
@@ -1533,22 +1798,65 @@ class EasyBlock(object):
 
     def checksum_step(self):
         """Verify checksum of sources and patches, if a checksum is available."""
-        for fil in self.src + self.patches:
-            if self.dry_run:
-                # dry run mode: only report checksums, don't actually verify them
+        if self.dry_run:
+            # dry run mode: only report checksums, don't actually verify them
+            for fil in self.src + self.patches:
                 filename = os.path.basename(fil['path'])
                 expected_checksum = fil['checksum'] or '(none)'
                 self.dry_run_msg("* expected checksum for %s: %s", filename, expected_checksum)
-            else:
-                if not verify_checksum(fil['path'], fil['checksum']):
-                    raise EasyBuildError("Checksum verification for %s using %s failed.", fil['path'], fil['checksum'])
-                else:
-                    self.log.info("Checksum verification for %s using %s passed." % (fil['path'], fil['checksum']))
+        else:
+            self.verify_file_checksums([(fil['path'], fil['checksum']) for fil in self.src + self.patches])
+
+    def det_source_tree_cache_key(self):
+        """
+        Determine key for cache of extracted and patched source trees (cfr. --cache-source-trees),
+        based on the checksums of the sources and patches, and on how the sources are extracted and patched.
+
+        :return: key (a string), or None if the source tree cache can't be used
+        """
+        if self.dry_run or not self.src or source_tree_cache() is None:
+            return None
+
+        # only source trees obtained via the standard extract/patch procedure can be cached,
+        # since cached source trees are used as a replacement for both steps
+        for step in ['extract_step', 'patch_step']:
+            if getattr(self.__class__, step).im_func is not getattr(EasyBlock, step).im_func:
+                self.log.info("Not using source tree cache, since %s is customised by easyblock", step)
+                return None
+        if self.skip or PATCH_STEP in self.cfg['skipsteps']:
+            self.log.info("Not using source tree cache, since patch step is skipped")
+            return None
+        # resulting source tree (and location of unpacked sources) depends on contents of build directory
+        if os.path.exists(self.builddir) and os.listdir(self.builddir):
+            self.log.info("Not using source tree cache, since build directory %s is not empty", self.builddir)
+            return None
+
+        key = [('unpack_options', self.cfg['unpack_options'])]
+        for src in self.src:
+            checksum = compute_checksum(src['path'], checksum_type=SOURCE_TREE_CACHE_CHECKSUM)
+            key.append(('source', src['name'], checksum, src['cmd']))
+        for patch in self.patches:
+            checksum = compute_checksum(patch['path'], checksum_type=SOURCE_TREE_CACHE_CHECKSUM)
+            patch_details = [patch.get(x) for x in ['level', 'source', 'sourcepath', 'copy']]
+            key.append(tuple(['patch', patch['name'], checksum] + patch_details))
+
+        return repr(key)
 
     def extract_step(self):
         """
         Unpack the source files.
         """
+        # try to obtain extracted and patched sources from cache (cfr. --cache-source-trees)
+        self.src_tree_cache_key = self.det_source_tree_cache_key()
+        self.src_tree_from_cache = False
+        if self.src_tree_cache_key is not None:
+            subdirs = source_tree_cache().load(self.src_tree_cache_key, self.builddir)
+            if subdirs is not None:
+                for src, subdir in zip(self.src, subdirs):
+                    src['finalpath'] = os.path.normpath(os.path.join(self.builddir, subdir))
+                self.src_tree_from_cache = True
+                return
+
         for src in self.src:
             self.log.info("Unpacking source %s" % src['name'])
             srcdir = extract_file(src['path'], self.builddir, cmd=src['cmd'], extra_options=self.cfg['unpack_options'])
@@ -1561,6 +1869,13 @@ class EasyBlock(object):
         """
         Apply the patches
         """
+        if self.src_tree_from_cache and beginpath is None:
+            self.log.info("Not applying patches, since patched source tree was obtained from cache")
+            return
+
+        # beginpath is updated below, so retain whether it was specified
+        orig_beginpath = beginpath
+
         for patch in self.patches:
             self.log.info("Applying patch %s" % patch['name'])
 
@@ -1593,6 +1908,11 @@ class EasyBlock(object):
             if not apply_patch(patch['path'], src, copy=copy_patch, level=level):
                 raise EasyBuildError("Applying patch %s failed", patch['name'])
 
+        # store extracted and patched sources in cache (cfr. --cache-source-trees)
+        if self.src_tree_cache_key is not None and orig_beginpath is None:
+            subdirs = [os.path.relpath(src['finalpath'], self.builddir) for src in self.src]
+            source_tree_cache().store(self.src_tree_cache_key, self.builddir, subdirs)
+
     def prepare_step(self, start_dir=True):
         """
         Pre-configure step. Set's up the builddir just before starting configure
@@ -1687,6 +2007,8 @@ class EasyBlock(object):
         if self.skip:
             self.skip_extensions()
 
+        self.extract_extension_sources()
+
         # actually install extensions
         self.log.debug("Installing extensions")
         exts_defaultclass = self.cfg['exts_defaultclass']
@@ -2461,7 +2783,6 @@ def build_and_install_one(ecdict, init_env):
     silent = build_option('silent')
 
     spec = ecdict['spec']
-    rawtxt = ecdict['ec'].rawtxt
     name = ecdict['ec']['name']
 
     dry_run = build_option('extended_dry_run')
@@ -2485,7 +2806,8 @@ def build_and_install_one(ecdict, init_env):
     # load easyblock
     easyblock = build_option('easyblock')
     if not easyblock:
-        easyblock = fetch_parameters_from_easyconfig(rawtxt, ['easyblock'])[0]
+        # easyblock specification was already determined when easyconfig file was parsed
+        easyblock = ecdict['ec'].easyblock
 
     try:
         app_class = get_easyblock_class(easyblock, name=name)
@@ -2648,12 +2970,11 @@ def get_easyblock_instance(ecdict):
     returns an instance of EasyBlock (or subclass thereof)
     """
     spec = ecdict['spec']
-    rawtxt = ecdict['ec'].rawtxt
     name = ecdict['ec']['name']
 
     # handle easyconfigs with custom easyblocks
-    # determine easyblock specification from easyconfig file, if any
-    easyblock = fetch_parameters_from_easyconfig(rawtxt, ['easyblock'])[0]
+    # easyblock specification from easyconfig file (if any) was already determined when it was parsed
+    easyblock = ecdict['ec'].easyblock
 
     app_class = get_easyblock_class(easyblock, name=name)
     return app_class(ecdict['ec'])
@@ -36,12 +36,18 @@ Easyconfig module that contains the EasyConfig class.
 :author: Alan O'Cais (Juelich Supercomputing Centre)
 """
 
+import collections
 import copy
 import difflib
 import functools
+import glob
+import hashlib
+import multiprocessing
 import os
+import pkgutil
 import re
 import shutil
+import sys
 from vsc.utils import fancylogger
 from vsc.utils.missing import get_class_for, nub
 from vsc.utils.patterns import Singleton
@@ -51,16 +57,18 @@ from easybuild.framework.easyconfig import MANDATORY
 from easybuild.framework.easyconfig.constants import EXTERNAL_MODULE_MARKER
 from easybuild.framework.easyconfig.default import DEFAULT_CONFIG
 from easybuild.framework.easyconfig.format.convert import Dependency
-from easybuild.framework.easyconfig.format.format import DEPENDENCY_PARAMETERS
+from easybuild.framework.easyconfig.format.format import DEPENDENCY_PARAMETERS, read_easyconfig
 from easybuild.framework.easyconfig.format.one import retrieve_blocks_in_spec
+from easybuild.framework.easyconfig.index import easyconfigs_index
 from easybuild.framework.easyconfig.licenses import EASYCONFIG_LICENSES_DICT
 from easybuild.framework.easyconfig.parser import DEPRECATED_PARAMETERS, REPLACED_PARAMETERS
 from easybuild.framework.easyconfig.parser import EasyConfigParser, fetch_parameters_from_easyconfig
-from easybuild.framework.easyconfig.templates import TEMPLATE_CONSTANTS, template_constant_dict
+from easybuild.framework.easyconfig.templates import TEMPLATE_CONSTANTS, TEMPLATE_SOURCE_PARAMS, template_constant_dict
 from easybuild.toolchains.gcccore import GCCcore
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.config import build_option, get_module_naming_scheme
-from easybuild.tools.filetools import copy_file, decode_class_name, encode_class_name, mkdir, read_file, write_file
+from easybuild.tools.filetools import copy_file, decode_class_name, encode_class_name, mkdir, write_file
 from easybuild.tools.module_naming_scheme import DEVEL_MODULE_SUFFIX
 from easybuild.tools.module_naming_scheme.utilities import avail_module_naming_schemes, det_full_ec_version
 from easybuild.tools.module_naming_scheme.utilities import det_hidden_modname, is_valid_module_name
@@ -70,6 +78,7 @@ from easybuild.tools.systemtools import check_os_dependency
 from easybuild.tools.toolchain import DUMMY_TOOLCHAIN_NAME, DUMMY_TOOLCHAIN_VERSION
 from easybuild.tools.toolchain.utilities import get_toolchain, search_toolchain
 from easybuild.tools.utilities import quote_py_str, remove_unwanted_chars
+from easybuild.tools.version import EASYBLOCKS_VERSION, FRAMEWORK_VERSION
 
 _log = fancylogger.getLogger('easyconfig.easyconfig', fname=False)
 
@@ -82,6 +91,12 @@ ITERATE_OPTIONS = ['preconfigopts', 'configopts', 'prebuildopts', 'buildopts', '
 # name of easyconfigs archive subdirectory
 EASYCONFIGS_ARCHIVE_DIR = '__archive__'
 
+# shared (read-only) table of default easyconfig parameters, see extend_params_table
+DEFAULT_PARAMS = dict((key, tuple(spec)) for (key, spec) in DEFAULT_CONFIG.items())
+
+# regex for escaping '%' characters that are not part of a template, see resolve_template
+TEMPLATE_ESCAPE_REGEX = re.compile(r'(%)(?!%*\(\w+\)s)')
+
 
 try:
     import autopep8
@@ -93,6 +108,20 @@ except ImportError as err:
 
 _easyconfig_files_cache = {}
 _easyconfigs_cache = {}
+# shared tables of easyconfig parameters, see extend_params_table
+_easyconfig_params_tables = {}
+# registry of available easyblock modules, see avail_easyblock_modules
+_easyblock_modules = {}
+# toolchains for which an easyconfig file is available for a particular dependency,
+# see robot_find_minimal_toolchains_of_dependencies
+_minimal_toolchains_cache = {}
+# fingerprints of available easyblocks, indexed by locations of easyblocks package, see det_easyblocks_fingerprint
+_easyblocks_fingerprints = {}
+
+# build options that affect the result of processing an easyconfig file,
+# and hence must be taken into account for the persistent cache of processed easyconfigs
+PERSISTENT_CACHE_BUILD_OPTIONS = ['check_osdeps', 'external_modules_metadata', 'filter_deps', 'hide_deps',
+                                  'robot_path', 'valid_module_classes', 'valid_stops', 'validate']
 
 
 def handle_deprecated_or_replaced_easyconfig_parameters(ec_method):
@@ -135,6 +164,78 @@ def toolchain_hierarchy_cache(func):
     return cache_aware_func
 
 
+def det_toolchain_hierarchy_key(toolchain):
+    """
+    Determine key for entry in persistent table of toolchain hierarchies for specified toolchain.
+
+    The key covers the toolchain name and version, the EasyBuild version and relevant build options.
+    The easyconfig files that were used to determine a toolchain hierarchy are not part of the key,
+    their modification time is checked when an entry is loaded instead (see get_toolchain_hierarchy).
+    """
+    key = [
+        toolchain['name'],
+        toolchain['version'],
+        str(FRAMEWORK_VERSION),
+        ('add_dummy_to_minimal_toolchains', build_option('add_dummy_to_minimal_toolchains')),
+        ('consider_archived_easyconfigs', build_option('consider_archived_easyconfigs')),
+    ]
+    key.extend(det_persistent_cache_build_options())
+
+    return repr(key)
+
+
+def det_persistent_cache_build_options():
+    """Return list of (name, value) tuples for build options that must be taken into account for persistent caches."""
+    res = []
+    for opt in PERSISTENT_CACHE_BUILD_OPTIONS:
+        value = build_option(opt)
+        if opt == 'external_modules_metadata' and value:
+            # use checksum for (all) metadata for external modules, as parsed from the specified files
+            value = hashlib.md5(repr(make_hashable(value))).hexdigest()
+        res.append((opt, value))
+    return res
+
+
+def det_easyblocks_fingerprint():
+    """
+    Determine fingerprint of available easyblocks, incl. easyblocks included via --include-easyblocks,
+    based on the location, size and modification time of the easyblock modules.
+    """
+    try:
+        import easybuild.easyblocks
+        paths = tuple(easybuild.easyblocks.__path__)
+    except ImportError:
+        paths = ()
+
+    if paths not in _easyblocks_fingerprints:
+        res = []
+        for path in paths:
+            for (dirpath, _, filenames) in os.walk(path):
+                # __init__.py files are ignored, since they are (re)generated for included easyblocks
+                for filename in sorted(f for f in filenames if f.endswith('.py') and f != '__init__.py'):
+                    # included easyblocks are symlinks (in a temporary directory) to the actual easyblock modules
+                    easyblock_path = os.path.realpath(os.path.join(dirpath, filename))
+                    try:
+                        st = os.stat(easyblock_path)
+                        res.append((easyblock_path, st.st_size, st.st_mtime))
+                    except OSError:
+                        res.append((easyblock_path, None, None))
+        _easyblocks_fingerprints[paths] = hashlib.md5(repr(sorted(res))).hexdigest()
+
+    return _easyblocks_fingerprints[paths]
+
+
+def _det_mtimes(paths):
+    """Determine modification time for each of the specified paths (None for paths that do not exist)."""
+    res = []
+    for path in paths:
+        try:
+            res.append((path, os.stat(path).st_mtime))
+        except OSError:
+            res.append((path, None))
+    return res
+
+
 @toolchain_hierarchy_cache
 def get_toolchain_hierarchy(parent_toolchain):
     """
@@ -144,8 +245,43 @@ def get_toolchain_hierarchy(parent_toolchain):
     The dummy toolchain is considered the most minimal subtoolchain only if the add_dummy_to_minimal_toolchains
     build option is enabled.
 
+    If a location for persistent caches is configured, toolchain hierarchies are also retained across sessions,
+    as long as the easyconfig files used to determine them are not changed (see also update_toolchain_hierarchies).
+
     :param parent_toolchain: dictionary with name/version of parent toolchain
     """
+    table = persistent_cache('toolchain_hierarchies')
+    if table is not None:
+        entry = table.load(det_toolchain_hierarchy_key(parent_toolchain))
+        if entry is not None:
+            toolchain_hierarchy, ec_files_mtimes = entry
+            if _det_mtimes([path for (path, _) in ec_files_mtimes]) == ec_files_mtimes:
+                # the parent toolchain is at the top of the hierarchy
+                toolchain_hierarchy[-1] = parent_toolchain
+                _log.debug("Found hierarchy for toolchain %s in persistent table: %s",
+                           parent_toolchain, toolchain_hierarchy)
+                return toolchain_hierarchy
+            else:
+                _log.debug("Ignoring outdated hierarchy for toolchain %s in persistent table", parent_toolchain)
+
+    return _store_toolchain_hierarchy(parent_toolchain, table)
+
+
+def _store_toolchain_hierarchy(toolchain, table):
+    """
+    Determine hierarchy for specified toolchain, and store it in specified persistent table (if not None).
+    """
+    toolchain_hierarchy, ec_files = _det_toolchain_hierarchy(toolchain)
+    if table is not None:
+        table.store(det_toolchain_hierarchy_key(toolchain), (toolchain_hierarchy, _det_mtimes(ec_files)))
+    return toolchain_hierarchy
+
+
+def _det_toolchain_hierarchy(parent_toolchain):
+    """
+    Determine list of subtoolchains for specified parent toolchain (see get_toolchain_hierarchy),
+    and list of easyconfig files that were used to determine it.
+    """
     # obtain list of all possible subtoolchains
     _, all_tc_classes = search_toolchain('')
     subtoolchains = dict((tc_class.NAME, getattr(tc_class, 'SUBTOOLCHAIN', None)) for tc_class in all_tc_classes)
@@ -155,6 +291,7 @@ def get_toolchain_hierarchy(parent_toolchain):
 
     # the parent toolchain is at the top of the hierarchy
     toolchain_hierarchy = [parent_toolchain]
+    ec_files = []
 
     while subtoolchain_name:
         # grab the easyconfig of the current toolchain and search the dependencies for a version of the subtoolchain
@@ -165,6 +302,7 @@ def get_toolchain_hierarchy(parent_toolchain):
 
         # parse the easyconfig
         parsed_ec = process_easyconfig(path, validate=False)[0]
+        ec_files.append(path)
 
         # search for version of the subtoolchain in dependencies
         # considers deps + toolchains of deps + deps of deps + toolchains of deps of deps
@@ -187,6 +325,7 @@ def get_toolchain_hierarchy(parent_toolchain):
                 raise EasyBuildError("Could not find easyconfig for dependency %s with version %s",
                                      dep['name'], det_full_ec_version(dep))
             easyconfig = process_easyconfig(ecfile, validate=False)[0]['ec']
+            ec_files.append(ecfile)
 
             # include deps and toolchains of deps of this dep, but skip dependencies marked as external modules
             for depdep in easyconfig.dependencies():
@@ -236,7 +375,50 @@ def get_toolchain_hierarchy(parent_toolchain):
         toolchain_hierarchy.insert(0, {'name': current_tc_name, 'version': current_tc_version})
 
     _log.info("Found toolchain hierarchy for toolchain %s: %s", parent_toolchain, toolchain_hierarchy)
-    return toolchain_hierarchy
+    return toolchain_hierarchy, nub(ec_files)
+
+
+def update_toolchain_hierarchies():
+    """
+    (Re)build persistent table of toolchain hierarchies, for all toolchains in the robot search path.
+
+    :return: number of toolchains for which the hierarchy was (re)determined
+    """
+    table = persistent_cache('toolchain_hierarchies')
+    if table is None:
+        raise EasyBuildError("A location for persistent caches must be specified (--cachepath) "
+                             "to build the table of toolchain hierarchies")
+
+    paths = build_option('robot_path') or []
+    if not isinstance(paths, (list, tuple)):
+        paths = [paths]
+
+    _, all_tc_classes = search_toolchain('')
+    tc_names = sorted(set(tc_class.NAME for tc_class in all_tc_classes) - set([DUMMY_TOOLCHAIN_NAME]))
+
+    # determine toolchain versions for which an easyconfig file is available, based on filenames
+    toolchains = []
+    for tc_name in tc_names:
+        versions = set()
+        prefix = '%s-' % tc_name
+        for path in paths:
+            for cand_path in create_paths(path, tc_name, '*'):
+                for ec_file in glob.glob(cand_path):
+                    filename = os.path.basename(ec_file)
+                    if filename.startswith(prefix):
+                        versions.add(filename[len(prefix):-len('.eb')])
+        toolchains.extend({'name': tc_name, 'version': version} for version in sorted(versions))
+
+    get_toolchain_hierarchy.clear()
+    cnt = 0
+    for toolchain in toolchains:
+        try:
+            _store_toolchain_hierarchy(toolchain, table)
+            cnt += 1
+        except EasyBuildError as err:
+            _log.info("Failed to determine hierarchy for toolchain %s, skipping it: %s", toolchain, err)
+
+    return cnt
 
 
 class EasyConfig(object):
@@ -248,7 +430,7 @@ class EasyConfig(object):
                  auto_convert_value_types=True):
         """
         initialize an easyconfig.
-        :param path: path to easyconfig file to be parsed (ignored if rawtxt is specified)
+        :param path: path to easyconfig file to be parsed (not read again if rawtxt is specified)
         :param extra_options: dictionary with extra variables that can be set for this specific instance
         :param build_specs: dictionary of build specifications (see EasyConfig class, default: {})
         :param validate: indicates whether validation should be performed (note: combined with 'validate' build option)
@@ -257,32 +439,46 @@ class EasyConfig(object):
         :param auto_convert_value_types: indicates wether types of easyconfig values should be automatically converted
                                          in case they are wrong
         """
+        # cache for resolved templated values of easyconfig parameters, see _resolve_template
+        self._resolved_values = {}
         self.template_values = None
+        # indicates whether template values must be regenerated, because easyconfig parameters they depend on changed
+        self._stale_template_values = False
         self.enable_templating = True  # a boolean to control templating
+        # indicates whether deprecated access via _config was already reported (only done once per instance)
+        self._legacy_config_reported = False
 
-        self.log = fancylogger.getLogger(self.__class__.__name__, fname=False)
+        # checksum for raw contents of easyconfig file, see fingerprint property
+        self._rawtxt_checksum = None
 
-        if path is not None and not os.path.isfile(path):
-            raise EasyBuildError("EasyConfig __init__ expected a valid path")
+        self.log = fancylogger.getLogger(self.__class__.__name__, fname=False)
 
         # read easyconfig file contents (or use provided rawtxt), so it can be passed down to avoid multiple re-reads
-        self.path = None
+        self.path = path
         if rawtxt is None:
-            self.path = path
-            self.rawtxt = read_file(path)
+            if path is None or not os.path.isfile(path):
+                raise EasyBuildError("EasyConfig __init__ expected a valid path")
+            self.rawtxt = read_easyconfig(path)
             self.log.debug("Raw contents from supplied easyconfig file %s: %s" % (path, self.rawtxt))
         else:
             self.rawtxt = rawtxt
-            self.log.debug("Supplied raw easyconfig contents: %s" % self.rawtxt)
+            self.log.debug("Supplied raw easyconfig contents (for %s): %s" % (path, self.rawtxt))
 
-        self.modules_tool = modules_tool()
+        self._modules_tool = modules_tool()
 
         # use legacy module classes as default
         self.valid_module_classes = build_option('valid_module_classes')
         if self.valid_module_classes is not None:
             self.log.info("Obtained list of valid module classes: %s" % self.valid_module_classes)
 
-        self._config = copy.deepcopy(DEFAULT_CONFIG)
+        # known easyconfig parameters: shared (read-only) table with default value, help text & category per parameter
+        # values for parameters that were set (or may be modified in place) are kept track of in self._values
+        self._params = DEFAULT_PARAMS
+        # extra easyconfig parameters the table of known parameters is composed of (see extend_params)
+        self._params_extras = []
+        self._values = {}
+        # names of easyconfig parameters for which the value may be shared with a copy (see copy method)
+        self._cow_keys = None
 
         # obtain name and easyblock specifications from raw easyconfig contents
         self.software_name, self.easyblock = fetch_parameters_from_easyconfig(self.rawtxt, ['name', 'easyblock'])
@@ -300,8 +496,7 @@ class EasyConfig(object):
 
         self.mandatory = MANDATORY_PARAMS[:]
 
-        # deep copy to make sure self.extra_options remains unchanged
-        self.extend_params(copy.deepcopy(self.extra_options))
+        self.extend_params(self.extra_options)
 
         # set valid stops
         self.valid_stops = build_option('valid_stops')
@@ -351,15 +546,24 @@ class EasyConfig(object):
 
         self.log.debug("Extending list of known easyconfig parameters with: %s", ' '.join(extra.keys()))
 
-        if overwrite:
-            self._config.update(extra)
-        else:
+        if not overwrite:
+            new_extra = {}
             for key in extra:
-                if key not in self._config:
-                    self._config[key] = extra[key]
+                if key not in self._params:
+                    new_extra[key] = extra[key]
                     self.log.debug("Added new easyconfig parameter: %s", key)
                 else:
                     self.log.debug("Easyconfig parameter %s already known, not overwriting", key)
+            extra = new_extra
+
+        if extra:
+            self._params = extend_params_table(self._params, extra)
+            self._params_extras.append(extra)
+
+        # (re)defined easyconfig parameters start off with their default value
+        for key in extra:
+            self._values.pop(key, None)
+            self._resolved_values.pop(key, None)
 
         # extend mandatory keys
         for key, value in extra.items():
@@ -370,17 +574,114 @@ class EasyConfig(object):
     def copy(self):
         """
         Return a copy of this EasyConfig instance.
+
+        The easyconfig file is not parsed again: the copy shares the (already parsed) easyconfig parameters with
+        this instance, and a parameter value is only copied when it is about to be modified in either instance
+        (copy-on-write, see _own_value).
         """
-        # create a new EasyConfig instance
-        ec = EasyConfig(self.path, validate=self.validation, hidden=self.hidden, rawtxt=self.rawtxt)
-        # take a copy of the actual config dictionary (which already contains the extra options)
-        ec._config = copy.deepcopy(self._config)
-        # since rawtxt is defined, self.path may not get inherited, make sure it does
-        if self.path:
-            ec.path = self.path
+        # shallow copy of instance attributes, via __getstate__ (so toolchain & modules tool are recreated on demand)
+        ec = self.__class__.__new__(self.__class__)
+        ec.__dict__.update(self.__getstate__())
+        ec._params = self._params
+        ec._params_extras = self._params_extras[:]
+
+        # dictionaries with parameter values are distinct, but (for now) both refer to the same values
+        ec._values = self._values.copy()
+        self._cow_keys = set(self._values)
+        ec._cow_keys = set(self._values)
+
+        ec.mandatory = self.mandatory[:]
+        ec.enable_templating = True
+        # template values are derived from the (shared) parameter values, so they don't need to be regenerated
+        if self.template_values is None:
+            ec.template_values = None
+        else:
+            ec.template_values = TemplateValues(self.template_values)
+        ec._all_dependencies = None
 
         return ec
 
+    def _own_value(self, key):
+        """
+        Return value for specified easyconfig parameter that is owned by this EasyConfig instance, so it can be
+        modified in place: default values are shared by all instances, and values may be shared with a copy of this
+        instance (or the instance it was copied from).
+        """
+        if key not in self._values:
+            self._values[key] = copy.deepcopy(self._params[key][0])
+        elif self._cow_keys and key in self._cow_keys:
+            self._cow_keys.remove(key)
+            self._values[key] = copy.deepcopy(self._values[key])
+
+        return self._values[key]
+
+    @property
+    def template_values(self):
+        """Dictionary with template values (None if not generated yet)."""
+        return self._template_values
+
+    @template_values.setter
+    def template_values(self, template_values):
+        """Set template values, which invalidates all cached resolved values for easyconfig parameters."""
+        if template_values is not None and not isinstance(template_values, TemplateValues):
+            template_values = TemplateValues(template_values)
+        self._template_values = template_values
+        self._resolved_values = {}
+
+    @property
+    def _config(self):
+        """
+        Dictionary-like view on the easyconfig parameters, with a [value, help text, category] entry per parameter,
+        for backward compatibility (e.g. with easyblocks that access EasyConfig._config directly).
+        """
+        self._report_legacy_config()
+        return LegacyEasyConfigParams(self)
+
+    @_config.setter
+    def _config(self, config):
+        """Set easyconfig parameters via a dictionary with a [value, help text, category] entry per parameter."""
+        self._report_legacy_config()
+        if not (isinstance(config, LegacyEasyConfigParams) and config.ec is self):
+            params = LegacyEasyConfigParams(self)
+            for key, entry in config.items():
+                params[key] = entry
+
+    def _report_legacy_config(self):
+        """Report deprecated use of _config, only for the first access (which may be done in a loop)."""
+        if not self._legacy_config_reported:
+            self.log.deprecated("Use of EasyConfig._config, use ec[key] (or ec.asdict()) instead", '4.0')
+            self._legacy_config_reported = True
+
+    def _resolve_template(self, key, value):
+        """
+        Resolve templates in specified value of easyconfig parameter, using cache of resolved values.
+
+        Cached resolved values are only used as long as the template values did not change; a cached entry is
+        discarded when the easyconfig parameter is set or when its raw value is handed out (see __getitem__).
+        """
+        if self._template_values is None or len(self._template_values) == 0 or self._stale_template_values:
+            self.generate_template_values()
+
+        generation = self._template_values.generation
+        cached = self._resolved_values.get(key)
+        if cached is None or cached[0] != generation:
+            cached = (generation, resolve_template(value, self._template_values))
+            self._resolved_values[key] = cached
+
+        # (nested) lists & dicts are copied, since the returned value may get modified by the caller
+        value = cached[1]
+        if not is_immutable(value):
+            value = copy_containers(value)
+
+        return value
+
+    def freeze(self):
+        """
+        Return a read-only view on this EasyConfig instance, in which all templated values are resolved upfront.
+        Useful to avoid overhead when easyconfig parameter values are accessed over and over again (e.g. in a loop).
+        """
+        return FrozenEasyConfig(self)
+
     def update(self, key, value):
         """
         Update a string configuration value with a value (i.e. append to it).
@@ -420,7 +721,7 @@ class EasyConfig(object):
             raise EasyBuildError("mandatory parameters not provided in %s: %s", self.path, missing_mandatory_keys)
 
         # provide suggestions for typos
-        possible_typos = [(key, difflib.get_close_matches(key.lower(), self._config.keys(), 1, 0.85))
+        possible_typos = [(key, difflib.get_close_matches(key.lower(), self._params.keys(), 1, 0.85))
                           for key in local_vars if key not in self]
 
         typos = [(key, guesses[0]) for (key, guesses) in possible_typos if len(guesses) == 1]
@@ -432,7 +733,7 @@ class EasyConfig(object):
         for key in ['toolchain'] + local_vars.keys():
             # validations are skipped, just set in the config
             # do not store variables we don't need
-            if key in self._config.keys():
+            if key in self._params:
                 if key in ['dependencies']:
                     self[key] = [self._parse_dependency(dep) for dep in local_vars[key]]
                 elif key in ['builddependencies']:
@@ -454,8 +755,11 @@ class EasyConfig(object):
         # finalize dependencies w.r.t. minimal toolchains & module names
         self._finalize_dependencies()
 
+        # parsed dependencies were updated in place, so discard resolved values that may have been cached
+        self._resolved_values = {}
+
         # indicate that this is a parsed easyconfig
-        self._config['parsed'] = [True, "This is a parsed easyconfig", "HIDDEN"]
+        self.extend_params({'parsed': [True, "This is a parsed easyconfig", "HIDDEN"]})
 
     def validate(self, check_osdeps=True):
         """
@@ -475,9 +779,10 @@ class EasyConfig(object):
             self.log.info("Not checking OS dependencies")
 
         self.log.info("Checking skipsteps")
-        if not isinstance(self._config['skipsteps'][0], (list, tuple,)):
+        skipsteps = self._values.get('skipsteps', self._params['skipsteps'][0])
+        if not isinstance(skipsteps, (list, tuple,)):
             raise EasyBuildError('Invalid type for skipsteps. Allowed are list or tuple, got %s (%s)',
-                                 type(self._config['skipsteps'][0]), self._config['skipsteps'][0])
+                                 type(skipsteps), skipsteps)
 
         self.log.info("Checking build option lists")
         self.validate_iterate_opts_lists()
@@ -666,6 +971,19 @@ class EasyConfig(object):
             self.log.debug("Initialized toolchain: %s (opts: %s)" % (tc_dict, self['toolchainopts']))
         return self._toolchain
 
+    @property
+    def fingerprint(self):
+        """
+        Fingerprint for this EasyConfig instance, used to determine equality & hash value.
+
+        Consists of path, checksum of raw contents, build specifications & whether module should be hidden.
+        """
+        # only recompute checksum for raw contents if they changed
+        if self._rawtxt_checksum is None or self._rawtxt_checksum[0] is not self.rawtxt:
+            self._rawtxt_checksum = (self.rawtxt, hashlib.md5(self.rawtxt).hexdigest())
+
+        return (self.path, self._rawtxt_checksum[1], make_hashable(self.build_specs), self.hidden)
+
     @property
     def all_dependencies(self):
         """Return list of all dependencies, incl. hidden/build deps & toolchain, but excluding filtered deps."""
@@ -873,59 +1191,90 @@ class EasyConfig(object):
 
         filter_deps = build_option('filter_deps')
 
-        for key in DEPENDENCY_PARAMETERS:
-            # loop over a *copy* of dependency dicts (with resolved templates);
-            # to update the original dep dict, we need to index with idx into self._config[key][0]...
-            for idx, dep in enumerate(self[key]):
+        # loop over a *copy* of dep dicts (with resolved templates);
+        # to update the original dep dict, we need to index with idx into the raw value...
+        deps = [(key, idx, dep) for key in DEPENDENCY_PARAMETERS for (idx, dep) in enumerate(self[key])]
 
-                # reference to original dep dict, this is the one we should be updating
-                orig_dep = self._config[key][0][idx]
+        # handle dependencies with inherited (non-dummy) toolchain
+        # this *must* be done after parsing all dependencies, to avoid problems with templates like %(pyver)s
+        inherited_tc_deps = [dep for (_, _, dep) in deps if not (filter_deps and dep['name'] in filter_deps) and
+                             dep['toolchain_inherited'] and dep['toolchain']['name'] != DUMMY_TOOLCHAIN_NAME]
+        subtoolchains = self._det_subtoolchains_of_dependencies(inherited_tc_deps)
 
-                if filter_deps and orig_dep['name'] in filter_deps:
-                    self.log.debug("Skipping filtered dependency %s when finalising dependencies", orig_dep['name'])
-                    continue
+        for key, idx, dep in deps:
 
-                # handle dependencies with inherited (non-dummy) toolchain
-                # this *must* be done after parsing all dependencies, to avoid problems with templates like %(pyver)s
-                if dep['toolchain_inherited'] and dep['toolchain']['name'] != DUMMY_TOOLCHAIN_NAME:
-                    tc = None
-                    dep_str = '%s %s%s' % (dep['name'], dep['version'], dep['versionsuffix'])
-                    self.log.debug("Figuring out toolchain to use for dep %s...", dep)
-                    if build_option('minimal_toolchains'):
-                        # determine 'smallest' subtoolchain for which a matching easyconfig file is available
-                        self.log.debug("Looking for minimal toolchain for dependency %s (parent toolchain: %s)...",
-                                       dep_str, dep['toolchain'])
-                        tc = robot_find_minimal_toolchain_of_dependency(dep, self.modules_tool)
-                        if tc is None:
-                            raise EasyBuildError("Failed to determine minimal toolchain for dep %s", dep_str)
-                    else:
-                        # try finding subtoolchain for dep for which an easyconfig file is available
-                        # this may fail, since it requires that the easyconfigs for parent toolchain
-                        # and subtoolchains are available
-                        try:
-                            tc = robot_find_minimal_toolchain_of_dependency(dep, self.modules_tool, parent_first=True)
-                            self.log.debug("Using subtoolchain %s for dep %s", tc, dep_str)
-                        except EasyBuildError as err:
-                            self.log.debug("Ignoring error while looking for subtoolchain for dep %s: %s", dep_str, err)
-
-                    if tc is None:
-                        tc = dep['toolchain']
-                        self.log.debug("Inheriting toolchain %s from parent for dep %s", tc, dep_str)
-
-                    # put derived toolchain in place, or complain if none could be found
-                    self.log.debug("Figured out toolchain to use for dep %s: %s", dep_str, tc)
-                    dep['toolchain'] = orig_dep['toolchain'] = tc
-
-                if not dep['external_module']:
-                    # make sure 'dummy' is set correctly
-                    orig_dep['dummy'] = dep['toolchain']['name'] == DUMMY_TOOLCHAIN_NAME
-
-                    # set module names
-                    orig_dep['short_mod_name'] = ActiveMNS().det_short_module_name(dep)
-                    orig_dep['full_mod_name'] = ActiveMNS().det_full_module_name(dep)
+            # reference to original dep dict, this is the one we should be updating
+            orig_dep = self._own_value(key)[idx]
+
+            if filter_deps and orig_dep['name'] in filter_deps:
+                self.log.debug("Skipping filtered dependency %s when finalising dependencies", orig_dep['name'])
+                continue
+
+            if id(dep) in subtoolchains:
+                tc = subtoolchains[id(dep)]
+                dep_str = '%s %s%s' % (dep['name'], dep['version'], dep['versionsuffix'])
+                if tc is None:
+                    tc = dep['toolchain']
+                    self.log.debug("Inheriting toolchain %s from parent for dep %s", tc, dep_str)
+
+                # put derived toolchain in place
+                self.log.debug("Figured out toolchain to use for dep %s: %s", dep_str, tc)
+                dep['toolchain'] = orig_dep['toolchain'] = tc
+
+            if not dep['external_module']:
+                # make sure 'dummy' is set correctly
+                orig_dep['dummy'] = dep['toolchain']['name'] == DUMMY_TOOLCHAIN_NAME
+
+                # set module names
+                orig_dep['short_mod_name'] = ActiveMNS().det_short_module_name(dep)
+                orig_dep['full_mod_name'] = ActiveMNS().det_full_module_name(dep)
+
+    def _det_subtoolchains_of_dependencies(self, deps):
+        """
+        Determine subtoolchains to use for specified dependencies (with inherited toolchain), all at once.
+
+        :param deps: list of dependency dicts
+        :return: dict with subtoolchain to use for each dependency (None means inheriting the toolchain), by id of dep
+        """
+        if not deps:
+            return {}
+
+        dep_strs = ['%s %s%s' % (dep['name'], dep['version'], dep['versionsuffix']) for dep in deps]
+        self.log.debug("Figuring out toolchain to use for deps %s...", dep_strs)
+
+        if build_option('minimal_toolchains'):
+            # determine 'smallest' subtoolchain for which a matching easyconfig file is available
+            self.log.debug("Looking for minimal toolchains for dependencies %s (parent toolchain: %s)...",
+                           dep_strs, self['toolchain'])
+            tcs = robot_find_minimal_toolchains_of_dependencies(deps, self.modules_tool)
+            for dep_str, tc in zip(dep_strs, tcs):
+                if tc is None:
+                    raise EasyBuildError("Failed to determine minimal toolchain for dep %s", dep_str)
+        else:
+            # try finding subtoolchain for deps for which an easyconfig file is available
+            # this may fail, since it requires that the easyconfigs for parent toolchain
+            # and subtoolchains are available
+            try:
+                tcs = robot_find_minimal_toolchains_of_dependencies(deps, self.modules_tool, parent_first=True)
+                self.log.debug("Using subtoolchains %s for deps %s", tcs, dep_strs)
+            except EasyBuildError as err:
+                # the error may be specific to a particular dependency rather than to the (shared) toolchain hierarchy,
+                # so fall back to looking for a subtoolchain one dependency at a time
+                self.log.debug("Error while looking for subtoolchains for deps %s, retrying per dep: %s", dep_strs, err)
+                tcs = []
+                for dep, dep_str in zip(deps, dep_strs):
+                    try:
+                        tc = robot_find_minimal_toolchain_of_dependency(dep, self.modules_tool, parent_first=True)
+                    except EasyBuildError as err:
+                        self.log.debug("Ignoring error while looking for subtoolchain for dep %s: %s", dep_str, err)
+                        tc = None
+                    tcs.append(tc)
+
+        return dict((id(dep), tc) for dep, tc in zip(deps, tcs))
 
     def generate_template_values(self):
         """Try to generate all template values."""
+        self._stale_template_values = False
 
         self._generate_template_values(skip_lower=True)
         self._generate_template_values(skip_lower=False)
@@ -956,11 +1305,10 @@ class EasyConfig(object):
         # (eg the run_setp code in EasyBlock)
 
         # step 1-3 work with easyconfig.templates constants
-        # disable templating with creating dict with template values to avoid looping back to here via __getitem__
-        prev_enable_templating = self.enable_templating
-        self.enable_templating = False
-        template_values = template_constant_dict(self, ignore=ignore, skip_lower=skip_lower)
-        self.enable_templating = prev_enable_templating
+        # use raw (non-templated) values, which are only read, so they don't need to be copied (see _own_value)
+        config = dict((key, self._values.get(key, self._params[key][0]))
+                      for key in TEMPLATE_SOURCE_PARAMS if key in self._params)
+        template_values = template_constant_dict(config, ignore=ignore, skip_lower=skip_lower)
 
         # update the template_values dict
         self.template_values.update(template_values)
@@ -973,29 +1321,44 @@ class EasyConfig(object):
     @handle_deprecated_or_replaced_easyconfig_parameters
     def __contains__(self, key):
         """Check whether easyconfig parameter is defined"""
-        return key in self._config
+        return key in self._params
 
     @handle_deprecated_or_replaced_easyconfig_parameters
     def __getitem__(self, key):
         """Return value of specified easyconfig parameter (without help text, etc.)"""
         value = None
-        if key in self._config:
-            value = self._config[key][0]
+        if key in self._values:
+            value = self._values[key]
+        elif key in self._params:
+            value = self._params[key][0]
         else:
             raise EasyBuildError("Use of unknown easyconfig parameter '%s' when getting parameter value", key)
 
+        # a reference to the raw value is returned when templating is disabled (or when the value is not something
+        # resolve_template creates a new instance of), which may get modified in place
+        templated_copy = self.enable_templating and isinstance(value, (list, tuple, dict))
+        if not (templated_copy or is_immutable(value)):
+            self._resolved_values.pop(key, None)
+            value = self._own_value(key)
+            if key in TEMPLATE_SOURCE_PARAMS:
+                self._stale_template_values = True
+
         if self.enable_templating:
-            if self.template_values is None or len(self.template_values) == 0:
-                self.generate_template_values()
-            value = resolve_template(value, self.template_values)
+            value = self._resolve_template(key, value)
 
         return value
 
     @handle_deprecated_or_replaced_easyconfig_parameters
     def __setitem__(self, key, value):
         """Set value of specified easyconfig parameter (help text & co is left untouched)"""
-        if key in self._config:
-            self._config[key][0] = value
+        if key in self._params:
+            self._resolved_values.pop(key, None)
+            if self._cow_keys:
+                self._cow_keys.discard(key)
+            self._values[key] = value
+            # template values are regenerated lazily, when a templated value is resolved (see _resolve_template)
+            if key in TEMPLATE_SOURCE_PARAMS:
+                self._stale_template_values = True
         else:
             raise EasyBuildError("Use of unknown easyconfig parameter '%s' when setting parameter value to '%s'",
                                  key, value)
@@ -1010,48 +1373,274 @@ class EasyConfig(object):
         else:
             return default
 
+    @property
+    def modules_tool(self):
+        """
+        Returns the modules tool instance for this easyconfig (which is created on demand, e.g. after unpickling).
+        """
+        if self._modules_tool is None:
+            self._modules_tool = modules_tool()
+        return self._modules_tool
+
+    @modules_tool.setter
+    def modules_tool(self, modtool):
+        """Set modules tool instance to use for this easyconfig."""
+        self._modules_tool = modtool
+
+    def __getstate__(self):
+        """Return state of this EasyConfig instance for pickling (e.g. to pass it between processes)."""
+        state = self.__dict__.copy()
+        # toolchain instance is not picklable, but it can be recreated on demand (see toolchain property)
+        state['_toolchain'] = None
+        # modules tool instance may be outdated when it is unpickled, so recreate it on demand (see modules_tool)
+        state['_modules_tool'] = None
+        # (shared) table of known easyconfig parameters is recomposed when unpickling (see __setstate__)
+        del state['_params']
+        return state
+
+    def __setstate__(self, state):
+        """Restore state of this EasyConfig instance when unpickling."""
+        self.__dict__.update(state)
+        self._params = DEFAULT_PARAMS
+        for extra in state['_params_extras']:
+            self._params = extend_params_table(self._params, extra)
+
     # *both* __eq__ and __ne__ must be implemented for == and != comparisons to work correctly
     # see also https://docs.python.org/2/reference/datamodel.html#object.__eq__
     def __eq__(self, ec):
         """Is this EasyConfig instance equivalent to the provided one?"""
-        return self.asdict() == ec.asdict()
+        return self.fingerprint == ec.fingerprint
 
     def __ne__(self, ec):
         """Is this EasyConfig instance equivalent to the provided one?"""
-        return self.asdict() != ec.asdict()
+        return self.fingerprint != ec.fingerprint
 
     def __hash__(self):
         """Return hash value for a hashable representation of this EasyConfig instance."""
-        def make_hashable(val):
-            """Make a hashable value of the given value."""
-            if isinstance(val, list):
-                val = tuple([make_hashable(x) for x in val])
-            elif isinstance(val, dict):
-                val = tuple([(key, make_hashable(val)) for (key, val) in sorted(val.items())])
-            return val
-
-        lst = []
-        for (key, val) in sorted(self.asdict().items()):
-            lst.append((key, make_hashable(val)))
-
-        # a list is not hashable, but a tuple is
-        return hash(tuple(lst))
+        return hash(self.fingerprint)
 
     def asdict(self):
         """
         Return dict representation of this EasyConfig instance.
         """
         res = {}
-        for key, tup in self._config.items():
-            value = tup[0]
+        for key in self._params:
             if self.enable_templating:
-                if not self.template_values:
-                    self.generate_template_values()
-                value = resolve_template(value, self.template_values)
+                value = self._resolve_template(key, self._values.get(key, self._params[key][0]))
+            else:
+                self._resolved_values.pop(key, None)
+                value = self._own_value(key)
             res[key] = value
         return res
 
 
+class FrozenEasyConfig(object):
+    """
+    Read-only view on an EasyConfig instance, with all templated values resolved upfront (see EasyConfig.freeze).
+    Values are not copied when they are accessed, so they must not be modified in place.
+    """
+
+    def __init__(self, ec):
+        """Create read-only view on specified EasyConfig instance."""
+        self.ec = ec
+        self._values = ec.asdict()
+
+    @handle_deprecated_or_replaced_easyconfig_parameters
+    def __contains__(self, key):
+        """Check whether easyconfig parameter is defined"""
+        return key in self._values
+
+    @handle_deprecated_or_replaced_easyconfig_parameters
+    def __getitem__(self, key):
+        """Return (resolved) value of specified easyconfig parameter"""
+        if key in self._values:
+            return self._values[key]
+        else:
+            raise EasyBuildError("Use of unknown easyconfig parameter '%s' when getting parameter value", key)
+
+    def __setitem__(self, key, value):
+        """Setting easyconfig parameters is not allowed in a read-only view."""
+        raise EasyBuildError("Can't set easyconfig parameter '%s' to '%s' in read-only view on easyconfig",
+                             key, value)
+
+    @handle_deprecated_or_replaced_easyconfig_parameters
+    def get(self, key, default=None):
+        """
+        Gets the value of a key in the config, with 'default' as fallback.
+        """
+        return self._values.get(key, default)
+
+    def asdict(self):
+        """
+        Return dict representation of this read-only view.
+        """
+        return copy_containers(self._values)
+
+
+class LegacyEasyConfigParam(list):
+    """
+    [value, help text, category] entry for an easyconfig parameter (see EasyConfig._config);
+    setting the value (the first element) updates the easyconfig parameter.
+    """
+
+    def __init__(self, ec, key):
+        """Create entry for specified easyconfig parameter, with its raw value (which may be modified in place)."""
+        prev_enable_templating = ec.enable_templating
+        ec.enable_templating = False
+        value = ec[key]
+        ec.enable_templating = prev_enable_templating
+
+        super(LegacyEasyConfigParam, self).__init__([value] + list(ec._params[key][1:]))
+        self.ec = ec
+        self.key = key
+
+    def __setitem__(self, idx, value):
+        super(LegacyEasyConfigParam, self).__setitem__(idx, value)
+        if idx == 0:
+            self.ec[self.key] = value
+
+
+class LegacyEasyConfigParams(collections.MutableMapping):
+    """
+    Dictionary-like view on the easyconfig parameters of an EasyConfig instance,
+    which maps parameter names to [value, help text, category] entries (see EasyConfig._config).
+    """
+
+    def __init__(self, ec):
+        """Create view on easyconfig parameters of specified EasyConfig instance."""
+        self.ec = ec
+
+    def __getitem__(self, key):
+        if key in self.ec._params:
+            return LegacyEasyConfigParam(self.ec, key)
+        else:
+            raise KeyError(key)
+
+    def __setitem__(self, key, entry):
+        if key not in self.ec._params:
+            self.ec.extend_params({key: list(entry)})
+        self.ec[key] = entry[0]
+
+    def __contains__(self, key):
+        return key in self.ec._params
+
+    def __delitem__(self, key):
+        raise EasyBuildError("Can't remove easyconfig parameter '%s'", key)
+
+    def __iter__(self):
+        return iter(self.ec._params)
+
+    def __len__(self):
+        return len(self.ec._params)
+
+
+class TemplateValues(dict):
+    """
+    Dictionary of template values, which keeps track of changes that are made to it,
+    so cached resolved values of easyconfig parameters can be invalidated.
+    """
+    # counter that is bumped whenever template values change;
+    # (also) defined as class attribute, since items may be set before instance attributes are restored on unpickling
+    generation = 0
+
+    def __setitem__(self, key, value):
+        if key not in self or self[key] != value:
+            self.generation += 1
+        super(TemplateValues, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.generation += 1
+        super(TemplateValues, self).__delitem__(key)
+
+    def clear(self):
+        self.generation += 1
+        super(TemplateValues, self).clear()
+
+    def pop(self, *args):
+        self.generation += 1
+        return super(TemplateValues, self).pop(*args)
+
+    def popitem(self):
+        self.generation += 1
+        return super(TemplateValues, self).popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.generation += 1
+        return super(TemplateValues, self).setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        for (key, value) in dict(*args, **kwargs).items():
+            self[key] = value
+
+
+def is_immutable(val):
+    """Check whether the given value is immutable (i.e. can not be modified in place)."""
+    if isinstance(val, tuple):
+        return all(is_immutable(x) for x in val)
+    else:
+        return val is None or isinstance(val, (basestring, bool, int, long, float))
+
+
+def extend_params_table(params, extra):
+    """
+    Return table of easyconfig parameters that extends the specified table with extra easyconfig parameters.
+
+    Tables of easyconfig parameters map parameter names to a (default value, help text, category) tuple;
+    they are shared between EasyConfig instances, and must *not* be modified.
+
+    :param params: table of easyconfig parameters to extend (default values are overwritten by extra parameters)
+    :param extra: dictionary with extra easyconfig parameters, with [default value, help text, category] as values
+    """
+    def hashable(val):
+        """Make hashable value of given value, taking into account the types of (nested) values."""
+        typ = type(val)
+        if isinstance(val, (list, tuple)):
+            val = tuple(hashable(x) for x in val)
+        elif isinstance(val, dict):
+            val = tuple(sorted((key, hashable(x)) for (key, x) in val.items()))
+        return (typ, val)
+
+    try:
+        key = (id(params), hashable(extra))
+        hash(key)
+    except TypeError:
+        # tables with unhashable default values for extra easyconfig parameters are not shared
+        key = None
+
+    if key in _easyconfig_params_tables:
+        res = _easyconfig_params_tables[key][1]
+    else:
+        res = params.copy()
+        # deep copy to make sure (default values in) table remains unchanged if extra parameters are modified
+        res.update((name, tuple(copy.deepcopy(spec))) for (name, spec) in extra.items())
+        if key is not None:
+            # also retain table that was extended, to ensure it stays around (and hence its id remains unique)
+            _easyconfig_params_tables[key] = (params, res)
+
+    return res
+
+
+def copy_containers(val):
+    """Return copy of given value, in which (nested) lists, tuples and dicts are copied (but not other values)."""
+    if isinstance(val, list):
+        val = [copy_containers(x) for x in val]
+    elif isinstance(val, tuple):
+        val = tuple(copy_containers(x) for x in val)
+    elif isinstance(val, dict):
+        val = dict((key, copy_containers(x)) for (key, x) in val.items())
+    return val
+
+
+def make_hashable(val):
+    """Make a hashable value of the given value."""
+    if isinstance(val, (list, tuple)):
+        val = tuple([make_hashable(x) for x in val])
+    elif isinstance(val, dict):
+        val = tuple([(key, make_hashable(val)) for (key, val) in sorted(val.items())])
+    return val
+
+
 def det_installversion(version, toolchain_name, toolchain_version, prefix, suffix):
     """Deprecated 'det_installversion' function, to determine exact install version, based on supplied parameters."""
     old_fn = 'framework.easyconfig.easyconfig.det_installversion'
@@ -1078,6 +1667,9 @@ def get_easyblock_class(easyblock, name=None, default_fallback=True, error_on_fa
                 # if we only get the class name, most likely we're dealing with a generic easyblock
                 try:
                     modulepath = get_module_path(easyblock, generic=True)
+                    # don't bother trying to import a generic easyblock that is known to be not available
+                    if not is_easyblock_module_available(modulepath):
+                        raise ImportError("No module named %s" % modulepath)
                     cls = get_class_for(modulepath, class_name)
                 except ImportError, err:
                     # we might be dealing with a non-generic easyblock, e.g. with --easyblock is used
@@ -1093,11 +1685,14 @@ def get_easyblock_class(easyblock, name=None, default_fallback=True, error_on_fa
             # modulepath will be the namespace + encoded modulename (from the classname)
             modulepath = get_module_path(class_name)
             modulepath_imported = False
-            try:
-                __import__(modulepath, globals(), locals(), [''])
-                modulepath_imported = True
-            except ImportError, err:
-                _log.debug("Failed to import module '%s': %s" % (modulepath, err))
+            # only try importing easyblock module if it is known to be available, since failing imports are costly
+            modulepath_avail = is_easyblock_module_available(modulepath)
+            if modulepath_avail:
+                try:
+                    __import__(modulepath, globals(), locals(), [''])
+                    modulepath_imported = True
+                except ImportError, err:
+                    _log.debug("Failed to import module '%s': %s" % (modulepath, err))
 
             # check if determining module path based on software name would have resulted in a different module path
             if modulepath_imported:
@@ -1110,29 +1705,34 @@ def get_easyblock_class(easyblock, name=None, default_fallback=True, error_on_fa
                     _log.nosupport("Determining module path based on software name", '2.0')
 
             # try and find easyblock
-            try:
-                _log.debug("getting class for %s.%s" % (modulepath, class_name))
-                cls = get_class_for(modulepath, class_name)
-                _log.info("Successfully obtained %s class instance from %s" % (class_name, modulepath))
-            except ImportError, err:
-                # when an ImportError occurs, make sure that it's caused by not finding the easyblock module,
-                # and not because of a broken import statement in the easyblock module
-                error_re = re.compile(r"No module named %s" % modulepath.replace("easybuild.easyblocks.", ''))
-                _log.debug("error regexp: %s" % error_re.pattern)
-                if error_re.match(str(err)):
-                    if default_fallback:
-                        # no easyblock could be found, so fall back to ConfigureMake (NO LONGER SUPPORTED)
-                        legacy_fallback_easyblock = 'ConfigureMake'
-                        def_mod_path = get_module_path(legacy_fallback_easyblock, generic=True)
-                        depr_msg = "Fallback to default easyblock %s (from %s)" % (legacy_fallback_easyblock, def_mod_path)
-                        depr_msg += "; use \"easyblock = '%s'\" in easyconfig file?" % legacy_fallback_easyblock
-                        _log.nosupport(depr_msg, '2.0')
-                else:
-                    if error_on_failed_import:
+            no_easyblock = not modulepath_avail
+            if modulepath_avail:
+                try:
+                    _log.debug("getting class for %s.%s" % (modulepath, class_name))
+                    cls = get_class_for(modulepath, class_name)
+                    _log.info("Successfully obtained %s class instance from %s" % (class_name, modulepath))
+                except ImportError, err:
+                    # when an ImportError occurs, make sure that it's caused by not finding the easyblock module,
+                    # and not because of a broken import statement in the easyblock module
+                    error_re = re.compile(r"No module named %s" % modulepath.replace("easybuild.easyblocks.", ''))
+                    _log.debug("error regexp: %s" % error_re.pattern)
+                    if error_re.match(str(err)):
+                        no_easyblock = True
+                    elif error_on_failed_import:
                         raise EasyBuildError("Failed to import easyblock for %s because of module issue: %s",
                                              class_name, err)
                     else:
                         _log.debug("Failed to import easyblock for %s, but ignoring it: %s" % (class_name, err))
+            else:
+                _log.debug("No easyblock module '%s' available for %s", modulepath, class_name)
+
+            if no_easyblock and default_fallback:
+                # no easyblock could be found, so fall back to ConfigureMake (NO LONGER SUPPORTED)
+                legacy_fallback_easyblock = 'ConfigureMake'
+                def_mod_path = get_module_path(legacy_fallback_easyblock, generic=True)
+                depr_msg = "Fallback to default easyblock %s (from %s)" % (legacy_fallback_easyblock, def_mod_path)
+                depr_msg += "; use \"easyblock = '%s'\" in easyconfig file?" % legacy_fallback_easyblock
+                _log.nosupport(depr_msg, '2.0')
 
         if cls is not None:
             _log.info("Successfully obtained class '%s' for easyblock '%s' (software name '%s')",
@@ -1150,6 +1750,50 @@ def get_easyblock_class(easyblock, name=None, default_fallback=True, error_on_fa
         raise EasyBuildError("Failed to obtain class for %s easyblock (not available?): %s", easyblock, err)
 
 
+def avail_easyblock_modules():
+    """
+    Determine set of available easyblock modules (full module paths), both software-specific and generic ones.
+
+    The locations spanned by the easybuild.easyblocks namespace are only scanned again when they change
+    (e.g. because of --include-easyblocks), so checking whether a particular easyblock is available
+    does not require a (failing) import attempt, which involves walking through the Python search path.
+    """
+    pkgs = []
+    for pkg_name in ['easybuild.easyblocks', 'easybuild.easyblocks.generic']:
+        try:
+            pkgs.append((pkg_name, __import__(pkg_name, globals(), locals(), [''])))
+        except ImportError, err:
+            _log.debug("Failed to import %s: %s", pkg_name, err)
+
+    # take modification time into account, so easyblock modules added to a known location are picked up too
+    key = []
+    for pkg_name, pkg in pkgs:
+        for path in getattr(pkg, '__path__', []):
+            try:
+                key.append((pkg_name, path, os.stat(path).st_mtime))
+            except OSError:
+                key.append((pkg_name, path, None))
+    key = tuple(key)
+
+    if key not in _easyblock_modules:
+        modules = set()
+        for pkg_name, pkg in pkgs:
+            for _, mod_name, _ in pkgutil.iter_modules(getattr(pkg, '__path__', [])):
+                modules.add('%s.%s' % (pkg_name, mod_name))
+        _log.debug("Found %d available easyblock modules: %s", len(modules), sorted(modules))
+
+        # only retain easyblock modules for current locations
+        _easyblock_modules.clear()
+        _easyblock_modules[key] = modules
+
+    return _easyblock_modules[key]
+
+
+def is_easyblock_module_available(modulepath):
+    """Check whether easyblock module with specified (full) module path is available."""
+    return modulepath in sys.modules or modulepath in avail_easyblock_modules()
+
+
 def get_module_path(name, generic=False, decode=True):
     """
     Determine the module path for a given easyblock or software name,
@@ -1199,7 +1843,7 @@ def resolve_template(value, tmpl_dict):
         # '%(name)s' -> '%(name)s'
         # '%%(name)s' -> '%%(name)s'
         if '%' in value:
-            value = re.sub(re.compile(r'(%)(?!%*\(\w+\)s)'), r'\1\1', value)
+            value = TEMPLATE_ESCAPE_REGEX.sub(r'\1\1', value)
 
             try:
                 value = value % tmpl_dict
@@ -1210,14 +1854,12 @@ def resolve_template(value, tmpl_dict):
         # this block deals with references to objects and returns other references
         # for reading this is ok, but for self['x'] = {}
         # self['x']['y'] = z does not work
-        # self['x'] is a get, will return a reference to a templated version of self._config['x']
+        # self['x'] is a get, will return a reference to a templated version of the raw value for 'x'
         # and the ['y] = z part will be against this new reference
         # you will need to do
         # self.enable_templating = False
         # self['x']['y'] = z
         # self.enable_templating = True
-        # or (direct but evil)
-        # self._config['x']['y'] = z
         # it can not be intercepted with __setitem__ because the set is done at a deeper level
         if isinstance(value, list):
             value = [resolve_template(val, tmpl_dict) for val in value]
@@ -1229,6 +1871,49 @@ def resolve_template(value, tmpl_dict):
     return value
 
 
+def det_persistent_cache_key(path, validate, hidden, parse_only, rawtxt=None):
+    """
+    Determine key for persistent cache of processed easyconfig file.
+
+    The key covers the location, size, modification time and contents of the easyconfig file,
+    the EasyBuild version, the available easyblocks (incl. included easyblocks), the active module naming scheme
+    and relevant build options (incl. metadata for external modules).
+    None is returned if the result of processing the easyconfig file can not be cached persistently,
+    i.e. when it depends on the available modules or on the contents of other easyconfig files.
+
+    :param rawtxt: raw contents of easyconfig file (if already available, to avoid reading it again)
+    """
+    if build_option('minimal_toolchains'):
+        return None
+
+    # module names for dependencies may be determined based on the easyconfig files for those dependencies
+    if ActiveMNS().requires_full_easyconfig(['name', 'version', 'versionsuffix', 'toolchain']):
+        return None
+
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError, err:
+        raise EasyBuildError("Failed to determine size & modification time of %s: %s", path, err)
+
+    key = [
+        path,
+        st.st_size,
+        st.st_mtime,
+        hashlib.md5(rawtxt or read_easyconfig(path)).hexdigest(),
+        str(FRAMEWORK_VERSION),
+        str(EASYBLOCKS_VERSION),
+        det_easyblocks_fingerprint(),
+        get_module_naming_scheme(),
+        validate,
+        hidden,
+        parse_only,
+    ]
+    key.extend(det_persistent_cache_build_options())
+
+    return repr(key)
+
+
 def process_easyconfig(path, build_specs=None, validate=True, parse_only=False, hidden=None):
     """
     Process easyconfig, returning some information for each block
@@ -1238,8 +1923,6 @@ def process_easyconfig(path, build_specs=None, validate=True, parse_only=False,
     :param parse_only: only parse easyconfig superficially (faster, but results in partial info)
     :param hidden: indicate whether corresponding module file should be installed hidden ('.'-prefixed)
     """
-    blocks = retrieve_blocks_in_spec(path, build_option('only_blocks'))
-
     if hidden is None:
         hidden = build_option('hidden')
 
@@ -1250,14 +1933,34 @@ def process_easyconfig(path, build_specs=None, validate=True, parse_only=False,
         if cache_key in _easyconfigs_cache:
             return [e.copy() for e in _easyconfigs_cache[cache_key]]
 
+    # read easyconfig file only once, raw contents are passed down where needed
+    rawtxt = read_easyconfig(path)
+    blocks = retrieve_blocks_in_spec(path, build_option('only_blocks'), rawtxt=rawtxt)
+
+    # processed easyconfig files can also be cached persistently (only supported for single-block easyconfigs)
+    ecs_cache, ecs_cache_key = None, None
+    if cache_key is not None and blocks == [path]:
+        ecs_cache = persistent_cache('easyconfigs')
+        if ecs_cache is not None:
+            ecs_cache_key = det_persistent_cache_key(path, validate, hidden, parse_only, rawtxt=rawtxt)
+
+    if ecs_cache_key is not None:
+        easyconfigs = ecs_cache.load(ecs_cache_key)
+        if easyconfigs is not None:
+            _easyconfigs_cache[cache_key] = [e.copy() for e in easyconfigs]
+            return easyconfigs
+
     easyconfigs = []
     for spec in blocks:
         # process for dependencies and real installversionname
         _log.debug("Processing easyconfig %s" % spec)
 
-        # create easyconfig
+        # create easyconfig (raw contents of a single-block easyconfig file were already read)
+        spec_rawtxt = None
+        if blocks == [path]:
+            spec_rawtxt = rawtxt
         try:
-            ec = EasyConfig(spec, build_specs=build_specs, validate=validate, hidden=hidden)
+            ec = EasyConfig(spec, build_specs=build_specs, validate=validate, hidden=hidden, rawtxt=spec_rawtxt)
         except EasyBuildError, err:
             raise EasyBuildError("Failed to process easyconfig %s: %s", spec, err.msg)
 
@@ -1306,9 +2009,90 @@ def process_easyconfig(path, build_specs=None, validate=True, parse_only=False,
     if cache_key is not None:
         _easyconfigs_cache[cache_key] = [e.copy() for e in easyconfigs]
 
+    if ecs_cache_key is not None:
+        ecs_cache.store(ecs_cache_key, easyconfigs)
+
     return easyconfigs
 
 
+def _process_easyconfig_job(job):
+    """
+    Process easyconfig file, possibly in a worker process (see process_easyconfigs).
+
+    :param job: tuple with path to easyconfig file, whether or not to only do a shallow parse,
+                and dict with named arguments for process_easyconfig
+    :return: tuple with result & error message (None if processing easyconfig file went fine)
+    """
+    path, shallow, kwargs = job
+    res, err = None, None
+    try:
+        if shallow:
+            res = EasyConfigParser(filename=path).get_config_dict()
+        else:
+            res = process_easyconfig(path, **kwargs)
+    except EasyBuildError as error:
+        err = error.msg
+    return res, err
+
+
+def process_easyconfigs(paths, nprocs=None, shallow=False, progress=None, **kwargs):
+    """
+    Process specified easyconfig files, using a pool of worker processes if more than one process is requested.
+
+    Errors are collected per easyconfig file rather than being raised, so a faulty easyconfig file does not
+    prevent the other easyconfig files from being processed.
+
+    :param paths: list of paths to easyconfig files
+    :param nprocs: number of processes to use (default: value for --parallel-parse, no worker processes if 1 or less)
+    :param shallow: only do a shallow parse via EasyConfigParser (results are dicts with easyconfig parameters)
+    :param progress: function to call with number of processed easyconfig files and total number of files,
+                     after processing each easyconfig file
+    :param kwargs: named arguments to pass down to process_easyconfig
+    :return: list of (path, result, error) tuples, in the same order as the specified paths
+             (result is None and error is an error message when processing an easyconfig file failed)
+    """
+    if nprocs is None:
+        nprocs = build_option('parallel_parse') or 1
+
+    if not shallow and kwargs.get('hidden') is None:
+        # determine value for 'hidden' upfront, so parsed easyconfigs can be cached when worker processes are used
+        kwargs['hidden'] = build_option('hidden')
+
+    jobs = [(path, shallow, kwargs) for path in paths]
+
+    pool = None
+    if nprocs > 1 and len(jobs) > 1:
+        nprocs = min(nprocs, len(jobs))
+        _log.info("Processing %d easyconfig files using %d processes", len(jobs), nprocs)
+        pool = multiprocessing.Pool(nprocs)
+        # hand out jobs in chunks to limit the communication overhead, while preserving the order of the results
+        results = pool.imap(_process_easyconfig_job, jobs, max(1, len(jobs) / (nprocs * 4)))
+    else:
+        results = (_process_easyconfig_job(job) for job in jobs)
+
+    processed = []
+    try:
+        for idx, (res, err) in enumerate(results):
+            path = paths[idx]
+            if err is None:
+                # results obtained from a worker process are added to the cache used by process_easyconfig
+                if pool is not None and not shallow and kwargs.get('build_specs') is None:
+                    cache_key = (path, kwargs.get('validate', True), kwargs['hidden'], kwargs.get('parse_only', False))
+                    _easyconfigs_cache[cache_key] = [e.copy() for e in res]
+            else:
+                _log.debug("Failed to process easyconfig %s: %s", path, err)
+            processed.append((path, res, err))
+
+            if progress is not None:
+                progress(idx + 1, len(jobs))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return processed
+
+
 def letter_dir_for(name):
     """
     Determine 'letter' directory for specified software name.
@@ -1364,10 +2148,17 @@ def robot_find_easyconfig(name, version):
 
     res = None
     for path in paths:
+        # use index of easyconfig files in robot search path if available, to avoid checking each candidate path
+        index = easyconfigs_index(path)
+        if index is None:
+            isfile = os.path.isfile
+        else:
+            isfile = index.isfile
+
         easyconfigs_paths = create_paths(path, name, version)
         for easyconfig_path in easyconfigs_paths:
             _log.debug("Checking easyconfig path %s" % easyconfig_path)
-            if os.path.isfile(easyconfig_path):
+            if isfile(easyconfig_path):
                 _log.debug("Found easyconfig file for name %s, version %s at %s" % (name, version, easyconfig_path))
                 _easyconfig_files_cache[key] = os.path.abspath(easyconfig_path)
                 res = _easyconfig_files_cache[key]
@@ -1423,52 +2214,88 @@ def robot_find_minimal_toolchain_of_dependency(dep, modtool, parent_tc=None, par
     :param parent_first: reverse order in which subtoolchains are considered: parent toolchain, then subtoolchains
     :return: minimal toolchain for which an easyconfig exists for this dependency (and matches build_options)
     """
-    if parent_tc is None:
-        parent_tc = dep['toolchain']
+    return robot_find_minimal_toolchains_of_dependencies([dep], modtool, parent_tc=parent_tc,
+                                                         parent_first=parent_first)[0]
 
-    avail_modules = []
-    if build_option('use_existing_modules') and not build_option('retain_all_deps'):
-        avail_modules = modtool.available()
 
-    newdep = copy.deepcopy(dep)
+def robot_find_minimal_toolchains_of_dependencies(deps, modtool, parent_tc=None, parent_first=False):
+    """
+    Find the minimal toolchains for a list of dependencies at once
 
-    toolchain_hierarchy = get_toolchain_hierarchy(parent_tc)
-    if parent_first:
-        toolchain_hierarchy = toolchain_hierarchy[::-1]
+    Toolchains in the hierarchy for which an easyconfig file is available are cached per dependency,
+    and the availability of modules is checked for all dependencies in one go.
 
+    :param deps: list of dependency target dicts (long and short module names may not exist yet)
+    :param parent_tc: toolchain from which to derive the toolchain hierarchy to search (default: use dep's toolchain)
+    :param parent_first: reverse order in which subtoolchains are considered: parent toolchain, then subtoolchains
+    :return: list with minimal toolchain for each dependency (None if no easyconfig is available for any toolchain)
+    """
+    use_existing_modules = build_option('use_existing_modules') and not build_option('retain_all_deps')
+    robot_paths_key = (str(build_option('robot_path')), build_option('consider_archived_easyconfigs'))
+
+    # determine toolchains for which an easyconfig exists, for each dependency
+    # start with subtoolchains first, i.e. first (dummy or) compiler-only toolchain, etc. (unless parent_first)
     possible_toolchains = []
-    # start with subtoolchains first, i.e. first (dummy or) compiler-only toolchain, etc.
-    for tc in toolchain_hierarchy:
-        newdep['toolchain'] = tc
-        eb_file = robot_find_easyconfig(newdep['name'], det_full_ec_version(newdep))
-        if eb_file is not None:
-            module_exists = False
-            # if necessary check if module exists
-            if build_option('use_existing_modules') and not build_option('retain_all_deps'):
-                full_mod_name = ActiveMNS().det_full_module_name(newdep)
-                # fallback to checking with modtool.exist is required,
-                # for hidden modules and external modules where module name may be partial
-                module_exists = full_mod_name in avail_modules or modtool.exist([full_mod_name], skip_avail=True)[0]
-            # add the toolchain to list of possibilities
-            possible_toolchains.append({'toolchain': tc, 'module_exists': module_exists})
-
-    if possible_toolchains:
-        _log.debug("List of possible minimal toolchains for %s: %s", dep, possible_toolchains)
-
-        # select the toolchain to return, defaulting to the first element (lowest possible toolchain)
-        minimal_toolchain = possible_toolchains[0]['toolchain']
-        if build_option('use_existing_modules') and not build_option('retain_all_deps'):
-            # take the last element in the case of using existing modules (allows for potentially better optimisation)
-            filtered_possibilities = [tc for tc in possible_toolchains if tc['module_exists']]
-            if filtered_possibilities:
-                # take the last element (the maximum toolchain where a module exists already)
-                minimal_toolchain = filtered_possibilities[-1]['toolchain']
-    else:
-        _log.info("Irresolvable dependency found (even with minimal toolchains): %s", dep)
-        minimal_toolchain = None
+    for dep in deps:
+        toolchain_hierarchy = get_toolchain_hierarchy(parent_tc or dep['toolchain'])
+        if parent_first:
+            toolchain_hierarchy = toolchain_hierarchy[::-1]
+
+        hierarchy_key = tuple((tc['name'], tc['version']) for tc in toolchain_hierarchy)
+        key = (dep['name'], dep['version'], dep.get('versionsuffix', ''), hierarchy_key, robot_paths_key)
+        if key not in _minimal_toolchains_cache:
+            newdep = copy.copy(dep)
+            tcs = []
+            for tc in toolchain_hierarchy:
+                newdep['toolchain'] = tc
+                if robot_find_easyconfig(newdep['name'], det_full_ec_version(newdep)) is not None:
+                    tcs.append(tc)
+            _minimal_toolchains_cache[key] = tcs
+
+        possible_toolchains.append(_minimal_toolchains_cache[key])
+
+    # if necessary check which modules exist, for all candidate toolchains of all dependencies at once
+    mod_names, existing_mod_names = [], set()
+    if use_existing_modules:
+        for dep, tcs in zip(deps, possible_toolchains):
+            newdep = copy.copy(dep)
+            dep_mod_names = []
+            for tc in tcs:
+                newdep['toolchain'] = tc
+                dep_mod_names.append(ActiveMNS().det_full_module_name(newdep))
+            mod_names.append(dep_mod_names)
+
+        avail_modules = set(modtool.available())
+        # fallback to checking with modtool.exist is required,
+        # for hidden modules and external modules where module name may be partial
+        to_check = nub([m for dep_mod_names in mod_names for m in dep_mod_names if m not in avail_modules])
+        if to_check:
+            existing_mod_names = set(m for m, e in zip(to_check, modtool.exist(to_check, skip_avail=True)) if e)
+        existing_mod_names.update(avail_modules)
+
+    minimal_toolchains = []
+    for idx, dep in enumerate(deps):
+        tcs = possible_toolchains[idx]
+        if tcs:
+            _log.debug("List of possible minimal toolchains for %s: %s", dep, tcs)
+
+            # select the toolchain to return, defaulting to the first element (lowest possible toolchain)
+            minimal_toolchain = tcs[0]
+            if use_existing_modules:
+                # take the last element in the case of using existing modules
+                # (allows for potentially better optimisation)
+                filtered_possibilities = [tc for tc, m in zip(tcs, mod_names[idx]) if m in existing_mod_names]
+                if filtered_possibilities:
+                    # take the last element (the maximum toolchain where a module exists already)
+                    minimal_toolchain = filtered_possibilities[-1]
+        else:
+            _log.info("Irresolvable dependency found (even with minimal toolchains): %s", dep)
+            minimal_toolchain = None
+
+        _log.info("Minimally resolving dependency %s using toolchain %s", dep, minimal_toolchain)
+        minimal_toolchains.append(minimal_toolchain)
 
-    _log.info("Minimally resolving dependency %s using toolchain %s", dep, minimal_toolchain)
-    return minimal_toolchain
+    return minimal_toolchains
 
 
 def det_location_for(path, target_dir, soft_name, target_file):
@@ -39,6 +39,7 @@ from easybuild.framework.easyconfig.format.version import ToolchainVersionOperat
 from easybuild.framework.easyconfig.format.convert import Dependency
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.configobj import Section
+from easybuild.tools.filetools import read_file
 
 
 INDENT_4SPACES = ' ' * 4
@@ -76,6 +77,29 @@ LAST_PARAMS = ['sanity_check_paths', 'moduleclass']
 
 _log = fancylogger.getLogger('easyconfig.format.format', fname=False)
 
+# statistics for reading easyconfig files, see read_easyconfig
+EASYCONFIG_READ_STATS = {
+    'reads': 0,
+    'bytes': 0,
+}
+
+
+def read_easyconfig(path):
+    """
+    Read contents of specified easyconfig file, keeping track of how many times easyconfig files are read.
+
+    Callers should read an easyconfig file only once, and pass down the raw contents where they are needed.
+    """
+    txt = read_file(path)
+    EASYCONFIG_READ_STATS['reads'] += 1
+    EASYCONFIG_READ_STATS['bytes'] += len(txt)
+    return txt
+
+
+def easyconfig_read_stats():
+    """Return statistics for reading easyconfig files (number of reads & bytes read)."""
+    return EASYCONFIG_READ_STATS.copy()
+
 
 def get_format_version(txt):
     """Get the easyconfig format version as EasyVersion instance."""
@@ -38,12 +38,12 @@ from vsc.utils import fancylogger
 
 from easybuild.framework.easyconfig.format.format import DEPENDENCY_PARAMETERS, EXCLUDED_KEYS_REPLACE_TEMPLATES
 from easybuild.framework.easyconfig.format.format import FORMAT_DEFAULT_VERSION, GROUPED_PARAMS, INDENT_4SPACES
-from easybuild.framework.easyconfig.format.format import LAST_PARAMS, get_format_version
+from easybuild.framework.easyconfig.format.format import LAST_PARAMS, get_format_version, read_easyconfig
 from easybuild.framework.easyconfig.format.pyheaderconfigobj import EasyConfigFormatConfigObj
 from easybuild.framework.easyconfig.format.version import EasyVersion
 from easybuild.framework.easyconfig.templates import to_template_str
 from easybuild.tools.build_log import EasyBuildError, print_msg
-from easybuild.tools.filetools import read_file, write_file
+from easybuild.tools.filetools import write_file
 from easybuild.tools.utilities import quote_py_str
 
 
@@ -58,6 +58,10 @@ REFORMAT_ORDERED_ITEM_KEYS = {
 }
 
 
+# regexes for blocks in easyconfig files, and for dependencies between blocks (see retrieve_blocks_in_spec)
+BLOCK_REGEX = re.compile(r"^\s*\[([\w.-]+)\]\s*$", re.M)
+DEP_BLOCK_REGEX = re.compile(r"^\s*block\s*=(\s*.*?)\s*$", re.M)
+
 _log = fancylogger.getLogger('easyconfig.format.one', fname=False)
 
 
@@ -347,20 +351,22 @@ class FormatOneZero(EasyConfigFormatConfigObj):
                             self.comments['inline'][comment_key] = '  # ' + comment
 
 
-def retrieve_blocks_in_spec(spec, only_blocks, silent=False):
+def retrieve_blocks_in_spec(spec, only_blocks, silent=False, rawtxt=None):
     """
     Easyconfigs can contain blocks (headed by a [Title]-line)
     which contain commands specific to that block. Commands in the beginning of the file
     above any block headers are common and shared between each block.
-    """
-    reg_block = re.compile(r"^\s*\[([\w.-]+)\]\s*$", re.M)
-    reg_dep_block = re.compile(r"^\s*block\s*=(\s*.*?)\s*$", re.M)
 
+    :param rawtxt: raw contents of easyconfig file (if already available, to avoid reading it again)
+    """
     spec_fn = os.path.basename(spec)
-    txt = read_file(spec)
+    if rawtxt is None:
+        txt = read_easyconfig(spec)
+    else:
+        txt = rawtxt
 
     # split into blocks using regex
-    pieces = reg_block.split(txt)
+    pieces = BLOCK_REGEX.split(txt)
     # the first block contains common statements
     common = pieces.pop(0)
 
@@ -384,7 +390,7 @@ def retrieve_blocks_in_spec(spec, only_blocks, silent=False):
             block = {'name': block_name, 'contents': block_contents}
 
             # dependency block
-            dep_block = reg_dep_block.search(block_contents)
+            dep_block = DEP_BLOCK_REGEX.search(block_contents)
             if dep_block:
                 dependencies = eval(dep_block.group(1))
                 if type(dependencies) == list:
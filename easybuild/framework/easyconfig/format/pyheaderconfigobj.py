@@ -28,7 +28,10 @@ The main easyconfig format class
 
 :author: Stijn De Weirdt (Ghent University)
 """
+import hashlib
+import marshal
 import re
+import sys
 
 from vsc.utils import fancylogger
 
@@ -37,12 +40,19 @@ from easybuild.framework.easyconfig.format.format import get_format_version, Eas
 from easybuild.framework.easyconfig.licenses import EASYCONFIG_LICENSES_DICT
 from easybuild.framework.easyconfig.templates import TEMPLATE_CONSTANTS
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.configobj import ConfigObj
 from easybuild.tools.systemtools import get_shared_lib_ext
 
 
 _log = fancylogger.getLogger('easyconfig.format.pyheaderconfigobj', fname=False)
 
+# compiled code objects for pyheaders, indexed by checksum of pyheader
+_pyheader_code_cache = {}
+
+# global environments for exec'ing pyheaders, indexed by allowed builtins (see EasyConfigFormatConfigObj.pyheader_env)
+_pyheader_env_cache = {}
+
 
 def build_easyconfig_constants_dict():
     """Make a dictionary with all constants that can be used"""
@@ -82,6 +92,39 @@ def build_easyconfig_variables_dict():
     return vars_dict
 
 
+def compile_pyheader(pyheader):
+    """
+    Compile specified pyheader to a code object, which is cached in memory and,
+    if a location for persistent caches is configured, also on disk (as marshalled code object).
+
+    Cached code objects are keyed by checksum of the pyheader and Python version,
+    since marshalled code objects are specific to the Python version being used.
+    """
+    checksum = hashlib.md5(pyheader).hexdigest()
+    code = _pyheader_code_cache.get(checksum)
+
+    if code is None:
+        cache = persistent_cache('pyheaders')
+        cache_key = repr((checksum, sys.version))
+
+        if cache is not None:
+            marshalled_code = cache.load(cache_key)
+            if marshalled_code is not None:
+                try:
+                    code = marshal.loads(marshalled_code)
+                except (EOFError, TypeError, ValueError), err:
+                    _log.debug("Ignoring cached code object for pyheader with checksum %s: %s", checksum, err)
+
+        if code is None:
+            code = compile(pyheader, '<string>', 'exec')
+            if cache is not None:
+                cache.store(cache_key, marshal.dumps(code))
+
+        _pyheader_code_cache[checksum] = code
+
+    return code
+
+
 class EasyConfigFormatConfigObj(EasyConfigFormat):
     """
     Extended EasyConfig format, with support for a header and sections that are actually parsed (as opposed to exec'ed).
@@ -179,11 +222,11 @@ class EasyConfigFormatConfigObj(EasyConfigFormat):
 
         # check for use of deprecated magic easyconfigs variables
         for magic_var in build_easyconfig_variables_dict():
-            if re.search(magic_var, pyheader, re.M):
+            if magic_var in pyheader:
                 _log.nosupport("Magic 'global' easyconfigs variable %s should no longer be used" % magic_var, '2.0')
 
         try:
-            exec(pyheader, global_vars, local_vars)
+            exec(compile_pyheader(pyheader), global_vars, local_vars)
         except SyntaxError, err:
             raise EasyBuildError("SyntaxError in easyconfig pyheader %s: %s", pyheader, err)
 
@@ -198,8 +241,23 @@ class EasyConfigFormatConfigObj(EasyConfigFormat):
         self.pyheader_localvars = local_vars
 
     def pyheader_env(self):
-        """Create the global/local environment to use with eval/execfile"""
-        local_vars = {}
+        """
+        Create the global/local environment to use with eval/execfile
+
+        The global environment is only composed once (for a particular set of allowed builtins),
+        a (shallow) copy of it is returned.
+        """
+        cache_key = None
+        if self.PYHEADER_ALLOWED_BUILTINS is not None:
+            cache_key = tuple(self.PYHEADER_ALLOWED_BUILTINS)
+
+        if cache_key not in _pyheader_env_cache:
+            _pyheader_env_cache[cache_key] = self._compose_pyheader_env()
+
+        return _pyheader_env_cache[cache_key].copy(), {}
+
+    def _compose_pyheader_env(self):
+        """Compose global environment to use with eval/execfile"""
         global_vars = {}
 
         # all variables
@@ -221,7 +279,7 @@ class EasyConfigFormatConfigObj(EasyConfigFormat):
             global_vars['__builtins__'] = builtins
             self.log.debug("Available builtins: %s" % global_vars['__builtins__'])
 
-        return global_vars, local_vars
+        return global_vars
 
     def _validate_pyheader(self):
         """
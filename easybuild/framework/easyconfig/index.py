@@ -0,0 +1,246 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Index of (easyconfig) files in the robot search path.
+
+Easyconfig files are located based on their filename, which is composed of the software name and
+the full easyconfig version (which includes version, toolchain and versionsuffix), see create_paths.
+An index of all files in a robot search path allows to check whether candidate paths exist
+without hitting the filesystem for every check.
+
+The index is retained in a persistent cache, and is refreshed incrementally, by only rescanning directories
+for which the modification time has changed (since only adding/removing files changes the directory mtime).
+"""
+import fnmatch
+import os
+from vsc.utils import fancylogger
+
+from easybuild.tools.cache import persistent_cache
+
+
+_log = fancylogger.getLogger('easyconfig.index', fname=False)
+
+# version of index format, must be bumped when format of cached index changes
+INDEX_FORMAT_VERSION = 1
+
+# indexes that are up to date in current session, indexed by (absolute) path
+_indexes = {}
+
+
+class EasyConfigsIndex(object):
+    """Index of files in a directory tree."""
+
+    def __init__(self, path, dirs=None):
+        """
+        Create index for specified path.
+
+        :param path: top-level directory of directory tree to index
+        :param dirs: existing index data (dict with relative directory paths as keys,
+                     and tuples with modification time, set of filenames and set of subdirectory names as values)
+        """
+        self.path = os.path.abspath(path)
+        if dirs is None:
+            dirs = {}
+        self.dirs = dirs
+
+    def _scan(self, reldir, parents=None):
+        """
+        (Re)scan specified directory, and (new) subdirectories.
+
+        :param reldir: path to directory, relative to top-level directory of the index
+        :param parents: real paths of parent directories (used to avoid following symlink loops)
+        """
+        dirpath = os.path.join(self.path, reldir)
+        realpath = os.path.realpath(dirpath)
+        if parents is None:
+            parents = []
+
+        try:
+            mtime = os.stat(dirpath).st_mtime
+            entries = os.listdir(dirpath)
+        except OSError, err:
+            _log.debug("Failed to scan %s, ignoring it: %s", dirpath, err)
+            self._remove(reldir)
+            return
+
+        filenames, subdirs = set(), set()
+        for entry in entries:
+            entry_path = os.path.join(dirpath, entry)
+            if os.path.isdir(entry_path):
+                if os.path.realpath(entry_path) not in parents + [realpath]:
+                    subdirs.add(entry)
+            elif os.path.isfile(entry_path):
+                filenames.add(entry)
+
+        if reldir in self.dirs:
+            for subdir in self.dirs[reldir][2] - subdirs:
+                self._remove(os.path.join(reldir, subdir))
+
+        self.dirs[reldir] = (mtime, filenames, subdirs)
+
+        for subdir in subdirs:
+            if os.path.join(reldir, subdir) not in self.dirs:
+                self._scan(os.path.join(reldir, subdir), parents=parents + [realpath])
+
+    def _remove(self, reldir):
+        """Remove specified directory (and its subdirectories) from index."""
+        entry = self.dirs.pop(reldir, None)
+        if entry is not None:
+            for subdir in entry[2]:
+                self._remove(os.path.join(reldir, subdir))
+
+    def refresh(self):
+        """
+        Refresh index, by rescanning directories for which the modification time has changed.
+
+        :return: number of (re)scanned directories
+        """
+        if not self.dirs:
+            self._scan('')
+            return len(self.dirs)
+
+        cnt = 0
+        for reldir in sorted(self.dirs.keys()):
+            # directory may have been removed from the index already, if a parent directory was rescanned
+            if reldir in self.dirs:
+                dirpath = os.path.join(self.path, reldir)
+                try:
+                    mtime = os.stat(dirpath).st_mtime
+                except OSError:
+                    mtime = None
+
+                if mtime != self.dirs[reldir][0]:
+                    _log.debug("Modification time of %s has changed, rescanning it", dirpath)
+                    cnt += 1
+                    self._scan(reldir)
+
+        return cnt
+
+    def relpath(self, path):
+        """Determine path relative to top-level directory of index (None if path is outside of index)."""
+        path = os.path.abspath(path)
+        if path == self.path:
+            return ''
+        elif path.startswith(os.path.join(self.path, '')):
+            return path[len(self.path) + 1:]
+        else:
+            return None
+
+    def isfile(self, path):
+        """Check whether specified path corresponds to an indexed file."""
+        relpath = self.relpath(path)
+        if relpath is None:
+            return os.path.isfile(path)
+
+        reldir, filename = os.path.split(relpath)
+        entry = self.dirs.get(reldir)
+        return entry is not None and filename in entry[1]
+
+    def glob(self, pattern):
+        """
+        Return sorted list of paths for indexed files that match specified glob pattern;
+        both the pattern and the returned paths are relative to the top-level directory of the index.
+        """
+        parts = os.path.normpath(pattern).split(os.path.sep)
+
+        def match(names, pattern):
+            """Match names against glob pattern (hidden files/directories are only matched explicitly)."""
+            if pattern.startswith('.'):
+                return fnmatch.filter(names, pattern)
+            else:
+                return [n for n in fnmatch.filter(names, pattern) if not n.startswith('.')]
+
+        reldirs = ['']
+        for part in parts[:-1]:
+            reldirs = [os.path.join(d, s) for d in reldirs if d in self.dirs for s in match(self.dirs[d][2], part)]
+
+        res = []
+        for reldir in reldirs:
+            if reldir in self.dirs:
+                res.extend(os.path.join(reldir, f) for f in match(self.dirs[reldir][1], parts[-1]))
+
+        return sorted(res)
+
+    def find(self, filename, ignore_dirs=None):
+        """
+        Return path (relative to top-level directory of the index) of first indexed file with specified name
+        (in sorted directory order), or None if no such file is found.
+
+        :param filename: name of file to find
+        :param ignore_dirs: names of subdirectories to ignore
+        """
+        if ignore_dirs is None:
+            ignore_dirs = []
+
+        for reldir in sorted(self.dirs.keys()):
+            if filename in self.dirs[reldir][1]:
+                if not any(d in ignore_dirs for d in reldir.split(os.path.sep)):
+                    return os.path.join(reldir, filename)
+        return None
+
+
+def easyconfigs_index(path):
+    """
+    Return up to date index of files in specified directory (e.g. a robot search path).
+
+    The index is only created/used if a location for persistent caches is configured, otherwise None is returned.
+    The index is refreshed only once per session, see also refresh_easyconfigs_index.
+
+    :param path: location to return index for
+    """
+    cache = persistent_cache('easyconfigs_index')
+    if cache is None:
+        return None
+
+    path = os.path.abspath(path)
+    index = _indexes.get(path)
+    if index is None:
+        key = 'v%s:%s' % (INDEX_FORMAT_VERSION, path)
+        index = EasyConfigsIndex(path, dirs=cache.load(key))
+
+        cnt = index.refresh()
+        _log.debug("Rescanned %d directories for index of %s (%d directories)", cnt, path, len(index.dirs))
+        if cnt:
+            cache.store(key, index.dirs)
+
+        _indexes[path] = index
+
+    return index
+
+
+def refresh_easyconfigs_index(path=None):
+    """
+    Make sure indexes that cover specified path (or all indexes) are refreshed when they are used next,
+    for example because files were added in the current session.
+
+    :param path: location that was changed (if None, all indexes are refreshed)
+    """
+    if path is None:
+        _indexes.clear()
+    else:
+        path = os.path.abspath(path)
+        for index_path in _indexes.keys():
+            if path == index_path or path.startswith(os.path.join(index_path, '')):
+                del _indexes[index_path]
@@ -35,10 +35,11 @@ from vsc.utils import fancylogger
 
 from easybuild.framework.easyconfig.format.format import FORMAT_DEFAULT_VERSION
 from easybuild.framework.easyconfig.format.format import get_format_version, get_format_version_classes
+from easybuild.framework.easyconfig.format.format import read_easyconfig
 from easybuild.framework.easyconfig.format.yeb import FormatYeb, is_yeb_format
 from easybuild.framework.easyconfig.types import PARAMETER_TYPES, check_type_of_param_value
 from easybuild.tools.build_log import EasyBuildError
-from easybuild.tools.filetools import read_file, write_file
+from easybuild.tools.filetools import write_file
 
 
 # deprecated easyconfig parameters, and their replacements
@@ -53,6 +54,9 @@ REPLACED_PARAMETERS = {
     'premakeopts': 'prebuildopts',
 }
 
+# (precompiled) regexes to fetch initial parameter definitions from easyconfig files, by parameter name
+_fetch_parameter_regexes = {}
+
 _log = fancylogger.getLogger('easyconfig.parser', fname=False)
 
 
@@ -64,7 +68,10 @@ def fetch_parameters_from_easyconfig(rawtxt, params):
     """
     param_values = []
     for param in params:
-        regex = re.compile(r"^\s*%s\s*(=|: )\s*(?P<param>\S.*?)\s*$" % param, re.M)
+        regex = _fetch_parameter_regexes.get(param)
+        if regex is None:
+            regex = re.compile(r"^\s*%s\s*(=|: )\s*(?P<param>\S.*?)\s*$" % param, re.M)
+            _fetch_parameter_regexes[param] = regex
         res = regex.search(rawtxt)
         if res:
             param_values.append(res.group('param').strip("'\""))
@@ -140,7 +147,7 @@ class EasyConfigParser(object):
     def _check_filename(self, fn):
         """Perform sanity check on the filename, and set mechanism to set the content of the file"""
         if os.path.isfile(fn):
-            self.get_fn = (read_file, (fn,))
+            self.get_fn = (read_easyconfig, (fn,))
             self.set_fn = (write_file, (fn, self.rawcontent))
 
         self.log.debug("Process filename %s with get function %s, set function %s" % (fn, self.get_fn, self.set_fn))
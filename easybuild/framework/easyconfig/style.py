@@ -28,10 +28,14 @@ Style tests for easyconfig files using pep8.
 
 :author: Ward Poelmans (Ghent University)
 """
+import multiprocessing
 import re
+import sys
+from cStringIO import StringIO
 from vsc.utils import fancylogger
 
 from easybuild.tools.build_log import print_msg
+from easybuild.tools.config import build_option
 from easybuild.tools.utilities import only_if_module_is_available
 
 try:
@@ -126,6 +130,23 @@ def check_easyconfigs_style(easyconfigs, verbose=False):
     return result.total_errors
 
 
+def _easyconfig_style_check_job(path):
+    """
+    Run style check on specified easyconfig file in a worker process (see cmdline_easyconfigs_style_check).
+
+    :return: tuple with number of warnings and errors, and output produced by the style check
+    """
+    orig_stdout = sys.stdout
+    sys.stdout = StringIO()
+    try:
+        errors = check_easyconfigs_style([path])
+        out = sys.stdout.getvalue()
+    finally:
+        sys.stdout = orig_stdout
+
+    return errors, out
+
+
 def cmdline_easyconfigs_style_check(paths):
     """
     Run easyconfigs style check of each of the specified paths, triggered from 'eb' command line
@@ -134,9 +155,27 @@ def cmdline_easyconfigs_style_check(paths):
     :return: True when style check passed on all easyconfig files, False otherwise
     """
     print_msg("Running style check on %d easyconfig(s)..." % len(paths), prefix=False)
+
+    # style check can be run in parallel if requested (--parallel-parse), output is reported in order
+    results = None
+    nprocs = build_option('parallel_parse') or 1
+    if nprocs > 1 and len(paths) > 1:
+        pool = multiprocessing.Pool(min(nprocs, len(paths)))
+        try:
+            results = pool.map(_easyconfig_style_check_job, paths)
+        finally:
+            pool.close()
+            pool.join()
+
     style_check_passed = True
-    for path in paths:
-        if check_easyconfigs_style([path]) == 0:
+    for idx, path in enumerate(paths):
+        if results is None:
+            errors = check_easyconfigs_style([path])
+        else:
+            errors, out = results[idx]
+            sys.stdout.write(out)
+
+        if errors == 0:
             res = 'PASS'
         else:
             res = 'FAIL'
@@ -57,6 +57,8 @@ TEMPLATE_NAMES_CONFIG = [
     'versionsuffix',
     'versionprefix',
 ]
+# easyconfig parameters that template values are derived from (see template_constant_dict)
+TEMPLATE_SOURCE_PARAMS = ['dependencies', 'name', 'toolchain', 'version'] + TEMPLATE_NAMES_CONFIG
 # lowercase versions of ._config
 TEMPLATE_NAMES_LOWER_TEMPLATE = "%(name)slower"
 TEMPLATE_NAMES_LOWER = [
@@ -46,9 +46,11 @@ from distutils.version import LooseVersion
 from vsc.utils import fancylogger
 
 from easybuild.framework.easyconfig import EASYCONFIGS_PKG_SUBDIR
-from easybuild.framework.easyconfig.easyconfig import EASYCONFIGS_ARCHIVE_DIR, ActiveMNS, EasyConfig
+from easybuild.framework.easyconfig.easyconfig import EASYCONFIGS_ARCHIVE_DIR, ActiveMNS
 from easybuild.framework.easyconfig.easyconfig import create_paths, get_easyblock_class, process_easyconfig
+from easybuild.framework.easyconfig.easyconfig import process_easyconfigs
 from easybuild.framework.easyconfig.format.yeb import quote_yaml_special_chars
+from easybuild.framework.easyconfig.index import easyconfigs_index
 from easybuild.tools.build_log import EasyBuildError, print_msg
 from easybuild.tools.config import build_option
 from easybuild.tools.environment import restore_env
@@ -115,10 +117,8 @@ def find_resolved_modules(easyconfigs, avail_modules, modtool, retain_all_deps=F
 
     ec_mod_names = [ec['full_mod_name'] for ec in easyconfigs]
     for easyconfig in easyconfigs:
-        if isinstance(easyconfig, EasyConfig):
-            easyconfig._config = copy.copy(easyconfig._config)
-        else:
-            easyconfig = easyconfig.copy()
+        # copy, we don't want to modify the list of dependencies for the original easyconfig
+        easyconfig = easyconfig.copy()
         deps = []
         for dep in easyconfig['dependencies']:
             dep_mod_name = dep.get('full_mod_name', ActiveMNS().det_full_module_name(dep))
@@ -332,6 +332,25 @@ def det_easyconfig_paths(orig_paths):
         # find missing easyconfigs by walking paths in robot search path
         for path in robot_path:
             _log.debug("Looking for missing easyconfig files (%d left) in %s..." % (len(ecs_to_find), path))
+
+            # use index of files in robot search path if available, rather than walking the directory tree
+            index = easyconfigs_index(path)
+            if index is not None:
+                ignore_dirs = build_option('ignore_dirs') or []
+                if not build_option('consider_archived_easyconfigs'):
+                    ignore_dirs = ignore_dirs + [EASYCONFIGS_ARCHIVE_DIR]
+
+                for idx, orig_path in ecs_to_find[:]:
+                    relpath = index.find(orig_path, ignore_dirs=ignore_dirs)
+                    if relpath is not None:
+                        ec_files[idx] = os.path.join(path, relpath)
+                        _log.info("Found %s in %s (via index): %s" % (orig_path, path, ec_files[idx]))
+                        ecs_to_find.remove((idx, orig_path))
+                if not ecs_to_find:
+                    break
+                else:
+                    continue
+
             for (subpath, dirnames, filenames) in os.walk(path, topdown=True):
                 for idx, orig_path in ecs_to_find[:]:
                     if orig_path in filenames:
@@ -364,7 +383,7 @@ def parse_easyconfigs(paths, validate=True):
     Parse easyconfig files
     :param paths: paths to easyconfigs
     """
-    easyconfigs = []
+    ec_files = []
     generated_ecs = False
     for (path, generated) in paths:
         path = os.path.abspath(path)
@@ -373,17 +392,34 @@ def parse_easyconfigs(paths, validate=True):
         if not os.path.exists(path):
             raise EasyBuildError("Can't find path %s", path)
         try:
-            ec_files = find_easyconfigs(path, ignore_dirs=build_option('ignore_dirs'))
-            for ec_file in ec_files:
-                # only pass build specs when not generating easyconfig files
-                kwargs = {'validate': validate}
-                if not build_option('try_to_generate'):
-                    kwargs['build_specs'] = build_option('build_specs')
-                ecs = process_easyconfig(ec_file, **kwargs)
-                easyconfigs.extend(ecs)
+            ec_files.extend(find_easyconfigs(path, ignore_dirs=build_option('ignore_dirs')))
         except IOError, err:
             raise EasyBuildError("Processing easyconfigs in path %s failed: %s", path, err)
 
+    # only pass build specs when not generating easyconfig files
+    kwargs = {'validate': validate}
+    if not build_option('try_to_generate'):
+        kwargs['build_specs'] = build_option('build_specs')
+
+    # easyconfig files are processed in parallel if requested (--parallel-parse), errors are reported together
+    try:
+        processed = process_easyconfigs(ec_files, **kwargs)
+    except IOError, err:
+        raise EasyBuildError("Processing easyconfigs failed: %s", err)
+
+    easyconfigs, errors = [], []
+    for ec_file, ecs, err in processed:
+        if err is None:
+            easyconfigs.extend(ecs)
+        else:
+            errors.append((ec_file, err))
+
+    if len(errors) == 1:
+        raise EasyBuildError(errors[0][1])
+    elif errors:
+        raise EasyBuildError("Failed to process %d easyconfig files:\n%s", len(errors),
+                             '\n'.join("* %s: %s" % error for error in errors))
+
     return easyconfigs, generated_ecs
 
 
@@ -438,7 +474,11 @@ def find_related_easyconfigs(path, ec):
         toolchain_name_pattern = ''
         toolchain_pattern = ''
 
-    potential_paths = [glob.glob(ec_path) for ec_path in create_paths(path, name, '*')]
+    index = easyconfigs_index(path)
+    if index is None:
+        potential_paths = [glob.glob(ec_path) for ec_path in create_paths(path, name, '*')]
+    else:
+        potential_paths = [[os.path.join(path, p) for p in index.glob(pat)] for pat in create_paths('', name, '*')]
     potential_paths = sum(potential_paths, [])  # flatten
     _log.debug("found these potential paths: %s" % potential_paths)
 
@@ -44,6 +44,7 @@ from vsc.utils.missing import nub
 
 from easybuild.framework.easyconfig.default import get_easyconfig_parameter_default
 from easybuild.framework.easyconfig.easyconfig import EasyConfig, create_paths, process_easyconfig
+from easybuild.framework.easyconfig.index import easyconfigs_index, refresh_easyconfigs_index
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.filetools import read_file, write_file
 from easybuild.tools.module_naming_scheme.utilities import det_full_ec_version
@@ -264,6 +265,9 @@ def tweak_one(src_fn, target_fn, tweaks, targetdir=None):
     write_file(target_fn, ectxt)
     _log.info("Tweaked easyconfig file written to %s" % target_fn)
 
+    # target location may be part of robot search path
+    refresh_easyconfigs_index(os.path.dirname(target_fn))
+
     return target_fn
 
 
@@ -316,9 +320,17 @@ def find_matching_easyconfigs(name, installver, paths):
     """
     ec_files = []
     for path in paths:
-        patterns = create_paths(path, name, installver)
+        index = easyconfigs_index(path)
+        if index is None:
+            patterns = create_paths(path, name, installver)
+        else:
+            patterns = create_paths('', name, installver)
+
         for pattern in patterns:
-            more_ec_files = filter(os.path.isfile, sorted(glob.glob(pattern)))
+            if index is None:
+                more_ec_files = filter(os.path.isfile, sorted(glob.glob(pattern)))
+            else:
+                more_ec_files = [os.path.join(path, p) for p in index.glob(pattern)]
             _log.debug("Including files that match glob pattern '%s': %s" % (pattern, more_ec_files))
             ec_files.extend(more_ec_files)
 
@@ -487,7 +499,7 @@ def select_or_generate_ec(fp, paths, specs):
     _log.debug("Filtering based on other parameters (specified via --amend): %s" % other_params)
     for (param, val) in other_params.items():
 
-        if param in ecs_and_files[0][0]._config:
+        if param in ecs_and_files[0][0]:
             vals = unique([x[0][param] for x in ecs_and_files])
         else:
             vals = []
@@ -537,7 +549,7 @@ def select_or_generate_ec(fp, paths, specs):
         # check whether selected easyconfig matches requirements
         match = True
         for (key, val) in specs.items():
-            if key in selected_ec._config:
+            if key in selected_ec:
                 # values must be equal to have a full match
                 if selected_ec[key] != val:
                     match = False
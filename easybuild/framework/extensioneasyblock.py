@@ -52,6 +52,10 @@ class ExtensionEasyBlock(EasyBlock, Extension):
       - run
     """
 
+    # deriving classes that unpack the source of the extension in run (via unpack_src=True) should set this to True,
+    # so the source can be extracted up front when --parallel-extract is used (cfr. EasyBlock.extract_extension_sources)
+    UNPACKS_SRC = False
+
     @staticmethod
     def extra_options(extra_vars=None):
         """Extra easyconfig parameters specific to ExtensionEasyBlock."""
@@ -97,7 +101,17 @@ class ExtensionEasyBlock(EasyBlock, Extension):
         # unpack file if desired
         if unpack_src:
             targetdir = os.path.join(self.master.builddir, remove_unwanted_chars(self.name))
-            self.ext_dir = extract_file("%s" % self.src, targetdir, extra_options=self.unpack_options)
+            # source may already have been extracted up front (cfr. EasyBlock.extract_extension_sources)
+            ext_dir = self.master.extracted_ext_srcs.pop(("%s" % self.src, targetdir), None)
+            if ext_dir is None or self.unpack_options:
+                self.ext_dir = extract_file("%s" % self.src, targetdir, extra_options=self.unpack_options)
+            else:
+                self.log.debug("Using %s, where source %s was already extracted", ext_dir, self.src)
+                try:
+                    os.chdir(ext_dir)
+                except OSError, err:
+                    raise EasyBuildError("Failed to move to %s: %s", ext_dir, err)
+                self.ext_dir = ext_dir
 
         # patch if needed
         if self.patches:
@@ -50,6 +50,8 @@ import easybuild.tools.config as config
 import easybuild.tools.options as eboptions
 from easybuild.framework.easyblock import EasyBlock, build_and_install_one
 from easybuild.framework.easyconfig import EASYCONFIGS_PKG_SUBDIR
+from easybuild.framework.easyconfig.easyconfig import update_toolchain_hierarchies
+from easybuild.framework.easyconfig.format.format import easyconfig_read_stats
 from easybuild.framework.easyconfig.style import cmdline_easyconfigs_style_check
 from easybuild.framework.easyconfig.tools import alt_easyconfig_paths, categorize_files_by_type, dep_graph
 from easybuild.framework.easyconfig.tools import det_easyconfig_paths, dump_env_script, get_paths_for
@@ -59,7 +61,7 @@ from easybuild.tools.config import find_last_log, get_repository, get_repository
 from easybuild.tools.docs import list_software
 from easybuild.tools.filetools import adjust_permissions, cleanup, write_file
 from easybuild.tools.github import check_github, find_easybuild_easyconfig, install_github_token, new_pr, update_pr
-from easybuild.tools.modules import modules_tool
+from easybuild.tools.modules import module_cache_stats, modules_tool
 from easybuild.tools.options import parse_external_modules_metadata, process_software_build_specs, use_color
 from easybuild.tools.robot import check_conflicts, det_robot_path, dry_run, resolve_dependencies, search_easyconfigs
 from easybuild.tools.package.utilities import check_pkg_support
@@ -204,9 +206,11 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None):
 
     # determine robot path
     # --try-X, --dep-graph, --search use robot path for searching, so enable it with path of installed easyconfigs
+    # (same for --update-toolchain-hierarchies, which considers all toolchains in the robot path)
     tweaked_ecs = try_to_generate and build_specs
     tweaked_ecs_paths, pr_path = alt_easyconfig_paths(eb_tmpdir, tweaked_ecs=tweaked_ecs, from_pr=options.from_pr)
-    auto_robot = try_to_generate or options.check_conflicts or options.dep_graph or search_query
+    auto_robot = try_to_generate or options.check_conflicts or options.dep_graph or search_query or \
+        options.update_toolchain_hierarchies
     robot_path = det_robot_path(options.robot_paths, tweaked_ecs_paths, pr_path, auto_robot=auto_robot)
     _log.debug("Full robot path: %s" % robot_path)
 
@@ -262,6 +266,10 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None):
     elif options.list_software:
         print list_software(output_format=options.output_format, detailed=options.list_software == 'detailed')
 
+    elif options.update_toolchain_hierarchies:
+        cnt = update_toolchain_hierarchies()
+        print_msg("Updated table of toolchain hierarchies for %d toolchains" % cnt, log=_log, silent=testing)
+
     # non-verbose cleanup after handling GitHub integration stuff or printing terse info
     early_stop_options = [
         options.check_github,
@@ -270,6 +278,7 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None):
         options.list_software,
         options.review_pr,
         options.terse,
+        options.update_toolchain_hierarchies,
         search_query,
     ]
     if any(early_stop_options):
@@ -386,7 +395,7 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None):
         print_msg(txt, log=_log, silent=testing, prefix=False)
 
     elif options.check_conflicts:
-        if check_conflicts(easyconfigs, modtool):
+        if check_conflicts(easyconfigs, modtool, report=options.conflicts_report):
             print_error("One or more conflicts detected!")
             sys.exit(1)
         else:
@@ -437,6 +446,9 @@ def main(args=None, logfile=None, do_build=None, testing=False, modtool=None):
 
     print_msg(success_msg, log=_log, silent=testing)
 
+    _log.info("Statistics for module caches: %s", module_cache_stats())
+    _log.info("Statistics for reading easyconfig files: %s", easyconfig_read_stats())
+
     # cleanup and spec files
     for ec in easyconfigs:
         if 'original_spec' in ec and os.path.isfile(ec['spec']):
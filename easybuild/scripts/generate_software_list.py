@@ -35,7 +35,7 @@ from optparse import OptionParser
 
 import easybuild.tools.config as config
 import easybuild.tools.options as eboptions
-from easybuild.framework.easyconfig.easyconfig import EasyConfig, get_easyblock_class
+from easybuild.framework.easyconfig.easyconfig import get_easyblock_class, process_easyconfigs
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.github import Githubfs
 from vsc.utils import fancylogger
@@ -56,6 +56,8 @@ parser.add_option("-p", "--path", action="store", dest="path",
      help="Specify a path inside the repo (default easybuild/easyconfigs).")
 parser.add_option("-l", "--local", action="store_true", dest="local",
      help="Use a local path, not on github.com (Default false)")
+parser.add_option("-j", "--parallel-parse", action="store", type="int", dest="parallel_parse", default=1,
+     help="Number of processes to use for parsing easyconfigs (default 1).")
 
 options, args = parser.parse_args()
 
@@ -111,6 +113,7 @@ names = []
 # fs.walk yields the same results as os.walk, so should be interchangable
 # same for fs.join and os.path.join
 
+ec_files = []
 for root, subfolders, files in walk(options.path):
     if '.git' in subfolders:
         log.info("found .git subfolder, ignoring it")
@@ -120,23 +123,30 @@ for root, subfolders, files in walk(options.path):
             log.warning("SKIPPING %s/%s" % (root, ec_file))
             continue
         ec_file = join(root, ec_file)
-        ec_file = read(ec_file)
-        try:
-            ec = EasyConfig(ec_file)
-            log.info("found valid easyconfig %s" % ec)
-            if not ec.name in names:
-                log.info("found new software package %s" % ec.name)
-                ec.easyblock = None
-                # check if an easyblock exists
-                ebclass = get_easyblock_class(None, name=ec.name, default_fallback=False)
-                if ebclass is not None:
-                    module = ebclass.__module__.split('.')[-1]
-                    if module != "configuremake":
-                        ec.easyblock = module
-                configs.append(ec)
-                names.append(ec.name)
-        except Exception, err:
-            raise EasyBuildError("faulty easyconfig %s: %s", ec_file, err)
+        ec_files.append(read(ec_file))
+
+# parse easyconfigs (in parallel if requested), report all faulty easyconfigs at once
+errors = []
+for ec_file, ecs, err in process_easyconfigs(ec_files, nprocs=options.parallel_parse, parse_only=True):
+    if err is not None:
+        errors.append("faulty easyconfig %s: %s" % (ec_file, err))
+        continue
+    for ec in [e['ec'] for e in ecs]:
+        log.info("found valid easyconfig %s" % ec)
+        if not ec.name in names:
+            log.info("found new software package %s" % ec.name)
+            ec.easyblock = None
+            # check if an easyblock exists
+            ebclass = get_easyblock_class(None, name=ec.name, default_fallback=False)
+            if ebclass is not None:
+                module = ebclass.__module__.split('.')[-1]
+                if module != "configuremake":
+                    ec.easyblock = module
+            configs.append(ec)
+            names.append(ec.name)
+
+if errors:
+    raise EasyBuildError('\n'.join(errors))
 
 log.info("Found easyconfigs: %s" % [x.name for x in configs])
 # sort by name
@@ -96,6 +96,10 @@ class EasyBuildLog(fancylogger.FancyLogger):
 
     RAISE_EXCEPTION_CLASS = EasyBuildError
 
+    def __reduce__(self):
+        """Pickle logger by name, so objects that hold a logger can be passed between processes."""
+        return (logging.getLogger, (self.name,))
+
     def caller_info(self):
         """Return string with caller info."""
         (filepath, line, function_name) = self.findCaller()
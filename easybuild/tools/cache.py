@@ -0,0 +1,231 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Support for persistent caches, which are retained on disk across EasyBuild sessions.
+"""
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+from vsc.utils import fancylogger
+
+from easybuild.tools.config import build_option
+
+
+_log = fancylogger.getLogger('tools.cache', fname=False)
+
+# fraction of maximum cache size to shrink a cache to when it is full, to avoid evicting entries on every store
+EVICTION_TARGET = 0.8
+
+# persistent caches, indexed by location
+_persistent_caches = {}
+
+
+class FileCache(object):
+    """
+    Persistent cache of picklable values, stored as individual files in a directory.
+
+    Entries that can not be loaded (e.g. because they are incomplete or corrupt) are considered to be cache misses,
+    and are removed. When the total size of the cache exceeds the maximum size, least recently used entries are evicted.
+    Failing to store an entry is not considered to be fatal (e.g. for read-only cache directories).
+    """
+
+    def __init__(self, path, max_size=None):
+        """
+        Create persistent cache in specified location.
+
+        :param path: path to directory for cache entries
+        :param max_size: maximum total size (in bytes) of the cache entries (None implies no limit)
+        """
+        self.log = fancylogger.getLogger(self.__class__.__name__, fname=False)
+        self.path = path
+        self.max_size = max_size
+
+        # total size of cache entries, only determined when needed
+        self.size = None
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+        }
+
+    def entry_path(self, key):
+        """Determine path for cache entry with specified key (a string)."""
+        digest = hashlib.sha1(key).hexdigest()
+        return os.path.join(self.path, digest[:2], digest[2:])
+
+    def entries(self):
+        """Return list of (path, size, last use time) tuples for all entries in this cache."""
+        res = []
+        if os.path.isdir(self.path):
+            for subdir in os.listdir(self.path):
+                subdir_path = os.path.join(self.path, subdir)
+                if not os.path.isdir(subdir_path):
+                    continue
+                for entry in os.listdir(subdir_path):
+                    entry_path = os.path.join(subdir_path, entry)
+                    try:
+                        st = os.stat(entry_path)
+                    except OSError:
+                        # entry may have been removed in the meantime (e.g. by another EasyBuild session)
+                        continue
+                    res.append((entry_path, st.st_size, st.st_mtime))
+        return res
+
+    def remove(self, path):
+        """Remove cache entry at specified path (if it still exists), return True if it was removed."""
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError, err:
+            self.log.debug("Failed to remove cache entry %s: %s", path, err)
+            return False
+
+        if self.size is not None:
+            self.size -= size
+        return True
+
+    def load(self, key, default=None):
+        """
+        Load value for specified key from cache.
+
+        :param key: key of cache entry (a string)
+        :param default: value to return in case of a cache miss
+        """
+        path = self.entry_path(key)
+
+        res = default
+        if os.path.exists(path):
+            try:
+                handle = open(path, 'rb')
+                try:
+                    entry_key, value = pickle.load(handle)
+                finally:
+                    handle.close()
+            except Exception, err:
+                self.log.warning("Removing unusable cache entry %s: %s", path, err)
+                self.remove(path)
+            else:
+                # entry only applies if keys match exactly (hash collisions are unlikely, but not impossible)
+                if entry_key == key:
+                    res = value
+                    # update modification time, to keep track of when cache entry was last used
+                    try:
+                        os.utime(path, None)
+                    except OSError, err:
+                        self.log.debug("Failed to update modification time of cache entry %s: %s", path, err)
+
+        if res is default:
+            self.stats['misses'] += 1
+            self.log.debug("Cache miss for %s in %s", key, self.path)
+        else:
+            self.stats['hits'] += 1
+            self.log.debug("Cache hit for %s in %s", key, self.path)
+
+        return res
+
+    def store(self, key, value):
+        """
+        Store value for specified key in cache.
+
+        :param key: key of cache entry (a string)
+        :param value: value to store (must be picklable)
+        """
+        path = self.entry_path(key)
+        try:
+            dirpath = os.path.dirname(path)
+            if not os.path.exists(dirpath):
+                os.makedirs(dirpath)
+
+            # write entry to temporary file first, and move it in place only when it is complete,
+            # so other EasyBuild sessions never see a partial cache entry
+            fd, tmppath = tempfile.mkstemp(prefix='.tmp', dir=dirpath)
+            handle = os.fdopen(fd, 'wb')
+            try:
+                pickle.dump((key, value), handle, pickle.HIGHEST_PROTOCOL)
+            finally:
+                handle.close()
+            os.rename(tmppath, path)
+        except (IOError, OSError, pickle.PicklingError), err:
+            self.log.warning("Failed to store cache entry %s: %s", path, err)
+            return
+
+        self.stats['stores'] += 1
+        self.log.debug("Stored cache entry for %s in %s", key, path)
+
+        if self.max_size is not None:
+            if self.size is None:
+                self.size = sum(size for (_, size, _) in self.entries())
+            else:
+                self.size += os.path.getsize(path)
+
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        """Evict least recently used entries from cache, until cache is sufficiently below its maximum size."""
+        entries = sorted(self.entries(), key=lambda x: x[2])
+        self.size = sum(size for (_, size, _) in entries)
+
+        target = int(self.max_size * EVICTION_TARGET)
+        self.log.info("Evicting cache entries in %s to reduce size from %d to %d bytes", self.path, self.size, target)
+        for path, _, _ in entries:
+            if self.size <= target:
+                break
+            if self.remove(path):
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        """Remove all entries from cache."""
+        for path, _, _ in self.entries():
+            self.remove(path)
+        self.size = 0
+
+
+def persistent_cache(name):
+    """
+    Return persistent cache with specified name, or None if no location for persistent caches was configured.
+
+    :param name: name of the cache, which determines the subdirectory of the cache path that is used
+    """
+    # build options may not be initialised yet (e.g. when parsing easyconfig files in scripts)
+    cachepath = build_option('cachepath', default=None)
+    if not cachepath:
+        return None
+
+    path = os.path.join(cachepath, name)
+    max_size = build_option('cache_max_size', default=None)
+    if max_size is not None:
+        # maximum size is specified in MB
+        max_size = int(max_size * 1024 * 1024)
+
+    cache = _persistent_caches.get(path)
+    if cache is None or cache.max_size != max_size:
+        cache = FileCache(path, max_size=max_size)
+        _persistent_caches[path] = cache
+
+    return cache
@@ -90,6 +90,9 @@ def mk_full_default_path(name, prefix=DEFAULT_PREFIX):
 BUILD_OPTIONS_CMDLINE = {
     None: [
         'aggregate_regtest',
+        'cache_max_size',
+        'cache_source_trees_max_size',
+        'cachepath',
         'download_timeout',
         'dump_test_report',
         'easyblock',
@@ -114,12 +117,17 @@ BUILD_OPTIONS_CMDLINE = {
         'job_output_dir',
         'job_polling_interval',
         'job_target_resource',
+        'max_downloads_per_host',
         'modules_footer',
         'modules_header',
         'mpi_cmd_template',
         'only_blocks',
         'optarch',
         'parallel',
+        'parallel_checksums',
+        'parallel_downloads',
+        'parallel_extract',
+        'parallel_parse',
         'rpath_filter',
         'regtest_output_dir',
         'skip',
@@ -133,6 +141,7 @@ BUILD_OPTIONS_CMDLINE = {
     False: [
         'add_dummy_to_minimal_toolchains',
         'allow_modules_tool_mismatch',
+        'cache_source_trees',
         'consider_archived_easyconfigs',
         'debug',
         'debug_lmod',
@@ -145,6 +154,9 @@ BUILD_OPTIONS_CMDLINE = {
         'hidden',
         'install_latest_eb_release',
         'minimal_toolchains',
+        'module_command_shell',
+        'module_file_evaluator',
+        'module_files_index',
         'module_only',
         'package',
         'read_only_installdir',
@@ -154,6 +166,7 @@ BUILD_OPTIONS_CMDLINE = {
         'sequential',
         'set_gid_bit',
         'skip_test_cases',
+        'source_store',
         'sticky_bit',
         'upload_test_report',
         'update_modules_tool_cache',
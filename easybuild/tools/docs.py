@@ -48,9 +48,8 @@ from vsc.utils.missing import nub
 from easybuild.framework.easyconfig.default import DEFAULT_CONFIG, HIDDEN, sorted_categories
 from easybuild.framework.easyblock import EasyBlock
 from easybuild.framework.easyconfig.constants import EASYCONFIG_CONSTANTS
-from easybuild.framework.easyconfig.easyconfig import EasyConfig, get_easyblock_class, process_easyconfig
+from easybuild.framework.easyconfig.easyconfig import EasyConfig, get_easyblock_class, process_easyconfigs
 from easybuild.framework.easyconfig.licenses import EASYCONFIG_LICENSES_DICT
-from easybuild.framework.easyconfig.parser import EasyConfigParser
 from easybuild.framework.easyconfig.templates import TEMPLATE_NAMES_CONFIG, TEMPLATE_NAMES_EASYCONFIG
 from easybuild.framework.easyconfig.templates import TEMPLATE_NAMES_LOWER, TEMPLATE_NAMES_LOWER_TEMPLATE
 from easybuild.framework.easyconfig.templates import TEMPLATE_NAMES_EASYBLOCK_RUN_STEP, TEMPLATE_CONSTANTS
@@ -536,21 +535,33 @@ def list_software(output_format=FORMAT_TXT, detailed=False, only_installed=False
     silent = build_option('silent')
 
     ec_paths = find_matching_easyconfigs('*', '*', build_option('robot_path') or [])
-    ecs = []
-    cnt = len(ec_paths)
-    for idx, ec_path in enumerate(ec_paths):
-        # full EasyConfig instance is only required when module name is needed
-        # this is significantly slower (5-10x) than a 'shallow' parse via EasyConfigParser
-        if only_installed:
-            ec = process_easyconfig(ec_path, validate=False, parse_only=True)[0]['ec']
-        else:
-            ec = EasyConfigParser(filename=ec_path).get_config_dict()
 
-        ecs.append(ec)
+    def report_progress(idx, cnt):
+        """Report progress on processing easyconfig files."""
         print_msg('\r', prefix=False, newline=False, silent=silent)
-        print_msg("Processed %d/%d easyconfigs..." % (idx+1, cnt), newline=False, silent=silent)
+        print_msg("Processed %d/%d easyconfigs..." % (idx, cnt), newline=False, silent=silent)
+
+    # full EasyConfig instance is only required when module name is needed
+    # this is significantly slower (5-10x) than a 'shallow' parse via EasyConfigParser
+    if only_installed:
+        processed = process_easyconfigs(ec_paths, progress=report_progress, validate=False, parse_only=True)
+    else:
+        processed = process_easyconfigs(ec_paths, shallow=True, progress=report_progress)
     print_msg('', prefix=False, silent=silent)
 
+    ecs, errors = [], []
+    for ec_path, res, err in processed:
+        if err is None:
+            if only_installed:
+                ecs.append(res[0]['ec'])
+            else:
+                ecs.append(res)
+        else:
+            errors.append("%s: %s" % (ec_path, err))
+
+    if errors:
+        raise EasyBuildError("Failed to process %d easyconfig files:\n%s", len(errors), '\n'.join(errors))
+
     software = {}
     for ec in ecs:
         software.setdefault(ec['name'], [])
@@ -36,24 +36,35 @@ Set of file tools.
 :author: Sotiris Fragkiskos (NTUA, CERN)
 :author: Davide Vanzo (ACCRE, Vanderbilt University)
 """
+import bz2
+import errno
+import fcntl
 import fileinput
 import glob
 import hashlib
+import httplib
+import multiprocessing
 import os
 import re
 import shutil
 import stat
 import sys
+import tarfile
 import tempfile
+import threading
 import time
 import urllib2
+import urlparse
+import zipfile
 import zlib
+from multiprocessing.pool import ThreadPool
 from vsc.utils import fancylogger
 from vsc.utils.missing import nub
 from xml.etree import ElementTree
 
 # import build_log must stay, to use of EasyBuildLog
 from easybuild.tools.build_log import EasyBuildError, dry_run_msg, print_msg
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.config import build_option
 from easybuild.tools import run
 
@@ -103,16 +114,100 @@ STRING_ENCODING_CHARMAP = {
 
 # default checksum for source and patch files
 DEFAULT_CHECKSUM = 'md5'
+# size of blocks (in bytes) that are read when computing multiple checksums in a single pass (cfr. compute_checksums)
+CHECKSUM_BLOCK_SIZE = 16 * 1024 * 1024
+
+# size of chunks (in bytes) used when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# suffix for file that holds (partially) downloaded data, which is renamed into place once the download is complete
+DOWNLOAD_PARTIAL_SUFFIX = '.part'
+# delay (in seconds) before retrying a failed download, doubled after every failed attempt
+DOWNLOAD_RETRY_BACKOFF = 1
+# default maximum number of concurrent downloads from a single host
+DEFAULT_MAX_DOWNLOADS_PER_HOST = 2
 
 # map of checksum types to checksum functions
 CHECKSUM_FUNCTIONS = {
     'md5': lambda p: calc_block_checksum(p, hashlib.md5()),
     'sha1': lambda p: calc_block_checksum(p, hashlib.sha1()),
+    'sha256': lambda p: calc_block_checksum(p, hashlib.sha256()),
     'adler32': lambda p: calc_block_checksum(p, ZlibChecksum(zlib.adler32)),
     'crc32': lambda p: calc_block_checksum(p, ZlibChecksum(zlib.crc32)),
     'size': lambda p: os.path.getsize(p),
 }
 
+# map of checksum types to functions that create a checksum object (with hashlib interface) of that type
+CHECKSUM_ALGORITHMS = {
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha256': hashlib.sha256,
+    'adler32': lambda: ZlibChecksum(zlib.adler32),
+    'crc32': lambda: ZlibChecksum(zlib.crc32),
+}
+
+# extract commands for known archive suffixes (cfr. extract_cmd)
+EXTRACT_CMDS = {
+    # gzipped or gzipped tarball
+    '.gtgz':    "tar xzf %(filepath)s",
+    '.gz':      "gunzip -c %(filepath)s > %(target)s",
+    '.tar.gz':  "tar xzf %(filepath)s",
+    '.tgz':     "tar xzf %(filepath)s",
+    # bzipped or bzipped tarball
+    '.bz2':     "bunzip2 -c %(filepath)s > %(target)s",
+    '.tar.bz2': "tar xjf %(filepath)s",
+    '.tb2':     "tar xjf %(filepath)s",
+    '.tbz':     "tar xjf %(filepath)s",
+    '.tbz2':    "tar xjf %(filepath)s",
+    # xzipped or xzipped tarball
+    '.tar.xz':  "unxz %(filepath)s --stdout | tar x",
+    '.txz':     "unxz %(filepath)s --stdout | tar x",
+    '.xz':      "unxz %(filepath)s",
+    # tarball
+    '.tar':     "tar xf %(filepath)s",
+    # zip file
+    '.zip':     "unzip -qq %(filepath)s",
+    # iso file
+    '.iso':     "7z x %(filepath)s",
+    # tar.Z: using compress (LZW)
+    '.tar.z':   "tar xZf %(filepath)s",
+}
+# extract commands to use instead when existing files should be overwritten
+EXTRACT_CMDS_OVERWRITE = {
+    '.zip':     "unzip -qq -o %(filepath)s",
+}
+
+# compression type and archive type for suffixes that are handled by the built-in extraction engine;
+# files with any other suffix are extracted using the command provided by extract_cmd
+EXTRACT_ENGINE_TYPES = {
+    '.gtgz':    ('gzip', 'tar'),
+    '.gz':      ('gzip', None),
+    '.tar.gz':  ('gzip', 'tar'),
+    '.tgz':     ('gzip', 'tar'),
+    '.bz2':     ('bzip2', None),
+    '.tar.bz2': ('bzip2', 'tar'),
+    '.tb2':     ('bzip2', 'tar'),
+    '.tbz':     ('bzip2', 'tar'),
+    '.tbz2':    ('bzip2', 'tar'),
+    '.tar.xz':  ('xz', 'tar'),
+    '.txz':     ('xz', 'tar'),
+    '.tar':     (None, 'tar'),
+    '.zip':     (None, 'zip'),
+}
+# commands that decompress a file to stdout using multiple threads, per compression type (used if available)
+PARALLEL_DECOMPRESS_CMDS = {
+    'bzip2': "pbzip2 -dc %s",
+    'gzip': "pigz -dc %s",
+    'xz': "xz -T0 -dc %s",
+}
+# size of chunks (in bytes) of compressed data that are decompressed at once when extracting in-process
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+
+# default number of threads to use for copying files when cloning a directory (cfr. clone_dir)
+DEFAULT_CLONE_THREADS = 8
+
+# checksums of files computed in this session, indexed by file identity (cfr. det_checksum_cache_key)
+_checksums_cache = {}
+
 
 class ZlibChecksum(object):
     """
@@ -133,6 +228,91 @@ class ZlibChecksum(object):
         return '0x%s' % (self.checksum & 0xffffffff)
 
 
+class DecompressedFile(object):
+    """
+    Read-only file-like object that provides the contents of a (gzip or bzip2) compressed file,
+    which are decompressed on the fly; files that consist of multiple concatenated compressed streams
+    (as produced by pigz or pbzip2 for example) are supported
+    """
+    def __init__(self, path, compression=None):
+        """
+        :param path: path to compressed file
+        :param compression: type of compression ('gzip', 'bzip2', or None for an uncompressed file)
+        """
+        self.name = path
+        self.compression = compression
+        self.handle = open(path, 'rb')
+        self.decompressor = self._new_decompressor()
+        self.stream_idx = 0
+        self.stream_out = 0
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _new_decompressor(self):
+        """Create decompressor object for a (next) compressed stream."""
+        if self.compression == 'gzip':
+            # 16 + MAX_WBITS: expect gzip header and trailer
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.compression == 'bzip2':
+            return bz2.BZ2Decompressor()
+        elif self.compression is None:
+            return None
+        else:
+            raise EasyBuildError("Unknown compression type for %s: %s", self.name, self.compression)
+
+    def _decompress(self, data):
+        """Decompress specified chunk of data, which may span multiple compressed streams."""
+        if self.decompressor is None:
+            return data
+
+        res = []
+        while data:
+            try:
+                out = self.decompressor.decompress(data)
+                data = self.decompressor.unused_data
+                res.append(out)
+                self.stream_out += len(out)
+            except EOFError:
+                # end of (bzip2) stream was reached at the end of the previous chunk of data
+                pass
+            except (IOError, zlib.error), err:
+                # trailing garbage after a complete stream is ignored, just like gunzip/bunzip2 do
+                if self.stream_idx > 0 and self.stream_out == 0:
+                    _log.warning("Ignoring trailing garbage in %s: %s", self.name, err)
+                    self.eof = True
+                    break
+                raise IOError("Failed to decompress %s: %s" % (self.name, err))
+
+            if data:
+                self.decompressor = self._new_decompressor()
+                self.stream_idx += 1
+                self.stream_out = 0
+
+        return ''.join(res)
+
+    def read(self, size=-1):
+        """Read (at most) specified number of bytes of decompressed data (or everything if size is negative)."""
+        while not self.eof and (size < 0 or len(self.buf) - self.pos < size):
+            data = self.handle.read(EXTRACT_CHUNK_SIZE)
+            if data:
+                # avoid copying the buffer for every read, only drop data that was already read when refilling it
+                self.buf = self.buf[self.pos:] + self._decompress(data)
+                self.pos = 0
+            else:
+                self.eof = True
+
+        if size < 0:
+            size = len(self.buf) - self.pos
+        res = self.buf[self.pos:self.pos + size]
+        self.pos += len(res)
+        return res
+
+    def close(self):
+        """Close compressed file."""
+        self.handle.close()
+
+
 def is_readable(path):
     """Return whether file at specified location exists and is readable."""
     try:
@@ -212,22 +392,174 @@ def extract_file(fn, dest, cmd=None, extra_options=None, overwrite=False, forced
     except OSError, err:
         raise EasyBuildError("Can't change to directory %s: %s", abs_dest, err)
 
-    if not cmd:
-        cmd = extract_cmd(fn, overwrite=overwrite)
-    else:
-        # complete command template with filename
-        cmd = cmd % fn
-    if not cmd:
-        raise EasyBuildError("Can't extract file %s with unknown filetype", fn)
+    # use built-in extraction engine, unless a custom extract command or extra options are specified,
+    # or only a dry run is being done
+    if cmd or extra_options or build_option('extended_dry_run') or not _extract_archive(fn, overwrite=overwrite):
+        if not cmd:
+            cmd = extract_cmd(fn, overwrite=overwrite)
+        else:
+            # complete command template with filename
+            cmd = cmd % fn
+        if not cmd:
+            raise EasyBuildError("Can't extract file %s with unknown filetype", fn)
 
-    if extra_options:
-        cmd = "%s %s" % (cmd, extra_options)
+        if extra_options:
+            cmd = "%s %s" % (cmd, extra_options)
 
-    run.run_cmd(cmd, simple=True, force_in_dry_run=forced)
+        run.run_cmd(cmd, simple=True, force_in_dry_run=forced)
 
     return find_base_dir()
 
 
+def _safe_tar_members(tar, fn):
+    """
+    Yield members of specified tarball, with the same treatment of unsafe paths as GNU tar:
+    leading '/' are stripped from member names, members with '..' in their path are refused.
+    """
+    for member in tar:
+        if '..' in member.name.split('/'):
+            raise EasyBuildError("Refusing to extract member %s of %s: path contains '..'", member.name, fn)
+        member.name = member.name.lstrip('/')
+        if member.islnk():
+            member.linkname = member.linkname.lstrip('/')
+        if member.name:
+            yield member
+
+
+def _extract_zip(fn):
+    """Extract zip file in current working directory in-process, retaining permissions and symbolic links."""
+    try:
+        zip_file = zipfile.ZipFile(fn)
+        try:
+            dir_modes = []
+            for info in zip_file.infolist():
+                path = zip_file.extract(info)
+                # permissions are only available for zip files created on Unix systems
+                mode = info.external_attr >> 16
+                if info.create_system == 3 and mode:
+                    if stat.S_ISLNK(mode):
+                        # zipfile extracts a symbolic link as a file containing the link target
+                        link_target = zip_file.read(info)
+                        os.remove(path)
+                        os.symlink(link_target, path)
+                    elif os.path.isdir(path):
+                        # permissions of directories are set last, in case they are read-only
+                        dir_modes.append((path, stat.S_IMODE(mode)))
+                    else:
+                        os.chmod(path, stat.S_IMODE(mode))
+            for path, mode in reversed(dir_modes):
+                os.chmod(path, mode)
+        finally:
+            zip_file.close()
+    except (zipfile.BadZipfile, IOError, OSError), err:
+        raise EasyBuildError("Failed to extract %s: %s", fn, err)
+
+
+def _extract_archive(fn, overwrite=False):
+    """
+    Extract file at specified path in current working directory, using the built-in extraction engine:
+    a parallel decompression tool (pigz, pbzip2, xz -T0) is used if it is available,
+    otherwise (compressed) tarballs and zip files are extracted in-process, using the tarfile/zipfile modules.
+
+    :param fn: path to file to extract
+    :param overwrite: overwrite existing unpacked file
+    :return: True if file was extracted, False if it can't be handled (and extract_cmd should be used instead)
+    """
+    filename = os.path.basename(fn)
+    ext = det_archive_suffix(filename)
+    compression, archive_type = EXTRACT_ENGINE_TYPES.get(ext.lower(), (None, None))
+    # same name for decompressed file as in extract_cmd
+    target = filename.rstrip(ext)
+
+    decompress_cmd = PARALLEL_DECOMPRESS_CMDS.get(compression)
+    if decompress_cmd and which(decompress_cmd.split(' ')[0]):
+        if archive_type == 'tar':
+            cmd = "%s | tar x" % (decompress_cmd % fn)
+        else:
+            cmd = "%s > %s" % (decompress_cmd % fn, target)
+        run.run_cmd(cmd, simple=True)
+
+    elif archive_type == 'tar' and compression in [None, 'gzip', 'bzip2']:
+        _log.debug("Extracting %s in-process", fn)
+        try:
+            tar_file = DecompressedFile(fn, compression=compression)
+            try:
+                tar = tarfile.open(fileobj=tar_file, mode='r|')
+                tar.extractall(members=_safe_tar_members(tar, fn))
+                tar.close()
+            finally:
+                tar_file.close()
+        except (tarfile.TarError, IOError, OSError), err:
+            raise EasyBuildError("Failed to extract %s: %s", fn, err)
+
+    elif archive_type is None and compression in ['gzip', 'bzip2']:
+        _log.debug("Decompressing %s in-process to %s", fn, target)
+        try:
+            in_file = DecompressedFile(fn, compression=compression)
+            try:
+                out_file = open(target, 'wb')
+                shutil.copyfileobj(in_file, out_file, EXTRACT_CHUNK_SIZE)
+                out_file.close()
+            finally:
+                in_file.close()
+        except (IOError, OSError), err:
+            raise EasyBuildError("Failed to decompress %s to %s: %s", fn, target, err)
+
+    elif archive_type == 'zip' and not which('unzip'):
+        _log.debug("Extracting %s in-process, since unzip is not available", fn)
+        _extract_zip(fn)
+
+    else:
+        return False
+
+    return True
+
+
+def _extract_file_job(job):
+    """Extract file in worker process; returns tuple with base directory and error message (if any)."""
+    fn, dest, extra_options, overwrite = job
+    try:
+        return (extract_file(fn, dest, extra_options=extra_options, overwrite=overwrite), None)
+    except EasyBuildError, err:
+        return (None, err.msg)
+
+
+def extract_files(extractions, nworkers=None, overwrite=False):
+    """
+    Extract multiple files concurrently, using a pool of worker processes
+    (extract_file changes the current working directory, so threads can't be used).
+
+    :param extractions: list of (path to file, location to extract to, extra options) tuples, cfr. extract_file
+    :param nworkers: number of processes to use (default: value for --parallel-extract)
+    :param overwrite: overwrite existing unpacked files
+    :return: list of (base directory, error message) tuples, in the same order as the specified files
+    """
+    if nworkers is None:
+        nworkers = build_option('parallel_extract') or 1
+
+    jobs = [(fn, dest, extra_options, overwrite) for (fn, dest, extra_options) in extractions]
+    nworkers = max(1, min(nworkers, len(jobs)))
+    _log.info("Extracting %d files using %d processes", len(jobs), nworkers)
+
+    cwd = os.getcwd()
+    if nworkers == 1:
+        results = [_extract_file_job(job) for job in jobs]
+        os.chdir(cwd)
+    else:
+        pool = multiprocessing.Pool(nworkers)
+        try:
+            results = pool.map(_extract_file_job, jobs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    for (fn, dest, _), (_, err) in zip(extractions, results):
+        if err is not None:
+            _log.warning("Failed to extract %s to %s: %s", fn, dest, err)
+
+    return results
+
+
 def which(cmd, retain_all=False):
     """
     Return (first) path in $PATH for specified command, or None if command is not found
@@ -324,8 +656,185 @@ def derive_alt_pypi_url(url):
     return alt_pypi_url
 
 
-def download_file(filename, url, path, forced=False):
-    """Download a file from the given URL, to the specified path."""
+def _det_content_range_start(content_range):
+    """Determine start offset from value of a Content-Range HTTP header (e.g. 'bytes 100-199/200')."""
+    res = None
+    if content_range:
+        regex = re.match(r'^\s*bytes\s+(?P<start>[0-9]+)-', content_range)
+        if regex:
+            res = int(regex.group('start'))
+    return res
+
+
+def _open_partial_download(path):
+    """
+    Open (and lock) file that holds partially downloaded data for the specified path.
+
+    The file is locked, so concurrent downloads to the same path (e.g. by other EasyBuild sessions) never write
+    to the same file; if it is locked already, a new file that is unique to this download is used instead
+    (which is removed when the download fails, since it can not be resumed).
+
+    :return: (handle, path, resumable) tuple for opened (and locked) file
+    """
+    partial_path = path + DOWNLOAD_PARTIAL_SUFFIX
+    handle = open(partial_path, 'a+b')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # make sure the locked file was not renamed into place (or removed) by another download in the meantime
+        if os.stat(partial_path).st_ino == os.fstat(handle.fileno()).st_ino:
+            return (handle, partial_path, True)
+    except (IOError, OSError) as err:
+        if getattr(err, 'errno', None) not in [errno.EACCES, errno.EAGAIN, errno.ENOENT]:
+            handle.close()
+            raise
+    handle.close()
+
+    # create file that is unique to this download with default permissions (0666, minus umask), like regular files,
+    # since it is renamed into place when the download completes (tempfile.mkstemp only allows access for the owner)
+    flags = os.O_RDWR | os.O_CREAT | os.O_EXCL | getattr(os, 'O_NOFOLLOW', 0)
+    prefix = '%s.%d.%d.' % (path, os.getpid(), threading.current_thread().ident)
+    cnt = 0
+    while True:
+        partial_path = prefix + str(cnt) + DOWNLOAD_PARTIAL_SUFFIX
+        try:
+            fd = os.open(partial_path, flags, 0666)
+            break
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+            cnt += 1
+
+    _log.debug("%s is locked by another download, using %s instead", path + DOWNLOAD_PARTIAL_SUFFIX, partial_path)
+    return (os.fdopen(fd, 'a+b'), partial_path, False)
+
+
+def _stream_download(filename, url, path, timeout, forced=False, progress=None, checksum_types=None):
+    """
+    Stream data from given URL to a temporary file next to the specified path, and rename it into place.
+
+    If a partially downloaded file is available, the download is resumed using an HTTP Range request;
+    data that was downloaded before is discarded if the server does not honor the requested range.
+    Partially downloaded data is discarded if the server reports that the URL is not available (4xx response).
+
+    Checksums of the specified types are computed while downloading, and stored in the cache of checksums.
+
+    :return: True if data was written, False if writing was skipped because of (extended) dry run mode
+    """
+    handle, partial_path, resumable = _open_partial_download(path)
+    done = False
+    try:
+        res = _stream_download_to(handle, partial_path, filename, url, path, timeout, forced=forced,
+                                  progress=progress, checksum_types=checksum_types)
+        done = True
+    except urllib2.HTTPError as err:
+        if 400 <= err.code <= 499:
+            _log.debug("Discarding partially downloaded file %s (HTTP response code %s)", partial_path, err.code)
+            handle.truncate(0)
+        raise
+    finally:
+        # file is only unlocked when it is closed, after it was renamed into place (or discarded)
+        if not (done and res) and (not resumable or os.path.getsize(partial_path) == 0):
+            os.remove(partial_path)
+        handle.close()
+
+    return res
+
+
+def _stream_download_to(handle, partial_path, filename, url, path, timeout, forced=False, progress=None,
+                        checksum_types=None):
+    """
+    Stream data from given URL to specified (opened) file that holds partially downloaded data,
+    and rename it into place when the download is complete (see _stream_download).
+    """
+    handle.seek(0, os.SEEK_END)
+    offset = handle.tell()
+
+    # use custom HTTP header
+    headers = {'User-Agent': 'EasyBuild'}
+    if offset and urlparse.urlparse(url).scheme in ['http', 'https']:
+        headers['Range'] = 'bytes=%d-' % offset
+
+    # urllib2 does the right thing for http proxy setups, urllib does not!
+    url_fd = urllib2.urlopen(urllib2.Request(url, headers=headers), timeout=timeout)
+    try:
+        code = url_fd.getcode()
+        _log.debug('response code for given url %s: %s' % (url, code))
+
+        # early exit in 'dry run' mode
+        if not forced and build_option('extended_dry_run'):
+            dry_run_msg("file written: %s" % path, silent=build_option('silent'))
+            return False
+
+        info = url_fd.info()
+        if code == 206 and _det_content_range_start(info.get('Content-Range')) == offset:
+            _log.info("Resuming download of %s from %s at byte %d", filename, url, offset)
+        else:
+            if offset:
+                _log.debug("Discarding %d bytes of partially downloaded file %s", offset, partial_path)
+                handle.truncate(0)
+            offset = 0
+
+        total = info.get('Content-Length')
+        if total is not None:
+            total = offset + int(total)
+
+        checksum_types = [typ for typ in checksum_types or [] if typ in CHECKSUM_ALGORITHMS]
+        checksums = dict((typ, CHECKSUM_ALGORITHMS[typ]()) for typ in checksum_types)
+        if checksums and offset:
+            # data that was downloaded before must be taken into account for checksums too
+            handle.seek(0)
+            for block in iter(lambda: handle.read(DOWNLOAD_CHUNK_SIZE), ''):
+                for checksum in checksums.values():
+                    checksum.update(block)
+            handle.seek(0, os.SEEK_END)
+
+        # file is opened in append mode, so data is always written at the end
+        done = offset
+        while True:
+            chunk = url_fd.read(DOWNLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            handle.write(chunk)
+            for checksum in checksums.values():
+                checksum.update(chunk)
+            done += len(chunk)
+            if progress is not None:
+                progress(filename, done, total)
+        handle.flush()
+    finally:
+        url_fd.close()
+
+    if total is not None and done < total:
+        raise IOError("Incomplete download of %s, only got %d out of %d bytes" % (url, done, total))
+
+    # rename is atomic, so the target path never holds a partially downloaded file
+    os.rename(partial_path, path)
+    _log.debug("Downloaded %d bytes from %s to %s", done, url, path)
+
+    for typ, checksum in sorted(checksums.items()):
+        value = checksum.hexdigest()
+        _log.debug("%s checksum computed while downloading %s: %s", typ, path, value)
+        store_checksum(det_checksum_cache_key(path, typ), value)
+
+    return True
+
+
+def download_file(filename, url, path, forced=False, progress=None, checksum_types=None):
+    """
+    Download a file from the given URL, to the specified path.
+
+    Data is streamed to a temporary file in the target directory, which is renamed into place when complete.
+    An interrupted download is resumed on the next attempt (if the server supports it).
+
+    :param filename: name of the file being downloaded
+    :param url: URL to download file from
+    :param path: path to download file to
+    :param forced: force download in (extended) dry run mode
+    :param progress: callback function that is called with the filename, number of bytes downloaded so far,
+                     and total size (None if unknown) after every chunk of downloaded data
+    :param checksum_types: types of checksums to compute while downloading (default: only default checksum type),
+                           which are stored in the cache of checksums so compute_checksum doesn't rehash the file
+    """
 
     _log.debug("Trying to download %s from %s to %s", filename, url, path)
 
@@ -340,38 +849,42 @@ def download_file(filename, url, path, forced=False):
     basedir = os.path.dirname(path)
     mkdir(basedir, parents=True)
 
+    if checksum_types is None:
+        checksum_types = [DEFAULT_CHECKSUM]
+
     # try downloading, three times max.
     downloaded = False
     max_attempts = 3
     attempt_cnt = 0
 
-    # use custom HTTP header
-    url_req = urllib2.Request(url, headers={'User-Agent': 'EasyBuild'})
-
     while not downloaded and attempt_cnt < max_attempts:
         try:
-            # urllib2 does the right thing for http proxy setups, urllib does not!
-            url_fd = urllib2.urlopen(url_req, timeout=timeout)
-            _log.debug('response code for given url %s: %s' % (url, url_fd.getcode()))
-            write_file(path, url_fd.read(), forced=forced)
+            _stream_download(filename, url, path, timeout, forced=forced, progress=progress,
+                             checksum_types=checksum_types)
             _log.info("Downloaded file %s from url %s to %s" % (filename, url, path))
             downloaded = True
-            url_fd.close()
         except urllib2.HTTPError as err:
-            if 400 <= err.code <= 499:
+            # partially downloaded data is discarded on 4xx errors (see _stream_download)
+            if err.code == 416:
+                _log.warning("Requested range not satisfiable for %s, restarting download from scratch", url)
+                attempt_cnt += 1
+            elif 400 <= err.code <= 499:
                 _log.warning("URL %s was not found (HTTP response code %s), not trying again" % (url, err.code))
                 break
             else:
                 _log.warning("HTTPError occured while trying to download %s to %s: %s" % (url, path, err))
                 attempt_cnt += 1
-        except IOError as err:
-            _log.warning("IOError occurred while trying to download %s to %s: %s" % (url, path, err))
+        except (IOError, httplib.HTTPException) as err:
+            _log.warning("%s occurred while trying to download %s to %s: %s", type(err).__name__, url, path, err)
             attempt_cnt += 1
         except Exception, err:
             raise EasyBuildError("Unexpected error occurred when trying to download %s to %s: %s", url, path, err)
 
         if not downloaded and attempt_cnt < max_attempts:
-            _log.info("Attempt %d of downloading %s to %s failed, trying again..." % (attempt_cnt, url, path))
+            backoff = DOWNLOAD_RETRY_BACKOFF * 2 ** (attempt_cnt - 1)
+            _log.info("Attempt %d of downloading %s to %s failed, trying again in %s seconds...",
+                      attempt_cnt, url, path, backoff)
+            time.sleep(backoff)
 
     if downloaded:
         _log.info("Successful download of file %s from url %s to path %s" % (filename, url, path))
@@ -381,6 +894,87 @@ def download_file(filename, url, path, forced=False):
         return None
 
 
+def _download_files_job(job):
+    """
+    Download a single file, trying each of the specified URLs in turn (for use in download_files).
+
+    The number of concurrent downloads from a particular host is limited by the semaphores in host_slots.
+    """
+    idx, filename, urls, path, host_slots, progress, checksum_types = job
+    res = None
+    for url in urls:
+        with host_slots[urlparse.urlparse(url).netloc]:
+            res = download_file(filename, url, path, progress=progress, checksum_types=checksum_types)
+        if res:
+            break
+    return (idx, filename, res)
+
+
+def download_files(downloads, max_workers=None, max_per_host=None, progress=None, checksum_types=None):
+    """
+    Download multiple files concurrently.
+
+    :param downloads: list of (filename, urls, path) tuples; the URLs for a particular file are tried in order,
+                      until downloading the file from one of them succeeds
+    :param max_workers: maximum number of concurrent downloads (default: value for --parallel-downloads)
+    :param max_per_host: maximum number of concurrent downloads from a single host
+                         (default: value for --max-downloads-per-host)
+    :param progress: progress callback function, see download_file
+    :param checksum_types: types of checksums to compute while downloading, see download_file
+    :return: list with path of each downloaded file (None for files that could not be downloaded), in order
+    """
+    if max_workers is None:
+        max_workers = build_option('parallel_downloads') or 1
+    if max_per_host is None:
+        max_per_host = build_option('max_downloads_per_host') or DEFAULT_MAX_DOWNLOADS_PER_HOST
+
+    # only download each target path once, even if it is listed multiple times
+    jobs, job_idxs, path_idxs, host_cnts = [], [], {}, {}
+    host_slots = {}
+    for filename, urls, path in downloads:
+        if isinstance(urls, basestring):
+            urls = [urls]
+        if path in path_idxs:
+            job_idxs.append(path_idxs[path])
+            continue
+
+        hosts = [urlparse.urlparse(url).netloc for url in urls]
+        for host in hosts:
+            if host not in host_slots:
+                host_slots[host] = threading.BoundedSemaphore(max_per_host)
+
+        # rank downloads per host, so that downloads from different hosts are interleaved,
+        # which avoids that all workers are waiting for the same host
+        first_host = hosts[0] if hosts else None
+        host_cnts[first_host] = host_cnts.get(first_host, 0) + 1
+        rank = host_cnts[first_host]
+
+        path_idxs[path] = len(jobs)
+        job_idxs.append(len(jobs))
+        jobs.append((rank, (len(jobs), filename, urls, path, host_slots, progress, checksum_types)))
+
+        # create target directories up front, to avoid that workers race to create them
+        mkdir(os.path.dirname(path), parents=True)
+
+    results = [None] * len(jobs)
+    if jobs:
+        jobs.sort()
+        nworkers = max(1, min(max_workers, len(jobs)))
+        _log.info("Downloading %d files using %d workers (max. %d per host)", len(jobs), nworkers, max_per_host)
+
+        pool = ThreadPool(nworkers)
+        try:
+            job_results = pool.imap_unordered(_download_files_job, [job for (_, job) in jobs])
+            for cnt, (idx, filename, res) in enumerate(job_results):
+                results[idx] = res
+                _log.info("[%d/%d] download of %s %s", cnt + 1, len(jobs), filename, 'done' if res else 'FAILED')
+        finally:
+            pool.close()
+            pool.join()
+
+    return [results[idx] for idx in job_idxs]
+
+
 def find_easyconfigs(path, ignore_dirs=None):
     """
     Find .eb easyconfig files in path
@@ -498,23 +1092,127 @@ def compute_checksum(path, checksum_type=DEFAULT_CHECKSUM):
     Compute checksum of specified file.
 
     :param path: Path of file to compute checksum for
-    :param checksum_type: Type of checksum ('adler32', 'crc32', 'md5' (default), 'sha1', 'size')
+    :param checksum_type: Type of checksum ('adler32', 'crc32', 'md5' (default), 'sha1', 'sha256', 'size')
     """
     if checksum_type not in CHECKSUM_FUNCTIONS:
         raise EasyBuildError("Unknown checksum type (%s), supported types are: %s",
                              checksum_type, CHECKSUM_FUNCTIONS.keys())
 
+    # only actual checksums are cached, determining the size of a file is cheap
+    cache_key = None
+    if checksum_type in CHECKSUM_ALGORITHMS:
+        cache_key = det_checksum_cache_key(path, checksum_type)
+        checksum = load_checksum(cache_key)
+        if checksum is not None:
+            _log.debug("Using cached %s checksum for %s: %s", checksum_type, path, checksum)
+            return checksum
+
     try:
         checksum = CHECKSUM_FUNCTIONS[checksum_type](path)
     except IOError, err:
         raise EasyBuildError("Failed to read %s: %s", path, err)
     except MemoryError, err:
         _log.warning("A memory error occured when computing the checksum for %s: %s" % (path, err))
-        checksum = 'dummy_checksum_due_to_memory_error'
+        return 'dummy_checksum_due_to_memory_error'
+
+    # don't cache checksum if file was changed while computing it
+    if cache_key is not None and cache_key == det_checksum_cache_key(path, checksum_type):
+        store_checksum(cache_key, checksum)
 
     return checksum
 
 
+def compute_checksums(path, checksum_types):
+    """
+    Compute checksums of specified types for specified file, reading the file only once.
+
+    Cached checksums are used where available, and computed checksums are cached (see compute_checksum).
+
+    :param path: Path of file to compute checksums for
+    :param checksum_types: list of checksum types (see compute_checksum)
+    :return: dict with checksum for each of the specified checksum types
+    """
+    res = {}
+    todo = {}
+    for checksum_type in nub(checksum_types):
+        if checksum_type in CHECKSUM_ALGORITHMS:
+            cache_key = det_checksum_cache_key(path, checksum_type)
+            checksum = load_checksum(cache_key)
+            if checksum is None:
+                todo[checksum_type] = cache_key
+            else:
+                _log.debug("Using cached %s checksum for %s: %s", checksum_type, path, checksum)
+                res[checksum_type] = checksum
+        else:
+            res[checksum_type] = compute_checksum(path, checksum_type=checksum_type)
+
+    if todo:
+        algorithms = dict((checksum_type, CHECKSUM_ALGORITHMS[checksum_type]()) for checksum_type in todo)
+        try:
+            handle = open(path, 'rb')
+            try:
+                for block in iter(lambda: handle.read(CHECKSUM_BLOCK_SIZE), ''):
+                    for algorithm in algorithms.values():
+                        algorithm.update(block)
+            finally:
+                handle.close()
+        except IOError, err:
+            raise EasyBuildError("Failed to read %s: %s", path, err)
+
+        for checksum_type, algorithm in sorted(algorithms.items()):
+            res[checksum_type] = algorithm.hexdigest()
+            # don't cache checksum if file was changed while computing it
+            cache_key = todo[checksum_type]
+            if cache_key is not None and cache_key == det_checksum_cache_key(path, checksum_type):
+                store_checksum(cache_key, res[checksum_type])
+
+    return res
+
+
+def det_checksum_cache_key(path, checksum_type):
+    """
+    Determine key for caching checksum of specified type for file at specified path, or None if file is not there.
+
+    The key is composed of device, inode, size and modification time (in nanoseconds) of the file,
+    so any change to the file results in a different key.
+    """
+    try:
+        st = os.stat(path)
+    except OSError, err:
+        _log.debug("Failed to stat %s, so not caching checksum: %s", path, err)
+        return None
+
+    return '%s:%s:%s:%s:%s' % (st.st_dev, st.st_ino, st.st_size, int(st.st_mtime * 10 ** 9), checksum_type)
+
+
+def load_checksum(key):
+    """
+    Load checksum for specified key (cfr. det_checksum_cache_key) from cache of checksums computed in this session,
+    or from persistent cache of checksums; returns None if no cached checksum is available.
+    """
+    if key is None:
+        return None
+
+    checksum = _checksums_cache.get(key)
+    if checksum is None:
+        cache = persistent_cache('checksums')
+        if cache is not None:
+            checksum = cache.load(key)
+            if checksum is not None:
+                _checksums_cache[key] = checksum
+
+    return checksum
+
+
+def store_checksum(key, checksum):
+    """Store checksum for specified key (cfr. det_checksum_cache_key) in cache(s) of checksums."""
+    if key is not None:
+        _checksums_cache[key] = checksum
+        cache = persistent_cache('checksums')
+        if cache is not None:
+            cache.store(key, checksum)
+
+
 def calc_block_checksum(path, algorithm):
     """Calculate a checksum of a file by reading it into blocks"""
     # We pick a blocksize of 16 MB: it's a multiple of the internal
@@ -572,6 +1270,55 @@ def verify_checksum(path, checksums):
     return True
 
 
+def _verify_checksum_job(job):
+    """Verify checksum(s) for specified file (for use in verify_checksums)."""
+    path, checksums = job
+    try:
+        if verify_checksum(path, checksums):
+            res = None
+        else:
+            res = "checksum mismatch"
+    except EasyBuildError, err:
+        res = err.msg
+
+    return (path, checksums, res)
+
+
+def verify_checksums(checksum_specs, nworkers=None):
+    """
+    Verify checksums for multiple files concurrently, using a pool of threads.
+
+    Hashing large blocks of data releases the GIL, so checksums for different files are effectively
+    computed in parallel. All files are verified, even if verification of some of them fails.
+
+    :param checksum_specs: list of (path, checksums) tuples, cfr. verify_checksum
+    :param nworkers: number of threads to use (default: value for --parallel-checksums)
+    :return: list of (path, checksums, reason) tuples for files that failed checksum verification
+    """
+    if nworkers is None:
+        nworkers = build_option('parallel_checksums') or 1
+
+    checksum_specs = [spec for spec in checksum_specs if spec[1] is not None]
+    nworkers = max(1, min(nworkers, len(checksum_specs)))
+    _log.debug("Verifying checksums for %d files using %d threads", len(checksum_specs), nworkers)
+
+    if nworkers == 1:
+        results = [_verify_checksum_job(spec) for spec in checksum_specs]
+    else:
+        pool = ThreadPool(nworkers)
+        try:
+            results = pool.map(_verify_checksum_job, checksum_specs, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+
+    failed = [res for res in results if res[2] is not None]
+    for path, checksums, reason in failed:
+        _log.warning("Checksum verification for %s using %s failed: %s", path, checksums, reason)
+
+    return failed
+
+
 def find_base_dir():
     """
     Try to locate a possible new base directory
@@ -610,49 +1357,35 @@ def find_base_dir():
     return new_dir
 
 
-def extract_cmd(filepath, overwrite=False):
+def det_archive_suffix(filepath):
     """
-    Determines the file type of file at filepath, returns extract cmd based on file suffix
+    Determine suffix of specified file that identifies its file type, cfr. EXTRACT_CMDS
+    (longest suffix that matches, case insensitive)
     """
     filename = os.path.basename(filepath)
 
-    extract_cmds = {
-        # gzipped or gzipped tarball
-        '.gtgz':    "tar xzf %(filepath)s",
-        '.gz':      "gunzip -c %(filepath)s > %(target)s",
-        '.tar.gz':  "tar xzf %(filepath)s",
-        '.tgz':     "tar xzf %(filepath)s",
-        # bzipped or bzipped tarball
-        '.bz2':     "bunzip2 -c %(filepath)s > %(target)s",
-        '.tar.bz2': "tar xjf %(filepath)s",
-        '.tb2':     "tar xjf %(filepath)s",
-        '.tbz':     "tar xjf %(filepath)s",
-        '.tbz2':    "tar xjf %(filepath)s",
-        # xzipped or xzipped tarball
-        '.tar.xz':  "unxz %(filepath)s --stdout | tar x",
-        '.txz':     "unxz %(filepath)s --stdout | tar x",
-        '.xz':      "unxz %(filepath)s",
-        # tarball
-        '.tar':     "tar xf %(filepath)s",
-        # zip file
-        '.zip':     "unzip -qq -o %(filepath)s" if overwrite else "unzip -qq %(filepath)s",
-        # iso file
-        '.iso':     "7z x %(filepath)s",
-        # tar.Z: using compress (LZW)
-        '.tar.z':   "tar xZf %(filepath)s",
-    }
-
-    suffixes = sorted(extract_cmds.keys(), key=len, reverse=True)
+    suffixes = sorted(EXTRACT_CMDS.keys(), key=len, reverse=True)
     pat = r'(?P<ext>%s)$' % '|'.join([ext.replace('.', '\\.') for ext in suffixes])
     res = re.search(pat, filename, flags=re.IGNORECASE)
     if res:
-        ext = res.group('ext')
+        return res.group('ext')
     else:
         raise EasyBuildError('Unknown file type for file %s', filename)
 
+
+def extract_cmd(filepath, overwrite=False):
+    """
+    Determines the file type of file at filepath, returns extract cmd based on file suffix
+    """
+    filename = os.path.basename(filepath)
+
+    ext = det_archive_suffix(filename)
     target = filename.rstrip(ext)
 
-    cmd_tmpl = extract_cmds[ext.lower()]
+    if overwrite and ext.lower() in EXTRACT_CMDS_OVERWRITE:
+        cmd_tmpl = EXTRACT_CMDS_OVERWRITE[ext.lower()]
+    else:
+        cmd_tmpl = EXTRACT_CMDS[ext.lower()]
 
     return cmd_tmpl % {'filepath': filepath, 'target': target}
 
@@ -1417,3 +2150,91 @@ def copy_file(path, target_path, force_in_dry_run=False):
             _log.info("%s copied to %s", path, target_path)
         except OSError as err:
             raise EasyBuildError("Failed to copy %s to %s: %s", path, target_path, err)
+
+
+def _reflink_supported(path, target_path):
+    """Check whether files in specified directory can be cloned into target directory using copy-on-write."""
+    probe = None
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            if not os.path.islink(os.path.join(dirpath, filename)):
+                probe = os.path.join(dirpath, filename)
+                break
+        if probe is not None:
+            break
+
+    if probe is None or not which('cp'):
+        return False
+
+    probe_target = os.path.join(target_path, '.reflink_probe.%d' % os.getpid())
+    cmd = "cp --reflink=always %s %s" % (probe, probe_target)
+    (_, ec) = run.run_cmd(cmd, log_ok=False, log_all=False, simple=False, regexp=False)
+    if os.path.exists(probe_target):
+        os.remove(probe_target)
+
+    return ec == 0
+
+
+def _copy_file_job(job):
+    """Copy file in worker thread; returns error message (if any)."""
+    path, target_path = job
+    try:
+        shutil.copy2(path, target_path)
+        return None
+    except (IOError, OSError), err:
+        return "Failed to copy %s to %s: %s" % (path, target_path, err)
+
+
+def clone_dir(path, target_path, nworkers=None):
+    """
+    Clone contents of specified directory into target directory (which is created if it doesn't exist yet):
+    files are cloned using copy-on-write (reflinks) if the file system supports it,
+    otherwise they are copied using a pool of threads. Symbolic links are retained.
+
+    :param path: directory to clone
+    :param target_path: directory to clone contents into
+    :param nworkers: number of threads to use for copying files (default: DEFAULT_CLONE_THREADS)
+    """
+    if nworkers is None:
+        nworkers = DEFAULT_CLONE_THREADS
+
+    mkdir(target_path, parents=True)
+
+    if _reflink_supported(path, target_path):
+        _log.debug("Cloning %s to %s using copy-on-write", path, target_path)
+        run.run_cmd("cp -a --reflink=always %s/. %s" % (path, target_path), simple=True, log_all=True)
+        return
+
+    # create directories and symbolic links first, then copy files concurrently
+    dirs, files = [], []
+    try:
+        for dirpath, dirnames, filenames in os.walk(path):
+            target_dirpath = os.path.join(target_path, os.path.relpath(dirpath, path))
+            for name in dirnames + filenames:
+                src, dst = os.path.join(dirpath, name), os.path.join(target_dirpath, name)
+                if os.path.islink(src):
+                    os.symlink(os.readlink(src), dst)
+                elif os.path.isdir(src):
+                    os.mkdir(dst)
+                    dirs.append((src, dst))
+                else:
+                    files.append((src, dst))
+    except OSError, err:
+        raise EasyBuildError("Failed to clone %s to %s: %s", path, target_path, err)
+
+    _log.debug("Cloning %s to %s by copying %d files using %d threads", path, target_path, len(files), nworkers)
+    pool = ThreadPool(max(1, min(nworkers, len(files))))
+    try:
+        errors = [err for err in pool.map(_copy_file_job, files, chunksize=16) if err is not None]
+    finally:
+        pool.close()
+        pool.join()
+    if errors:
+        raise EasyBuildError("Failed to clone %s to %s: %s", path, target_path, '; '.join(errors))
+
+    # permissions and timestamps of directories are copied last (deepest first), since copying files changes them
+    try:
+        for src, dst in reversed(dirs):
+            shutil.copystat(src, dst)
+    except OSError, err:
+        raise EasyBuildError("Failed to clone %s to %s: %s", path, target_path, err)
@@ -0,0 +1,835 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+In-process evaluation of module files, for the subset of Tcl and Lua that is used in the module files
+generated by EasyBuild (see ModuleGeneratorTcl and ModuleGeneratorLua in easybuild.tools.module_generator).
+
+Evaluating a module file (in 'load' mode) yields the changes it makes to the environment,
+the $MODULEPATH extensions it makes and the modules it loads, without running the modules tool.
+An EasyBuildError is raised for module files that use unsupported constructs;
+the modules tool should be used for those instead.
+"""
+import os
+import re
+from vsc.utils import fancylogger
+
+from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.filetools import read_file
+
+
+_log = fancylogger.getLogger('tools.module_evaluator', fname=False)
+
+# memoized evaluations of module files
+# key: path to module file; value: ModuleFileEvaluation instance
+_evaluations = {}
+
+# module file statements that do not affect the environment, $MODULEPATH or the set of loaded modules
+TCL_IGNORED_CMDS = ['conflict', 'module-version', 'module-whatis', 'prereq', 'proc', 'puts', 'set-alias',
+                    'unset-alias']
+LUA_IGNORED_FUNCS = ['conflict', 'family', 'help', 'io.stderr:write', 'LmodMessage', 'prereq', 'set_alias',
+                     'unset_alias', 'whatis']
+
+TCL_VAR_NAME_REGEX = re.compile(r'[A-Za-z0-9_]+')
+
+LUA_KEYWORDS = ['and', 'else', 'elseif', 'end', 'false', 'if', 'local', 'nil', 'not', 'or', 'then', 'true']
+LUA_NAME_REGEX = re.compile(r'[A-Za-z_][A-Za-z0-9_]*([.:][A-Za-z_][A-Za-z0-9_]*)*')
+LUA_NUMBER_REGEX = re.compile(r'[0-9]+(\.[0-9]+)?')
+LUA_LONG_BRACKET_REGEX = re.compile(r'\[(=*)\[')
+LUA_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', '"': '"', "'": "'"}
+
+
+class ModuleFileEvaluation(object):
+    """Result of evaluating a module file."""
+
+    def __init__(self, path, loaded_modules, environ):
+        """
+        Create evaluation for specified module file.
+
+        :param path: path to module file
+        :param loaded_modules: list of modules that are loaded (used for 'is-loaded' conditions)
+        :param environ: environment to evaluate module file in (used to determine values of environment variables)
+        """
+        self.path = path
+        self.loaded_modules = loaded_modules
+        self.environ = environ
+
+        # changes to environment, in order: list of (action, name, value) tuples,
+        # with action one of 'setenv', 'unsetenv', 'prepend', 'append'
+        self.changes = []
+        # modules that are loaded/unloaded by this module file
+        self.loads = []
+        self.unloads = []
+        # $MODULEPATH extensions and loaded modules, including those in branches of conditions that were not taken
+        self.all_modpath_exts = []
+        self.all_loads = []
+
+        # results of checks that the evaluation depends on (used to check whether memoized evaluation can be reused)
+        # key: tuple with type of check and argument; value: result
+        self.inputs = {}
+
+        try:
+            st = os.stat(path)
+        except OSError, err:
+            raise EasyBuildError("Failed to determine modification time and size of %s: %s", path, err)
+        self.signature = (st.st_mtime, st.st_size)
+
+    @property
+    def modpath_exts(self):
+        """List of $MODULEPATH extensions made by this module file (in order of appearance)."""
+        return [value for (action, name, value) in self.changes if name == 'MODULEPATH' and action == 'prepend']
+
+    def check(self, typ, arg):
+        """Perform check of specified type with specified argument, and record the result."""
+        if typ == 'env':
+            res = self.environ.get(arg)
+        elif typ == 'is-loaded':
+            res = any(m == arg or m.startswith(arg + '/') for m in self.loaded_modules)
+        elif typ == 'isdir':
+            res = os.path.isdir(arg)
+        else:
+            raise EasyBuildError("Unknown type of check: %s", typ)
+
+        self.inputs[(typ, arg)] = res
+        return res
+
+    def is_valid(self, loaded_modules, environ):
+        """Check whether this evaluation is still valid for the module file, in specified context."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+
+        if (st.st_mtime, st.st_size) != self.signature:
+            return False
+
+        orig_loaded_modules, orig_environ = self.loaded_modules, self.environ
+        self.loaded_modules, self.environ = loaded_modules, environ
+        try:
+            res = all(self.check(typ, arg) == val for ((typ, arg), val) in self.inputs.items())
+        finally:
+            self.loaded_modules, self.environ = orig_loaded_modules, orig_environ
+
+        return res
+
+    def add_change(self, action, name, value, active):
+        """Record change to environment (only if active), and $MODULEPATH extensions (always)."""
+        if name == 'MODULEPATH' and action in ['prepend', 'append']:
+            self.all_modpath_exts.append(value)
+        if active:
+            self.changes.append((action, name, value))
+
+    def add_load(self, mod_name, active):
+        """Record load of specified module (only if active)."""
+        self.all_loads.append(mod_name)
+        if active:
+            self.loads.append(mod_name)
+
+    def add_unload(self, mod_name, active):
+        """Record unload of specified module (only if active)."""
+        if active:
+            self.unloads.append(mod_name)
+
+    def apply(self, environ):
+        """Return copy of specified environment (a dict), with the changes made by the module file applied to it."""
+        res = environ.copy()
+        for (action, name, value) in self.changes:
+            if action == 'setenv':
+                res[name] = value
+            elif action == 'unsetenv':
+                res.pop(name, None)
+            else:
+                paths = [p for p in res.get(name, '').split(os.pathsep) if p and p != value]
+                if action == 'prepend':
+                    paths.insert(0, value)
+                else:
+                    paths.append(value)
+                res[name] = os.pathsep.join(paths)
+        return res
+
+
+def _tcl_skip_quoted(txt, idx):
+    """Return index right after double-quoted part of Tcl code that starts at specified index."""
+    idx += 1
+    while idx < len(txt) and txt[idx] != '"':
+        if txt[idx] == '\\':
+            idx += 1
+        elif txt[idx] == '[':
+            idx = _tcl_skip_bracketed(txt, idx) - 1
+        idx += 1
+    if idx >= len(txt):
+        raise EasyBuildError("Missing closing quote in Tcl code: %s", txt)
+    return idx + 1
+
+
+def _tcl_skip_braced(txt, idx):
+    """Return index right after braced part of Tcl code that starts at specified index."""
+    depth = 0
+    while idx < len(txt):
+        if txt[idx] == '\\':
+            idx += 1
+        elif txt[idx] == '{':
+            depth += 1
+        elif txt[idx] == '}':
+            depth -= 1
+            if depth == 0:
+                return idx + 1
+        idx += 1
+    raise EasyBuildError("Missing closing brace in Tcl code: %s", txt)
+
+
+def _tcl_skip_bracketed(txt, idx):
+    """Return index right after bracketed command in Tcl code that starts at specified index."""
+    depth = 0
+    while idx < len(txt):
+        if txt[idx] == '\\':
+            idx += 1
+        elif txt[idx] == '{':
+            idx = _tcl_skip_braced(txt, idx) - 1
+        elif txt[idx] == '"':
+            idx = _tcl_skip_quoted(txt, idx) - 1
+        elif txt[idx] == '[':
+            depth += 1
+        elif txt[idx] == ']':
+            depth -= 1
+            if depth == 0:
+                return idx + 1
+        idx += 1
+    raise EasyBuildError("Missing closing bracket in Tcl code: %s", txt)
+
+
+def parse_tcl(txt):
+    """
+    Parse Tcl code into list of commands, each represented by a list of words;
+    each word is represented by a tuple with its type ('braced', 'quoted' or 'bare') and raw value.
+    """
+    cmds, words = [], []
+    idx = 0
+    while idx < len(txt):
+        char = txt[idx]
+        if char in ' \t\r':
+            idx += 1
+        elif char == '\\' and txt[idx+1:idx+2] == '\n':
+            # line continuation
+            idx += 2
+        elif char in '\n;':
+            if words:
+                cmds.append(words)
+                words = []
+            idx += 1
+        elif char == '#' and not words:
+            # comment, runs until end of line
+            while idx < len(txt) and txt[idx] != '\n':
+                idx += 1
+        elif char == '{':
+            end = _tcl_skip_braced(txt, idx)
+            words.append(('braced', txt[idx+1:end-1]))
+            idx = end
+        elif char == '"':
+            end = _tcl_skip_quoted(txt, idx)
+            words.append(('quoted', txt[idx+1:end-1]))
+            idx = end
+        else:
+            end = idx
+            while end < len(txt) and txt[end] not in ' \t\r\n;':
+                if txt[end] == '\\':
+                    end += 2
+                elif txt[end] == '[':
+                    end = _tcl_skip_bracketed(txt, end)
+                else:
+                    end += 1
+            words.append(('bare', txt[idx:end]))
+            idx = end
+
+    if words:
+        cmds.append(words)
+
+    return cmds
+
+
+class TclModuleFileEvaluator(object):
+    """Evaluator for module files in Tcl syntax."""
+
+    def __init__(self, evaluation):
+        """Create evaluator that records results in specified ModuleFileEvaluation instance."""
+        self.evaluation = evaluation
+        self.variables = {}
+
+    def subst(self, word):
+        """Perform substitutions (variables, commands, backslashes) for specified word."""
+        (typ, txt) = word
+        if typ == 'braced':
+            return txt
+
+        res = []
+        idx = 0
+        while idx < len(txt):
+            char = txt[idx]
+            if char == '\\':
+                res.append({'n': '\n', 't': '\t'}.get(txt[idx+1:idx+2], txt[idx+1:idx+2]))
+                idx += 2
+            elif char == '[':
+                end = _tcl_skip_bracketed(txt, idx)
+                cmds = parse_tcl(txt[idx+1:end-1])
+                if len(cmds) != 1:
+                    raise EasyBuildError("Unsupported command substitution in Tcl code: %s", txt[idx:end])
+                res.append(self.eval_cmd_value(cmds[0]))
+                idx = end
+            elif char == '$':
+                if txt[idx+1:idx+2] == '{':
+                    end = txt.index('}', idx)
+                    name = txt[idx+2:end]
+                    idx = end + 1
+                else:
+                    regex_res = TCL_VAR_NAME_REGEX.match(txt, idx + 1)
+                    if regex_res is None:
+                        res.append(char)
+                        idx += 1
+                        continue
+                    name = regex_res.group(0)
+                    idx = regex_res.end()
+
+                if name == 'env' and txt[idx:idx+1] == '(':
+                    end = txt.index(')', idx)
+                    env_var = txt[idx+1:end]
+                    idx = end + 1
+                    value = self.evaluation.check('env', env_var)
+                    if value is None:
+                        raise EasyBuildError("Environment variable $%s used in %s is not defined",
+                                             env_var, self.evaluation.path)
+                    res.append(value)
+                elif name in self.variables:
+                    res.append(self.variables[name])
+                else:
+                    raise EasyBuildError("Unknown variable '%s' used in %s", name, self.evaluation.path)
+            else:
+                res.append(char)
+                idx += 1
+
+        return ''.join(res)
+
+    def eval_cmd_value(self, words):
+        """Evaluate command that is used to produce a value (i.e., in a command substitution)."""
+        args = [self.subst(w) for w in words]
+        if args[:2] == ['file', 'join'] and len(args) > 2:
+            res = os.path.join(*args[2:])
+        elif args[:2] == ['file', 'isdirectory'] and len(args) == 3:
+            res = str(int(self.evaluation.check('isdir', args[2])))
+        elif args[0] == 'is-loaded' and len(args) == 2:
+            res = str(int(self.evaluation.check('is-loaded', args[1])))
+        elif args[:2] == ['module-info', 'mode']:
+            # module files are evaluated in 'load' mode
+            if len(args) == 2:
+                res = 'load'
+            else:
+                res = str(int(args[2] == 'load'))
+        else:
+            raise EasyBuildError("Unsupported command substitution in %s: %s", self.evaluation.path, ' '.join(args))
+
+        return res
+
+    def eval_cond(self, cond):
+        """Evaluate condition (an expression) of an 'if' statement."""
+        cond = cond.strip()
+        negate = cond.startswith('!')
+        if negate:
+            cond = cond[1:].strip()
+
+        if not cond.startswith('[') or _tcl_skip_bracketed(cond, 0) != len(cond):
+            raise EasyBuildError("Unsupported condition in %s: %s", self.evaluation.path, cond)
+
+        res = self.subst(('bare', cond)) not in ['', '0']
+        if negate:
+            res = not res
+        return res
+
+    def eval_block(self, txt, active=True):
+        """Evaluate block of Tcl code."""
+        for words in parse_tcl(txt):
+            self.eval_cmd(words, active=active)
+
+    def eval_cmd(self, words, active=True):
+        """
+        Evaluate Tcl command.
+
+        :param words: list of words for the command
+        :param active: whether or not the command is actually executed
+                       (commands in branches of conditions that are not taken are only inspected)
+        """
+        ev = self.evaluation
+        cmd = self.subst(words[0])
+        args = words[1:]
+
+        if cmd in TCL_IGNORED_CMDS:
+            pass
+
+        elif cmd == 'set' and len(args) == 2:
+            if active:
+                self.variables[self.subst(args[0])] = self.subst(args[1])
+
+        elif cmd in ['setenv', 'unsetenv'] and len(args) == (2 if cmd == 'setenv' else 1):
+            if active:
+                value = None
+                if cmd == 'setenv':
+                    value = self.subst(args[1])
+                ev.add_change(cmd, self.subst(args[0]), value, active)
+
+        elif cmd in ['prepend-path', 'append-path'] and len(args) >= 2:
+            args = [self.subst(a) for a in args]
+            if args[0].startswith('-'):
+                raise EasyBuildError("Unsupported options for %s in %s: %s", cmd, ev.path, args)
+            action = cmd.split('-')[0]
+            values = [p for value in args[1:] for p in value.split(os.pathsep)]
+            if action == 'prepend':
+                # last value ends up in front
+                values = values[::-1]
+            for value in values:
+                ev.add_change(action, args[0], value, active)
+
+        elif cmd == 'module' and args:
+            self.eval_module_cmd([self.subst(a) for a in args], active)
+
+        elif cmd == 'if':
+            self.eval_if(args, active)
+
+        else:
+            raise EasyBuildError("Unsupported Tcl command in %s: %s", ev.path, cmd)
+
+    def eval_module_cmd(self, args, active):
+        """Evaluate 'module' command with specified arguments."""
+        ev = self.evaluation
+        subcmd, args = args[0], args[1:]
+        if subcmd == 'use':
+            action = 'prepend'
+            if args and args[0] in ['-a', '--append']:
+                action, args = 'append', args[1:]
+            elif args and args[0] in ['-p', '--prepend']:
+                args = args[1:]
+            if action == 'prepend':
+                args = args[::-1]
+            for path in args:
+                ev.add_change(action, 'MODULEPATH', path, active)
+        elif subcmd in ['load', 'add']:
+            for mod_name in args:
+                ev.add_load(mod_name, active)
+        elif subcmd in ['unload', 'rm']:
+            for mod_name in args:
+                ev.add_unload(mod_name, active)
+        elif subcmd in ['swap', 'switch'] and len(args) == 2:
+            ev.add_unload(args[0], active)
+            ev.add_load(args[1], active)
+        else:
+            raise EasyBuildError("Unsupported module subcommand in %s: %s", ev.path, ' '.join([subcmd] + args))
+
+    def eval_if(self, args, active):
+        """Evaluate 'if' statement with specified arguments."""
+        # collect (condition, body) tuples; condition is None for 'else' part
+        parts = []
+        idx = 0
+        while idx < len(args):
+            keyword = None
+            if idx > 0:
+                keyword = self.subst(args[idx])
+                idx += 1
+            if keyword in [None, 'elseif'] and idx + 1 < len(args):
+                parts.append((args[idx][1], args[idx+1][1]))
+                idx += 2
+            elif keyword == 'else' and idx + 1 == len(args):
+                parts.append((None, args[idx][1]))
+                idx += 1
+            else:
+                raise EasyBuildError("Unsupported 'if' statement in %s", self.evaluation.path)
+
+        taken = False
+        for (cond, body) in parts:
+            cond_res = cond is None or self.eval_cond(cond)
+            branch_active = active and not taken and cond_res
+            taken = taken or cond_res
+            self.eval_block(body, active=branch_active)
+
+    def evaluate(self, txt):
+        """Evaluate specified contents of module file."""
+        self.eval_block(txt)
+
+
+def tokenize_lua(txt):
+    """Split Lua code into list of tokens, each represented by a tuple with the token type and value."""
+    tokens = []
+    idx = 0
+    while idx < len(txt):
+        char = txt[idx]
+        long_bracket = LUA_LONG_BRACKET_REGEX.match(txt, idx)
+        if char.isspace():
+            idx += 1
+        elif txt.startswith('--', idx):
+            long_bracket = LUA_LONG_BRACKET_REGEX.match(txt, idx + 2)
+            if long_bracket:
+                end_marker = ']%s]' % long_bracket.group(1)
+                end = txt.find(end_marker, long_bracket.end())
+                if end < 0:
+                    raise EasyBuildError("Missing end of long comment in Lua code")
+                idx = end + len(end_marker)
+            else:
+                end = txt.find('\n', idx)
+                idx = len(txt) if end < 0 else end
+        elif long_bracket:
+            end_marker = ']%s]' % long_bracket.group(1)
+            end = txt.find(end_marker, long_bracket.end())
+            if end < 0:
+                raise EasyBuildError("Missing end of long string in Lua code")
+            value = txt[long_bracket.end():end]
+            # a newline right after the opening long bracket is skipped
+            if value.startswith('\n'):
+                value = value[1:]
+            tokens.append(('str', value))
+            idx = end + len(end_marker)
+        elif char in '"\'':
+            value = []
+            idx += 1
+            while idx < len(txt) and txt[idx] != char:
+                if txt[idx] == '\\':
+                    idx += 1
+                    value.append(LUA_ESCAPES.get(txt[idx:idx+1], txt[idx:idx+1]))
+                elif txt[idx] == '\n':
+                    raise EasyBuildError("Unfinished string in Lua code")
+                else:
+                    value.append(txt[idx])
+                idx += 1
+            if idx >= len(txt):
+                raise EasyBuildError("Unfinished string in Lua code")
+            tokens.append(('str', ''.join(value)))
+            idx += 1
+        elif txt[idx:idx+2] in ['==', '~=', '..']:
+            tokens.append(('op', txt[idx:idx+2]))
+            idx += 2
+        elif char in '(),=':
+            tokens.append(('op', char))
+            idx += 1
+        else:
+            name = LUA_NAME_REGEX.match(txt, idx)
+            number = LUA_NUMBER_REGEX.match(txt, idx)
+            if name:
+                value = name.group(0)
+                tokens.append(('kw' if value in LUA_KEYWORDS else 'name', value))
+                idx = name.end()
+            elif number:
+                tokens.append(('num', number.group(0)))
+                idx = number.end()
+            else:
+                raise EasyBuildError("Unsupported character in Lua code: '%s'", char)
+
+    return tokens
+
+
+class LuaModuleFileEvaluator(object):
+    """Evaluator for module files in Lua syntax."""
+
+    def __init__(self, evaluation):
+        """Create evaluator that records results in specified ModuleFileEvaluation instance."""
+        self.evaluation = evaluation
+        self.variables = {}
+        self.tokens = []
+        self.pos = 0
+
+    def peek(self, offset=0):
+        """Return token at current position (plus offset), or (None, None) if there is no such token."""
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset]
+        return (None, None)
+
+    def next(self):
+        """Return next token, and move forward."""
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, typ, value=None):
+        """Return next token, after checking whether it has the expected type (and value)."""
+        token = self.next()
+        if token[0] != typ or (value is not None and token[1] != value):
+            raise EasyBuildError("Unexpected token in %s: found %s, expected %s",
+                                 self.evaluation.path, token, (typ, value))
+        return token[1]
+
+    def parse_block(self, terminators):
+        """Parse block of statements, until one of the specified keywords (or end of code) is reached."""
+        stmts = []
+        while self.peek()[0] is not None and self.peek() not in [('kw', t) for t in terminators]:
+            stmts.append(self.parse_stmt())
+        return stmts
+
+    def parse_stmt(self):
+        """Parse a single statement."""
+        (typ, value) = self.peek()
+        if (typ, value) == ('kw', 'local'):
+            self.next()
+            name = self.expect('name')
+            self.expect('op', '=')
+            return ('assign', name, self.parse_expr())
+
+        elif (typ, value) == ('kw', 'if'):
+            self.next()
+            branches, else_block = [], []
+            while True:
+                cond = self.parse_expr()
+                self.expect('kw', 'then')
+                branches.append((cond, self.parse_block(['elseif', 'else', 'end'])))
+                keyword = self.expect('kw')
+                if keyword == 'elseif':
+                    continue
+                elif keyword == 'else':
+                    else_block = self.parse_block(['end'])
+                    self.expect('kw', 'end')
+                break
+            return ('if', branches, else_block)
+
+        elif typ == 'name' and self.peek(1) == ('op', '='):
+            self.next()
+            self.next()
+            return ('assign', value, self.parse_expr())
+
+        elif typ == 'name':
+            expr = self.parse_primary()
+            if expr[0] != 'call':
+                raise EasyBuildError("Unsupported statement in %s: %s", self.evaluation.path, value)
+            return expr
+
+        else:
+            raise EasyBuildError("Unsupported statement in %s: %s", self.evaluation.path, value)
+
+    def parse_expr(self):
+        """Parse an expression (only 'or', 'and', 'not', '==', '~=' and '..' operators are supported)."""
+        expr = self.parse_and()
+        while self.peek() == ('kw', 'or'):
+            self.next()
+            expr = ('op', 'or', expr, self.parse_and())
+        return expr
+
+    def parse_and(self):
+        """Parse 'and' expression."""
+        expr = self.parse_cmp()
+        while self.peek() == ('kw', 'and'):
+            self.next()
+            expr = ('op', 'and', expr, self.parse_cmp())
+        return expr
+
+    def parse_cmp(self):
+        """Parse comparison expression."""
+        expr = self.parse_concat()
+        while self.peek() in [('op', '=='), ('op', '~=')]:
+            op = self.next()[1]
+            expr = ('op', op, expr, self.parse_concat())
+        return expr
+
+    def parse_concat(self):
+        """Parse concatenation expression."""
+        expr = self.parse_unary()
+        if self.peek() == ('op', '..'):
+            self.next()
+            # concatenation is right associative
+            expr = ('op', '..', expr, self.parse_concat())
+        return expr
+
+    def parse_unary(self):
+        """Parse 'not' expression."""
+        if self.peek() == ('kw', 'not'):
+            self.next()
+            return ('not', self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        """Parse primary expression: literal value, variable, function call or parenthesized expression."""
+        (typ, value) = self.next()
+        if typ in ['str', 'num']:
+            return ('value', value)
+        elif typ == 'kw' and value in ['true', 'false', 'nil']:
+            return ('value', {'true': True, 'false': False, 'nil': None}[value])
+        elif (typ, value) == ('op', '('):
+            expr = self.parse_expr()
+            self.expect('op', ')')
+            return expr
+        elif typ == 'name':
+            if self.peek() == ('op', '('):
+                self.next()
+                args = []
+                while self.peek() != ('op', ')'):
+                    if args:
+                        self.expect('op', ',')
+                    args.append(self.parse_expr())
+                self.next()
+                return ('call', value, args)
+            elif self.peek()[0] == 'str':
+                # function call with a single string argument, e.g. help[[...]]
+                return ('call', value, [('value', self.next()[1])])
+            else:
+                return ('var', value)
+        else:
+            raise EasyBuildError("Unsupported expression in %s: %s", self.evaluation.path, value)
+
+    def eval_expr(self, expr):
+        """Evaluate expression."""
+        ev = self.evaluation
+        if expr[0] == 'value':
+            return expr[1]
+        elif expr[0] == 'var':
+            if expr[1] not in self.variables:
+                raise EasyBuildError("Unknown variable '%s' used in %s", expr[1], ev.path)
+            return self.variables[expr[1]]
+        elif expr[0] == 'not':
+            return not self.eval_expr(expr[1])
+        elif expr[0] == 'op':
+            (op, left, right) = expr[1:]
+            if op == 'or':
+                return self.eval_expr(left) or self.eval_expr(right)
+            elif op == 'and':
+                return self.eval_expr(left) and self.eval_expr(right)
+            elif op == '==':
+                return self.eval_expr(left) == self.eval_expr(right)
+            elif op == '~=':
+                return self.eval_expr(left) != self.eval_expr(right)
+            else:
+                left, right = self.eval_expr(left), self.eval_expr(right)
+                if not isinstance(left, basestring) or not isinstance(right, basestring):
+                    raise EasyBuildError("Concatenation of non-string values in %s", ev.path)
+                return left + right
+
+        # function call
+        (func, args) = expr[1:]
+        args = [self.eval_expr(a) for a in args]
+        if func == 'pathJoin':
+            return re.sub('/+', '/', '/'.join(a for a in args if a))
+        elif func == 'os.getenv' and len(args) == 1:
+            return ev.check('env', args[0])
+        elif func == 'isloaded' and len(args) == 1:
+            return ev.check('is-loaded', args[0])
+        elif func == 'isDir' and len(args) == 1:
+            return ev.check('isdir', args[0])
+        elif func == 'mode' and not args:
+            # module files are evaluated in 'load' mode
+            return 'load'
+        else:
+            raise EasyBuildError("Unsupported function call in %s: %s", ev.path, func)
+
+    def eval_stmt(self, stmt, active=True):
+        """
+        Evaluate statement.
+
+        :param stmt: statement to evaluate
+        :param active: whether or not the statement is actually executed
+                       (statements in branches of conditions that are not taken are only inspected)
+        """
+        ev = self.evaluation
+        if stmt[0] == 'assign':
+            if active:
+                self.variables[stmt[1]] = self.eval_expr(stmt[2])
+
+        elif stmt[0] == 'if':
+            taken = False
+            for (cond, block) in stmt[1]:
+                cond_res = bool(self.eval_expr(cond))
+                for sub_stmt in block:
+                    self.eval_stmt(sub_stmt, active=active and not taken and cond_res)
+                taken = taken or cond_res
+            for sub_stmt in stmt[2]:
+                self.eval_stmt(sub_stmt, active=active and not taken)
+
+        else:
+            func, args = stmt[1], stmt[2]
+            if func in LUA_IGNORED_FUNCS:
+                return
+
+            args = [self.eval_expr(a) for a in args]
+            if not all(isinstance(a, basestring) for a in args):
+                raise EasyBuildError("Non-string arguments for %s in %s: %s", func, ev.path, args)
+
+            if func == 'setenv' and len(args) == 2:
+                ev.add_change('setenv', args[0], args[1], active)
+            elif func == 'unsetenv' and len(args) == 1:
+                ev.add_change('unsetenv', args[0], None, active)
+            elif func in ['prepend_path', 'append_path'] and len(args) == 2:
+                action = func.split('_')[0]
+                values = args[1].split(os.pathsep)
+                if action == 'prepend':
+                    values = values[::-1]
+                for value in values:
+                    ev.add_change(action, args[0], value, active)
+            elif func == 'load':
+                for mod_name in args:
+                    ev.add_load(mod_name, active)
+            elif func == 'unload':
+                for mod_name in args:
+                    ev.add_unload(mod_name, active)
+            elif func == 'swap' and len(args) == 2:
+                ev.add_unload(args[0], active)
+                ev.add_load(args[1], active)
+            else:
+                raise EasyBuildError("Unsupported function call in %s: %s", ev.path, func)
+
+    def evaluate(self, txt):
+        """Evaluate specified contents of module file."""
+        self.tokens = tokenize_lua(txt)
+        self.pos = 0
+        for stmt in self.parse_block([]):
+            self.eval_stmt(stmt)
+
+
+def evaluate_module_file(path, loaded_modules=None, environ=None):
+    """
+    Evaluate specified module file (in 'load' mode), without running the modules tool.
+    Results are memoized, and reused as long as the module file and the context it was evaluated in are unchanged.
+
+    :param path: path to module file (in Tcl or Lua syntax)
+    :param loaded_modules: list of loaded modules (default: determined via $LOADEDMODULES)
+    :param environ: environment to evaluate module file in (default: current environment)
+    :return: ModuleFileEvaluation instance
+    """
+    if environ is None:
+        environ = os.environ
+    if loaded_modules is None:
+        loaded_modules = [m for m in environ.get('LOADEDMODULES', '').split(os.pathsep) if m]
+
+    evaluation = _evaluations.get(path)
+    if evaluation is not None and evaluation.is_valid(loaded_modules, environ):
+        _log.debug("Reusing memoized evaluation of module file %s", path)
+        return evaluation
+
+    evaluation = ModuleFileEvaluation(path, loaded_modules, environ)
+    if path.endswith('.lua'):
+        evaluator = LuaModuleFileEvaluator(evaluation)
+    else:
+        evaluator = TclModuleFileEvaluator(evaluation)
+    evaluator.evaluate(read_file(path))
+
+    # don't retain reference to environment
+    evaluation.loaded_modules, evaluation.environ = None, None
+
+    _log.debug("Evaluated module file %s: changes %s, loads %s", path, evaluation.changes, evaluation.loads)
+    _evaluations[path] = evaluation
+
+    return evaluation
+
+
+def reset_module_file_evaluations():
+    """Reset memoized evaluations of module files."""
+    _evaluations.clear()
@@ -42,6 +42,7 @@ from vsc.utils.missing import get_subclasses
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import build_option, get_module_syntax, install_path
 from easybuild.tools.filetools import mkdir, read_file
+from easybuild.tools.module_evaluator import evaluate_module_file
 from easybuild.tools.modules import modules_tool
 from easybuild.tools.utilities import quote_str
 
@@ -732,9 +733,19 @@ def dependencies_for(mod_name, modtool, depth=sys.maxint):
     :param depth: recursion depth (default is sys.maxint, which should be equivalent to infinite recursion depth)
     """
     mod_filepath = modtool.modulefile_path(mod_name)
-    modtxt = read_file(mod_filepath)
-    loadregex = module_load_regex(mod_filepath)
-    mods = loadregex.findall(modtxt)
+
+    mods = None
+    if build_option('module_file_evaluator'):
+        try:
+            # consider all 'load' statements, also those guarded by a condition
+            mods = evaluate_module_file(mod_filepath).all_loads[:]
+        except EasyBuildError, err:
+            _log.debug("Failed to evaluate module file %s, falling back to regex: %s", mod_filepath, err)
+
+    if mods is None:
+        modtxt = read_file(mod_filepath)
+        loadregex = module_load_regex(mod_filepath)
+        mods = loadregex.findall(modtxt)
 
     if depth > 0:
         # recursively determine dependencies for these dependency modules, until depth is non-positive
@@ -35,18 +35,28 @@ This python module implements the environment modules functionality:
 :author: Jens Timmerman (Ghent University)
 :author: David Brown (Pacific Northwest National Laboratory)
 """
+import atexit
+import hashlib
 import os
+import pipes
 import re
+import select
+import shutil
+import signal
 import subprocess
+import tempfile
+import time
 from distutils.version import StrictVersion
 from subprocess import PIPE
 from vsc.utils import fancylogger
 from vsc.utils.missing import get_subclasses
 
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.config import build_option, get_modules_tool, install_path
 from easybuild.tools.environment import ORIG_OS_ENVIRON, restore_env, setvar
 from easybuild.tools.filetools import convert_name, mkdir, path_matches, read_file, which
+from easybuild.tools.module_evaluator import evaluate_module_file, reset_module_file_evaluations
 from easybuild.tools.module_naming_scheme import DEVEL_MODULE_SUFFIX
 from easybuild.tools.run import run_cmd
 from vsc.utils.missing import nub
@@ -116,6 +126,42 @@ OUTPUT_MATCHES = {
 # value: result of module subcommand
 MODULE_AVAIL_CACHE = {}
 MODULE_SHOW_CACHE = {}
+MODULE_CACHES = {
+    'avail': MODULE_AVAIL_CACHE,
+    'show': MODULE_SHOW_CACHE,
+}
+
+# reverse index for module caches, used to invalidate cache entries
+# key: (real) path of entry in $MODULEPATH
+# value: set of (subcommand, cache key) tuples for cache entries that involve this path
+MODULE_CACHE_KEYS_FOR_PATH = {}
+
+# signatures for entries in $MODULEPATH, used to validate persistently cached results of module subcommands
+# key: module path; value: signature based on modification times of all (sub)directories (None for non-existing path)
+MODULE_PATH_SIGNATURES = {}
+
+# marker used by module command shell to indicate that a command completed (followed by exit code)
+MODULE_COMMAND_SHELL_MARKER = '__EASYBUILD_MODULE_COMMAND_DONE__'
+# maximum time (in seconds) to wait for a module command that is run via the module command shell
+MODULE_COMMAND_SHELL_TIMEOUT = 300
+
+# statistics for module caches
+MODULE_CACHE_STATS = {
+    'hits': 0,
+    'persistent_hits': 0,
+    'misses': 0,
+}
+
+# index of module files, for entries in $MODULEPATH
+# key: tuple with (absolute) module path and boolean indicating whether module files in Lua syntax are considered
+# value: ModuleFilesIndex instance
+MODULE_FILES_INDEX_CACHE = {}
+
+# names of files that may define defaults/aliases for the modules in a directory
+MODULE_RC_FILES = ['.modulerc', '.modulerc.lua', '.version']
+
+# header required for module files in Tcl syntax
+TCL_MODULE_HEADER = '#%Module'
 
 # cache for modules tool version
 # cache key: module command
@@ -145,6 +191,10 @@ class ModulesTool(object):
     VERSION_REGEXP = None
     # modules tool user cache directory
     USER_CACHE_DIR = None
+    # option to include hidden modules in output of 'avail'
+    SHOW_HIDDEN_OPTION = None
+    # whether or not module files in Lua syntax are supported
+    LUA_MODULE_FILES = False
 
     def __init__(self, mod_paths=None, testing=False):
         """
@@ -296,6 +346,70 @@ class ModulesTool(object):
         """Create a module cache key, using the specified partial key, by combining it with the current $MODULEPATH."""
         return ('MODULEPATH=%s' % os.environ.get('MODULEPATH', ''), self.COMMAND, partial_key)
 
+    def persistent_cache_key(self, subcmd, key):
+        """
+        Determine key for persistent cache of result of specified module subcommand.
+
+        :param subcmd: module subcommand ('avail' or 'show')
+        :param key: cache key, see mk_module_cache_key
+        """
+        return repr((subcmd, key, self.version))
+
+    def get_cached_result(self, subcmd, key):
+        """
+        Return cached result of specified module subcommand, or None if no (valid) cached result is available.
+
+        Results are looked up in the in-memory cache first, next in the persistent cache (if it is enabled).
+        Persistently cached results are only valid if none of the module paths in $MODULEPATH changed since,
+        and (for 'module show') if the module file itself did not change since (see det_module_cache_signature).
+
+        :param subcmd: module subcommand ('avail' or 'show')
+        :param key: cache key, see mk_module_cache_key
+        """
+        cache = MODULE_CACHES[subcmd]
+        if key in cache:
+            MODULE_CACHE_STATS['hits'] += 1
+            self.log.debug("Found cached result for 'module %s' with key '%s': %s", subcmd, key, cache[key])
+            return cache[key]
+
+        modules_cache = persistent_cache('modules')
+        if modules_cache is not None:
+            # determine signature for module paths *before* running module subcommand in case of a cache miss,
+            # to avoid that the result gets stored along with a signature that is more recent than the result
+            curr_signature = det_module_cache_signature(subcmd, key)
+            entry = modules_cache.load(self.persistent_cache_key(subcmd, key))
+            if entry is not None:
+                signature, res = entry
+                if signature == curr_signature:
+                    MODULE_CACHE_STATS['persistent_hits'] += 1
+                    self.log.debug("Found persistently cached result for 'module %s' with key '%s': %s",
+                                   subcmd, key, res)
+                    cache[key] = res
+                    register_module_cache_key(subcmd, key)
+                    return res
+                else:
+                    self.log.debug("Persistently cached result for 'module %s' with key '%s' is outdated", subcmd, key)
+
+        MODULE_CACHE_STATS['misses'] += 1
+        return None
+
+    def cache_result(self, subcmd, key, res):
+        """
+        Cache result of specified module subcommand, in memory and persistently (if enabled).
+
+        :param subcmd: module subcommand ('avail' or 'show')
+        :param key: cache key, see mk_module_cache_key
+        :param res: result to cache
+        """
+        MODULE_CACHES[subcmd][key] = res
+        register_module_cache_key(subcmd, key)
+        self.log.debug("Cached result for 'module %s' with key '%s': %s", subcmd, key, res)
+
+        modules_cache = persistent_cache('modules')
+        if modules_cache is not None:
+            signature = det_module_cache_signature(subcmd, key)
+            modules_cache.store(self.persistent_cache_key(subcmd, key), (signature, res))
+
     def set_mod_paths(self, mod_paths=None):
         """
         Set mod_paths, based on $MODULEPATH unless a list of module paths is specified.
@@ -411,12 +525,22 @@ class ModulesTool(object):
         if mod_name is None:
             mod_name = ''
 
+        if build_option('module_files_index'):
+            include_hidden = self.SHOW_HIDDEN_OPTION is not None and self.SHOW_HIDDEN_OPTION in extra_args
+            mod_names = set()
+            for index in self.module_files_indexes():
+                mod_names.update(index.available(mod_name=mod_name, include_hidden=include_hidden))
+            ans = sorted(mod_names)
+            self.log.debug("Available modules for '%s' according to index of module files: %s", mod_name, ans)
+            return ans
+
         # cache 'avail' calls without an argument, since these are particularly expensive...
         key = self.mk_module_cache_key(';'.join(extra_args))
-        if not mod_name and key in MODULE_AVAIL_CACHE:
-            ans = MODULE_AVAIL_CACHE[key]
-            self.log.debug("Found cached result for 'module avail' with key '%s': %s", key, ans)
-        else:
+        ans = None
+        if not mod_name:
+            ans = self.get_cached_result('avail', key)
+
+        if ans is None:
             args = ['avail'] + extra_args + [mod_name]
             mods = self.run_module(*args)
 
@@ -426,8 +550,7 @@ class ModulesTool(object):
             self.log.debug("'module available %s' gave %d answers: %s" % (mod_name, len(ans), ans))
 
             if not mod_name:
-                MODULE_AVAIL_CACHE[key] = ans
-                self.log.debug("Cached result for 'module avail' with key '%s': %s", key, ans)
+                self.cache_result('avail', key, ans)
 
         return ans
 
@@ -449,6 +572,21 @@ class ModulesTool(object):
             txt = self.show(mod_name)
             return bool(re.search(mod_exists_regex, txt, re.M))
 
+        if build_option('module_files_index'):
+            indexes = self.module_files_indexes()
+            mods_exist = []
+            for mod_name in mod_names:
+                found = [index.lookup(mod_name) for index in indexes]
+                if True in found:
+                    mods_exist.append(True)
+                elif None in found:
+                    # module name may correspond to an alias or default version defined in .modulerc/.version file
+                    self.log.debug("Unclear whether module %s exists based on index, checking via 'show'", mod_name)
+                    mods_exist.append(mod_exists_via_show(mod_name))
+                else:
+                    mods_exist.append(False)
+            return mods_exist
+
         if skip_avail:
             avail_mod_names = []
         elif len(mod_names) == 1:
@@ -472,6 +610,16 @@ class ModulesTool(object):
 
         return mods_exist
 
+    def module_files_indexes(self):
+        """Return list of indexes of module files, for each of the entries in $MODULEPATH (in order)."""
+        res = []
+        for path in nub(curr_module_paths()):
+            key = (os.path.abspath(path), self.LUA_MODULE_FILES)
+            if key not in MODULE_FILES_INDEX_CACHE:
+                MODULE_FILES_INDEX_CACHE[key] = ModuleFilesIndex(key[0], lua=self.LUA_MODULE_FILES)
+            res.append(MODULE_FILES_INDEX_CACHE[key])
+        return res
+
     def exists(self, mod_name):
         """NO LONGER SUPPORTED: use exist method instead"""
         self.log.nosupport("exists(<mod_name>) is not supported anymore, use exist([<mod_name>]) instead", '2.0')
@@ -530,13 +678,10 @@ class ModulesTool(object):
         Run 'module show' for the specified module.
         """
         key = self.mk_module_cache_key(mod_name)
-        if key in MODULE_SHOW_CACHE:
-            ans = MODULE_SHOW_CACHE[key]
-            self.log.debug("Found cached result for 'module show %s' with key '%s': %s", mod_name, key, ans)
-        else:
+        ans = self.get_cached_result('show', key)
+        if ans is None:
             ans = self.run_module('show', mod_name, return_output=True)
-            MODULE_SHOW_CACHE[key] = ans
-            self.log.debug("Cached result for 'module show %s' with key '%s': %s", mod_name, key, ans)
+            self.cache_result('show', key, ans)
 
         return ans
 
@@ -558,16 +703,44 @@ class ModulesTool(object):
         else:
             raise EasyBuildError("Can't get value from a non-existing module %s", mod_name)
 
+    def locate_module_file(self, mod_name, mod_paths=None):
+        """
+        Locate module file for specified (full) module name directly, i.e. without running the modules tool.
+
+        :param mod_name: module name
+        :param mod_paths: list of module paths to consider (default: current entries in $MODULEPATH)
+        :return: path to module file, or None if it could not be located
+        """
+        if mod_paths is None:
+            mod_paths = curr_module_paths()
+
+        for mod_path in mod_paths:
+            path = os.path.join(mod_path, mod_name)
+            if self.LUA_MODULE_FILES and os.path.isfile(path + '.lua'):
+                return path + '.lua'
+            elif os.path.isfile(path) and is_tcl_module_file(path):
+                return path
+            elif os.path.isdir(path):
+                # partial module name, which default module file corresponds to is determined by modules tool
+                return None
+
+        return None
+
     def modulefile_path(self, mod_name, strip_ext=False):
         """
         Get the path of the module file for the specified module
 
         :param mod_name: module name
         :param strip_ext: strip (.lua) extension from module fileame (if present)"""
-        # (possible relative) path is always followed by a ':', and may be prepended by whitespace
-        # this works for both environment modules and Lmod
-        modpath_re = re.compile('^\s*(?P<modpath>[^/\n]*/[^ ]+):$', re.M)
-        modpath = self.get_value_from_modulefile(mod_name, modpath_re)
+        modpath = None
+        if build_option('module_file_evaluator'):
+            modpath = self.locate_module_file(mod_name)
+
+        if modpath is None:
+            # (possible relative) path is always followed by a ':', and may be prepended by whitespace
+            # this works for both environment modules and Lmod
+            modpath_re = re.compile('^\s*(?P<modpath>[^/\n]*/[^ ]+):$', re.M)
+            modpath = self.get_value_from_modulefile(mod_name, modpath_re)
 
         if strip_ext and modpath.endswith('.lua'):
             modpath = os.path.splitext(modpath)[0]
@@ -644,10 +817,18 @@ class ModulesTool(object):
         full_cmd = ' '.join(cmd_list)
         self.log.debug("Running module command '%s' from %s" % (full_cmd, os.getcwd()))
 
-        proc = subprocess.Popen(cmd_list, stdout=PIPE, stderr=PIPE, env=environ)
         # stdout will contain python code (to change environment etc)
         # stderr will contain text (just like the normal module command)
-        (stdout, stderr) = proc.communicate()
+        stdout, stderr = None, None
+        if build_option('module_command_shell'):
+            try:
+                (stdout, stderr) = module_command_shell().run(cmd_list, environ)
+            except EasyBuildError, err:
+                self.log.warning("Failed to run '%s' via module command shell, running it directly: %s", full_cmd, err)
+
+        if stdout is None:
+            proc = subprocess.Popen(cmd_list, stdout=PIPE, stderr=PIPE, env=environ)
+            (stdout, stderr) = proc.communicate()
         self.log.debug("Output of module command '%s': stdout: %s; stderr: %s" % (full_cmd, stdout, stderr))
 
         if kwargs.get('check_output', True):
@@ -732,6 +913,12 @@ class ModulesTool(object):
         """
         self.log.debug("Determining $MODULEPATH extensions for modules %s" % mod_names)
 
+        if build_option('module_file_evaluator'):
+            try:
+                return self.modpath_extensions_via_evaluator(mod_names)
+            except EasyBuildError, err:
+                self.log.debug("Failed to determine $MODULEPATH extensions via module file evaluator: %s", err)
+
         # copy environment so we can restore it
         env = os.environ.copy()
 
@@ -762,6 +949,32 @@ class ModulesTool(object):
 
         return modpath_exts
 
+    def modpath_extensions_via_evaluator(self, mod_names):
+        """
+        Determine dictionary with $MODULEPATH extensions for specified modules, by evaluating their module files
+        directly rather than loading them (see modpath_extensions_for).
+
+        An EasyBuildError is raised if one of the module files can not be located or evaluated.
+        """
+        # keep track of module paths that would be available after loading the modules,
+        # since modules may extend $MODULEPATH to make other modules available
+        mod_paths = curr_module_paths()
+
+        modpath_exts = {}
+        for mod_name in mod_names:
+            path = self.locate_module_file(mod_name, mod_paths=mod_paths)
+            if path is None:
+                raise EasyBuildError("Failed to locate module file for %s in %s", mod_name, mod_paths)
+
+            # consider all potential $MODULEPATH extensions, also those guarded by a condition
+            exts = evaluate_module_file(path).all_modpath_exts
+            self.log.debug("Found $MODULEPATH extensions for %s: %s", mod_name, exts)
+            modpath_exts[mod_name] = exts
+
+            mod_paths = [ext for ext in exts[::-1] if ext not in mod_paths] + mod_paths
+
+        return modpath_exts
+
     def path_to_top_of_module_tree(self, top_paths, mod_name, full_mod_subdir, deps, modpath_exts=None):
         """
         Recursively determine path to the top of the module tree,
@@ -807,6 +1020,17 @@ class ModulesTool(object):
             modpath_exts = dict([(k, v) for k, v in self.modpath_extensions_for(deps).items() if v])
             self.log.debug("Non-empty lists of module path extensions for dependencies: %s" % modpath_exts)
 
+        # with the module file evaluator, module files for dependencies are located directly,
+        # taking into account the module paths that would be available after loading all dependencies
+        dep_mod_files = {}
+        if build_option('module_file_evaluator'):
+            mod_paths = curr_module_paths() + [ext for exts in modpath_exts.values() for ext in exts]
+            for dep in modpath_exts:
+                dep_mod_files[dep] = self.locate_module_file(dep, mod_paths=mod_paths)
+            if None in dep_mod_files.values():
+                self.log.debug("Not all module files could be located directly (%s), loading modules", dep_mod_files)
+                dep_mod_files = {}
+
         mods_to_top = []
         full_mod_subdirs = []
         for dep in modpath_exts:
@@ -816,14 +1040,20 @@ class ModulesTool(object):
             if path_matches(full_mod_subdir, full_modpath_exts):
 
                 # full path to module subdir of dependency is simply path to module file without (short) module name
-                dep_full_mod_subdir = self.modulefile_path(dep, strip_ext=True)[:-len(dep)-1]
+                if dep_mod_files:
+                    dep_mod_file = dep_mod_files[dep]
+                    if dep_mod_file.endswith('.lua'):
+                        dep_mod_file = os.path.splitext(dep_mod_file)[0]
+                else:
+                    dep_mod_file = self.modulefile_path(dep, strip_ext=True)
+                dep_full_mod_subdir = dep_mod_file[:-len(dep)-1]
                 full_mod_subdirs.append(dep_full_mod_subdir)
 
                 mods_to_top.append(dep)
                 self.log.debug("Found module to top of module tree: %s (subdir: %s, modpath extensions %s)",
                                dep, dep_full_mod_subdir, full_modpath_exts)
 
-            if full_modpath_exts:
+            if full_modpath_exts and not dep_mod_files:
                 # load module for this dependency, since it may extend $MODULEPATH to make dependencies available
                 # this is required to obtain the corresponding module file paths (via 'module show')
                 self.load([dep])
@@ -944,6 +1174,7 @@ class Lmod(ModulesTool):
     USER_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.lmod.d', '.cache')
 
     SHOW_HIDDEN_OPTION = '--show-hidden'
+    LUA_MODULE_FILES = True
 
     def __init__(self, *args, **kwargs):
         """Constructor, set lmod-specific class variable values."""
@@ -1069,6 +1300,279 @@ class Lmod(ModulesTool):
                                        skip_avail=skip_avail)
 
 
+class ModuleCommandShell(object):
+    """
+    Long-running shell process from which module commands are spawned.
+
+    The modules tool itself (modulecmd, Lmod) can not be kept running, so a new process is still spawned for every
+    module command; with a module command shell, that process is spawned by the (small) shell process rather than
+    by the (large) EasyBuild process, which is relatively expensive to fork.
+    The environment of the shell process is kept in sync with the environment that the module command should use,
+    by sending the changes since the previous command.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Create module command shell (shell process is only started when it is needed).
+
+        :param timeout: maximum time (in seconds) to wait for a module command to complete
+                        (default: MODULE_COMMAND_SHELL_TIMEOUT)
+        """
+        self.log = fancylogger.getLogger(self.__class__.__name__, fname=False)
+        if timeout is None:
+            timeout = MODULE_COMMAND_SHELL_TIMEOUT
+        self.timeout = timeout
+        self.proc = None
+        # environment of shell process
+        self.env = None
+        # process that started the shell process (forked processes must not use the same shell process)
+        self.pid = None
+        # directory for files in which output of module commands is stored
+        self.tmpdir = None
+
+    def start(self, environ):
+        """Start shell process, using specified environment."""
+        self.tmpdir = tempfile.mkdtemp(prefix='eb-module-cmd-')
+        devnull = open(os.devnull, 'w')
+        try:
+            # shell process is started in a new process group, so it can be killed together with the module command
+            self.proc = subprocess.Popen(['bash', '--noprofile', '--norc'], stdin=PIPE, stdout=PIPE, stderr=devnull,
+                                         env=environ, close_fds=True, preexec_fn=os.setsid)
+        except OSError, err:
+            raise EasyBuildError("Failed to start module command shell: %s", err)
+        finally:
+            devnull.close()
+
+        self.env = environ.copy()
+        self.pid = os.getpid()
+        self.log.debug("Started module command shell (PID %s), using %s", self.proc.pid, self.tmpdir)
+
+    def stop(self, kill=False):
+        """
+        Stop shell process (if it is running), and clean up.
+
+        :param kill: kill shell process (and the module command it is running), rather than waiting for it to stop
+        """
+        if self.pid == os.getpid():
+            if self.proc is not None and self.proc.poll() is None:
+                try:
+                    if kill:
+                        os.killpg(self.proc.pid, signal.SIGKILL)
+                    self.proc.stdin.close()
+                    self.proc.wait()
+                except (IOError, OSError), err:
+                    self.log.debug("Failed to cleanly stop module command shell: %s", err)
+            if self.tmpdir is not None:
+                shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+        self.proc, self.env, self.pid, self.tmpdir = None, None, None, None
+
+    def env_changes(self, environ):
+        """Return list of shell commands to make environment of shell process match specified environment."""
+        valid_name = re.compile('^[A-Za-z_][A-Za-z0-9_]*$')
+
+        lines = []
+        for key in sorted(self.env):
+            if key not in environ and valid_name.match(key):
+                lines.append('unset %s 2>/dev/null' % key)
+        for key in sorted(environ):
+            if self.env.get(key) != environ[key]:
+                if valid_name.match(key):
+                    lines.append('export %s=%s 2>/dev/null' % (key, pipes.quote(environ[key])))
+                else:
+                    self.log.debug("Not passing down $%s to module command shell, invalid name", key)
+        return lines
+
+    def run(self, cmd_list, environ):
+        """
+        Run specified command via shell process, with specified environment (in current working directory).
+
+        :param cmd_list: command to run (list of strings)
+        :param environ: environment to run command in
+        :return: tuple with output for stdout and stderr
+        """
+        # (re)start shell process if it's not running, or was started by another (parent) process
+        if self.proc is None or self.pid != os.getpid() or self.proc.poll() is not None:
+            if self.pid == os.getpid():
+                self.stop()
+            else:
+                self.proc, self.pid = None, None
+            self.start(environ)
+
+        out_fp = os.path.join(self.tmpdir, 'stdout')
+        err_fp = os.path.join(self.tmpdir, 'stderr')
+
+        lines = self.env_changes(environ)
+        lines.append('cd %s 2>/dev/null' % pipes.quote(os.getcwd()))
+        cmd = ' '.join(pipes.quote(c) for c in cmd_list)
+        lines.append('%s >%s 2>%s; echo "%s $?"' % (cmd, pipes.quote(out_fp), pipes.quote(err_fp),
+                                                      MODULE_COMMAND_SHELL_MARKER))
+
+        try:
+            self.proc.stdin.write('\n'.join(lines) + '\n')
+            self.proc.stdin.flush()
+            line = self.read_line()
+        except (IOError, OSError, select.error), err:
+            self.stop(kill=True)
+            raise EasyBuildError("Failed to communicate with module command shell: %s", err)
+
+        if line is None:
+            self.stop(kill=True)
+            raise EasyBuildError("Module command '%s' did not complete within %s seconds via module command shell",
+                                 cmd, self.timeout)
+
+        self.env = environ.copy()
+
+        if not line.startswith(MODULE_COMMAND_SHELL_MARKER):
+            self.stop()
+            raise EasyBuildError("Unexpected output from module command shell: '%s'", line)
+
+        self.log.debug("Module command '%s' completed via module command shell (exit code %s)",
+                       cmd, line.split()[-1])
+
+        return (read_file(out_fp), read_file(err_fp))
+
+    def read_line(self):
+        """
+        Read line of output from shell process, waiting at most as long as the timeout of this module command shell.
+
+        :return: line of output (incomplete if shell process stopped), or None if timeout was reached
+        """
+        deadline = time.time() + self.timeout
+        line = ''
+        while not line.endswith('\n'):
+            remaining = deadline - time.time()
+            if remaining <= 0 or not select.select([self.proc.stdout], [], [], remaining)[0]:
+                return None
+            data = os.read(self.proc.stdout.fileno(), 1024)
+            if not data:
+                break
+            line += data
+
+        return line
+
+
+class ModuleFilesIndex(object):
+    """
+    Index of module files available in a particular module path.
+
+    Used to check whether modules exist and to determine the list of available modules,
+    without running the modules tool (which requires spawning a process for each check).
+    """
+
+    def __init__(self, path, lua=False):
+        """
+        Create index of module files in specified module path.
+
+        :param path: module path to index (i.e., an entry in $MODULEPATH)
+        :param lua: also consider module files in Lua syntax (.lua extension)
+        """
+        self.path = path
+        self.lua = lua
+
+        # module names (incl. hidden ones) mapped to path of corresponding module file
+        self.modules = {}
+        # (partial) module names that correspond to directories which contain module files
+        self.dirs = set()
+        # (partial) module names that correspond to directories with a .modulerc/.version file (or '' for top level)
+        self.rc_dirs = set()
+
+        self.scan()
+
+    def scan(self):
+        """Scan module path for module files."""
+        self.modules.clear()
+        self.dirs.clear()
+        self.rc_dirs.clear()
+
+        visited = set()
+        for (dirpath, dirnames, filenames) in os.walk(self.path, followlinks=True):
+            # avoid getting stuck in symlink loops
+            realpath = os.path.realpath(dirpath)
+            if realpath in visited:
+                dirnames[:] = []
+                continue
+            visited.add(realpath)
+
+            reldir = os.path.relpath(dirpath, self.path)
+            if reldir == os.curdir:
+                reldir = ''
+
+            for filename in sorted(filenames):
+                filepath = os.path.join(dirpath, filename)
+                if filename in MODULE_RC_FILES:
+                    self.rc_dirs.add(reldir)
+                    continue
+                elif filename.endswith('.lua'):
+                    if not self.lua:
+                        continue
+                    mod_name = os.path.join(reldir, filename[:-len('.lua')])
+                    # module file in Lua syntax takes precedence over one in Tcl syntax for the same module
+                    self.modules[mod_name] = filepath
+                elif is_tcl_module_file(filepath):
+                    mod_name = os.path.join(reldir, filename)
+                    self.modules.setdefault(mod_name, filepath)
+                else:
+                    continue
+
+                parent = reldir
+                while parent and parent not in self.dirs:
+                    self.dirs.add(parent)
+                    parent = os.path.dirname(parent)
+
+        _log.debug("Found %d module files in %s", len(self.modules), self.path)
+
+    def lookup(self, mod_name):
+        """
+        Check whether module with specified (partial) name is available in this module path.
+
+        :return: True if it is available, False if it is not, None if that can not be determined via the index
+                 (since a .modulerc/.version file may define an alias or default version that matches)
+        """
+        if mod_name in self.modules or mod_name in self.dirs:
+            return True
+
+        parent = os.path.dirname(mod_name)
+        while True:
+            if parent in self.rc_dirs:
+                return None
+            if not parent:
+                break
+            parent = os.path.dirname(parent)
+
+        return False
+
+    def available(self, mod_name=None, include_hidden=False):
+        """
+        Return list of available modules, optionally filtered by specified (partial) module name.
+
+        :param mod_name: a (partial) module name for filtering (prefix match)
+        :param include_hidden: also include hidden modules
+        """
+        res = []
+        for name in self.modules:
+            if mod_name and not name.startswith(mod_name):
+                continue
+            if include_hidden or not os.path.basename(name).startswith('.'):
+                res.append(name)
+        return res
+
+
+def is_tcl_module_file(path):
+    """Check whether specified file is a module file in Tcl syntax, based on the required header."""
+    try:
+        handle = open(path, 'r')
+        try:
+            header = handle.read(len(TCL_MODULE_HEADER))
+        finally:
+            handle.close()
+    except IOError, err:
+        _log.debug("Failed to read %s, so not considering it to be a module file: %s", path, err)
+        return False
+
+    return header == TCL_MODULE_HEADER
+
+
 def get_software_root_env_var_name(name):
     """Return name of environment variable for software root."""
     newname = convert_name(name, upper=True)
@@ -1195,10 +1699,111 @@ def modules_tool(mod_paths=None, testing=False):
         return None
 
 
+_module_command_shell = None
+
+
+def module_command_shell():
+    """Return module command shell (created on first use)."""
+    global _module_command_shell
+
+    if _module_command_shell is None:
+        _module_command_shell = ModuleCommandShell()
+        atexit.register(_module_command_shell.stop)
+
+    return _module_command_shell
+
+
+def module_paths_in_cache_key(key):
+    """Return list of module paths included in specified module cache key, see mk_module_cache_key."""
+    return [p for p in '='.join(key[0].split('=')[1:]).split(os.pathsep) if p]
+
+
+def register_module_cache_key(subcmd, key):
+    """Register module cache key in reverse index, for each of the (real) module paths it includes."""
+    for path in module_paths_in_cache_key(key):
+        MODULE_CACHE_KEYS_FOR_PATH.setdefault(os.path.realpath(path), set()).add((subcmd, key))
+
+
+def module_path_signature(path):
+    """
+    Determine signature for specified module path, based on the modification times of all its (sub)directories;
+    since adding or removing module files changes the modification time of the directory they are in,
+    the signature changes whenever modules are added or removed.
+
+    Signatures are determined only once per session, until they are invalidated via invalidate_module_caches_for.
+    """
+    path = os.path.realpath(path)
+    if path not in MODULE_PATH_SIGNATURES:
+        if os.path.isdir(path):
+            md5 = hashlib.md5()
+            visited = set()
+            for (dirpath, dirnames, _) in os.walk(path, followlinks=True):
+                # avoid getting stuck in symlink loops
+                if os.path.realpath(dirpath) in visited:
+                    dirnames[:] = []
+                    continue
+                visited.add(os.path.realpath(dirpath))
+                dirnames.sort()
+                try:
+                    mtime = os.stat(dirpath).st_mtime
+                except OSError, err:
+                    _log.debug("Failed to determine modification time of %s: %s", dirpath, err)
+                    mtime = None
+                md5.update('%s:%s\n' % (os.path.relpath(dirpath, path), mtime))
+            MODULE_PATH_SIGNATURES[path] = md5.hexdigest()
+        else:
+            MODULE_PATH_SIGNATURES[path] = None
+
+    return MODULE_PATH_SIGNATURES[path]
+
+
+def det_module_paths_signature(key):
+    """Determine signature for module paths included in specified module cache key."""
+    return [(path, module_path_signature(path)) for path in module_paths_in_cache_key(key)]
+
+
+def module_file_signature(path, mod_name):
+    """
+    Determine signature for module file(s) for specified module in specified module path,
+    based on the modification time and size of the module file (in Tcl or Lua syntax);
+    this changes when a module file is regenerated in place, which does not affect the module path signature.
+    """
+    res = []
+    for mod_file in [os.path.join(path, mod_name), os.path.join(path, mod_name + '.lua')]:
+        try:
+            st = os.stat(mod_file)
+            res.append((st.st_mtime, st.st_size))
+        except OSError:
+            res.append(None)
+    return res
+
+
+def det_module_cache_signature(subcmd, key):
+    """
+    Determine signature for persistently cached result of specified module subcommand with specified key:
+    the signatures of the module paths, and for 'module show' also the signature of the module file itself.
+    """
+    res = det_module_paths_signature(key)
+    if subcmd == 'show':
+        res.extend((path, module_file_signature(path, key[2])) for path in module_paths_in_cache_key(key))
+    return res
+
+
+def module_cache_stats():
+    """Return string summarizing statistics for module caches."""
+    return ', '.join('%s: %d' % (key, MODULE_CACHE_STATS[key]) for key in ['hits', 'persistent_hits', 'misses'])
+
+
 def reset_module_caches():
     """Reset module caches."""
     MODULE_AVAIL_CACHE.clear()
     MODULE_SHOW_CACHE.clear()
+    MODULE_CACHE_KEYS_FOR_PATH.clear()
+    MODULE_PATH_SIGNATURES.clear()
+    MODULE_FILES_INDEX_CACHE.clear()
+    reset_module_file_evaluations()
+    for key in MODULE_CACHE_STATS:
+        MODULE_CACHE_STATS[key] = 0
 
 
 def invalidate_module_caches_for(path):
@@ -1206,17 +1811,27 @@ def invalidate_module_caches_for(path):
     if not os.path.exists(path):
         raise EasyBuildError("Non-existing path specified to invalidate module caches: %s", path)
 
-    _log.debug("Invallidating module cache entries for path '%s'", path)
-    for cache, subcmd in [(MODULE_AVAIL_CACHE, 'avail'), (MODULE_SHOW_CACHE, 'show')]:
-        for key in cache.keys():
-            paths_in_key = '='.join(key[0].split('=')[1:]).split(os.pathsep)
-            _log.debug("Paths for 'module %s' key '%s': %s", subcmd, key, paths_in_key)
-            for path_in_key in paths_in_key:
-                if path == path_in_key or (os.path.exists(path_in_key) and os.path.samefile(path, path_in_key)):
-                    _log.debug("Entry '%s' in 'module %s' cache is evicted, marked as invalid via path '%s': %s",
-                               key, subcmd, path, cache[key])
-                    del cache[key]
-                    break
+    _log.debug("Invalidating module cache entries for path '%s'", path)
+    realpath = os.path.realpath(path)
+    for (subcmd, key) in MODULE_CACHE_KEYS_FOR_PATH.pop(realpath, set()):
+        cache = MODULE_CACHES[subcmd]
+        if key in cache:
+            _log.debug("Entry '%s' in 'module %s' cache is evicted, marked as invalid via path '%s': %s",
+                       key, subcmd, path, cache[key])
+            del cache[key]
+
+    # signatures of module paths that (may) include the specified path must be redetermined
+    for sig_path in MODULE_PATH_SIGNATURES.keys():
+        if realpath == sig_path or realpath.startswith(os.path.join(sig_path, '')):
+            del MODULE_PATH_SIGNATURES[sig_path]
+
+    abspath = os.path.abspath(path)
+    for key in MODULE_FILES_INDEX_CACHE.keys():
+        index_path = key[0]
+        if abspath == index_path or abspath.startswith(os.path.join(index_path, '')) or \
+                (os.path.exists(index_path) and os.path.samefile(path, index_path)):
+            _log.debug("Index of module files for '%s' is evicted, marked as invalid via path '%s'", index_path, path)
+            del MODULE_FILES_INDEX_CACHE[key]
 
 
 class Modules(EnvironmentModulesC):
@@ -315,6 +315,8 @@ class EasyBuildOptions(GeneralOption):
             'add-dummy-to-minimal-toolchains': ("Include dummy in minimal toolchain searches", None, 'store_true', False),
             'allow-modules-tool-mismatch': ("Allow mismatch of modules tool and definition of 'module' function",
                                             None, 'store_true', False),
+            'cache-source-trees': ("Cache extracted and patched source trees, and reuse them in later builds "
+                                   "(requires --cachepath)", None, 'store_true', False),
             'cleanup-builddir': ("Cleanup build dir after successful installation.", None, 'store_true', True),
             'cleanup-tmpdir': ("Cleanup tmp dir after successful run.", None, 'store_true', True),
             'color': ("Colorize output", 'choice', 'store', fancylogger.Colorize.AUTO, fancylogger.Colorize,
@@ -351,7 +353,17 @@ class EasyBuildOptions(GeneralOption):
                                 "(e.g. --hide-toolchains=GCCcore)", 'strlist', 'extend', None),
             'ignore-osdeps': ("Ignore any listed OS dependencies", None, 'store_true', False),
             'install-latest-eb-release': ("Install latest known version of easybuild", None, 'store_true', False),
+            'max-downloads-per-host': ("Maximum number of concurrent downloads from a single host",
+                                       'int', 'store', None),
             'minimal-toolchains': ("Use minimal toolchain when resolving dependencies", None, 'store_true', False),
+            'module-command-shell': ("Spawn module commands from a long-running shell process rather than from "
+                                     "the EasyBuild process itself (the modules tool is still started for every "
+                                     "module command)", None, 'store_true', False),
+            'module-file-evaluator': ("Evaluate module files generated by EasyBuild directly rather than via the "
+                                      "modules tool where possible, e.g. to determine $MODULEPATH extensions",
+                                      None, 'store_true', False),
+            'module-files-index': ("Check for available modules by scanning module paths for module files, "
+                                   "rather than via the modules tool (where possible)", None, 'store_true', False),
             'module-only': ("Only generate module file(s); skip all steps except for %s" % ', '.join(MODULE_ONLY_STEPS),
                             None, 'store_true', False),
             'mpi-cmd-template': ("Template for MPI commands (template keys: %(nr_ranks)s, %(cmd)s)",
@@ -362,6 +374,14 @@ class EasyBuildOptions(GeneralOption):
             'output-format': ("Set output format", 'choice', 'store', FORMAT_TXT, [FORMAT_TXT, FORMAT_RST]),
             'parallel': ("Specify (maximum) level of parallellism used during build procedure",
                          'int', 'store', None),
+            'parallel-checksums': ("Number of threads to use for verifying checksums of sources and patches",
+                                   'int', 'store', None),
+            'parallel-downloads': ("Number of concurrent downloads to use for fetching sources and patches",
+                                   'int', 'store', None),
+            'parallel-extract': ("Number of processes to use for extracting sources of extensions up front",
+                                 'int', 'store', None),
+            'parallel-parse': ("Number of processes to use for parsing easyconfigs",
+                               'int', 'store', None),
             'pretend': (("Does the build/installation in a test directory located in $HOME/easybuildinstall"),
                         None, 'store_true', False, 'p'),
             'read-only-installdir': ("Set read-only permissions on installation directory after installation",
@@ -371,10 +391,14 @@ class EasyBuildOptions(GeneralOption):
             'set-gid-bit': ("Set group ID bit on newly created directories", None, 'store_true', False),
             'sticky-bit': ("Set sticky bit on newly created directories", None, 'store_true', False),
             'skip-test-cases': ("Skip running test cases", None, 'store_true', False, 't'),
+            'source-store': ("Maintain a content-addressed store of sources and patches in the first source path, "
+                             "which is used to locate files by checksum", None, 'store_true', False),
             'umask': ("umask to use (e.g. '022'); non-user write permissions on install directories are removed",
                       None, 'store', None),
             'update-modules-tool-cache': ("Update modules tool cache file(s) after generating module file",
                                           None, 'store_true', False),
+            'update-toolchain-hierarchies': ("(Re)build persistent table of toolchain hierarchies for all toolchains "
+                                             "in robot search path (requires --cachepath)", None, 'store_true', False),
             'use-ccache': ("Enable use of ccache to speed up compilation, with specified cache dir",
                            str, 'store', False, {'metavar': "PATH"}),
             'use-f90cache': ("Enable use of f90cache to speed up compilation, with specified cache dir",
@@ -400,6 +424,11 @@ class EasyBuildOptions(GeneralOption):
             'avail-repositories': ("Show all repository types (incl. non-usable)",
                                    None, "store_true", False,),
             'buildpath': ("Temporary build path", None, 'store', mk_full_default_path('buildpath')),
+            'cache-max-size': ("Maximum size (in MB) for each of the persistent caches", 'int', 'store', 1024),
+            'cache-source-trees-max-size': ("Maximum size (in MB) for the cache of source trees",
+                                            'int', 'store', 10240),
+            'cachepath': ("Location for persistent caches, e.g. of processed easyconfig files (disabled if not set)",
+                          None, 'store', None),
             'external-modules-metadata': ("List of files specifying metadata for external modules (INI format)",
                                           'strlist', 'store', None),
             'ignore-dirs': ("Directory names to ignore when searching for files/dirs",
@@ -484,6 +513,8 @@ class EasyBuildOptions(GeneralOption):
                                            None, 'store_true', False),
             'avail-toolchain-opts': ("Show options for toolchain", 'str', 'store', None),
             'check-conflicts': ("Check for version conflicts in dependency graphs", None, 'store_true', False),
+            'conflicts-report': ("Write report of conflicts found via --check-conflicts to specified file (JSON)",
+                                 None, 'store', None, {'metavar': 'PATH'}),
             'dep-graph': ("Create dependency graph", None, 'store', None, {'metavar': 'depgraph.<ext>'}),
             'dump-env-script': ("Dump source script to set up build environment based on toolchain/dependencies",
                                 None, 'store_true', False),
@@ -33,20 +33,25 @@ Dependency resolution functionality, a.k.a. robot.
 :author: Toon Willems (Ghent University)
 :author: Ward Poelmans (Ghent University)
 """
-import copy
+import heapq
+import json
+import multiprocessing
 import os
 import sys
 from vsc.utils import fancylogger
 from vsc.utils.missing import nub
 
-from easybuild.framework.easyconfig.easyconfig import EASYCONFIGS_ARCHIVE_DIR, ActiveMNS, process_easyconfig
-from easybuild.framework.easyconfig.easyconfig import robot_find_easyconfig, verify_easyconfig_filename
-from easybuild.framework.easyconfig.tools import find_resolved_modules, skip_available
+from easybuild.framework.easyconfig.easyconfig import EASYCONFIGS_ARCHIVE_DIR, ActiveMNS, EasyConfig
+from easybuild.framework.easyconfig.easyconfig import _easyconfigs_cache, _process_easyconfig_job
+from easybuild.framework.easyconfig.easyconfig import process_easyconfig, robot_find_easyconfig
+from easybuild.framework.easyconfig.easyconfig import verify_easyconfig_filename
+from easybuild.framework.easyconfig.tools import skip_available
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import build_option
-from easybuild.tools.filetools import det_common_path_prefix, search_file
+from easybuild.tools.filetools import det_common_path_prefix, search_file, write_file
 from easybuild.tools.module_naming_scheme.easybuild_mns import EasyBuildMNS
 from easybuild.tools.module_naming_scheme.utilities import det_full_ec_version
+from easybuild.tools.ordereddict import OrderedDict
 
 _log = fancylogger.getLogger('tools.robot', fname=False)
 
@@ -72,13 +77,14 @@ def det_robot_path(robot_paths_option, tweaked_ecs_paths, pr_path, auto_robot=Fa
     return robot_path
 
 
-def check_conflicts(easyconfigs, modtool, check_inter_ec_conflicts=True):
+def check_conflicts(easyconfigs, modtool, check_inter_ec_conflicts=True, report=None):
     """
     Check for conflicts in dependency graphs for specified easyconfigs.
 
     :param easyconfigs: list of easyconfig files (EasyConfig instances) to check for conflicts
     :param modtool: ModulesTool instance to use
     :param check_inter_ec_conflicts: also check for conflicts between (dependencies of) listed easyconfigs
+    :param report: path to file to write report of detected conflicts to (in JSON format)
     :return: True if one or more conflicts were found, False otherwise
     """
 
@@ -92,7 +98,7 @@ def check_conflicts(easyconfigs, modtool, check_inter_ec_conflicts=True):
         return (spec['name'], det_full_ec_version(spec))
 
     # construct a dictionary: (name, installver) tuple to (build) dependencies
-    deps_for, dep_of = {}, {}
+    deps_for = {}
     for node in ordered_ecs:
         node_key = mk_key(node)
 
@@ -105,37 +111,45 @@ def check_conflicts(easyconfigs, modtool, check_inter_ec_conflicts=True):
 
         deps_for[node_key] = (build_deps, runtime_deps)
 
-        # keep track of reverse deps too
-        for dep in deps:
-            dep_of.setdefault(dep, set()).add(node_key)
-
     if check_inter_ec_conflicts:
         # add ghost entry that depends on each of the specified easyconfigs,
         # since we want to check for conflicts between specified easyconfigs too
         deps_for[(None, None)] = ([], [mk_key(e) for e in easyconfigs])
 
-    # iteratively expand list of dependencies
-    last_deps_for = None
-    while deps_for != last_deps_for:
-        last_deps_for = copy.deepcopy(deps_for)
-        # (Automake, _), [], [(Autoconf, _), (GCC, _)]
-        for (key, (build_deps, runtime_deps)) in last_deps_for.items():
-            # extend runtime dependencies with non-build dependencies of own runtime dependencies
-            # Autoconf
-            for dep in runtime_deps:
-                # [], [M4, GCC]
-                deps_for[key][1].extend([d for d in deps_for[dep][1]])
-
-            # extend build dependencies with non-build dependencies of own build dependencies
-            for dep in build_deps:
-                deps_for[key][0].extend([d for d in deps_for[dep][1]])
-
-            deps_for[key] = (sorted(nub(deps_for[key][0])), sorted(nub(deps_for[key][1])))
-
-            # also track reverse deps (except for ghost entry)
-            if key != (None, None):
-                for dep in build_deps + runtime_deps:
-                    dep_of.setdefault(dep, set()).add(key)
+    # determine transitive closure of runtime dependencies for each entry, via (iterative) memoized depth-first search
+    runtime_closure = {}
+    for key in deps_for:
+        stack = [(key, False)]
+        while stack:
+            (curr, expanded) = stack.pop()
+            if curr in runtime_closure:
+                continue
+            runtime_deps = deps_for.get(curr, ([], []))[1]
+            if expanded:
+                closure = set(runtime_deps)
+                for dep in runtime_deps:
+                    closure.update(runtime_closure[dep])
+                runtime_closure[curr] = closure
+            else:
+                stack.append((curr, True))
+                stack.extend((dep, False) for dep in runtime_deps if dep not in runtime_closure)
+
+    # build dependencies are complemented with the runtime dependencies of the build dependencies
+    closures = {}
+    for (key, (build_deps, _)) in deps_for.items():
+        build_closure = set(build_deps)
+        for dep in build_deps:
+            build_closure.update(runtime_closure[dep])
+        closures[key] = (sorted(build_closure), sorted(runtime_closure[key]))
+
+    # keep track of reverse deps too (except for ghost entry)
+    dep_of = {}
+    for (key, (build_deps, runtime_deps)) in closures.items():
+        if key != (None, None):
+            for dep in build_deps + runtime_deps:
+                dep_of.setdefault(dep, set()).add(key)
+
+    conflicts = []
 
     def check_conflict(parent, dep1, dep2):
         """
@@ -160,17 +174,43 @@ def check_conflicts(easyconfigs, modtool, check_inter_ec_conflicts=True):
                 specname = '%s-%s' % parent
                 sys.stderr.write("Conflict found for dependencies of %s: %s\n" % (specname, vs_msg))
 
+            conflicts.append({
+                'parent': parent[0] and {'name': parent[0], 'version': parent[1]},
+                'conflict': [{
+                    'name': dep[0],
+                    'version': dep[1],
+                    'dep_of': ['%s-%s' % d for d in sorted(dep_of.get(dep, []))],
+                } for dep in [dep1, dep2]],
+            })
+
         return conflict
 
-    # for each of the easyconfigs, check whether the dependencies (incl. build deps) contain any conflicts
+    # for each of the easyconfigs, check whether the dependencies (incl. build deps) contain any conflicts;
+    # only dependencies with the same software name can conflict, so bucket them by name first
     res = False
-    for (key, (build_deps, runtime_deps)) in deps_for.items():
-        # also check whether module itself clashes with any of its dependencies
-        for i, dep1 in enumerate(build_deps + runtime_deps + [key]):
-            for dep2 in (build_deps + runtime_deps)[i+1:]:
-                # don't worry about conflicts between module itself and any of its build deps
-                if dep1 != key or dep2 not in build_deps:
-                    res |= check_conflict(key, dep1, dep2)
+    for (key, (build_deps, runtime_deps)) in sorted(closures.items()):
+        all_deps = build_deps + runtime_deps
+        buckets = {}
+        for i, dep in enumerate(all_deps):
+            buckets.setdefault(dep[0], []).append(i)
+
+        # consider pairs of dependencies in the same order as they are listed
+        pairs = []
+        for idxs in buckets.values():
+            if len(set(all_deps[i][1] for i in idxs)) > 1:
+                pairs.extend((i, j) for (pos, i) in enumerate(idxs) for j in idxs[pos+1:])
+
+        for (i, j) in sorted(pairs):
+            res |= check_conflict(key, all_deps[i], all_deps[j])
+
+    if report:
+        report_txt = json.dumps({
+            'conflicts': conflicts,
+            'conflicts_found': res,
+            'easyconfigs': ['%s-%s' % mk_key(ec) for ec in easyconfigs],
+        }, indent=4, sort_keys=True)
+        write_file(report, report_txt)
+        _log.info("Report of conflicts written to %s", report)
 
     return res
 
@@ -194,7 +234,8 @@ def dry_run(easyconfigs, modtool, short=False):
         lines.append("Dry run: printing build status of easyconfigs and dependencies")
         all_specs = resolve_dependencies(easyconfigs, modtool, retain_all_deps=True)
 
-    unbuilt_specs = skip_available(all_specs, modtool)
+    # keep track of unbuilt specs by id, comparing specs (dicts which include parsed easyconfigs) is expensive
+    unbuilt_specs = set(id(spec) for spec in skip_available(all_specs, modtool))
     dry_run_fmt = " * [%1s] %s (module: %s)"  # markdown compatible (list of items with checkboxes in front)
 
     listed_ec_paths = [spec['spec'] for spec in easyconfigs]
@@ -204,7 +245,7 @@ def dry_run(easyconfigs, modtool, short=False):
     # only allow short if common prefix is long enough
     short = short and common_prefix is not None and len(common_prefix) > len(var_name) * 2
     for spec in all_specs:
-        if spec in unbuilt_specs:
+        if id(spec) in unbuilt_specs:
             ans = ' '
         elif build_option('force') and spec['spec'] in listed_ec_paths:
             ans = 'F'
@@ -230,6 +271,287 @@ def dry_run(easyconfigs, modtool, short=False):
     return '\n'.join(lines)
 
 
+class DependencyGraph(object):
+    """
+    Dependency graph for easyconfigs that still need to be resolved, with nodes keyed by full module name.
+
+    Easyconfigs are released in the same order as repeatedly going over the list of pending easyconfigs
+    (in the order in which they were added), and picking each easyconfig for which all dependencies are resolved;
+    this is done using a Kahn-style topological sort, which requires only O(V+E) work (+ heap operations).
+    """
+
+    def __init__(self, avail_modules, modtool, retain_all_deps=False):
+        """
+        Create empty dependency graph.
+
+        :param avail_modules: list of available modules (can be used to resolve dependencies)
+        :param modtool: ModulesTool instance to use
+        :param retain_all_deps: retain all dependencies, regardless of whether modules are available for them or not
+        """
+        self.modtool = modtool
+        self.retain_all_deps = retain_all_deps
+
+        # full module names of available modules, incl. those for resolved easyconfigs
+        self.avail_modules = set(avail_modules)
+
+        # pending easyconfigs, by sequence number (i.e. in the order in which they were added)
+        self.pending = OrderedDict()
+        # number of pending easyconfigs for each full module name
+        self.pending_cnt = {}
+        # (full module name, dep spec) tuples for unresolved dependencies of each pending easyconfig
+        self.deps = {}
+        # full module names of unresolved dependencies of each pending easyconfig
+        self.blockers = {}
+        # reverse adjacency: sequence numbers of pending easyconfigs waiting for each full module name
+        self.dependents = {}
+        # pending easyconfigs for which all dependencies are resolved
+        self.ready = set()
+        # sequence numbers of pending easyconfigs, by id
+        self.seqs = {}
+
+        self.seq = 0
+        # cache for results of checking existence of modules via modules tool
+        self.exists = {}
+
+    def __len__(self):
+        """Return number of pending easyconfigs."""
+        return len(self.pending)
+
+    def _dep_mod_name(self, dep):
+        """Determine full module name for specified dependency."""
+        dep_mod_name = dep.get('full_mod_name')
+        if dep_mod_name is None:
+            dep_mod_name = ActiveMNS().det_full_module_name(dep)
+        return dep_mod_name
+
+    def add_nodes(self, easyconfigs):
+        """
+        Add list of easyconfigs to dependency graph.
+
+        :param easyconfigs: list of parsed easyconfigs
+        """
+        entries = []
+        for easyconfig in easyconfigs:
+            # copy, we don't want to modify the list of dependencies for the original easyconfig
+            easyconfig = easyconfig.copy()
+
+            mod_name = easyconfig['full_mod_name']
+            self.pending_cnt[mod_name] = self.pending_cnt.get(mod_name, 0) + 1
+            deps = [(self._dep_mod_name(dep), dep) for dep in easyconfig['dependencies']]
+            entries.append((easyconfig, deps))
+
+        # do this only once for all dependencies of all added easyconfigs
+        self._check_exist([dep_mod_name for (_, deps) in entries for (dep_mod_name, _) in deps])
+
+        for easyconfig, deps in entries:
+            seq = self.seq
+            self.seq += 1
+            self.pending[seq] = easyconfig
+            self.seqs[id(easyconfig)] = seq
+
+            unresolved_deps = []
+            for dep_mod_name, dep in deps:
+                if self.is_unresolved(dep_mod_name, dep):
+                    unresolved_deps.append((dep_mod_name, dep))
+                    self.dependents.setdefault(dep_mod_name, set()).add(seq)
+
+            self.deps[seq] = unresolved_deps
+            self.blockers[seq] = set(dep_mod_name for (dep_mod_name, _) in unresolved_deps)
+            if not self.blockers[seq]:
+                self.ready.add(seq)
+
+    def _check_exist(self, dep_mod_names):
+        """Check existence of modules with specified names (if needed), and cache the results."""
+        # fallback to checking with modtool.exist is required,
+        # for hidden modules and external modules where module name may be partial
+        if not self.retain_all_deps:
+            to_check = nub([dep_mod_name for dep_mod_name in dep_mod_names
+                            if dep_mod_name not in self.pending_cnt and dep_mod_name not in self.avail_modules
+                            and dep_mod_name not in self.exists])
+            if to_check:
+                self.exists.update(zip(to_check, self.modtool.exist(to_check, skip_avail=True)))
+
+    def missing_deps(self, deps):
+        """
+        Determine which of the specified dependencies are unresolved, and not pending in the dependency graph either.
+
+        :param deps: list of dependency specs
+        """
+        dep_mod_names = [self._dep_mod_name(dep) for dep in deps]
+        self._check_exist(dep_mod_names)
+        return [dep for (dep_mod_name, dep) in zip(dep_mod_names, deps)
+                if not self.pending_cnt.get(dep_mod_name, 0) and self.is_unresolved(dep_mod_name, dep)]
+
+    def is_unresolved(self, dep_mod_name, dep):
+        """Check whether dependency with specified full module name is not resolved (yet)."""
+        # treat external modules as resolved when retain_all_deps is enabled (e.g., under --dry-run),
+        # since no corresponding easyconfig can be found for them
+        if self.retain_all_deps and dep.get('external_module', False):
+            _log.debug("Treating dependency marked as external dependency as resolved: %s", dep_mod_name)
+            res = False
+
+        # retain dep if it is (still) in the list of easyconfigs
+        elif self.pending_cnt.get(dep_mod_name, 0):
+            _log.debug("Dep %s is (still) in list of easyconfigs, retaining it", dep_mod_name)
+            res = True
+
+        elif dep_mod_name in self.avail_modules:
+            res = False
+
+        # if all dependencies should be retained, include dep unless it has been already
+        elif self.retain_all_deps:
+            _log.debug("Retaining new dep %s in 'retain all deps' mode", dep_mod_name)
+            res = True
+
+        # retain dep if corresponding module is not available yet
+        else:
+            res = not self.exists[dep_mod_name]
+            if res:
+                _log.debug("No module available for dep %s, retaining it", dep)
+
+        return res
+
+    def resolve(self):
+        """
+        Release all pending easyconfigs for which all dependencies are resolved (or become resolved along the way).
+
+        :return: list of resolved easyconfigs, in the order in which they can be installed
+        """
+        resolved_ecs = []
+
+        # easyconfigs are released in rounds, in order of sequence number;
+        # easyconfigs that become ready are picked up in the current round only if they come after the last one
+        curr_round, next_round = list(self.ready), []
+        heapq.heapify(curr_round)
+        self.ready = set()
+
+        while curr_round:
+            seq = heapq.heappop(curr_round)
+
+            easyconfig = self.pending.pop(seq)
+            del self.seqs[id(easyconfig)]
+            del self.deps[seq]
+            del self.blockers[seq]
+
+            _log.debug("Adding easyconfig %s to final list" % easyconfig['spec'])
+            easyconfig['dependencies'] = []
+            resolved_ecs.append(easyconfig)
+
+            mod_name = easyconfig['full_mod_name']
+            self.avail_modules.add(mod_name)
+            self.pending_cnt[mod_name] -= 1
+            if self.pending_cnt[mod_name] == 0:
+                del self.pending_cnt[mod_name]
+                for dependent in self.dependents.pop(mod_name, []):
+                    if dependent in self.blockers:
+                        self.blockers[dependent].discard(mod_name)
+                        if not self.blockers[dependent]:
+                            if dependent > seq:
+                                heapq.heappush(curr_round, dependent)
+                            else:
+                                next_round.append(dependent)
+
+            if not curr_round:
+                curr_round, next_round = next_round, []
+                heapq.heapify(curr_round)
+
+        return resolved_ecs
+
+    def unresolved(self):
+        """
+        Return list of pending easyconfigs, in the order in which they were added.
+
+        The list of dependencies of each pending easyconfig is updated to only include unresolved dependencies.
+        """
+        res = []
+        for seq, easyconfig in self.pending.items():
+            self.deps[seq] = [(n, d) for (n, d) in self.deps[seq] if n in self.blockers[seq]]
+            easyconfig['dependencies'] = [dep for (_, dep) in self.deps[seq]]
+            res.append(easyconfig)
+        return res
+
+    def remove_dependency(self, easyconfig, dep):
+        """Remove (irresolvable) dependency for specified pending easyconfig."""
+        seq = self.seqs.get(id(easyconfig))
+        if seq is None:
+            raise EasyBuildError("Easyconfig %s not found in dependency graph", easyconfig['spec'])
+
+        easyconfig['dependencies'].remove(dep)
+        self.deps[seq] = [(n, d) for (n, d) in self.deps[seq] if d is not dep]
+
+        dep_mod_name = self._dep_mod_name(dep)
+        if dep_mod_name not in [n for (n, _) in self.deps[seq]]:
+            self.blockers[seq].discard(dep_mod_name)
+            if not self.blockers[seq]:
+                self.ready.add(seq)
+
+
+def prefetch_easyconfigs(deps, dep_graph, nprocs, validate=True, seen=None):
+    """
+    Breadth-first discovery of easyconfigs for specified dependencies, and their unresolved dependencies.
+
+    Easyconfig files are located for an entire frontier of dependencies at once, and are parsed concurrently
+    in a pool of worker processes. Parsed easyconfigs are added to the cache used by process_easyconfig,
+    where the robot picks them up in the same order as it would otherwise parse them in,
+    so the result of the dependency resolution is not affected.
+
+    :param deps: list of dependency specs to find & parse easyconfigs for
+    :param dep_graph: DependencyGraph instance, used to determine which dependencies are still unresolved
+    :param nprocs: number of worker processes to use for parsing easyconfigs
+    :param validate: whether or not to validate parsed easyconfigs
+    :param seen: set of (name, version, hidden) tuples for dependencies that were already considered (updated in place)
+    """
+    if seen is None:
+        seen = set()
+
+    pool = None
+    try:
+        frontier = deps
+        while frontier:
+            jobs, parsed = [], []
+            for dep in frontier:
+                # dependencies marked as external modules can not be resolved via an easyconfig
+                if dep.get('external_module', False):
+                    continue
+
+                full_ec_version = det_full_ec_version(dep)
+                hidden = dep.get('hidden', False)
+                if (dep['name'], full_ec_version, hidden) in seen:
+                    continue
+                seen.add((dep['name'], full_ec_version, hidden))
+
+                path = robot_find_easyconfig(dep['name'], full_ec_version)
+                if path is not None:
+                    # same cache key as used in process_easyconfig
+                    cache_key = (path, validate, hidden, False)
+                    if cache_key in _easyconfigs_cache:
+                        parsed.extend(_easyconfigs_cache[cache_key])
+                    else:
+                        job = (path, False, {'validate': validate, 'hidden': hidden})
+                        if job not in jobs:
+                            jobs.append(job)
+
+            if jobs:
+                _log.info("Parsing %d easyconfigs for frontier of %d dependencies using %d processes",
+                          len(jobs), len(frontier), nprocs)
+                if pool is None:
+                    pool = multiprocessing.Pool(nprocs)
+
+                for (path, _, kwargs), (res, err) in zip(jobs, pool.map(_process_easyconfig_job, jobs)):
+                    if err is None:
+                        _easyconfigs_cache[(path, kwargs['validate'], kwargs['hidden'], False)] = res
+                        parsed.extend(res)
+                    else:
+                        # don't cache anything, robot will run into the same problem (and report it)
+                        _log.debug("Failed to process easyconfig %s in worker process: %s", path, err)
+
+            frontier = dep_graph.missing_deps([dep for ec in parsed for dep in ec['dependencies']])
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
 def resolve_dependencies(easyconfigs, modtool, retain_all_deps=False):
     """
     Work through the list of easyconfigs to determine an optimal order
@@ -253,33 +575,51 @@ def resolve_dependencies(easyconfigs, modtool, retain_all_deps=False):
 
     ordered_ecs = []
     # all available modules can be used for resolving dependencies except those that will be installed
-    being_installed = [p['full_mod_name'] for p in easyconfigs]
+    being_installed = set(p['full_mod_name'] for p in easyconfigs)
     avail_modules = [m for m in avail_modules if not m in being_installed]
 
     _log.debug('easyconfigs before resolving deps: %s' % easyconfigs)
 
+    dep_graph = DependencyGraph(avail_modules, modtool, retain_all_deps=retain_all_deps)
+    dep_graph.add_nodes(easyconfigs)
+
+    # rely on EasyBuild module naming scheme when resolving dependencies, since we know that will
+    # generate sensible module names that include the necessary information for the resolution to work
+    # (name, version, toolchain, versionsuffix); cache them by id, (dependency) specs are retained in the graph
+    eb_mns = EasyBuildMNS()
+    eb_mod_names = {}
+
+    def det_eb_mod_name(spec):
+        """Determine (cached) module name for given spec according to EasyBuild module naming scheme."""
+        key = id(spec)
+        if key not in eb_mod_names:
+            eb_mod_names[key] = (spec, eb_mns.det_full_module_name(spec))
+        return eb_mod_names[key][1]
+
+    # easyconfigs for unresolved dependencies can be discovered breadth-first, and parsed in parallel
+    parallel_parse = build_option('parallel_parse') or 1
+    prefetched = set()
+
     # resolve all dependencies, put a safeguard in place to avoid an infinite loop (shouldn't occur though)
     irresolvable = []
+    ordered_ec_mod_names = set()
     loopcnt = 0
     maxloopcnt = 10000
-    while easyconfigs:
+    while dep_graph:
         # make sure this stops, we really don't want to get stuck in an infinite loop
         loopcnt += 1
         if loopcnt > maxloopcnt:
             raise EasyBuildError("Maximum loop cnt %s reached, so quitting (easyconfigs: %s, irresolvable: %s)",
-                                 maxloopcnt, easyconfigs, irresolvable)
+                                 maxloopcnt, dep_graph.unresolved(), irresolvable)
 
         # first try resolving dependencies without using external dependencies
-        last_processed_count = -1
-        while len(avail_modules) > last_processed_count:
-            last_processed_count = len(avail_modules)
-            res = find_resolved_modules(easyconfigs, avail_modules, modtool, retain_all_deps=retain_all_deps)
-            resolved_ecs, easyconfigs, avail_modules = res
-            ordered_ec_mod_names = [x['full_mod_name'] for x in ordered_ecs]
-            for ec in resolved_ecs:
-                # only add easyconfig if it's not included yet (based on module name)
-                if not ec['full_mod_name'] in ordered_ec_mod_names:
-                    ordered_ecs.append(ec)
+        for ec in dep_graph.resolve():
+            # only add easyconfig if it's not included yet (based on module name)
+            if not ec['full_mod_name'] in ordered_ec_mod_names:
+                ordered_ecs.append(ec)
+                ordered_ec_mod_names.add(ec['full_mod_name'])
+
+        easyconfigs = dep_graph.unresolved()
 
         # dependencies marked as external modules should be resolved via available modules at this point
         missing_external_modules = [d['full_mod_name'] for ec in easyconfigs for d in ec['dependencies']
@@ -291,17 +631,23 @@ def resolve_dependencies(easyconfigs, modtool, retain_all_deps=False):
         # robot: look for existing dependencies, add them
         if robot and easyconfigs:
 
-            # rely on EasyBuild module naming scheme when resolving dependencies, since we know that will
-            # generate sensible module names that include the necessary information for the resolution to work
-            # (name, version, toolchain, versionsuffix)
-            being_installed = [EasyBuildMNS().det_full_module_name(p['ec']) for p in easyconfigs]
+            being_installed = set(det_eb_mod_name(p['ec']) for p in easyconfigs)
+
+            if parallel_parse > 1:
+                # consider all candidate dependencies at once, rather than only the first one for each easyconfig
+                candidates = [d for p in easyconfigs for d in p['dependencies'] if
+                              not det_eb_mod_name(d) in being_installed]
+                prefetch_easyconfigs(candidates, dep_graph, parallel_parse, validate=not retain_all_deps,
+                                     seen=prefetched)
 
+            # use fingerprints of parsed easyconfigs to check whether they're already being processed
             additional = []
+            fingerprints = set(p['ec'].fingerprint for p in easyconfigs if isinstance(p['ec'], EasyConfig))
             for entry in easyconfigs:
                 # do not choose an entry that is being installed in the current run
                 # if they depend, you probably want to rebuild them using the new dependency
                 deps = entry['dependencies']
-                candidates = [d for d in deps if not EasyBuildMNS().det_full_module_name(d) in being_installed]
+                candidates = [d for d in deps if not det_eb_mod_name(d) in being_installed]
                 if candidates:
                     cand_dep = candidates[0]
                     # find easyconfig, might not find any
@@ -315,7 +661,7 @@ def resolve_dependencies(easyconfigs, modtool, retain_all_deps=False):
                             _log.debug("Irresolvable dependency found: %s" % cand_dep)
                             irresolvable.append(cand_dep)
                         # remove irresolvable dependency from list of dependencies so we can continue
-                        entry['dependencies'].remove(cand_dep)
+                        dep_graph.remove_dependency(entry, cand_dep)
                     else:
                         _log.info("Robot: resolving dependency %s with %s" % (cand_dep, path))
                         # build specs should not be passed down to resolved dependencies,
@@ -327,16 +673,17 @@ def resolve_dependencies(easyconfigs, modtool, retain_all_deps=False):
                         verify_easyconfig_filename(path, cand_dep, parsed_ec=processed_ecs)
 
                         for ec in processed_ecs:
-                            if not ec in easyconfigs + additional:
+                            if not ec['ec'].fingerprint in fingerprints:
                                 additional.append(ec)
+                                fingerprints.add(ec['ec'].fingerprint)
                                 _log.debug("Added %s as dependency of %s" % (ec, entry))
                 else:
-                    mod_name = EasyBuildMNS().det_full_module_name(entry['ec'])
+                    mod_name = det_eb_mod_name(entry['ec'])
                     _log.debug("No more candidate dependencies to resolve for %s" % mod_name)
 
-            # add additional (new) easyconfigs to list of stuff to process
-            easyconfigs.extend(additional)
-            _log.debug("Unprocessed dependencies: %s", easyconfigs)
+            # add additional (new) easyconfigs to dependency graph
+            dep_graph.add_nodes(additional)
+            _log.debug("Unprocessed dependencies: %s", easyconfigs + additional)
 
         elif not robot:
             # no use in continuing if robot is not enabled, dependencies won't be resolved anyway
@@ -0,0 +1,209 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Support for a content-addressed store of source files, located in the first source path.
+
+Files in the store are indexed by their SHA256 checksum. For other common checksum types, aliases are
+created (as symbolic links), so a file can be located in constant time via any checksum that is known for it.
+Files from the store are made available in the classic <letter>/<name>/ locations via hard links,
+or symbolic links if hard links are not supported.
+"""
+import os
+import re
+import shutil
+from vsc.utils import fancylogger
+
+from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.config import build_option, source_paths
+from easybuild.tools.filetools import DEFAULT_CHECKSUM, compute_checksums
+
+
+_log = fancylogger.getLogger('tools.sourcestore', fname=False)
+
+# subdirectory of first source path that holds the source store
+SOURCE_STORE_SUBDIR = '.source_store'
+
+# checksum type used to index files in the source store
+SOURCE_STORE_CHECKSUM = 'sha256'
+
+# checksum types for which aliases are created in the source store
+SOURCE_STORE_ALIAS_CHECKSUMS = ['md5', 'sha1']
+
+# checksums are used as file names in the source store, so only allow a restricted set of characters
+CHECKSUM_REGEX = re.compile('^[0-9a-f]+$')
+
+
+def source_store_path():
+    """Return location of source store, or None if use of the source store is not enabled (cfr. --source-store)."""
+    if build_option('source_store', default=False):
+        return os.path.join(source_paths()[0], SOURCE_STORE_SUBDIR)
+    else:
+        return None
+
+
+def source_store_checksum_types():
+    """Return list of checksum types via which files can be located in the source store."""
+    return [SOURCE_STORE_CHECKSUM] + SOURCE_STORE_ALIAS_CHECKSUMS
+
+
+def _entry_path(store, checksum_type, checksum):
+    """Determine path of entry in source store for specified checksum."""
+    return os.path.join(store, checksum_type, checksum[:2], checksum)
+
+
+def _parse_checksums(checksums):
+    """
+    Return list of (type, value) tuples for specified checksum(s) that can be used to locate files in the source store.
+
+    :param checksums: checksum value (and type, optionally, default is MD5), or list thereof (cfr. verify_checksum)
+    """
+    if checksums is None:
+        return []
+
+    if not isinstance(checksums, list):
+        checksums = [checksums]
+
+    res = []
+    for checksum in checksums:
+        if isinstance(checksum, basestring):
+            typ = DEFAULT_CHECKSUM
+        elif isinstance(checksum, tuple) and len(checksum) == 2:
+            typ, checksum = checksum
+        else:
+            continue
+
+        if typ in source_store_checksum_types() and isinstance(checksum, basestring):
+            checksum = checksum.lower()
+            if CHECKSUM_REGEX.match(checksum):
+                res.append((typ, checksum))
+
+    return res
+
+
+def find_in_source_store(checksums):
+    """
+    Try to find file with (one of) the specified checksum(s) in the source store.
+
+    :param checksums: checksum value (and type, optionally, default is MD5), or list thereof (cfr. verify_checksum)
+    :return: path to file in source store, or None if no such file is available
+    """
+    store = source_store_path()
+    if store is None:
+        return None
+
+    for typ, checksum in _parse_checksums(checksums):
+        path = _entry_path(store, typ, checksum)
+        # aliases are symbolic links, so use location of the actual file in the store
+        if os.path.isfile(path):
+            path = os.path.realpath(path)
+            _log.debug("Found file with %s checksum %s in source store: %s", typ, checksum, path)
+            return path
+
+    return None
+
+
+def add_to_source_store(path, checksums=None):
+    """
+    Add file at specified path to source store (if it's not in there yet).
+
+    The file is hard linked into the store (or copied if that's not possible); failing to add the file to the store
+    is not considered to be fatal.
+    Aliases are only created for the types of the specified checksums (if any), since the file will be looked up
+    via those; this avoids computing other types of checksums for it.
+
+    :param checksums: checksum(s) specified for the file (cfr. find_in_source_store)
+    :return: path to file in source store, or None if the file was not added to the store
+    """
+    store = source_store_path()
+    if store is None:
+        return None
+
+    alias_types = [typ for (typ, _) in _parse_checksums(checksums) if typ in SOURCE_STORE_ALIAS_CHECKSUMS]
+
+    try:
+        # all required checksums are computed in a single pass over the file
+        computed = compute_checksums(path, [SOURCE_STORE_CHECKSUM] + alias_types)
+        entry = _entry_path(store, SOURCE_STORE_CHECKSUM, computed[SOURCE_STORE_CHECKSUM])
+        if not os.path.exists(entry):
+            if not os.path.exists(os.path.dirname(entry)):
+                os.makedirs(os.path.dirname(entry))
+
+            # link/copy file to temporary location first and then move it in place,
+            # so the store never holds a partial file
+            tmp_entry = '%s.tmp.%d' % (entry, os.getpid())
+            try:
+                os.link(path, tmp_entry)
+            except OSError, err:
+                _log.debug("Failed to hard link %s into source store (%s), so copying it instead", path, err)
+                shutil.copy2(path, tmp_entry)
+            os.rename(tmp_entry, entry)
+            _log.info("Added %s to source store: %s", path, entry)
+
+        for checksum_type in sorted(set(alias_types)):
+            alias = _entry_path(store, checksum_type, computed[checksum_type])
+            if not os.path.lexists(alias):
+                if not os.path.exists(os.path.dirname(alias)):
+                    os.makedirs(os.path.dirname(alias))
+                os.symlink(os.path.relpath(entry, os.path.dirname(alias)), alias)
+
+    except (EasyBuildError, IOError, OSError), err:
+        _log.warning("Failed to add %s to source store %s: %s", path, store, err)
+        entry = None
+
+    return entry
+
+
+def link_from_source_store(entry, path):
+    """
+    Make file in source store available at specified path, using a hard link (or a symbolic link).
+
+    An existing file at the specified path is left untouched, unless it is a broken symbolic link.
+
+    :return: specified path if file is available there, path to file in source store otherwise
+    """
+    if os.path.exists(path):
+        if os.path.samefile(path, entry):
+            return path
+        else:
+            _log.warning("Not replacing existing file %s with %s from source store", path, entry)
+            return entry
+
+    try:
+        if os.path.lexists(path):
+            _log.debug("Removing broken symbolic link %s", path)
+            os.remove(path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        try:
+            os.link(entry, path)
+        except OSError, err:
+            _log.debug("Failed to hard link %s to %s (%s), using a symbolic link instead", entry, path, err)
+            os.symlink(entry, path)
+    except OSError, err:
+        _log.warning("Failed to link %s from source store to %s: %s", entry, path, err)
+        return entry
+
+    _log.info("Linked %s from source store to %s", entry, path)
+    return path
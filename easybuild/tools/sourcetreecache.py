@@ -0,0 +1,285 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Support for a cache of extracted and patched source trees, located in the path for persistent caches (--cachepath).
+
+Each entry holds a source tree (as it was after applying all patches) and the metadata required to reuse it;
+entries are keyed by the checksums of the sources together with the ordered list of patches and patch levels
+(cfr. EasyBlock.det_source_tree_cache_key).
+"""
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+from vsc.utils import fancylogger
+
+from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import EVICTION_TARGET
+from easybuild.tools.config import build_option
+from easybuild.tools.filetools import clone_dir, rmtree2
+
+
+_log = fancylogger.getLogger('tools.sourcetreecache', fname=False)
+
+# subdirectory of path for persistent caches that holds the source tree cache
+SOURCE_TREE_CACHE_SUBDIR = 'source_trees'
+
+# checksum type used for sources and patches in keys of the source tree cache
+SOURCE_TREE_CACHE_CHECKSUM = 'sha256'
+
+# subdirectory of cache entry that holds the source tree
+ENTRY_TREE = 'tree'
+# file in cache entry that holds the metadata; its modification time indicates when the entry was last used
+ENTRY_METADATA = 'metadata'
+
+# source tree caches, indexed by location
+_source_tree_caches = {}
+
+# whether or not a warning was already logged for not having a location for persistent caches
+_no_cachepath_warned = False
+
+
+class SourceTreeCache(object):
+    """
+    Persistent cache of source trees, stored as individual directories.
+
+    When the total size of the cache exceeds the maximum size, least recently used entries are evicted.
+    Failing to store an entry is not considered to be fatal.
+    """
+
+    def __init__(self, path, max_size=None):
+        """
+        Create source tree cache in specified location.
+
+        :param path: path to directory for cache entries
+        :param max_size: maximum total size (in bytes) of the source trees in the cache (None implies no limit)
+        """
+        self.log = fancylogger.getLogger(self.__class__.__name__, fname=False)
+        self.path = path
+        self.max_size = max_size
+
+        # total size of cache entries, only determined when needed
+        self.size = None
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+        }
+
+    def entry_path(self, key):
+        """Determine path for cache entry with specified key (a string)."""
+        return os.path.join(self.path, hashlib.sha1(key).hexdigest())
+
+    def load_metadata(self, path):
+        """Load metadata of cache entry at specified path; returns (key, subdirs, size) tuple or None."""
+        metadata_path = os.path.join(path, ENTRY_METADATA)
+        try:
+            handle = open(metadata_path, 'rb')
+            try:
+                return pickle.load(handle)
+            finally:
+                handle.close()
+        except Exception, err:
+            self.log.debug("Failed to load metadata for cache entry %s: %s", path, err)
+            return None
+
+    def entries(self):
+        """Return list of (path, size, last use time) tuples for all (complete) entries in this cache."""
+        res = []
+        if os.path.isdir(self.path):
+            for entry in os.listdir(self.path):
+                # skip entries that are being created or removed
+                if entry.startswith('.'):
+                    continue
+                entry_path = os.path.join(self.path, entry)
+                metadata = self.load_metadata(entry_path)
+                try:
+                    last_use = os.stat(os.path.join(entry_path, ENTRY_METADATA)).st_mtime
+                except OSError:
+                    # entry may have been removed in the meantime (e.g. by another EasyBuild session)
+                    continue
+                if metadata is not None:
+                    res.append((entry_path, metadata[2], last_use))
+        return res
+
+    def remove(self, path, size=None):
+        """Remove cache entry at specified path (if it still exists), return True if it was removed."""
+        # move entry out of the way first, so other EasyBuild sessions never see a partially removed entry
+        tmp_path = os.path.join(self.path, '.rm.%s.%d' % (os.path.basename(path), os.getpid()))
+        try:
+            os.rename(path, tmp_path)
+            rmtree2(tmp_path)
+        except (EasyBuildError, OSError), err:
+            self.log.debug("Failed to remove cache entry %s: %s", path, err)
+            return False
+
+        if self.size is not None and size is not None:
+            self.size -= size
+        return True
+
+    def load(self, key, target_path):
+        """
+        Clone source tree for specified key from cache into target directory.
+
+        :param key: key of cache entry (a string)
+        :param target_path: (empty) directory to clone source tree into
+        :return: list of subdirectories (relative to target_path) that were stored with the source tree,
+                 or None in case of a cache miss
+        """
+        path = self.entry_path(key)
+
+        res = None
+        metadata = self.load_metadata(path)
+        # entry only applies if keys match exactly (hash collisions are unlikely, but not impossible)
+        if metadata is not None and metadata[0] == key:
+            try:
+                clone_dir(os.path.join(path, ENTRY_TREE), target_path)
+                res = metadata[1]
+            except EasyBuildError, err:
+                self.log.warning("Failed to clone source tree from cache entry %s: %s", path, err)
+                # clean up partially cloned source tree
+                for entry in os.listdir(target_path):
+                    entry_path = os.path.join(target_path, entry)
+                    if os.path.isdir(entry_path) and not os.path.islink(entry_path):
+                        rmtree2(entry_path)
+                    else:
+                        os.remove(entry_path)
+            else:
+                # update modification time, to keep track of when cache entry was last used
+                try:
+                    os.utime(os.path.join(path, ENTRY_METADATA), None)
+                except OSError, err:
+                    self.log.debug("Failed to update modification time of cache entry %s: %s", path, err)
+
+        if res is None:
+            self.stats['misses'] += 1
+            self.log.info("Source tree cache miss for %s in %s", key, self.path)
+        else:
+            self.stats['hits'] += 1
+            self.log.info("Source tree cache hit for %s: cloned %s into %s", key, path, target_path)
+
+        return res
+
+    def store(self, key, path, subdirs):
+        """
+        Store source tree in specified directory in cache.
+
+        :param key: key of cache entry (a string)
+        :param path: directory that holds the source tree
+        :param subdirs: list of subdirectories (relative to path) to store with the source tree
+        """
+        entry_path = self.entry_path(key)
+        if os.path.exists(entry_path):
+            self.log.debug("Source tree for %s is already stored in %s", key, entry_path)
+            return
+
+        tmp_path = None
+        try:
+            if not os.path.exists(self.path):
+                os.makedirs(self.path)
+
+            # create entry in temporary location first and move it in place only when it is complete,
+            # so other EasyBuild sessions never see a partial cache entry
+            tmp_path = tempfile.mkdtemp(prefix='.tmp', dir=self.path)
+            tree_path = os.path.join(tmp_path, ENTRY_TREE)
+            clone_dir(path, tree_path)
+
+            size = 0
+            for dirpath, _, filenames in os.walk(tree_path):
+                size += sum(os.lstat(os.path.join(dirpath, name)).st_size for name in filenames)
+
+            handle = open(os.path.join(tmp_path, ENTRY_METADATA), 'wb')
+            try:
+                pickle.dump((key, subdirs, size), handle, pickle.HIGHEST_PROTOCOL)
+            finally:
+                handle.close()
+            os.rename(tmp_path, entry_path)
+        except (EasyBuildError, IOError, OSError, pickle.PicklingError), err:
+            self.log.warning("Failed to store source tree %s in cache entry %s: %s", path, entry_path, err)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    rmtree2(tmp_path)
+                except EasyBuildError, err:
+                    self.log.debug("Failed to clean up %s: %s", tmp_path, err)
+            return
+
+        self.stats['stores'] += 1
+        self.log.info("Stored source tree %s for %s in %s (%d bytes)", path, key, entry_path, size)
+
+        if self.max_size is not None:
+            if self.size is None:
+                self.size = sum(size for (_, size, _) in self.entries())
+            else:
+                self.size += size
+
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        """Evict least recently used entries from cache, until cache is sufficiently below its maximum size."""
+        entries = sorted(self.entries(), key=lambda x: x[2])
+        self.size = sum(size for (_, size, _) in entries)
+
+        target = int(self.max_size * EVICTION_TARGET)
+        self.log.info("Evicting source trees in %s to reduce size from %d to %d bytes", self.path, self.size, target)
+        for path, size, _ in entries:
+            if self.size <= target:
+                break
+            if self.remove(path, size=size):
+                self.stats['evictions'] += 1
+
+
+def source_tree_cache():
+    """
+    Return cache of extracted and patched source trees,
+    or None if it is not enabled (cfr. --cache-source-trees) or if no location for persistent caches was configured.
+    """
+    if not build_option('cache_source_trees', default=False):
+        return None
+
+    cachepath = build_option('cachepath', default=None)
+    if not cachepath:
+        # only warn once, this function is called several times per installation
+        global _no_cachepath_warned
+        if not _no_cachepath_warned:
+            _log.warning("Not using cache of source trees, since no location for persistent caches is set "
+                         "(--cachepath)")
+            _no_cachepath_warned = True
+        return None
+
+    path = os.path.join(cachepath, SOURCE_TREE_CACHE_SUBDIR)
+    max_size = build_option('cache_source_trees_max_size', default=None)
+    if max_size is not None:
+        # maximum size is specified in MB
+        max_size = int(max_size * 1024 * 1024)
+
+    cache = _source_tree_caches.get(path)
+    if cache is None or cache.max_size != max_size:
+        cache = SourceTreeCache(path, max_size=max_size)
+        _source_tree_caches[path] = cache
+
+    return cache
@@ -40,7 +40,7 @@ from datetime import datetime
 from time import gmtime, strftime
 
 from easybuild.framework.easyblock import build_easyconfigs
-from easybuild.framework.easyconfig.tools import process_easyconfig
+from easybuild.framework.easyconfig.tools import process_easyconfigs
 from easybuild.framework.easyconfig.tools import skip_available
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import build_option
@@ -98,12 +98,12 @@ def regtest(easyconfig_paths, modtool, build_specs=None):
 
     test_results = []
 
-    # process all the found easyconfig files
+    # process all the found easyconfig files (in parallel if requested via --parallel-parse)
     easyconfigs = []
-    for ecfile in ecfiles:
-        try:
-            easyconfigs.extend(process_easyconfig(ecfile, build_specs=build_specs))
-        except EasyBuildError, err:
+    for ecfile, ecs, err in process_easyconfigs(ecfiles, build_specs=build_specs):
+        if err is None:
+            easyconfigs.extend(ecs)
+        else:
             test_results.append((ecfile, 'parsing_easyconfigs', 'easyconfig file error: %s' % err, _log))
 
     # skip easyconfigs for which a module is already available, unless forced
@@ -0,0 +1,127 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Unit tests for tools/cache.py.
+"""
+import os
+import sys
+import time
+from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
+from unittest import TextTestRunner
+
+from easybuild.tools.cache import FileCache, persistent_cache
+from easybuild.tools.filetools import mkdir, write_file
+
+
+class CacheTest(EnhancedTestCase):
+    """Tests for persistent caches."""
+
+    def test_file_cache(self):
+        """Test FileCache class."""
+        cachedir = os.path.join(self.test_prefix, 'cache')
+        cache = FileCache(cachedir)
+
+        self.assertEqual(cache.load('foo'), None)
+        self.assertEqual(cache.load('foo', default='bar'), 'bar')
+        self.assertFalse(os.path.exists(cachedir))
+
+        cache.store('foo', {'one': [1, 2, 3]})
+        self.assertEqual(cache.load('foo'), {'one': [1, 2, 3]})
+        self.assertEqual(len(cache.entries()), 1)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 2, 'stores': 1, 'evictions': 0})
+
+        # cache entries are retained across instances
+        cache = FileCache(cachedir)
+        self.assertEqual(cache.load('foo'), {'one': [1, 2, 3]})
+        cache.store('foo', 'updated')
+        self.assertEqual(cache.load('foo'), 'updated')
+        self.assertEqual(len(cache.entries()), 1)
+
+        # corrupt cache entries are cache misses, and get removed
+        write_file(cache.entry_path('foo'), 'this is not a pickle')
+        self.assertEqual(cache.load('foo'), None)
+        self.assertFalse(os.path.exists(cache.entry_path('foo')))
+
+        # entries with a different key (hash collision) are cache misses
+        cache.store('foo', 'foo')
+        mkdir(os.path.dirname(cache.entry_path('bar')), parents=True)
+        os.rename(cache.entry_path('foo'), cache.entry_path('bar'))
+        self.assertEqual(cache.load('bar'), None)
+
+        cache.clear()
+        self.assertEqual(cache.entries(), [])
+
+        # storing entries is done on a best-effort basis
+        write_file(os.path.join(self.test_prefix, 'file'), '')
+        cache = FileCache(os.path.join(self.test_prefix, 'file', 'cache'))
+        cache.store('foo', 'foo')
+        self.assertEqual(cache.load('foo'), None)
+
+    def test_file_cache_eviction(self):
+        """Test evicting least recently used entries from a FileCache."""
+        cache = FileCache(os.path.join(self.test_prefix, 'cache'))
+        cache.store('entry0', 'x' * 1000)
+        entry_size = os.path.getsize(cache.entry_path('entry0'))
+        cache.clear()
+
+        cache = FileCache(os.path.join(self.test_prefix, 'cache'), max_size=entry_size * 5)
+        now = time.time()
+        for idx in range(5):
+            key = 'entry%d' % idx
+            cache.store(key, 'x' * 1000)
+            # make sure entries have a distinct last use time, in the order in which they were stored
+            os.utime(cache.entry_path(key), (now - 100 + idx, now - 100 + idx))
+        self.assertEqual(len(cache.entries()), 5)
+        self.assertEqual(cache.stats['evictions'], 0)
+
+        # loading an entry marks it as recently used
+        self.assertEqual(cache.load('entry0'), 'x' * 1000)
+
+        # storing another entry triggers evicting least recently used entries, until cache is at 80% of max. size
+        cache.store('entry5', 'x' * 1000)
+        self.assertEqual(cache.stats['evictions'], 2)
+        expected = sorted(cache.entry_path(k) for k in ['entry0', 'entry3', 'entry4', 'entry5'])
+        self.assertEqual(sorted(p for (p, _, _) in cache.entries()), expected)
+        self.assertEqual(cache.size, entry_size * 4)
+
+    def test_persistent_cache(self):
+        """Test persistent_cache function."""
+        self.assertEqual(persistent_cache('test'), None)
+
+        init_config(build_options={'cachepath': self.test_prefix, 'cache_max_size': 2})
+        cache = persistent_cache('test')
+        self.assertTrue(isinstance(cache, FileCache))
+        self.assertEqual(cache.path, os.path.join(self.test_prefix, 'test'))
+        self.assertEqual(cache.max_size, 2 * 1024 * 1024)
+        self.assertTrue(persistent_cache('test') is cache)
+
+
+def suite():
+    """ returns all the testcases in this module """
+    return TestLoaderFiltered().loadTestsFromTestCase(CacheTest, sys.argv[1:])
+
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=1).run(suite())
@@ -44,8 +44,10 @@ from easybuild.framework.extensioneasyblock import ExtensionEasyBlock
 from easybuild.tools import config
 from easybuild.tools.build_log import EasyBuildError
 from easybuild.tools.config import get_module_syntax
-from easybuild.tools.filetools import mkdir, read_file, write_file
+from easybuild.tools.filetools import compute_checksum, mkdir, read_file, write_file
 from easybuild.tools.modules import modules_tool
+from easybuild.tools.sourcestore import SOURCE_STORE_SUBDIR, find_in_source_store
+from easybuild.tools.sourcetreecache import source_tree_cache
 
 
 class EasyBlockTest(EnhancedTestCase):
@@ -527,6 +529,33 @@ class EasyBlockTest(EnhancedTestCase):
         eb.close_log()
         os.remove(eb.logfile)
 
+    def test_ext_class_unpacks_src(self):
+        """Test determining whether extension class unpacks source (only then it is extracted up front)."""
+        self.contents = '\n'.join([
+            'easyblock = "ConfigureMake"',
+            'name = "pi"',
+            'version = "3.14"',
+            'homepage = "http://example.com"',
+            'description = "test easyconfig"',
+            'toolchain = {"name": "dummy", "version": "dummy"}',
+            'exts_list = ["ext1"]',
+            'exts_defaultclass = "DummyExtension"',
+        ])
+        self.writeEC()
+        eb = EasyBlock(EasyConfig(self.eb_file))
+        self.assertFalse(eb.ext_class_unpacks_src({'name': 'ext1'}))
+
+        self.contents = self.contents.replace('DummyExtension', 'Toy_Extension')
+        self.writeEC()
+        eb = EasyBlock(EasyConfig(self.eb_file))
+        self.assertTrue(eb.ext_class_unpacks_src({'name': 'ext1'}))
+
+        # unknown extension class
+        self.contents = self.contents.replace('Toy_Extension', 'NoSuchExtension')
+        self.writeEC()
+        eb = EasyBlock(EasyConfig(self.eb_file))
+        self.assertFalse(eb.ext_class_unpacks_src({'name': 'ext1'}))
+
     def test_make_module_step(self):
         """Test the make_module_step"""
         name = "pi"
@@ -788,6 +817,45 @@ class EasyBlockTest(EnhancedTestCase):
 
         shutil.rmtree(tmpdir)
 
+    def test_obtain_file_source_store(self):
+        """Test obtain_file method in combination with source store."""
+        toy_tarball = 'toy-0.0.tar.gz'
+        testdir = os.path.abspath(os.path.dirname(__file__))
+        toy_tarball_path = os.path.join(testdir, 'sandbox', 'sources', 'toy', toy_tarball)
+        toy_md5 = compute_checksum(toy_tarball_path)
+        srcpath = os.path.join(self.test_prefix, 'sources')
+        del os.environ['EASYBUILD_SOURCEPATH']  # defined by setUp
+
+        ec = process_easyconfig(os.path.join(testdir, 'easyconfigs', 'test_ecs', 't', 'toy', 'toy-0.0.eb'))[0]
+        eb = EasyBlock(ec['ec'])
+
+        init_config(args=['--sourcepath=%s' % srcpath], build_options={'source_store': True})
+
+        # downloaded file is added to source store
+        urls = ['file://%s' % os.path.dirname(toy_tarball_path)]
+        res = eb.obtain_file(toy_tarball, urls=urls, checksum=toy_md5)
+        self.assertEqual(res, os.path.join(srcpath, 't', 'toy', toy_tarball))
+        entry = find_in_source_store(toy_md5)
+        self.assertTrue(entry.startswith(os.path.join(srcpath, SOURCE_STORE_SUBDIR)))
+        self.assertTrue(os.path.samefile(res, entry))
+
+        # file is obtained from source store via its checksum, even if it's not available anywhere else
+        os.remove(res)
+        res = eb.obtain_file(toy_tarball, checksum=toy_md5)
+        self.assertEqual(res, os.path.join(srcpath, 't', 'toy', toy_tarball))
+        self.assertTrue(os.path.samefile(res, entry))
+
+        # also for files with a different name but the same contents
+        res = eb.obtain_file('toy-0.0-renamed.tar.gz', extension=True, checksum=('sha256', entry.split('/')[-1]))
+        self.assertEqual(res, os.path.join(srcpath, 't', 'toy', 'extensions', 'toy-0.0-renamed.tar.gz'))
+        self.assertTrue(os.path.samefile(res, entry))
+
+        # without a (matching) checksum, the source store is not used
+        fn = 'toy-0.0-nosuchfile.tar.gz'
+        error_regex = "Couldn't find file %s anywhere" % fn
+        self.assertErrorRegex(EasyBuildError, error_regex, eb.obtain_file, fn)
+        self.assertErrorRegex(EasyBuildError, error_regex, eb.obtain_file, fn, checksum='0123456789abcdef')
+
     def test_check_readiness(self):
         """Test check_readiness method."""
         init_config(build_options={'validate': False})
@@ -911,6 +979,57 @@ class EasyBlockTest(EnhancedTestCase):
         self.assertTrue("and very proud of it" in read_file(os.path.join(toydir, 'toy.source')))
         self.assertEqual(read_file(os.path.join(toydir, 'toy-extra.txt')), 'moar!\n')
 
+    def test_source_tree_cache(self):
+        """Test extract and patch steps in combination with cache of source trees."""
+        test_easyconfigs = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        ec = process_easyconfig(os.path.join(test_easyconfigs, 't', 'toy', 'toy-0.0.eb'))[0]
+
+        init_config(build_options={'cache_source_trees': True, 'cachepath': os.path.join(self.test_prefix, 'cache')})
+        cache = source_tree_cache()
+
+        # extracted and patched source tree is stored in cache
+        eb = EasyBlock(ec['ec'])
+        eb.make_builddir()
+        eb.fetch_step()
+        eb.extract_step()
+        eb.patch_step()
+        self.assertFalse(eb.src_tree_from_cache)
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 1, 'stores': 1, 'evictions': 0})
+
+        # in a clean build directory, patched source tree is obtained from cache
+        eb = EasyBlock(ec['ec'])
+        eb.make_builddir()
+        eb.fetch_step()
+        eb.extract_step()
+        self.assertTrue(eb.src_tree_from_cache)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 1, 'stores': 1, 'evictions': 0})
+        toydir = os.path.join(eb.builddir, 'toy-0.0')
+        self.assertEqual(eb.src[0]['finalpath'], toydir)
+        eb.patch_step()
+        self.assertEqual(sorted(os.listdir(toydir)), ['toy-extra.txt', 'toy.source', 'toy.source.orig'])
+        self.assertTrue("and very proud of it" in read_file(os.path.join(toydir, 'toy.source')))
+        self.assertEqual(cache.stats['stores'], 1)
+
+        # cache is not used if build directory is not empty
+        eb = EasyBlock(ec['ec'])
+        eb.make_builddir()
+        eb.fetch_step()
+        self.assertTrue(eb.det_source_tree_cache_key())
+        write_file(os.path.join(eb.builddir, 'foo.txt'), 'foo')
+        self.assertEqual(eb.det_source_tree_cache_key(), None)
+
+        # different list of patches implies a different source tree
+        ec['ec']['patches'] = ['toy-0.0_typo.patch']
+        eb = EasyBlock(ec['ec'])
+        eb.make_builddir()
+        eb.fetch_step()
+        eb.extract_step()
+        eb.patch_step()
+        self.assertFalse(eb.src_tree_from_cache)
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 2, 'stores': 2, 'evictions': 0})
+        toydir = os.path.join(eb.builddir, 'toy-0.0')
+        self.assertEqual(sorted(os.listdir(toydir)), ['toy.source', 'toy.source.orig'])
+
     def test_extensions_sanity_check(self):
         """Test sanity check aspect of extensions."""
         test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
@@ -32,12 +32,13 @@ Unit tests for easyconfig.py
 import copy
 import glob
 import os
+import pickle
 import re
 import shutil
 import sys
 import tempfile
 from distutils.version import LooseVersion
-from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
+from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, cleanup, init_config
 from unittest import TextTestRunner
 from vsc.utils.fancylogger import setLogLevelDebug, logToScreen
 
@@ -45,26 +46,33 @@ import easybuild.tools.build_log
 import easybuild.framework.easyconfig as easyconfig
 from easybuild.framework.easyblock import EasyBlock
 from easybuild.framework.easyconfig.constants import EXTERNAL_MODULE_MARKER
+from easybuild.framework.easyconfig.format.format import easyconfig_read_stats
 from easybuild.framework.easyconfig.easyconfig import ActiveMNS, EasyConfig, create_paths, copy_easyconfigs
-from easybuild.framework.easyconfig.easyconfig import letter_dir_for, get_easyblock_class, process_easyconfig
+from easybuild.framework.easyconfig.easyconfig import avail_easyblock_modules, is_easyblock_module_available
+from easybuild.framework.easyconfig.easyconfig import det_persistent_cache_key, letter_dir_for, get_easyblock_class
+from easybuild.framework.easyconfig.easyconfig import process_easyconfig, process_easyconfigs, robot_find_easyconfig
+from easybuild.framework.easyconfig.index import EasyConfigsIndex, easyconfigs_index
 from easybuild.framework.easyconfig.easyconfig import resolve_template, verify_easyconfig_filename
 from easybuild.framework.easyconfig.licenses import License, LicenseGPLv3
 from easybuild.framework.easyconfig.parser import fetch_parameters_from_easyconfig
 from easybuild.framework.easyconfig.templates import template_constant_dict, to_template_str
-from easybuild.framework.easyconfig.tools import categorize_files_by_type, dep_graph, find_related_easyconfigs
+from easybuild.framework.easyconfig.tools import categorize_files_by_type, dep_graph, det_easyconfig_paths
+from easybuild.framework.easyconfig.tools import find_related_easyconfigs
 from easybuild.framework.easyconfig.tools import parse_easyconfigs
-from easybuild.framework.easyconfig.tweak import obtain_ec_for, tweak_one
+from easybuild.framework.easyconfig.tweak import find_matching_easyconfigs, obtain_ec_for, tweak_one
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.config import module_classes
 from easybuild.tools.configobj import ConfigObj
 from easybuild.tools.docs import avail_easyconfig_constants, avail_easyconfig_templates
-from easybuild.tools.filetools import mkdir, read_file, write_file
+from easybuild.tools.filetools import copy_file, mkdir, read_file, write_file
 from easybuild.tools.module_naming_scheme.toolchain import det_toolchain_compilers, det_toolchain_mpi
 from easybuild.tools.module_naming_scheme.utilities import det_full_ec_version
 from easybuild.tools.options import parse_external_modules_metadata
 from easybuild.tools.robot import resolve_dependencies
 from easybuild.tools.systemtools import get_shared_lib_ext
 from easybuild.tools.utilities import quote_str
+from easybuild.tools.version import VERSION
 from test.framework.utilities import find_full_path
 
 
@@ -816,6 +824,57 @@ class EasyConfigTest(EnhancedTestCase):
         eb['description'] = "test easyconfig % %% %s% %%% %(name)s %%(name)s %%%(name)s %%%%(name)s"
         self.assertEqual(eb['description'], "test easyconfig % %% %s% %%% PI %(name)s %PI %%(name)s")
 
+    def test_templating_cache(self):
+        """Test caching of resolved templated values of easyconfig parameters."""
+        test_ecs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        ec = EasyConfig(os.path.join(test_ecs, 't', 'toy', 'toy-0.0.eb'))
+
+        self.assertEqual(ec['sources'], ['toy-0.0.tar.gz'])
+        self.assertTrue('sources' in ec._resolved_values)
+
+        # modifying the returned value doesn't affect the cached resolved value
+        ec['sources'].append('foo.tar.gz')
+        ec['sanity_check_paths']['dirs'].append('lib')
+        self.assertEqual(ec['sources'], ['toy-0.0.tar.gz'])
+        self.assertEqual(ec['sanity_check_paths'], {'files': [('bin/yot', 'bin/toy')], 'dirs': ['bin']})
+
+        # setting a value invalidates the cached resolved value
+        ec['sources'] = ['%(name)s-%(version)s.zip']
+        self.assertEqual(ec['sources'], ['toy-0.0.zip'])
+        ec.update('sources', ['%(namelower)s.tar.gz'])
+        self.assertEqual(ec['sources'], ['toy-0.0.zip', 'toy.tar.gz'])
+
+        # same when value is modified in place (which requires that templating is disabled)
+        ec.enable_templating = False
+        ec['sources'].append('%(version)s.tar.bz2')
+        ec.enable_templating = True
+        self.assertEqual(ec['sources'], ['toy-0.0.zip', 'toy.tar.gz', '0.0.tar.bz2'])
+
+        # changing template values also invalidates cached resolved values
+        ec.template_values['version'] = '1.2.3'
+        self.assertEqual(ec['sources'], ['toy-0.0.zip', 'toy.tar.gz', '1.2.3.tar.bz2'])
+        ec.template_values = {'name': 'foo', 'namelower': 'foo', 'version': '4.5.6'}
+        # note: first entry was resolved when 'sources' was updated
+        self.assertEqual(ec['sources'], ['toy-0.0.zip', 'foo.tar.gz', '4.5.6.tar.bz2'])
+        ec['version'] = '0.0'
+        ec.generate_template_values()
+        self.assertEqual(ec['sources'], ['toy-0.0.zip', 'toy.tar.gz', '0.0.tar.bz2'])
+
+        self.assertEqual(ec.asdict()['sources'], ec['sources'])
+
+        # read-only view with all values resolved upfront
+        frozen_ec = ec.freeze()
+        self.assertEqual(frozen_ec['sources'], ['toy-0.0.zip', 'toy.tar.gz', '0.0.tar.bz2'])
+        self.assertEqual(frozen_ec['postinstallcmds'], ['echo TOY > %(installdir)s/README'])
+        self.assertEqual(frozen_ec.get('nosuchparam', 'foo'), 'foo')
+        self.assertTrue('sources' in frozen_ec)
+        self.assertEqual(frozen_ec.asdict(), ec.asdict())
+
+        error_pattern = "Can't set easyconfig parameter 'version' to '1.0' in read-only view"
+        self.assertErrorRegex(EasyBuildError, error_pattern, frozen_ec.__setitem__, 'version', '1.0')
+        error_pattern = "Use of unknown easyconfig parameter 'nosuchparam'"
+        self.assertErrorRegex(EasyBuildError, error_pattern, frozen_ec.__getitem__, 'nosuchparam')
+
     def test_templating_doc(self):
         """test templating documentation"""
         doc = avail_easyconfig_templates()
@@ -981,6 +1040,91 @@ class EasyConfigTest(EnhancedTestCase):
 
         self.assertEqual(fetch_parameters_from_easyconfig(read_file(toy_ec_file), ['description'])[0], "Toy C program.")
 
+    def test_process_easyconfigs(self):
+        """Test process_easyconfigs function."""
+        test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        ec_files = [
+            os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0.eb'),
+            os.path.join(test_ecs_dir, 'g', 'gzip', 'gzip-1.4.eb'),
+            os.path.join(self.test_prefix, 'broken.eb'),
+            os.path.join(test_ecs_dir, 'g', 'GCC', 'GCC-4.7.2.eb'),
+            os.path.join(self.test_prefix, 'also_broken.eb'),
+        ]
+        write_file(ec_files[2], "name = 'broken'\nversion = ")
+        write_file(ec_files[4], "name = 'also_broken'\nversion = '1.0'\nfoo = bar")
+
+        res = {}
+        for nprocs in [1, 3]:
+            easyconfig.easyconfig._easyconfigs_cache.clear()
+            progress = []
+            res[nprocs] = process_easyconfigs(ec_files, nprocs=nprocs, validate=False,
+                                              progress=lambda idx, cnt: progress.append((idx, cnt)))
+            self.assertEqual(progress, [(idx, 5) for idx in range(1, 6)])
+
+            # results are in the same order as the specified easyconfig files
+            self.assertEqual([path for (path, _, _) in res[nprocs]], ec_files)
+            self.assertEqual([ecs[0]['ec']['name'] for (_, ecs, err) in res[nprocs] if err is None],
+                             ['toy', 'gzip', 'GCC'])
+
+            # errors are collected per easyconfig file
+            errors = [(path, err) for (path, ecs, err) in res[nprocs] if err is not None]
+            self.assertEqual([path for (path, _) in errors], [ec_files[2], ec_files[4]])
+            self.assertTrue(all(ecs is None for (_, ecs, err) in res[nprocs] if err is not None))
+            self.assertTrue(re.search("Failed to process easyconfig %s" % ec_files[2], errors[0][1]))
+
+            # parsed easyconfigs are available in cache, also when they were obtained from worker processes
+            self.assertTrue((ec_files[0], False, False, False) in easyconfig.easyconfig._easyconfigs_cache)
+
+        self.assertEqual([ecs[0]['full_mod_name'] for (_, ecs, err) in res[3] if err is None],
+                         [ecs[0]['full_mod_name'] for (_, ecs, err) in res[1] if err is None])
+
+        # shallow parse yields dicts with easyconfig parameters
+        res = process_easyconfigs(ec_files[:2], nprocs=2, shallow=True)
+        self.assertEqual([(ec['name'], ec['version']) for (_, ec, _) in res], [('toy', '0.0'), ('gzip', '1.4')])
+
+        # all faulty easyconfig files are reported by parse_easyconfigs
+        init_config(build_options={'parallel_parse': 2, 'valid_module_classes': module_classes()})
+        error_pattern = "Failed to process 2 easyconfig files:\n\* %s: .*\n\* %s: " % (ec_files[2], ec_files[4])
+        self.assertErrorRegex(EasyBuildError, error_pattern, parse_easyconfigs, [(p, False) for p in ec_files])
+
+        ecs, _ = parse_easyconfigs([(p, False) for p in ec_files[:2] + ec_files[3:4]])
+        self.assertEqual([ec['ec']['name'] for ec in ecs], ['toy', 'gzip', 'GCC'])
+
+    def test_read_easyconfig_once(self):
+        """Test whether easyconfig files are only read once when they are processed."""
+        test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        toy_ec = os.path.join(self.test_prefix, 'toy.eb')
+        copy_file(os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0.eb'), toy_ec)
+        toy_txt = read_file(toy_ec)
+
+        orig_stats = easyconfig_read_stats()
+        ecs = process_easyconfig(toy_ec)
+        stats = easyconfig_read_stats()
+        self.assertEqual(stats['reads'] - orig_stats['reads'], 1)
+        self.assertEqual(stats['bytes'] - orig_stats['bytes'], len(toy_txt))
+
+        self.assertEqual(len(ecs), 1)
+        self.assertEqual(ecs[0]['spec'], toy_ec)
+        self.assertEqual(ecs[0]['ec'].path, toy_ec)
+        self.assertEqual(ecs[0]['ec'].rawtxt, toy_txt)
+        self.assertEqual(ecs[0]['ec'].easyblock, None)
+
+        # processing the same easyconfig file again is served from cache, without reading the file again
+        process_easyconfig(toy_ec)
+        self.assertEqual(easyconfig_read_stats()['reads'], stats['reads'])
+
+        # path is retained when raw contents are provided, but the file is not read
+        ec = EasyConfig(toy_ec, rawtxt=toy_txt)
+        self.assertEqual(ec.path, toy_ec)
+        self.assertEqual(ec['name'], 'toy')
+        self.assertEqual(easyconfig_read_stats()['reads'], stats['reads'])
+
+        # a non-existing path is only an issue if no raw contents are provided
+        ec = EasyConfig(os.path.join(self.test_prefix, 'nosuchfile.eb'), rawtxt=toy_txt)
+        self.assertEqual(ec['name'], 'toy')
+        self.assertErrorRegex(EasyBuildError, "expected a valid path", EasyConfig,
+                              os.path.join(self.test_prefix, 'nosuchfile.eb'))
+
     def test_get_easyblock_class(self):
         """Test get_easyblock_class function."""
         from easybuild.easyblocks.generic.configuremake import ConfigureMake
@@ -999,6 +1143,47 @@ class EasyConfigTest(EnhancedTestCase):
         self.assertErrorRegex(EasyBuildError, "Failed to import EB_TOY", get_easyblock_class, None, name='TOY')
         self.assertEqual(get_easyblock_class(None, name='TOY', error_on_failed_import=False), None)
 
+    def test_avail_easyblock_modules(self):
+        """Test registry of available easyblock modules."""
+        import easybuild.easyblocks
+
+        avail_ebs = avail_easyblock_modules()
+        for modulepath in ['easybuild.easyblocks.toy', 'easybuild.easyblocks.generic.configuremake',
+                           'easybuild.easyblocks.generic.toolchain']:
+            self.assertTrue(modulepath in avail_ebs, "%s found in %s" % (modulepath, avail_ebs))
+            self.assertTrue(is_easyblock_module_available(modulepath))
+
+        for modulepath in ['easybuild.easyblocks.gzip', 'easybuild.easyblocks.generic.toy']:
+            self.assertFalse(modulepath in avail_ebs)
+            self.assertFalse(is_easyblock_module_available(modulepath))
+
+        # registry is only rebuilt when locations of easyblocks change
+        self.assertTrue(avail_easyblock_modules() is avail_ebs)
+
+        # easyblocks in additional locations are picked up
+        easyblocks_dir = os.path.join(self.test_prefix, 'easyblocks')
+        write_file(os.path.join(easyblocks_dir, 'gzip.py'), '\n'.join([
+            'from easybuild.framework.easyblock import EasyBlock',
+            'class EB_gzip(EasyBlock):',
+            '    pass',
+        ]))
+        easybuild.easyblocks.__path__.insert(0, easyblocks_dir)
+        try:
+            self.assertTrue(is_easyblock_module_available('easybuild.easyblocks.gzip'))
+            self.assertEqual(get_easyblock_class(None, name='gzip').__name__, 'EB_gzip')
+
+            # also when they're added to a known location
+            self.assertFalse(is_easyblock_module_available('easybuild.easyblocks.bzip2'))
+            write_file(os.path.join(easyblocks_dir, 'bzip2.py'), '')
+            os.utime(easyblocks_dir, (0, 0))
+            self.assertTrue(is_easyblock_module_available('easybuild.easyblocks.bzip2'))
+        finally:
+            easybuild.easyblocks.__path__.remove(easyblocks_dir)
+            del sys.modules['easybuild.easyblocks.gzip']
+
+        self.assertFalse(is_easyblock_module_available('easybuild.easyblocks.gzip'))
+        self.assertEqual(get_easyblock_class(None, name='gzip', default_fallback=False), None)
+
     def test_letter_dir(self):
         """Test letter_dir_for function."""
         test_cases = {
@@ -1142,6 +1327,7 @@ class EasyConfigTest(EnhancedTestCase):
         # copy classes before reloading, so we can restore them (other isinstance checks fail)
         orig_EasyConfig = copy.deepcopy(easyconfig.easyconfig.EasyConfig)
         orig_ActiveMNS = copy.deepcopy(easyconfig.easyconfig.ActiveMNS)
+        orig_EasyConfigParser = easyconfig.parser.EasyConfigParser
         reload(easyconfig.parser)
 
         for key, (newkey, depr_ver) in easyconfig.parser.DEPRECATED_PARAMETERS.items():
@@ -1166,6 +1352,8 @@ class EasyConfigTest(EnhancedTestCase):
         reload(easyconfig.parser)
         easyconfig.easyconfig.EasyConfig = orig_EasyConfig
         easyconfig.easyconfig.ActiveMNS = orig_ActiveMNS
+        # restore original parser class, which is still used by EasyConfig (required for pickling)
+        easyconfig.parser.EasyConfigParser = orig_EasyConfigParser
 
     def test_unknown_easyconfig_parameter(self):
         """Check behaviour when unknown easyconfig parameters are used."""
@@ -1747,6 +1935,148 @@ class EasyConfigTest(EnhancedTestCase):
         self.assertEqual(ec1, ec2)
         self.assertEqual(ec1.rawtxt, ec2.rawtxt)
         self.assertEqual(ec1.path, ec2.path)
+        self.assertEqual(ec1.asdict(), ec2.asdict())
+        self.assertEqual(ec1.full_mod_name, ec2.full_mod_name)
+
+        # easyconfig file is not parsed again when copying
+        self.assertTrue(ec2.parser is ec1.parser)
+
+        # changing a parameter value in the copy doesn't affect the original, and vice versa
+        ec2['version'] = '1.2.3'
+        ec2['sanity_check_paths'] = {}
+        self.assertEqual(ec1['version'], '0.0')
+        self.assertEqual(ec1['sanity_check_paths'], {'files': [('bin/yot', 'bin/toy')], 'dirs': ['bin']})
+        ec1['versionsuffix'] = '-test'
+        self.assertEqual(ec2['versionsuffix'], '')
+
+        # template values are regenerated when a parameter they are derived from is changed
+        self.assertEqual(ec2['sources'], ['toy-1.2.3.tar.gz'])
+        self.assertEqual(ec1['sources'], ['toy-0.0.tar.gz'])
+        # (re)generating template values doesn't imply copying shared values
+        self.assertTrue(ec1._values['toolchain'] is ec2._values['toolchain'])
+
+        # also when values are modified in place
+        orig_patches = ec1['patches']
+        ec2.enable_templating = False
+        ec2['patches'].append('foo.patch')
+        ec2['toolchain']['name'] = 'foo'
+        ec2.enable_templating = True
+        self.assertEqual(ec1['patches'], orig_patches)
+        self.assertEqual(ec1['toolchain']['name'], 'dummy')
+        self.assertEqual(ec2['patches'], orig_patches + ['foo.patch'])
+        self.assertEqual(ec2['toolchain']['name'], 'foo')
+
+        ec1.enable_templating = False
+        ec1['sources'].append('bar.tar.gz')
+        ec1.enable_templating = True
+        self.assertEqual(ec1['sources'], ['toy-0.0.tar.gz', 'bar.tar.gz'])
+        self.assertEqual(ec2['sources'], ['toy-1.2.3.tar.gz'])
+
+        # copies of copies are also independent of each other
+        ec3 = ec2.copy()
+        ec3['patches'] = []
+        self.assertEqual(ec2['patches'], orig_patches + ['foo.patch'])
+        self.assertEqual(ec1['patches'], orig_patches)
+
+        # many copies of the same easyconfig (e.g. one per extension) are independent of each other
+        # (see benchmarks/benchmark_easyconfig_copy.py for timing copies)
+        ecs = []
+        for idx in range(200):
+            ecs.append(ec1.copy())
+            ecs[-1]['sanity_check_paths'] = {'files': [], 'dirs': ['ext%d' % idx]}
+        self.assertEqual(ecs[123]['sanity_check_paths'], {'files': [], 'dirs': ['ext123']})
+        self.assertEqual(ec1['sanity_check_paths'], {'files': [('bin/yot', 'bin/toy')], 'dirs': ['bin']})
+
+    def test_shared_params(self):
+        """Test sharing of table of known easyconfig parameters between EasyConfig instances."""
+        test_ecs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        toy_ec = os.path.join(test_ecs, 't', 'toy', 'toy-0.0.eb')
+        ec1 = EasyConfig(toy_ec)
+        ec2 = EasyConfig(toy_ec)
+        gzip_ecs = [EasyConfig(os.path.join(test_ecs, 'g', 'gzip', 'gzip-%s.eb' % v)) for v in ['1.4', '1.5-goolf-1.4.10']]
+
+        # parameter tables are shared by instances for which the same extra easyconfig parameters are defined,
+        # even if they use a different easyblock (EB_toy and ConfigureMake don't define any extra parameters)
+        self.assertTrue(ec1._params is ec2._params)
+        self.assertTrue(gzip_ecs[0]._params is gzip_ecs[1]._params)
+        self.assertTrue(ec1._params is gzip_ecs[0]._params)
+        self.assertTrue('parsed' in ec1 and ec1['parsed'])
+
+        # different extra easyconfig parameters (e.g. for easyblocks with custom parameters) imply a different table
+        extra_options = {'foo_extra1': ['foo', "first foo-specific easyconfig parameter", easyconfig.CUSTOM]}
+        foo_ecs = [EasyConfig(toy_ec, extra_options=extra_options) for _ in range(2)]
+        self.assertTrue(foo_ecs[0]._params is foo_ecs[1]._params)
+        self.assertFalse(ec1._params is foo_ecs[0]._params)
+        self.assertEqual(foo_ecs[0]['foo_extra1'], 'foo')
+        self.assertFalse('foo_extra1' in ec1)
+
+        # only values for easyconfig parameters that were set are tracked per instance
+        self.assertTrue(len(ec1._values) < len(ec1._params) / 2)
+        self.assertFalse('modextrapaths' in ec1._values)
+        self.assertEqual(ec1['modextrapaths'], {})
+
+        # default values are not affected when values are modified in place
+        ec1.enable_templating = False
+        ec1['modextrapaths']['PATH'] = 'foo'
+        ec1['exts_list'].append('bar')
+        ec1.enable_templating = True
+        self.assertEqual(ec1['modextrapaths'], {'PATH': 'foo'})
+        self.assertEqual(ec1['exts_list'], ['bar'])
+        self.assertEqual(ec2['modextrapaths'], {})
+        self.assertEqual(ec2['exts_list'], [])
+        self.assertEqual(EasyConfig(toy_ec)['exts_list'], [])
+
+        # extending list of known parameters results in a different (shared) table
+        ec1.extend_params({'foo': ['bar', "Foo", easyconfig.CUSTOM]})
+        ec2.extend_params({'foo': ['bar', "Foo", easyconfig.CUSTOM]})
+        self.assertTrue(ec1._params is ec2._params)
+        self.assertEqual(ec1['foo'], 'bar')
+        self.assertFalse('foo' in EasyConfig(toy_ec))
+        # default values with different types don't result in the same table
+        ec2.extend_params({'foo': [['bar'], "Foo", easyconfig.CUSTOM]})
+        ec1.extend_params({'foo': [('bar',), "Foo", easyconfig.CUSTOM]})
+        self.assertEqual(ec2['foo'], ['bar'])
+        self.assertEqual(ec1['foo'], ('bar',))
+
+        # parameter table is restored when unpickling
+        ec3 = pickle.loads(pickle.dumps(ec2))
+        self.assertTrue(ec3._params is ec2._params)
+        self.assertEqual(ec3.asdict(), ec2.asdict())
+
+    def test_legacy_config(self):
+        """Test backward compatible (deprecated) access to easyconfig parameters via _config."""
+        test_ecs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        ec = EasyConfig(os.path.join(test_ecs, 't', 'toy', 'toy-0.0.eb'))
+
+        self.assertErrorRegex(EasyBuildError, "DEPRECATED .* EasyConfig._config", lambda: ec._config)
+
+        # use actual EasyBuild version, rather than value for --deprecated set by earlier tests
+        os.environ.pop('EASYBUILD_DEPRECATED')
+        easybuild.tools.build_log.CURRENT_VERSION = VERSION
+        init_config()
+
+        # [value, help text, category] entry per easyconfig parameter
+        self.assertEqual(ec._config['version'], ['0.0', "Version of software", easyconfig.MANDATORY])
+        self.assertTrue('version' in ec._config)
+        self.assertFalse('foo' in ec._config)
+        self.assertEqual(sorted(ec._config.keys()), sorted(ec.asdict().keys()))
+
+        # setting or modifying a value via _config updates the easyconfig parameter
+        orig_patches = ec['patches']
+        ec._config['version'][0] = '1.2.3'
+        ec._config['patches'][0].append('foo.patch')
+        self.assertEqual(ec['version'], '1.2.3')
+        self.assertEqual(ec['patches'], orig_patches + ['foo.patch'])
+        self.assertEqual(ec['sources'], ['toy-1.2.3.tar.gz'])
+
+        # unknown easyconfig parameters are added
+        ec._config['foo'] = ['bar', "Foo", easyconfig.CUSTOM]
+        self.assertEqual(ec['foo'], 'bar')
+
+        # deprecated use of _config is only reported for the first access (per instance)
+        easybuild.tools.build_log.CURRENT_VERSION = LooseVersion('10000000')
+        self.assertEqual(ec._config['foo'][0], 'bar')
+        self.assertErrorRegex(EasyBuildError, "DEPRECATED .* EasyConfig._config", lambda: EasyConfig(ec.path)._config)
 
     def test_eq_hash(self):
         """Test comparing two EasyConfig instances."""
@@ -1768,6 +2098,24 @@ class EasyConfigTest(EnhancedTestCase):
         self.assertFalse(ec1 == ec3)
         self.assertTrue(ec1 != ec3)
 
+        # equality is determined via fingerprint (path, checksum of raw contents, build specs, hidden)
+        self.assertEqual(ec1.fingerprint, ec2.fingerprint)
+        self.assertEqual(ec1.fingerprint[0], os.path.join(test_easyconfigs, 't', 'toy', 'toy-0.0.eb'))
+        self.assertEqual(len(set([ec1, ec2, ec3])), 2)
+
+        ec4 = EasyConfig(os.path.join(test_easyconfigs, 't', 'toy', 'toy-0.0.eb'), hidden=True)
+        self.assertFalse(ec1 == ec4)
+        ec5 = EasyConfig(os.path.join(test_easyconfigs, 't', 'toy', 'toy-0.0.eb'), build_specs={'version': '0.0'})
+        self.assertFalse(ec1 == ec5)
+        self.assertEqual(ec5, EasyConfig(ec5.path, build_specs={'version': '0.0'}))
+
+        # same raw contents in a different location is not equal either
+        test_ec = os.path.join(self.test_prefix, 'toy-0.0.eb')
+        write_file(test_ec, ec1.rawtxt)
+        ec6 = EasyConfig(test_ec)
+        self.assertFalse(ec1 == ec6)
+        self.assertEqual(ec1.fingerprint[1:], ec6.fingerprint[1:])
+
     def test_copy_easyconfigs(self):
         """Test copy_easyconfigs function."""
         test_ecs_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
@@ -1891,7 +2239,7 @@ class EasyConfigTest(EnhancedTestCase):
             'MPI/GCC/4.7.2/OpenMPI/1.6.4/Python/2.7.10',
             'MPI/GCC/4.7.2/OpenMPI/1.6.4/pytest/1.2.3-Python-2.7.10',
         ]
-        dep_full_mod_names = [d['full_mod_name'] for d in ordered_ecs[-1]['ec']._config['dependencies'][0]]
+        dep_full_mod_names = [d['full_mod_name'] for d in ordered_ecs[-1]['ec']['dependencies']]
         self.assertEqual(dep_full_mod_names, expected)
 
     def test_hidden_toolchain(self):
@@ -2012,6 +2360,177 @@ class EasyConfigTest(EnhancedTestCase):
         error_pattern = "Contents of .*/%s does not match with filename" % os.path.basename(toy_ec)
         self.assertErrorRegex(EasyBuildError, error_pattern, verify_easyconfig_filename, toy_ec, specs)
 
+    def test_persistent_easyconfigs_cache(self):
+        """Test persistent cache of processed easyconfig files."""
+        test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        toy_ec = os.path.join(self.test_prefix, 'toy-0.0-gompi-1.3.12-test.eb')
+        copy_file(os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0-gompi-1.3.12-test.eb'), toy_ec)
+
+        # no persistent caching by default
+        res = process_easyconfig(toy_ec)
+        self.assertEqual(len(res), 1)
+        self.assertEqual(persistent_cache('easyconfigs'), None)
+
+        cachepath = os.path.join(self.test_prefix, 'cache')
+        init_config(build_options={'cachepath': cachepath, 'valid_module_classes': module_classes()})
+        ecs_cache = persistent_cache('easyconfigs')
+
+        easyconfig.easyconfig._easyconfigs_cache.clear()
+        res = process_easyconfig(toy_ec)
+        self.assertEqual(ecs_cache.stats['misses'], 1)
+        self.assertEqual(ecs_cache.stats['stores'], 1)
+        self.assertEqual(len(ecs_cache.entries()), 1)
+
+        # processed easyconfig is obtained from persistent cache, without parsing the easyconfig file
+        easyconfig.easyconfig._easyconfigs_cache.clear()
+        orig_EasyConfigParser = easyconfig.easyconfig.EasyConfigParser
+        easyconfig.easyconfig.EasyConfigParser = None
+        try:
+            cached_res = process_easyconfig(toy_ec)
+        finally:
+            easyconfig.easyconfig.EasyConfigParser = orig_EasyConfigParser
+        self.assertEqual(ecs_cache.stats['hits'], 1)
+
+        self.assertEqual(len(cached_res), 1)
+        for key in ['spec', 'short_mod_name', 'full_mod_name', 'dependencies', 'builddependencies', 'hidden']:
+            self.assertEqual(cached_res[0][key], res[0][key])
+        ec = cached_res[0]['ec']
+        self.assertEqual(ec, res[0]['ec'])
+        self.assertEqual(ec['versionsuffix'], '-test')
+        self.assertEqual(ec.toolchain.as_dict(), res[0]['ec'].toolchain.as_dict())
+        self.assertTrue(ec.modules_tool is not None)
+
+        # different options for processing the easyconfig file result in a cache miss
+        easyconfig.easyconfig._easyconfigs_cache.clear()
+        process_easyconfig(toy_ec, validate=False)
+        process_easyconfig(toy_ec, hidden=True)
+        self.assertEqual(ecs_cache.stats['hits'], 1)
+        self.assertEqual(len(ecs_cache.entries()), 3)
+
+        # changing the easyconfig file invalidates the cache entry
+        easyconfig.easyconfig._easyconfigs_cache.clear()
+        write_file(toy_ec, "\n# modified", append=True)
+        process_easyconfig(toy_ec)
+        self.assertEqual(ecs_cache.stats['hits'], 1)
+        self.assertEqual(ecs_cache.stats['misses'], 4)
+
+        cache_key = det_persistent_cache_key(toy_ec, True, False, False)
+        self.assertTrue(cache_key is not None)
+
+        # metadata for external modules is taken into account
+        metadata = ConfigObj()
+        metadata['foo/1.2.3'] = {'name': ['foo'], 'version': ['1.2.3']}
+        build_options = {'cachepath': cachepath, 'valid_module_classes': module_classes()}
+        init_config(build_options=dict(build_options, external_modules_metadata=metadata))
+        metadata_cache_key = det_persistent_cache_key(toy_ec, True, False, False)
+        self.assertNotEqual(metadata_cache_key, cache_key)
+        metadata['foo/1.2.3']['version'] = ['1.2.4']
+        self.assertNotEqual(det_persistent_cache_key(toy_ec, True, False, False), metadata_cache_key)
+
+        # (included) easyblocks are taken into account
+        init_config(build_options=build_options)
+        import easybuild.easyblocks
+        easyblock = os.path.join(self.test_prefix, 'easyblocks', 'foo.py')
+        write_file(easyblock, "# foo easyblock")
+        easybuild.easyblocks.__path__.insert(0, os.path.dirname(easyblock))
+        try:
+            easyblocks_cache_key = det_persistent_cache_key(toy_ec, True, False, False)
+            self.assertNotEqual(easyblocks_cache_key, cache_key)
+
+            # changes to easyblocks are only picked up in a new session
+            easyconfig.easyconfig._easyblocks_fingerprints.clear()
+            write_file(easyblock, "# modified foo easyblock, different size")
+            self.assertNotEqual(det_persistent_cache_key(toy_ec, True, False, False), easyblocks_cache_key)
+        finally:
+            easybuild.easyblocks.__path__.remove(os.path.dirname(easyblock))
+        self.assertEqual(det_persistent_cache_key(toy_ec, True, False, False), cache_key)
+
+        # no persistent caching when dependencies are resolved using minimal toolchains
+        init_config(build_options={'cachepath': cachepath, 'minimal_toolchains': True})
+        self.assertEqual(det_persistent_cache_key(toy_ec, True, False, False), None)
+
+    def test_easyconfigs_index(self):
+        """Test index of easyconfig files in robot search path."""
+        test_ecs_dir = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'easyconfigs', 'test_ecs')
+        ecs_dir = os.path.join(self.test_prefix, 'easyconfigs')
+        shutil.copytree(test_ecs_dir, ecs_dir)
+        write_file(os.path.join(ecs_dir, 'g', 'GCC', '.GCC-1.2.3.eb'), '')
+
+        def lookups():
+            """Perform lookups of easyconfig files in different ways."""
+            easyconfig.easyconfig._easyconfig_files_cache.clear()
+            res = []
+            for (name, version) in [('GCC', '4.6.3'), ('gzip', '1.5-goolf-1.4.10'), ('toy', '0.0'), ('foo', '1.0'),
+                                    ('toy', '0.0-deps'), ('GCC', '1.2.3'), ('OpenMPI', '1.6.4-GCC-4.6.4')]:
+                res.append(robot_find_easyconfig(name, version))
+            for (name, installver) in [('GCC', '*'), ('gzip', '1.5-*'), ('toy', '0.0*'), ('foo', '*')]:
+                res.append(find_matching_easyconfigs(name, installver, [ecs_dir]))
+            for ec_file in [os.path.join('g', 'GCC', 'GCC-4.6.3.eb'), os.path.join('t', 'toy', 'toy-0.0-deps.eb')]:
+                ec = EasyConfig(os.path.join(ecs_dir, ec_file))
+                res.append(find_related_easyconfigs(ecs_dir, ec))
+                ec['version'] = '0.1'
+                res.append(find_related_easyconfigs(ecs_dir, ec))
+            res.append(det_easyconfig_paths(['toy-0.0.eb', 'GCC-4.6.4.eb', 'nosuchfile.eb']))
+            return res
+
+        build_options = {
+            'external_modules_metadata': ConfigObj(),
+            'ignore_dirs': ['.git', '.svn'],
+            'robot_path': [ecs_dir],
+            'valid_module_classes': module_classes(),
+        }
+        init_config(build_options=build_options)
+        self.assertEqual(easyconfigs_index(ecs_dir), None)
+        expected = lookups()
+        self.assertEqual(expected[0], os.path.join(ecs_dir, 'g', 'GCC', 'GCC-4.6.3.eb'))
+        self.assertEqual(expected[3], None)
+        self.assertEqual(expected[5], None)
+
+        build_options['cachepath'] = os.path.join(self.test_prefix, 'cache')
+        init_config(build_options=build_options)
+        index = easyconfigs_index(ecs_dir)
+        self.assertTrue(isinstance(index, EasyConfigsIndex))
+        self.assertEqual(lookups(), expected)
+
+        # index is only refreshed once per session, and stored persistently
+        self.assertTrue(easyconfigs_index(ecs_dir) is index)
+        ecs_cache = persistent_cache('easyconfigs_index')
+        self.assertEqual(ecs_cache.stats['stores'], 1)
+
+        # index is refreshed incrementally, by only rescanning directories for which the mtime changed
+        index = EasyConfigsIndex(ecs_dir)
+        self.assertEqual(index.refresh(), len(index.dirs))
+        self.assertEqual(index.refresh(), 0)
+        self.assertFalse(index.isfile(os.path.join(ecs_dir, 'f', 'foo', 'foo-1.0.eb')))
+
+        write_file(os.path.join(ecs_dir, 'f', 'foo', 'foo-1.0.eb'), '')
+        # make sure modification time of directories changes, even on filesystems with a coarse time resolution
+        os.utime(ecs_dir, (0, 0))
+        os.utime(os.path.join(ecs_dir, 'f'), (0, 0))
+        self.assertEqual(index.refresh(), 2)
+        self.assertTrue(index.isfile(os.path.join(ecs_dir, 'f', 'foo', 'foo-1.0.eb')))
+        self.assertEqual(index.glob(os.path.join('f', 'foo', '*.eb')), [os.path.join('f', 'foo', 'foo-1.0.eb')])
+        self.assertEqual(index.find('foo-1.0.eb'), os.path.join('f', 'foo', 'foo-1.0.eb'))
+        self.assertEqual(index.find('foo-1.0.eb', ignore_dirs=['foo']), None)
+
+        shutil.rmtree(os.path.join(ecs_dir, 'g'))
+        self.assertEqual(index.refresh(), 1)
+        self.assertFalse(index.isfile(os.path.join(ecs_dir, 'g', 'GCC', 'GCC-4.6.3.eb')))
+        self.assertEqual([d for d in index.dirs if d.startswith('g')], [])
+
+        # index for next session is loaded from persistent cache, and updated
+        cleanup()
+        init_config(build_options=build_options)
+        index = easyconfigs_index(ecs_dir)
+        self.assertEqual(persistent_cache('easyconfigs_index').stats['hits'], 1)
+        self.assertEqual(robot_find_easyconfig('foo', '1.0'), os.path.join(ecs_dir, 'f', 'foo', 'foo-1.0.eb'))
+        self.assertEqual(robot_find_easyconfig('GCC', '4.6.3'), None)
+
+        # tweaked easyconfig files are picked up
+        tweaked_ec = os.path.join(ecs_dir, 't', 'toy', 'toy-0.0-tweaked.eb')
+        tweak_one(os.path.join(test_ecs_dir, 't', 'toy', 'toy-0.0.eb'), tweaked_ec, {'versionsuffix': '-tweaked'})
+        self.assertEqual(robot_find_easyconfig('toy', '0.0-tweaked'), tweaked_ec)
+
 
 def suite():
     """ returns all the testcases in this module """
@@ -29,16 +29,18 @@ Unit tests for easyconfig/parser.py
 """
 import os
 import sys
-from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered
+from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
 from unittest import TextTestRunner
 from vsc.utils.fancylogger import setLogLevelDebug, logToScreen
 
+import easybuild.framework.easyconfig.format.pyheaderconfigobj as pyheaderconfigobj
 import easybuild.tools.build_log
 from easybuild.framework.easyconfig.format.format import Dependency
-from easybuild.framework.easyconfig.format.pyheaderconfigobj import build_easyconfig_constants_dict
+from easybuild.framework.easyconfig.format.pyheaderconfigobj import build_easyconfig_constants_dict, compile_pyheader
 from easybuild.framework.easyconfig.format.version import EasyVersion
 from easybuild.framework.easyconfig.parser import EasyConfigParser
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.filetools import read_file
 
 
@@ -187,6 +189,40 @@ class EasyConfigParserTest(EnhancedTestCase):
         self.assertEqual(constants['GPLv2'], 'LicenseGPLv2')
         self.assertEqual(constants['EXTERNAL_MODULE'], 'EXTERNAL_MODULE')
 
+    def test_compile_pyheader(self):
+        """Test caching of compiled pyheaders."""
+        pyheader = "name = 'foo'\nversion = '1.2.3'\n"
+        pyheaderconfigobj._pyheader_code_cache.clear()
+
+        code = compile_pyheader(pyheader)
+        local_vars = {}
+        exec(code, {}, local_vars)
+        self.assertEqual(local_vars, {'name': 'foo', 'version': '1.2.3'})
+        self.assertTrue(compile_pyheader(pyheader) is code)
+        self.assertEqual(len(pyheaderconfigobj._pyheader_code_cache), 1)
+
+        # compiled code objects are also cached on disk, if a location for persistent caches is configured
+        init_config(build_options={'cachepath': self.test_prefix})
+        pyheaderconfigobj._pyheader_code_cache.clear()
+        code = compile_pyheader(pyheader)
+        cache = persistent_cache('pyheaders')
+        self.assertEqual(cache.stats['stores'], 1)
+        pyheaderconfigobj._pyheader_code_cache.clear()
+        self.assertEqual(compile_pyheader(pyheader), code)
+        self.assertEqual(cache.stats['hits'], 1)
+
+        # global environment for pyheaders is only composed once
+        ecp = EasyConfigParser(os.path.join(TESTDIRBASE, 'v1.0', 'g', 'GCC', 'GCC-4.6.3.eb'))
+        global_vars, local_vars = ecp._formatter.pyheader_env()
+        self.assertEqual(local_vars, {})
+        self.assertEqual(global_vars['SOURCE_TAR_GZ'], '%(name)s-%(version)s.tar.gz')
+        global_vars['SOURCE_TAR_GZ'] = 'foo'
+        self.assertEqual(ecp._formatter.pyheader_env()[0]['SOURCE_TAR_GZ'], '%(name)s-%(version)s.tar.gz')
+
+        # syntax errors are still reported
+        error_pattern = "SyntaxError in easyconfig pyheader"
+        self.assertErrorRegex(EasyBuildError, error_pattern, ecp._formatter.parse_pyheader, "name = 'foo")
+
     def test_check_value_types(self):
         """Test checking of easyconfig parameter value types."""
         test_ec = os.path.join(TESTDIRBASE, 'test_ecs', 'g', 'gzip', 'gzip-1.4-broken.eb')
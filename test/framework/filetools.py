@@ -30,22 +30,71 @@ Unit tests for filetools.py
 @author: Stijn De Weirdt (Ghent University)
 @author: Ward Poelmans (Ghent University)
 """
+import BaseHTTPServer
+import bz2
+import fcntl
+import gzip
 import os
 import re
 import shutil
+import SocketServer
 import stat
 import sys
+import tarfile
 import tempfile
+import threading
 import urllib2
+import zipfile
 from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
 from unittest import TextTestRunner
 from urllib2 import URLError
 
 import easybuild.tools.filetools as ft
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.multidiff import multidiff
 
 
+class RangeHTTPRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handler for serving files from a local directory, with support for HTTP Range requests."""
+
+    root = None
+    # log of (path, Range header) for each handled request
+    requests = []
+    # number of bytes after which the next response for a particular path is cut off
+    truncate = {}
+
+    def do_GET(self):
+        """Serve requested file (or part of it)."""
+        range_header = self.headers.get('Range')
+        self.requests.append((self.path, range_header))
+
+        path = os.path.join(self.root, self.path.lstrip('/'))
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        data = ft.read_file(path)
+        start = 0
+        if range_header:
+            start = int(re.match('^bytes=([0-9]+)-$', range_header).group(1))
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, len(data) - 1, len(data)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.end_headers()
+
+        body = data[start:]
+        if self.path in self.truncate:
+            body = body[:self.truncate.pop(self.path)]
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Don't log requests to stderr."""
+        pass
+
+
 class FileToolsTest(EnhancedTestCase):
     """ Testcase for filetools module """
 
@@ -184,6 +233,7 @@ class FileToolsTest(EnhancedTestCase):
             'crc32': '0x1457143216',
             'md5': '7167b64b1ca062b9674ffef46f9325db',
             'sha1': 'db05b79e09a4cc67e9dd30b313b5488813db3190',
+            'sha256': '1c49562c4b404f3120a3fa0926c8d09c99ef80e470f7de03ffdfa14047960ea5',
         }
 
         # make sure checksums computation/verification is correct
@@ -206,6 +256,94 @@ class FileToolsTest(EnhancedTestCase):
         # cleanup
         os.remove(fp)
 
+    def test_verify_checksums(self):
+        """Test verify_checksums function."""
+        checksum_specs = []
+        for idx in range(10):
+            fp = os.path.join(self.test_prefix, 'file%d.txt' % idx)
+            ft.write_file(fp, "file %d\n" % idx)
+            checksum_specs.append((fp, ('sha1', ft.compute_checksum(fp, checksum_type='sha1'))))
+
+        for nworkers in [1, 4]:
+            self.assertEqual(ft.verify_checksums(checksum_specs, nworkers=nworkers), [])
+
+        # all failures are reported, in order
+        file2, file7 = checksum_specs[2][0], checksum_specs[7][0]
+        checksum_specs[2] = (file2, ('sha1', 'thisisnotthechecksum'))
+        checksum_specs[7] = (file7, [ft.compute_checksum(file7), 'nope'])
+        nosuchfile = os.path.join(self.test_prefix, 'nosuchfile.txt')
+        checksum_specs.append((nosuchfile, '7167b64b1ca062b9674ffef46f9325db'))
+        # files without a checksum are not verified
+        checksum_specs.append((nosuchfile, None))
+        for nworkers in [1, 4]:
+            res = ft.verify_checksums(checksum_specs, nworkers=nworkers)
+            self.assertEqual([(path, reason) for (path, _, reason) in res[:2]],
+                             [(file2, "checksum mismatch"), (file7, "checksum mismatch")])
+            self.assertEqual(len(res), 3)
+            self.assertEqual(res[2][0], nosuchfile)
+            self.assertTrue(res[2][2].startswith("Failed to read %s" % nosuchfile))
+
+    def test_checksums_cache(self):
+        """Test caching of computed checksums."""
+        fp = os.path.join(self.test_prefix, 'test.txt')
+        ft.write_file(fp, "easybuild\n")
+        md5 = '7167b64b1ca062b9674ffef46f9325db'
+
+        self.assertEqual(ft.compute_checksum(fp), md5)
+        key = ft.det_checksum_cache_key(fp, 'md5')
+        self.assertTrue(key.endswith(':md5'))
+        self.assertEqual(ft._checksums_cache, {key: md5})
+
+        # cached checksum is used as long as the file is unchanged
+        ft._checksums_cache[key] = 'cached_md5'
+        self.assertEqual(ft.compute_checksum(fp), 'cached_md5')
+        self.assertTrue(ft.verify_checksum(fp, 'cached_md5'))
+
+        # checksum is recomputed when file is changed
+        ft.write_file(fp, "easybuild, modified\n")
+        self.assertNotEqual(ft.det_checksum_cache_key(fp, 'md5'), key)
+        self.assertEqual(ft.compute_checksum(fp), 'd12872e1b8e1f50ee9cfd4c242338dd2')
+
+        # size is not cached, since it is cheap to determine
+        ft._checksums_cache.clear()
+        self.assertEqual(ft.compute_checksum(fp, checksum_type='size'), 20)
+        self.assertEqual(ft._checksums_cache, {})
+        self.assertEqual(ft.det_checksum_cache_key(os.path.join(self.test_prefix, 'nosuchfile'), 'md5'), None)
+
+        # multiple checksums can be computed at once, using cached checksums where available
+        ft._checksums_cache[ft.det_checksum_cache_key(fp, 'md5')] = 'cached_md5'
+        res = ft.compute_checksums(fp, ['md5', 'sha1', 'adler32', 'size', 'sha1'])
+        expected = {'md5': 'cached_md5', 'size': 20}
+        for typ in ['sha1', 'adler32']:
+            expected[typ] = ft.calc_block_checksum(fp, ft.CHECKSUM_ALGORITHMS[typ]())
+        self.assertEqual(res, expected)
+        self.assertEqual(ft.compute_checksum(fp, checksum_type='sha1'), expected['sha1'])
+        self.assertEqual(sorted(ft._checksums_cache.values()), sorted([expected['adler32'], 'cached_md5',
+                                                                       expected['sha1']]))
+        self.assertErrorRegex(EasyBuildError, "Failed to read", ft.compute_checksums,
+                              os.path.join(self.test_prefix, 'nosuchfile'), ['md5', 'sha1'])
+
+        # checksums are retained across sessions via persistent cache
+        init_config(build_options={'cachepath': os.path.join(self.test_prefix, 'cache')})
+        sha1 = ft.compute_checksum(fp, checksum_type='sha1')
+        ft._checksums_cache.clear()
+        cache = persistent_cache('checksums')
+        self.assertEqual(cache.load(ft.det_checksum_cache_key(fp, 'sha1')), sha1)
+        cache.store(ft.det_checksum_cache_key(fp, 'sha1'), 'cached_sha1')
+        self.assertEqual(ft.compute_checksum(fp, checksum_type='sha1'), 'cached_sha1')
+
+        # checksums are computed while downloading
+        ft._checksums_cache.clear()
+        test_dir = os.path.abspath(os.path.dirname(__file__))
+        toy_src = os.path.join(test_dir, 'sandbox', 'sources', 'toy', 'toy-0.0.tar.gz')
+        target = os.path.join(self.test_prefix, 'downloads', 'toy-0.0.tar.gz')
+        res = ft.download_file('toy-0.0.tar.gz', 'file://%s' % toy_src, target, checksum_types=['md5', 'sha1'])
+        self.assertEqual(res, target)
+        for typ in ['md5', 'sha1']:
+            expected = ft.calc_block_checksum(toy_src, ft.CHECKSUM_ALGORITHMS[typ]())
+            self.assertEqual(ft._checksums_cache[ft.det_checksum_cache_key(target, typ)], expected)
+            self.assertEqual(ft.compute_checksum(target, checksum_type=typ), expected)
+
     def test_common_path_prefix(self):
         """Test get common path prefix for a list of paths."""
         self.assertEqual(ft.det_common_path_prefix(['/foo/bar/foo', '/foo/bar/baz', '/foo/bar/bar']), '/foo/bar')
@@ -280,6 +418,94 @@ class FileToolsTest(EnhancedTestCase):
         self.assertTrue(os.path.exists(target_location))
         self.assertTrue(os.path.samefile(path, target_location))
 
+    def test_download_files(self):
+        """Test download_files function & streaming/resuming downloads, using a local HTTP server."""
+        srcdir = os.path.join(self.test_prefix, 'srv')
+        ft.write_file(os.path.join(srcdir, 'small.txt'), 'this is a small file\n')
+        big_txt = ''.join('line %d of a file that is larger than the download chunk size\n' % i for i in range(50000))
+        self.assertTrue(len(big_txt) > ft.DOWNLOAD_CHUNK_SIZE)
+        ft.write_file(os.path.join(srcdir, 'big.txt'), big_txt)
+
+        RangeHTTPRequestHandler.root = srcdir
+        RangeHTTPRequestHandler.requests = []
+        server = SocketServer.ThreadingTCPServer(('127.0.0.1', 0), RangeHTTPRequestHandler)
+        server.daemon_threads = True
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+        base_url = 'http://127.0.0.1:%d' % server.server_address[1]
+
+        orig_backoff = ft.DOWNLOAD_RETRY_BACKOFF
+        ft.DOWNLOAD_RETRY_BACKOFF = 0
+        try:
+            targetdir = os.path.join(self.test_prefix, 'downloads')
+            downloads = [
+                ('big.txt', base_url + '/big.txt', os.path.join(targetdir, 'big.txt')),
+                # first URL doesn't work, second one does
+                ('small.txt', [base_url + '/nosuchdir/small.txt', base_url + '/small.txt'],
+                 os.path.join(targetdir, 'small.txt')),
+                ('nosuchfile.txt', base_url + '/nosuchfile.txt', os.path.join(targetdir, 'nosuchfile.txt')),
+                # same target path is only downloaded once
+                ('big.txt', base_url + '/big.txt', os.path.join(targetdir, 'big.txt')),
+            ]
+            progress = {}
+
+            def report_progress(filename, done, total):
+                """Keep track of download progress."""
+                progress[filename] = (done, total)
+
+            res = ft.download_files(downloads, max_workers=3, max_per_host=2, progress=report_progress)
+            expected = [os.path.join(targetdir, 'big.txt'), os.path.join(targetdir, 'small.txt'), None,
+                        os.path.join(targetdir, 'big.txt')]
+            self.assertEqual(res, expected)
+            self.assertEqual(ft.read_file(os.path.join(targetdir, 'big.txt')), big_txt)
+            self.assertEqual(ft.read_file(os.path.join(targetdir, 'small.txt')), 'this is a small file\n')
+            self.assertEqual(sorted(os.listdir(targetdir)), ['big.txt', 'small.txt'])
+            self.assertEqual(progress['big.txt'], (len(big_txt), len(big_txt)))
+            self.assertEqual(len([r for r in RangeHTTPRequestHandler.requests if r[0] == '/big.txt']), 1)
+            # 4xx errors are not retried
+            self.assertEqual(RangeHTTPRequestHandler.requests.count(('/nosuchfile.txt', None)), 1)
+
+            # interrupted download is resumed using a Range request, and only renamed into place when complete
+            RangeHTTPRequestHandler.requests = []
+            RangeHTTPRequestHandler.truncate['/big.txt'] = 12345
+            target = os.path.join(self.test_prefix, 'resumed', 'big.txt')
+            self.assertEqual(ft.download_file('big.txt', base_url + '/big.txt', target), target)
+            self.assertEqual(ft.read_file(target), big_txt)
+            self.assertFalse(os.path.exists(target + ft.DOWNLOAD_PARTIAL_SUFFIX))
+            self.assertEqual(RangeHTTPRequestHandler.requests, [('/big.txt', None), ('/big.txt', 'bytes=12345-')])
+
+            # partial download left behind by an earlier run is resumed too
+            RangeHTTPRequestHandler.requests = []
+            target = os.path.join(self.test_prefix, 'partial', 'big.txt')
+            ft.write_file(target + ft.DOWNLOAD_PARTIAL_SUFFIX, big_txt[:1000])
+            self.assertEqual(ft.download_file('big.txt', base_url + '/big.txt', target), target)
+            self.assertEqual(ft.read_file(target), big_txt)
+            self.assertEqual(RangeHTTPRequestHandler.requests, [('/big.txt', 'bytes=1000-')])
+
+            # partial download that is locked (i.e. in use by another EasyBuild session) is left untouched
+            RangeHTTPRequestHandler.requests = []
+            target = os.path.join(self.test_prefix, 'locked', 'big.txt')
+            ft.write_file(target + ft.DOWNLOAD_PARTIAL_SUFFIX, big_txt[:1000])
+            handle = open(target + ft.DOWNLOAD_PARTIAL_SUFFIX, 'a+b')
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            orig_umask = os.umask(0022)
+            try:
+                self.assertEqual(ft.download_file('big.txt', base_url + '/big.txt', target), target)
+            finally:
+                os.umask(orig_umask)
+                handle.close()
+            self.assertEqual(ft.read_file(target), big_txt)
+            # downloaded file has default permissions (not only accessible by owner, like a temporary file)
+            self.assertEqual(stat.S_IMODE(os.stat(target).st_mode), 0644)
+            self.assertEqual(ft.read_file(target + ft.DOWNLOAD_PARTIAL_SUFFIX), big_txt[:1000])
+            self.assertEqual(sorted(os.listdir(os.path.dirname(target))), ['big.txt', 'big.txt.part'])
+            self.assertEqual(RangeHTTPRequestHandler.requests, [('/big.txt', None)])
+        finally:
+            ft.DOWNLOAD_RETRY_BACKOFF = orig_backoff
+            server.shutdown()
+            server.server_close()
+
     def test_mkdir(self):
         """Test mkdir function."""
 
@@ -873,6 +1099,108 @@ class FileToolsTest(EnhancedTestCase):
         self.assertTrue(os.path.exists(os.path.join(self.test_prefix, 'toy-0.0', 'toy.source')))
         self.assertTrue(os.path.samefile(path, self.test_prefix))
 
+    def test_clone_dir(self):
+        """Test clone_dir function."""
+        testdir = os.path.join(self.test_prefix, 'test')
+        ft.write_file(os.path.join(testdir, 'foo.txt'), "foo\n")
+        ft.write_file(os.path.join(testdir, 'sub', 'bar.sh'), "#!/bin/bash\necho bar\n")
+        os.chmod(os.path.join(testdir, 'sub', 'bar.sh'), 0755)
+        os.symlink('bar.sh', os.path.join(testdir, 'sub', 'bar'))
+        os.symlink('sub', os.path.join(testdir, 'subdir'))
+        os.mkdir(os.path.join(testdir, 'empty'))
+
+        for nworkers in [1, 3]:
+            target = os.path.join(self.test_prefix, 'clone%d' % nworkers)
+            ft.clone_dir(testdir, target, nworkers=nworkers)
+            self.assertEqual(sorted(os.listdir(target)), ['empty', 'foo.txt', 'sub', 'subdir'])
+            self.assertEqual(ft.read_file(os.path.join(target, 'foo.txt')), "foo\n")
+            self.assertEqual(ft.read_file(os.path.join(target, 'sub', 'bar.sh')), "#!/bin/bash\necho bar\n")
+            self.assertTrue(os.stat(os.path.join(target, 'sub', 'bar.sh')).st_mode & stat.S_IXUSR)
+            self.assertEqual(os.readlink(os.path.join(target, 'sub', 'bar')), 'bar.sh')
+            self.assertEqual(os.readlink(os.path.join(target, 'subdir')), 'sub')
+            # files are copies (or copy-on-write clones), not hard links
+            self.assertEqual(os.stat(os.path.join(target, 'foo.txt')).st_nlink, 1)
+            self.assertFalse(os.path.exists(os.path.join(target, '.reflink_probe.%d' % os.getpid())))
+
+    def test_extract_file_in_process(self):
+        """Test in-process extraction of files by built-in extraction engine."""
+        # make sure no parallel decompression tools (or unzip) are found
+        os.environ['PATH'] = os.path.join(self.test_prefix, 'bin')
+
+        pkgdir = os.path.join(self.test_prefix, 'pkg-1.0')
+        ft.write_file(os.path.join(pkgdir, 'bin', 'foo'), "#!/bin/bash\necho foo\n")
+        os.chmod(os.path.join(pkgdir, 'bin', 'foo'), 0755)
+        os.symlink('foo', os.path.join(pkgdir, 'bin', 'bar'))
+        ft.write_file(os.path.join(pkgdir, 'README'), "README\n")
+        tar_path = os.path.join(self.test_prefix, 'pkg-1.0.tar')
+        tar = tarfile.open(tar_path, 'w')
+        tar.add(pkgdir, arcname='pkg-1.0')
+        tar.close()
+        tar_data = ft.read_file(tar_path)
+
+        archives = [tar_path]
+        # gzipped/bzipped tarballs, consisting of multiple concatenated streams (like pigz/pbzip2 produce)
+        archive = os.path.join(self.test_prefix, 'pkg-1.0.tar.gz')
+        for data in [tar_data[:1000], tar_data[1000:]]:
+            gzip_file = gzip.open(archive, 'ab')
+            gzip_file.write(data)
+            gzip_file.close()
+        archives.append(archive)
+        archive = os.path.join(self.test_prefix, 'pkg-1.0.tbz2')
+        ft.write_file(archive, bz2.compress(tar_data[:1000]) + bz2.compress(tar_data[1000:]))
+        archives.append(archive)
+
+        zip_path = os.path.join(self.test_prefix, 'pkg-1.0.zip')
+        zip_file = zipfile.ZipFile(zip_path, 'w')
+        for name in ['README', os.path.join('bin', 'foo'), os.path.join('bin', 'bar')]:
+            path = os.path.join(pkgdir, name)
+            info = zipfile.ZipInfo(os.path.join('pkg-1.0', name))
+            info.create_system = 3
+            info.external_attr = os.lstat(path).st_mode << 16
+            zip_file.writestr(info, os.readlink(path) if os.path.islink(path) else ft.read_file(path))
+        zip_file.close()
+        archives.append(zip_path)
+
+        for archive in archives:
+            dest = os.path.join(self.test_prefix, 'extracted', os.path.basename(archive))
+            path = ft.extract_file(archive, dest)
+            self.assertEqual(path, os.path.join(dest, 'pkg-1.0'))
+            self.assertEqual(ft.read_file(os.path.join(path, 'bin', 'foo')), "#!/bin/bash\necho foo\n")
+            self.assertTrue(os.stat(os.path.join(path, 'bin', 'foo')).st_mode & stat.S_IXUSR)
+            self.assertEqual(os.readlink(os.path.join(path, 'bin', 'bar')), 'foo')
+
+        # single compressed files are decompressed in target directory
+        ft.write_file(os.path.join(self.test_prefix, 'test.txt.bz2'), bz2.compress("test\n"))
+        path = ft.extract_file(os.path.join(self.test_prefix, 'test.txt.bz2'), os.path.join(self.test_prefix, 'txt'))
+        self.assertEqual(path, os.path.join(self.test_prefix, 'txt'))
+        self.assertEqual(ft.read_file(os.path.join(path, 'test.txt')), "test\n")
+
+        # members with '..' in their path are refused, leading '/' are stripped (like GNU tar does)
+        tar_path = os.path.join(self.test_prefix, 'unsafe.tar')
+        for name in ['/pkg/test.txt', '../test.txt']:
+            tar = tarfile.open(tar_path, 'w')
+            tar.add(os.path.join(self.test_prefix, 'txt', 'test.txt'), arcname=name)
+            tar.close()
+            if name.startswith('/'):
+                path = ft.extract_file(tar_path, os.path.join(self.test_prefix, 'unsafe'))
+                self.assertEqual(path, os.path.join(self.test_prefix, 'unsafe', 'pkg'))
+            else:
+                error_regex = "Refusing to extract member ../test.txt"
+                self.assertErrorRegex(EasyBuildError, error_regex, ft.extract_file, tar_path, self.test_prefix)
+
+        # files can be extracted concurrently, failures are reported per file
+        extractions = [(archive, os.path.join(self.test_prefix, 'par%d' % idx), None)
+                       for idx, archive in enumerate(archives + [os.path.join(self.test_prefix, 'nosuchfile.tar')])]
+        cwd = os.getcwd()
+        res = ft.extract_files(extractions, nworkers=2)
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(len(res), len(archives) + 1)
+        for idx in range(len(archives)):
+            self.assertEqual(res[idx], (os.path.join(self.test_prefix, 'par%d' % idx, 'pkg-1.0'), None))
+            self.assertTrue(os.path.exists(os.path.join(res[idx][0], 'bin', 'foo')))
+        self.assertEqual(res[-1][0], None)
+        self.assertTrue(res[-1][1].startswith("Can't extract file"))
+
     def test_remove_file(self):
         """Test remove_file"""
         testfile = os.path.join(self.test_prefix, 'foo')
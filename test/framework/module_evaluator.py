@@ -0,0 +1,213 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Unit tests for tools/module_evaluator.py.
+"""
+import os
+import sys
+from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered
+from unittest import TextTestRunner
+
+from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.filetools import write_file
+from easybuild.tools.module_evaluator import evaluate_module_file, parse_tcl, tokenize_lua
+
+
+class ModuleEvaluatorTest(EnhancedTestCase):
+    """Tests for evaluating module files in-process."""
+
+    def test_parse_tcl(self):
+        """Test parse_tcl function."""
+        txt = '\n'.join([
+            "#%Module",
+            "set root /tmp/foo ; # comment",
+            'setenv FOO "$root/bar baz"',
+            "module-whatis {multi",
+            "line}",
+            "module use [ file join $env(HOME) \"test dir\" ]",
+        ])
+        expected = [
+            [('bare', 'set'), ('bare', 'root'), ('bare', '/tmp/foo')],
+            [('bare', 'setenv'), ('bare', 'FOO'), ('quoted', '$root/bar baz')],
+            [('bare', 'module-whatis'), ('braced', 'multi\nline')],
+            [('bare', 'module'), ('bare', 'use'), ('bare', '[ file join $env(HOME) "test dir" ]')],
+        ]
+        self.assertEqual(parse_tcl(txt), expected)
+
+        self.assertErrorRegex(EasyBuildError, "Missing closing brace", parse_tcl, "if { 1 } {")
+
+    def test_tokenize_lua(self):
+        """Test tokenize_lua function."""
+        txt = '\n'.join([
+            "-- comment",
+            'local root = "/tmp/foo"',
+            "help([==[multi",
+            "line]==])",
+            'if not isloaded("GCC/4.7.2") then',
+            '    prepend_path("PATH", pathJoin(root, \'bin\'))',
+            'end',
+        ])
+        expected = [
+            ('kw', 'local'), ('name', 'root'), ('op', '='), ('str', '/tmp/foo'),
+            ('name', 'help'), ('op', '('), ('str', 'multi\nline'), ('op', ')'),
+            ('kw', 'if'), ('kw', 'not'), ('name', 'isloaded'), ('op', '('), ('str', 'GCC/4.7.2'), ('op', ')'),
+            ('kw', 'then'),
+            ('name', 'prepend_path'), ('op', '('), ('str', 'PATH'), ('op', ','),
+            ('name', 'pathJoin'), ('op', '('), ('name', 'root'), ('op', ','), ('str', 'bin'), ('op', ')'), ('op', ')'),
+            ('kw', 'end'),
+        ]
+        self.assertEqual(tokenize_lua(txt), expected)
+
+    def test_evaluate_tcl_module_file(self):
+        """Test evaluating module file in Tcl syntax."""
+        modfile = os.path.join(self.test_prefix, 'foo', '1.0')
+        userdir = os.path.join(self.test_prefix, 'user')
+        write_file(modfile, '\n'.join([
+            "#%Module",
+            "proc ModulesHelp { } {",
+            "    puts stderr { foo - Homepage: http://example.com",
+            "    }",
+            "}",
+            "module-whatis {Description: foo - Homepage: http://example.com}",
+            "set root /prefix/software/foo/1.0",
+            "conflict foo",
+            "if { ![ is-loaded GCC/4.7.2 ] } {",
+            "    module load GCC/4.7.2",
+            "}",
+            "if { [ is-loaded bar ] } {",
+            "    module swap bar bar/2.0",
+            "} else {",
+            "    module load bar/2.0",
+            "}",
+            "module use /prefix/modules/all/Compiler/foo/1.0",
+            "if { [ file isdirectory [ file join $env(TEST_USER_DIR) \"modules\" ] ] } {",
+            "    module use [ file join $env(TEST_USER_DIR) \"modules\" ]",
+            "}",
+            "prepend-path\tPATH\t\t$root/bin",
+            "prepend-path\tLD_LIBRARY_PATH\t\t$root/lib",
+            "setenv\tEBROOTFOO\t\t\"$root\"",
+            "setenv\tEBVERSIONFOO\t\t\"1.0\"",
+            "if { [ module-info mode load ] } {",
+            "    puts stderr \"Loading foo, \\$root is $root\"",
+            "}",
+        ]))
+
+        os.environ['TEST_USER_DIR'] = userdir
+        ev = evaluate_module_file(modfile, loaded_modules=['bar/1.0'])
+
+        self.assertEqual(ev.loads, ['GCC/4.7.2', 'bar/2.0'])
+        self.assertEqual(ev.all_loads, ['GCC/4.7.2', 'bar/2.0', 'bar/2.0'])
+        self.assertEqual(ev.unloads, ['bar'])
+        self.assertEqual(ev.modpath_exts, ['/prefix/modules/all/Compiler/foo/1.0'])
+        self.assertEqual(ev.all_modpath_exts, ['/prefix/modules/all/Compiler/foo/1.0', userdir + '/modules'])
+
+        env = ev.apply({'PATH': '/usr/bin', 'FOO': 'bar'})
+        self.assertEqual(env['PATH'], '/prefix/software/foo/1.0/bin:/usr/bin')
+        self.assertEqual(env['LD_LIBRARY_PATH'], '/prefix/software/foo/1.0/lib')
+        self.assertEqual(env['EBROOTFOO'], '/prefix/software/foo/1.0')
+        self.assertEqual(env['EBVERSIONFOO'], '1.0')
+        self.assertEqual(env['MODULEPATH'], '/prefix/modules/all/Compiler/foo/1.0')
+        self.assertEqual(env['FOO'], 'bar')
+
+        # evaluation is memoized, as long as checks it depends on yield the same result
+        self.assertTrue(evaluate_module_file(modfile, loaded_modules=['bar/1.0']) is ev)
+        ev2 = evaluate_module_file(modfile, loaded_modules=[])
+        self.assertFalse(ev2 is ev)
+        self.assertEqual(ev2.loads, ['GCC/4.7.2', 'bar/2.0'])
+        self.assertEqual(ev2.unloads, [])
+
+        os.makedirs(os.path.join(userdir, 'modules'))
+        ev3 = evaluate_module_file(modfile, loaded_modules=[])
+        self.assertFalse(ev3 is ev2)
+        self.assertEqual(ev3.modpath_exts, ['/prefix/modules/all/Compiler/foo/1.0', userdir + '/modules'])
+
+        # unsupported constructs result in an error
+        write_file(modfile, "#%Module\nforeach x {a b} {\n    setenv FOO $x\n}\n")
+        self.assertErrorRegex(EasyBuildError, "Unsupported Tcl command", evaluate_module_file, modfile)
+        write_file(modfile, "#%Module\nsetenv FOO $nosuchvar\n")
+        self.assertErrorRegex(EasyBuildError, "Unknown variable 'nosuchvar'", evaluate_module_file, modfile)
+
+    def test_evaluate_lua_module_file(self):
+        """Test evaluating module file in Lua syntax."""
+        modfile = os.path.join(self.test_prefix, 'foo', '1.0.lua')
+        write_file(modfile, '\n'.join([
+            'help([[foo - Homepage: http://example.com]])',
+            'whatis([[Description: foo - Homepage: http://example.com]])',
+            'local root = "/prefix/software/foo/1.0"',
+            'conflict("foo")',
+            'if not isloaded("GCC/4.7.2") then',
+            '    load("GCC/4.7.2")',
+            'end',
+            'prepend_path("MODULEPATH", "/prefix/modules/all/Compiler/foo/1.0")',
+            'if isDir(pathJoin(os.getenv("HOME"), "nosuchdir")) then',
+            '    prepend_path("MODULEPATH", pathJoin(os.getenv("HOME"), "nosuchdir"))',
+            'end',
+            'prepend_path("PATH", pathJoin(root, "bin"))',
+            'setenv("EBROOTFOO", root)',
+            'setenv("EBVERSIONFOO", "1.0")',
+            'setenv("EBDEVELFOO", pathJoin(root, "easybuild/foo-1.0-easybuild-devel"))',
+            'if mode() == "load" then',
+            '    io.stderr:write([==[Loading foo]==])',
+            'end',
+        ]))
+
+        ev = evaluate_module_file(modfile, loaded_modules=['GCC/4.7.2'])
+        self.assertEqual(ev.loads, [])
+        self.assertEqual(ev.all_loads, ['GCC/4.7.2'])
+        self.assertEqual(ev.modpath_exts, ['/prefix/modules/all/Compiler/foo/1.0'])
+        nosuchdir = os.path.join(os.environ['HOME'], 'nosuchdir')
+        self.assertEqual(ev.all_modpath_exts, ['/prefix/modules/all/Compiler/foo/1.0', nosuchdir])
+
+        env = ev.apply({'PATH': '/usr/bin'})
+        self.assertEqual(env['PATH'], '/prefix/software/foo/1.0/bin:/usr/bin')
+        self.assertEqual(env['EBROOTFOO'], '/prefix/software/foo/1.0')
+        self.assertEqual(env['EBDEVELFOO'], '/prefix/software/foo/1.0/easybuild/foo-1.0-easybuild-devel')
+
+        write_file(modfile, 'execute{cmd="echo foo", modeA={"load"}}\n')
+        self.assertErrorRegex(EasyBuildError, "Unsupported", evaluate_module_file, modfile)
+
+    def test_evaluate_test_modules(self):
+        """Test evaluating all test module files."""
+        test_mods_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
+        cnt = 0
+        for (dirpath, _, filenames) in os.walk(test_mods_path):
+            for filename in filenames:
+                if not filename.startswith('.modulerc'):
+                    evaluate_module_file(os.path.join(dirpath, filename))
+                    cnt += 1
+        self.assertTrue(cnt > 0)
+
+        ev = evaluate_module_file(os.path.join(test_mods_path, 'Core', 'GCC', '4.7.2'))
+        self.assertEqual(ev.modpath_exts, ['/tmp/modules/all/Compiler/GCC/4.7.2'])
+        self.assertEqual(ev.apply({})['EBROOTGCC'], '/tmp/software/Core/GCC/4.7.2')
+
+
+def suite():
+    """ returns all the testcases in this module """
+    return TestLoaderFiltered().loadTestsFromTestCase(ModuleEvaluatorTest, sys.argv[1:])
+
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=1).run(suite())
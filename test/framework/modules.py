@@ -629,6 +629,185 @@ class ModulesTest(EnhancedTestCase):
         self.assertEqual(mod.MODULE_AVAIL_CACHE, {})
         self.assertEqual(mod.MODULE_SHOW_CACHE, {})
 
+    def test_persistent_module_caches(self):
+        """Test persistent caching of results for 'module avail' and 'module show'."""
+        init_config(build_options={'cachepath': os.path.join(self.test_prefix, 'cache')})
+
+        # use copy of test modules, so we can add modules
+        test_mods_path = os.path.join(self.test_prefix, 'modules')
+        shutil.copytree(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules'), test_mods_path)
+        self.reset_modulepath([test_mods_path])
+        mod.reset_module_caches()
+
+        avail_res = self.modtool.available()
+        show_res = self.modtool.show('GCC/4.7.2')
+        self.assertEqual(mod.MODULE_CACHE_STATS, {'hits': 0, 'persistent_hits': 0, 'misses': 2})
+
+        self.assertTrue(self.modtool.available() == avail_res)
+        self.assertEqual(mod.MODULE_CACHE_STATS['hits'], 1)
+
+        # results are retained across sessions
+        mod.reset_module_caches()
+        self.assertTrue(self.modtool.available() == avail_res)
+        self.assertEqual(self.modtool.show('GCC/4.7.2'), show_res)
+        self.assertEqual(mod.MODULE_CACHE_STATS, {'hits': 0, 'persistent_hits': 2, 'misses': 0})
+        self.assertEqual(mod.module_cache_stats(), "hits: 0, persistent_hits: 2, misses: 0")
+
+        # reverse index keeps track of cache entries per module path
+        keys = mod.MODULE_CACHE_KEYS_FOR_PATH[os.path.realpath(test_mods_path)]
+        self.assertEqual(sorted(subcmd for (subcmd, _) in keys), ['avail', 'show'])
+
+        # regenerating a module file in place doesn't change the signature of the module path,
+        # but does invalidate the persistently cached result of 'module show' for that module
+        gcc_mod_file = os.path.join(test_mods_path, 'GCC', '4.7.2')
+        write_file(gcc_mod_file, read_file(gcc_mod_file) + '\nsetenv FOO bar\n')
+        mod.reset_module_caches()
+        self.assertTrue(self.modtool.available() == avail_res)
+        self.assertTrue('FOO' in self.modtool.show('GCC/4.7.2'))
+        self.assertEqual(mod.MODULE_CACHE_STATS, {'hits': 0, 'persistent_hits': 1, 'misses': 1})
+
+        # adding a module (in a subdirectory) changes the signature of the module path,
+        # so persistently cached results become invalid (even in a new session)
+        write_file(os.path.join(test_mods_path, 'GCC', '5.4.0'), read_file(os.path.join(test_mods_path, 'GCC', '4.7.2')))
+        mod.reset_module_caches()
+        res = self.modtool.available()
+        self.assertTrue('GCC/5.4.0' in res)
+        self.assertEqual(mod.MODULE_CACHE_STATS, {'hits': 0, 'persistent_hits': 0, 'misses': 1})
+
+        # invalidating caches for a module path also redetermines the signature of the module path
+        write_file(os.path.join(test_mods_path, 'GCC', '6.3.0'), read_file(os.path.join(test_mods_path, 'GCC', '4.7.2')))
+        invalidate_module_caches_for(os.path.join(test_mods_path, 'GCC'))
+        invalidate_module_caches_for(test_mods_path)
+        self.assertEqual(mod.MODULE_AVAIL_CACHE, {})
+        self.assertEqual(mod.MODULE_CACHE_KEYS_FOR_PATH, {})
+        self.assertTrue('GCC/6.3.0' in self.modtool.available())
+
+    def test_module_command_shell(self):
+        """Test running module commands via module command shell."""
+        self.init_testmods()
+        avail_mods = self.modtool.available()
+
+        init_config(build_options={'module_command_shell': True})
+        mod.reset_module_caches()
+        self.assertEqual(self.modtool.available(), avail_mods)
+
+        shell = mod.module_command_shell()
+        self.assertTrue(shell.proc is not None)
+        shell_pid = shell.proc.pid
+
+        # changes to the environment are passed down to the module command
+        self.modtool.load(['GCC/4.7.2'])
+        self.assertTrue(os.environ['EBROOTGCC'].endswith('/software/GCC/4.7.2'))
+        self.assertEqual(self.modtool.loaded_modules(), ['GCC/4.7.2'])
+        self.modtool.purge()
+        self.assertEqual(self.modtool.loaded_modules(), [])
+
+        # same shell process is used for all module commands
+        self.assertEqual(shell.proc.pid, shell_pid)
+
+        # module command shell is restarted if shell process is no longer running
+        shell.proc.kill()
+        shell.proc.wait()
+        self.modtool.load(['GCC/4.7.2'])
+        self.assertEqual(self.modtool.loaded_modules(), ['GCC/4.7.2'])
+        self.assertNotEqual(shell.proc.pid, shell_pid)
+
+        shell.stop()
+        self.assertEqual(shell.proc, None)
+
+        # shell process is killed if a command doesn't complete in time
+        shell = mod.ModuleCommandShell(timeout=1)
+        self.assertEqual(shell.run(['echo', 'foo'], os.environ.copy()), ('foo\n', ''))
+        error_pattern = "did not complete within 1 seconds via module command shell"
+        self.assertErrorRegex(EasyBuildError, error_pattern, shell.run, ['sleep', '30'], os.environ.copy())
+        self.assertEqual(shell.proc, None)
+        self.assertEqual(shell.run(['echo', 'bar'], os.environ.copy()), ('bar\n', ''))
+        shell.stop()
+
+    def test_module_files_index(self):
+        """Test use of index of module files to check for available modules."""
+        test_mods_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
+
+        index = mod.ModuleFilesIndex(test_mods_path, lua=True)
+        self.assertEqual(index.lookup('GCC/4.7.2'), True)
+        self.assertEqual(index.lookup('OpenMPI'), True)
+        self.assertEqual(index.lookup('toy/.0.0-deps'), True)
+        self.assertEqual(index.lookup('bzip2/.1.0.6'), True)
+        self.assertEqual(index.lookup('Compiler/GCC/4.7.2/OpenMPI/1.6.4'), True)
+        self.assertEqual(index.lookup('foo/1.2.3'), False)
+        self.assertEqual(index.lookup('OpenMPI/1.6.4'), False)
+        # GCC directory contains a .modulerc file, so non-existing GCC modules may still be resolved via an alias
+        self.assertEqual(index.lookup('GCC/4.6'), None)
+
+        self.assertEqual(sorted(index.available(mod_name='GCC')),
+                         ['GCC/4.6.3', 'GCC/4.6.4', 'GCC/4.7.2', 'GCCcore/6.2.0'])
+        self.assertEqual(len(index.available()), TEST_MODULES_COUNT)
+        self.assertEqual(len(index.available(include_hidden=True)), TEST_MODULES_COUNT + 3)
+
+        # module files in Lua syntax are only considered when asked for
+        index = mod.ModuleFilesIndex(test_mods_path)
+        self.assertEqual(index.lookup('bzip2/.1.0.6'), False)
+        self.assertEqual(index.lookup('toy/.0.0-deps'), True)
+
+        # files without the required header for Tcl module files are ignored
+        write_file(os.path.join(self.test_prefix, 'foo', '1.2.3'), "this is not a module file")
+        write_file(os.path.join(self.test_prefix, 'foo', '4.5.6'), "#%Module\nsetenv FOO bar\n")
+        index = mod.ModuleFilesIndex(self.test_prefix)
+        self.assertEqual(index.modules, {'foo/4.5.6': os.path.join(self.test_prefix, 'foo', '4.5.6')})
+
+        # exist and available methods use index of module files when enabled
+        init_config(build_options={'module_files_index': True})
+        self.init_testmods()
+        self.assertEqual(mod.MODULE_FILES_INDEX_CACHE, {})
+
+        mod_names = ['OpenMPI/1.6.4-GCC-4.6.4', 'foo/1.2.3', 'GCC', 'OpenMPI/1.6.4',
+                     'Compiler/GCC/4.7.2/OpenMPI/1.6.4', 'toy/.0.0-deps']
+        self.assertEqual(self.modtool.exist(mod_names), [True, False, True, False, True, True])
+        self.assertEqual(self.modtool.exist(mod_names, skip_avail=True), [True, False, True, False, True, True])
+        self.assertEqual(len(mod.MODULE_FILES_INDEX_CACHE), 1)
+        self.assertTrue('GCC/4.7.2' in self.modtool.available())
+
+        # index is evicted when caches for corresponding path are invalidated
+        invalidate_module_caches_for(test_mods_path)
+        self.assertEqual(mod.MODULE_FILES_INDEX_CACHE, {})
+
+    def test_module_file_evaluator(self):
+        """Test use of in-process evaluation of module files."""
+        init_config(build_options={'module_file_evaluator': True})
+        self.setup_hierarchical_modules()
+
+        mod_dir = os.path.join(self.test_installpath, 'modules', 'all')
+        gcc_modfile = os.path.join(mod_dir, 'Core', 'GCC', '4.7.2')
+        self.assertEqual(self.modtool.locate_module_file('GCC/4.7.2'), gcc_modfile)
+        self.assertEqual(self.modtool.locate_module_file('GCC'), None)
+        self.assertEqual(self.modtool.locate_module_file('OpenMPI/1.6.4'), None)
+        self.assertEqual(self.modtool.modulefile_path('GCC/4.7.2'), gcc_modfile)
+
+        expected = {
+            'GCC/4.7.2': [os.path.join(mod_dir, 'Compiler', 'GCC', '4.7.2')],
+            'OpenMPI/1.6.4': [os.path.join(mod_dir, 'MPI', 'GCC', '4.7.2', 'OpenMPI', '1.6.4')],
+            'FFTW/3.3.3': [],
+        }
+        res = self.modtool.modpath_extensions_for(['GCC/4.7.2', 'OpenMPI/1.6.4', 'FFTW/3.3.3'])
+        self.assertEqual(res, expected)
+        # no modules were loaded to determine the result
+        self.assertEqual(self.modtool.loaded_modules(), [])
+
+        # fall back to using modules tool for module files that can not be evaluated in-process
+        test_mod = 'test-modpaths/1.2.3.4'
+        write_file(os.path.join(mod_dir, test_mod), '\n'.join([
+            '#%Module',
+            'foreach var {FOO BAR} {',
+            '    setenv $var foobar',
+            '}',
+            'module use %s/Compiler/GCC/4.7.2' % mod_dir,
+        ]))
+        res = self.modtool.modpath_extensions_for([test_mod])
+        self.assertEqual(res, {test_mod: [os.path.join(mod_dir, 'Compiler', 'GCC', '4.7.2')]})
+
+        error_pattern = "Can't get value from a non-existing module"
+        self.assertErrorRegex(EasyBuildError, error_pattern, self.modtool.modpath_extensions_for, ['nosuchmodule/1.2'])
+
     def test_module_use_bash(self):
         """Test whether effect of 'module use' is preserved when a new bash session is started."""
         # this test is here as check for a nasty bug in how the modules tool is deployed
@@ -28,7 +28,10 @@ Unit tests for robot (dependency resolution).
 @author: Toon Willems (Ghent University)
 """
 
+import json
 import os
+import pickle
+import random
 import re
 import shutil
 import sys
@@ -44,11 +47,14 @@ import easybuild.tools.robot as robot
 from easybuild.framework.easyconfig.easyconfig import _easyconfig_files_cache, process_easyconfig, EasyConfig
 from easybuild.framework.easyconfig.tools import alt_easyconfig_paths, find_resolved_modules, parse_easyconfigs
 from easybuild.framework.easyconfig.tweak import tweak
-from easybuild.framework.easyconfig.easyconfig import get_toolchain_hierarchy
+from easybuild.framework.easyconfig.easyconfig import det_toolchain_hierarchy_key, get_toolchain_hierarchy
+from easybuild.framework.easyconfig.easyconfig import update_toolchain_hierarchies
 from easybuild.framework.easyconfig.easyconfig import robot_find_minimal_toolchain_of_dependency
+from easybuild.framework.easyconfig.easyconfig import robot_find_minimal_toolchains_of_dependencies
 from easybuild.framework.easyconfig.tools import skip_available
 from easybuild.tools import config, modules
 from easybuild.tools.build_log import EasyBuildError
+from easybuild.tools.cache import persistent_cache
 from easybuild.tools.config import module_classes
 from easybuild.tools.configobj import ConfigObj
 from easybuild.tools.filetools import copy_file, read_file, write_file
@@ -545,6 +551,120 @@ class RobotTest(EnhancedTestCase):
         self.assertTrue('gzip/1.4' in mods)
 
 
+    def test_dependency_graph(self):
+        """Test DependencyGraph, i.e. whether it yields same order as iterating via find_resolved_modules."""
+        def mkdepspec(name):
+            """Create a dep spec with given name."""
+            return {
+                'name': name,
+                'version': '1.0',
+                'versionsuffix': '',
+                'toolchain': {'name': 'dummy', 'version': 'dummy'},
+                'full_mod_name': '%s/1.0' % name,
+            }
+
+        def mkspec(name, deps):
+            """Create a spec with given name/deps."""
+            spec = mkdepspec(name)
+            return {
+                'ec': spec,
+                'spec': '%s.eb' % name,
+                'full_mod_name': spec['full_mod_name'],
+                'dependencies': [mkdepspec(dep) for dep in deps],
+            }
+
+        random.seed(1234)
+        for _ in range(25):
+            # random DAG: node i can only depend on nodes j < i; list of specs is shuffled afterwards
+            cnt = random.randint(1, 50)
+            ecs = [mkspec('node%d' % i, random.sample(['node%d' % j for j in range(i)], min(i, 3)))
+                   for i in range(cnt)]
+            random.shuffle(ecs)
+
+            # determine order by iterating with find_resolved_modules until a fixpoint is reached
+            ordered_ecs, remaining_ecs, avail_modules = [], deepcopy(ecs), []
+            last_processed_count = -1
+            while len(avail_modules) > last_processed_count:
+                last_processed_count = len(avail_modules)
+                res = find_resolved_modules(remaining_ecs, avail_modules, self.modtool)
+                resolved_ecs, remaining_ecs, avail_modules = res
+                ordered_ecs.extend(resolved_ecs)
+
+            dep_graph = robot.DependencyGraph([], self.modtool)
+            dep_graph.add_nodes(deepcopy(ecs))
+            self.assertEqual(len(dep_graph), cnt)
+            res = dep_graph.resolve()
+            self.assertEqual([ec['full_mod_name'] for ec in res], [ec['full_mod_name'] for ec in ordered_ecs])
+            self.assertEqual(len(dep_graph), 0)
+
+        # unresolved dependencies are retained, and can be removed (e.g. when they're irresolvable)
+        dep_graph = robot.DependencyGraph(['one/1.0'], self.modtool, retain_all_deps=True)
+        dep_graph.add_nodes([mkspec('two', ['one', 'zero']), mkspec('three', ['two', 'one'])])
+        self.assertEqual(dep_graph.resolve(), [])
+        unresolved = dep_graph.unresolved()
+        self.assertEqual([ec['full_mod_name'] for ec in unresolved], ['two/1.0', 'three/1.0'])
+        self.assertEqual([d['full_mod_name'] for d in unresolved[0]['dependencies']], ['zero/1.0'])
+        self.assertEqual([d['full_mod_name'] for d in unresolved[1]['dependencies']], ['two/1.0'])
+
+        dep_graph.remove_dependency(unresolved[0], unresolved[0]['dependencies'][0])
+        res = dep_graph.resolve()
+        self.assertEqual([ec['full_mod_name'] for ec in res], ['two/1.0', 'three/1.0'])
+        self.assertEqual(dep_graph.unresolved(), [])
+
+        # synthetic graph (see benchmarks/benchmark_dependency_graph.py for a large one)
+        ecs = []
+        for i in range(100):
+            ecs.append(mkspec('node%d' % i, ['node%d' % (i - j) for j in (1, 7, 33) if i - j >= 0]))
+        random.shuffle(ecs)
+
+        init_config(build_options={'robot_path': None})
+        res = resolve_dependencies(ecs, self.modtool, retain_all_deps=True)
+        self.assertEqual(len(res), 100)
+        mod_names = [ec['full_mod_name'] for ec in res]
+        self.assertEqual(mod_names[0], 'node0/1.0')
+        self.assertEqual(mod_names[-1], 'node99/1.0')
+        positions = dict((mod_name, idx) for (idx, mod_name) in enumerate(mod_names))
+        for ec in ecs:
+            for dep in ec['dependencies']:
+                self.assertTrue(positions[dep['full_mod_name']] < positions[ec['full_mod_name']])
+
+    def test_resolve_dependencies_parallel_parse(self):
+        """Test resolving dependencies with easyconfigs being parsed in parallel."""
+        test_ecs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        gzip_ec = os.path.join(test_ecs, 'g', 'gzip', 'gzip-1.5-goolf-1.4.10.eb')
+
+        res = {}
+        for parallel_parse in [None, 3]:
+            # start from a clean slate, to make sure all dependencies are parsed (again)
+            ecec._easyconfigs_cache.clear()
+            init_config(build_options={
+                'parallel_parse': parallel_parse,
+                'robot_path': test_ecs,
+                'valid_module_classes': module_classes(),
+            })
+            ecs, _ = parse_easyconfigs([(gzip_ec, False)])
+            res[parallel_parse] = resolve_dependencies(ecs, self.modtool, retain_all_deps=True)
+
+        mod_names = [ec['full_mod_name'] for ec in res[None]]
+        self.assertEqual(len(mod_names), 9)
+        self.assertEqual(mod_names[-1], 'gzip/1.5-goolf-1.4.10')
+        self.assertEqual([ec['full_mod_name'] for ec in res[3]], mod_names)
+        self.assertEqual([ec['spec'] for ec in res[3]], [ec['spec'] for ec in res[None]])
+
+        # easyconfigs for all (recursive) dependencies are prefetched into the cache
+        ecec._easyconfigs_cache.clear()
+        dep_graph = robot.DependencyGraph([], self.modtool, retain_all_deps=True)
+        dep_graph.add_nodes(ecs)
+        robot.prefetch_easyconfigs(ecs[0]['dependencies'], dep_graph, 2, validate=False)
+        self.assertEqual(len(ecec._easyconfigs_cache), 8)
+        for ec in res[3][:-1]:
+            self.assertTrue((ec['spec'], False, False, False) in ecec._easyconfigs_cache)
+
+        # easyconfigs parsed in worker processes can be passed back
+        ec = res[3][0]['ec']
+        self.assertEqual(pickle.loads(pickle.dumps(ec)), ec)
+        self.assertEqual(pickle.loads(pickle.dumps(ec)).toolchain.as_dict(), ec.toolchain.as_dict())
+
     def test_det_easyconfig_paths(self):
         """Test det_easyconfig_paths function (without --from-pr)."""
         fd, dummylogfn = tempfile.mkstemp(prefix='easybuild-dummy', suffix='.log')
@@ -743,6 +863,73 @@ class RobotTest(EnhancedTestCase):
         error_msg = "Multiple versions of GCC found in dependencies of toolchain gompi: 4.6.4, 4.7.2"
         self.assertErrorRegex(EasyBuildError, error_msg, get_toolchain_hierarchy, tc)
 
+    def test_persistent_toolchain_hierarchies(self):
+        """Test persistent table of toolchain hierarchies."""
+        test_easyconfigs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        gompi_ec = os.path.join(self.test_prefix, 'gompi-1.4.10.eb')
+        copy_file(os.path.join(test_easyconfigs, 'g', 'gompi', 'gompi-1.4.10.eb'), gompi_ec)
+
+        error_msg = "A location for persistent caches must be specified"
+        self.assertErrorRegex(EasyBuildError, error_msg, update_toolchain_hierarchies)
+
+        init_config(build_options={
+            'cachepath': os.path.join(self.test_prefix, 'cache'),
+            'robot_path': [self.test_prefix, test_easyconfigs],
+            'valid_module_classes': module_classes(),
+        })
+        table = persistent_cache('toolchain_hierarchies')
+        _easyconfig_files_cache.clear()
+
+        gompi = {'name': 'gompi', 'version': '1.4.10'}
+        gompi_hierarchy = [{'name': 'GCC', 'version': '4.7.2'}, gompi]
+
+        # parsing easyconfig files to determine the hierarchy for gompi may also determine (and store) the hierarchy
+        # for other toolchains (depending on what is cached already), so only check the entry for gompi
+        gompi_entry_path = table.entry_path(det_toolchain_hierarchy_key(gompi))
+        self.assertFalse(os.path.exists(gompi_entry_path))
+        get_toolchain_hierarchy.clear()
+        self.assertEqual(get_toolchain_hierarchy(gompi), gompi_hierarchy)
+        self.assertTrue(os.path.exists(gompi_entry_path))
+        gompi_entry = read_file(gompi_entry_path)
+
+        # hierarchy is obtained from persistent table, without searching for toolchains or parsing easyconfigs
+        get_toolchain_hierarchy.clear()
+        orig_search_toolchain, orig_process_easyconfig = ecec.search_toolchain, ecec.process_easyconfig
+        ecec.search_toolchain, ecec.process_easyconfig = None, None
+        hits, stores = table.stats['hits'], table.stats['stores']
+        try:
+            res = get_toolchain_hierarchy(gompi)
+        finally:
+            ecec.search_toolchain, ecec.process_easyconfig = orig_search_toolchain, orig_process_easyconfig
+        self.assertEqual(res, gompi_hierarchy)
+        self.assertTrue(res[-1] is gompi)
+        self.assertEqual((table.stats['hits'], table.stats['stores']), (hits + 1, stores))
+
+        # entry is no longer used when one of the easyconfig files it is based on is changed
+        write_file(gompi_ec, "\ndependencies += [('GCC', '4.6.4')]", append=True)
+        os.utime(gompi_ec, (0, 0))
+        get_toolchain_hierarchy.clear()
+        error_msg = "Multiple versions of GCC found in dependencies of toolchain gompi: 4.6.4, 4.7.2"
+        self.assertErrorRegex(EasyBuildError, error_msg, get_toolchain_hierarchy, gompi)
+        # outdated entry for gompi is not replaced, since its hierarchy could not be determined
+        self.assertEqual(read_file(gompi_entry_path), gompi_entry)
+
+        # table can be (re)built for all toolchains in robot path, faulty toolchains are skipped
+        os.remove(gompi_ec)
+        _easyconfig_files_cache.clear()
+        get_toolchain_hierarchy.clear()
+        self.assertTrue(update_toolchain_hierarchies() > 5)
+        self.assertTrue(table.stats['stores'] > 6)
+
+        get_toolchain_hierarchy.clear()
+        ecec.search_toolchain, ecec.process_easyconfig = None, None
+        try:
+            res = get_toolchain_hierarchy({'name': 'goolf', 'version': '1.4.10'})
+            self.assertEqual(get_toolchain_hierarchy(gompi), gompi_hierarchy)
+        finally:
+            ecec.search_toolchain, ecec.process_easyconfig = orig_search_toolchain, orig_process_easyconfig
+        self.assertEqual(res, gompi_hierarchy + [{'name': 'goolf', 'version': '1.4.10'}])
+
     def test_find_resolved_modules(self):
         """Test find_resolved_modules function."""
         nodeps = {
@@ -1019,6 +1206,57 @@ class RobotTest(EnhancedTestCase):
         sqlite = bar.dependencies()[3]
         self.assertEqual(det_full_ec_version(sqlite), '3.8.10.2-goolf-1.4.10')
 
+    def test_robot_find_minimal_toolchains_of_dependencies(self):
+        """Test robot_find_minimal_toolchains_of_dependencies."""
+        test_easyconfigs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        init_config(build_options={
+            'valid_module_classes': module_classes(),
+            'robot_path': test_easyconfigs,
+        })
+
+        goolf = {'name': 'goolf', 'version': '1.4.10'}
+        deps = [
+            {'name': 'OpenMPI', 'version': '1.6.4', 'versionsuffix': '', 'toolchain': goolf},
+            {'name': 'gzip', 'version': '1.4', 'versionsuffix': '', 'toolchain': goolf},
+            {'name': 'SQLite', 'version': '3.8.10.2', 'versionsuffix': '', 'toolchain': goolf},
+            {'name': 'OpenBLAS', 'version': '0.2.6', 'versionsuffix': '-LAPACK-3.4.2', 'toolchain': goolf},
+        ]
+        gcc = {'name': 'GCC', 'version': '4.7.2'}
+        gompi = {'name': 'gompi', 'version': '1.4.10'}
+
+        get_toolchain_hierarchy.clear()
+        ecec._minimal_toolchains_cache.clear()
+        res = robot_find_minimal_toolchains_of_dependencies(deps, self.modtool)
+        self.assertEqual(res, [gcc, None, gcc, gompi])
+        self.assertEqual(res, [robot_find_minimal_toolchain_of_dependency(dep, self.modtool) for dep in deps])
+
+        res = robot_find_minimal_toolchains_of_dependencies(deps, self.modtool, parent_first=True)
+        self.assertEqual(res, [gcc, None, goolf, gompi])
+
+        # results are cached per dependency & toolchain hierarchy, so easyconfig files are not searched again
+        # (other entries may be added when easyconfig files for toolchains are parsed, so only check specific keys)
+        hierarchy = (('GCC', '4.7.2'), ('gompi', '1.4.10'), ('goolf', '1.4.10'))
+        robot_paths_key = (str(test_easyconfigs), False)
+        for hierarchy_key in [hierarchy, hierarchy[::-1]]:
+            for dep in deps:
+                key = (dep['name'], dep['version'], dep['versionsuffix'], hierarchy_key, robot_paths_key)
+                self.assertTrue(key in ecec._minimal_toolchains_cache)
+        ecec._minimal_toolchains_cache[('gzip', '1.4', '', hierarchy, robot_paths_key)] = [gompi]
+        res = robot_find_minimal_toolchains_of_dependencies(deps, self.modtool)
+        self.assertEqual(res, [gcc, gompi, gcc, gompi])
+
+        # results obtained with other robot search paths are not used
+        init_config(build_options={
+            'valid_module_classes': module_classes(),
+            'robot_path': [test_easyconfigs],
+        })
+        res = robot_find_minimal_toolchains_of_dependencies(deps, self.modtool)
+        self.assertEqual(res, [gcc, None, gcc, gompi])
+
+        # specified parent toolchain is used for all dependencies
+        res = robot_find_minimal_toolchains_of_dependencies(deps, self.modtool, parent_tc=gompi, parent_first=True)
+        self.assertEqual(res, [gcc, None, gompi, gompi])
+
     def test_check_conflicts(self):
         """Test check_conflicts function."""
         test_easyconfigs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
@@ -1087,6 +1325,80 @@ class RobotTest(EnhancedTestCase):
         # test use of check_inter_ec_conflicts
         self.assertFalse(check_conflicts(ecs, self.modtool, check_inter_ec_conflicts=False), "No conflicts found")
 
+        # report of conflicts in JSON format
+        report = os.path.join(self.test_prefix, 'conflicts.json')
+        self.mock_stderr(True)
+        conflicts = check_conflicts(ecs, self.modtool, report=report)
+        self.mock_stderr(False)
+        self.assertTrue(conflicts)
+
+        res = json.loads(read_file(report))
+        self.assertEqual(res['conflicts_found'], True)
+        self.assertEqual(res['easyconfigs'], ['bzip2-1.0.6-GCC-4.9.2', 'hwloc-1.6.2-GCC-4.6.4'])
+        self.assertEqual(len(res['conflicts']), 1)
+        self.assertEqual(res['conflicts'][0]['parent'], None)
+        expected = [
+            {'name': 'GCC', 'version': '4.6.4', 'dep_of': ['hwloc-1.6.2-GCC-4.6.4']},
+            {'name': 'GCC', 'version': '4.9.2', 'dep_of': ['bzip2-1.0.6-GCC-4.9.2', 'gzip-1.6-GCC-4.9.2']},
+        ]
+        self.assertEqual(res['conflicts'][0]['conflict'], expected)
+
+        self.assertFalse(check_conflicts(ecs, self.modtool, check_inter_ec_conflicts=False, report=report))
+        self.assertEqual(json.loads(read_file(report))['conflicts'], [])
+
+    def test_check_conflicts_transitive(self):
+        """Test check_conflicts function on conflicts between transitive (build) dependencies."""
+        test_ecs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
+        init_config(build_options={
+            'robot_path': [self.test_prefix, test_ecs],
+            'valid_module_classes': module_classes(),
+            'validate': False,
+        })
+
+        ec_tmpl = '\n'.join([
+            "easyblock = 'ConfigureMake'",
+            "name = '%s'",
+            "version = '%s'",
+            "homepage = 'http://example.com'",
+            "description = 'test'",
+            "toolchain = {'name': 'dummy', 'version': 'dummy'}",
+            "dependencies = [%s]",
+            "builddependencies = [%s]",
+        ])
+        specs = [
+            # name, version, dependencies, build dependencies
+            ('zlib', '1.0', '', ''),
+            ('zlib', '2.0', '', ''),
+            ('libfoo', '1.0', "('zlib', '1.0')", ''),
+            ('libbar', '1.0', "('libfoo', '1.0')", ''),
+            ('tool', '1.0', "('zlib', '2.0')", ''),
+            # runtime dependency on zlib 2.0 conflicts with zlib 1.0 via libbar -> libfoo
+            ('app', '1.0', "('libbar', '1.0'), ('zlib', '2.0')", ''),
+            # zlib 2.0 via build dependency tool conflicts with zlib 1.0 via libbar -> libfoo
+            ('app', '2.0', "('libbar', '1.0')", "('tool', '1.0')"),
+            # build dependency on zlib 2.0 conflicts with zlib 1.0 via libfoo
+            ('app', '3.0', "('libfoo', '1.0')", "('zlib', '2.0'),"),
+            # no conflicts
+            ('app', '4.0', "('zlib', '2.0')", "('tool', '1.0'),"),
+        ]
+        for (name, version, deps, builddeps) in specs:
+            write_file(os.path.join(self.test_prefix, '%s-%s.eb' % (name, version)),
+                       ec_tmpl % (name, version, deps, builddeps))
+
+        for version in ['1.0', '2.0', '3.0', '4.0']:
+            ecs, _ = parse_easyconfigs([(os.path.join(self.test_prefix, 'app-%s.eb' % version), False)])
+            self.mock_stderr(True)
+            res = check_conflicts(ecs, self.modtool)
+            stderr = self.get_stderr()
+            self.mock_stderr(False)
+            if version == '4.0':
+                self.assertFalse(res)
+                self.assertEqual(stderr, '')
+            else:
+                self.assertTrue(res)
+                regex = re.compile("Conflict found for dependencies of app-%s: zlib-[12].0 vs zlib-[12].0" % version)
+                self.assertTrue(regex.search(stderr), "Pattern '%s' found in: %s" % (regex.pattern, stderr))
+
     def test_robot_archived_easyconfigs(self):
         """Test whether robot can pick up archived easyconfigs when asked."""
         test_ecs = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'easyconfigs', 'test_ecs')
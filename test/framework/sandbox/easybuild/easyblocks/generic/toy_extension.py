@@ -34,6 +34,8 @@ from easybuild.easyblocks.toy import EB_toy
 class Toy_Extension(ExtensionEasyBlock):
     """Support for building/installing toy."""
 
+    UNPACKS_SRC = True
+
     def run(self):
         """Build toy extension."""
         super(Toy_Extension, self).run(unpack_src=True)
@@ -0,0 +1,110 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Unit tests for tools/sourcestore.py.
+"""
+import os
+import sys
+from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
+from unittest import TextTestRunner
+
+from easybuild.tools.filetools import compute_checksum, read_file, write_file
+from easybuild.tools.sourcestore import SOURCE_STORE_SUBDIR, add_to_source_store, find_in_source_store
+from easybuild.tools.sourcestore import link_from_source_store, source_store_path
+
+
+class SourceStoreTest(EnhancedTestCase):
+    """Tests for content-addressed source store."""
+
+    def test_source_store(self):
+        """Test adding files to source store, and finding them via their checksum."""
+        srcpath = os.path.join(self.test_prefix, 'sources')
+        test_file = os.path.join(srcpath, 'f', 'foo', 'foo-1.0.tar.gz')
+        write_file(test_file, "this is not really a tarball\n")
+        md5 = compute_checksum(test_file, checksum_type='md5')
+        sha1 = compute_checksum(test_file, checksum_type='sha1')
+        sha256 = compute_checksum(test_file, checksum_type='sha256')
+
+        # source store is only used when enabled
+        init_config(args=['--sourcepath=%s' % srcpath])
+        self.assertEqual(source_store_path(), None)
+        self.assertEqual(add_to_source_store(test_file), None)
+        self.assertEqual(find_in_source_store(md5), None)
+
+        init_config(args=['--sourcepath=%s' % srcpath], build_options={'source_store': True})
+        store = os.path.join(srcpath, SOURCE_STORE_SUBDIR)
+        self.assertEqual(source_store_path(), store)
+        self.assertEqual(find_in_source_store(md5), None)
+
+        entry = add_to_source_store(test_file)
+        self.assertEqual(entry, os.path.join(store, 'sha256', sha256[:2], sha256))
+        # file is hard linked into source store
+        self.assertTrue(os.path.samefile(entry, test_file))
+        self.assertEqual(os.stat(test_file).st_nlink, 2)
+        # aliases are only created for the types of the specified checksums, so other checksums are not computed
+        self.assertEqual(find_in_source_store(('sha256', sha256)), entry)
+        self.assertEqual(find_in_source_store(md5), None)
+        self.assertEqual(find_in_source_store(('sha1', sha1)), None)
+        self.assertEqual(sorted(os.listdir(store)), ['sha256'])
+
+        # adding a file again is harmless
+        self.assertEqual(add_to_source_store(test_file, checksums=[md5, ('sha1', sha1)]), entry)
+        self.assertEqual(sorted(os.listdir(store)), ['md5', 'sha1', 'sha256'])
+
+        # file can be found via different types of checksums
+        for checksum in [md5, md5.upper(), ('md5', md5), ('sha1', sha1), ('sha256', sha256), ['nope', md5]]:
+            self.assertEqual(find_in_source_store(checksum), entry)
+        for checksum in [None, 'nope', ('sha1', md5), ('adler32', '0x1234'), ('md5', '../../foo'), ('md5', None)]:
+            self.assertEqual(find_in_source_store(checksum), None)
+
+        # file from source store can be made available elsewhere
+        other_path = os.path.join(srcpath, 'b', 'bar', 'foo-1.0.tar.gz')
+        self.assertEqual(link_from_source_store(entry, other_path), other_path)
+        self.assertTrue(os.path.samefile(other_path, entry))
+        self.assertEqual(link_from_source_store(entry, other_path), other_path)
+
+        # existing (different) files are not replaced
+        other_path = os.path.join(srcpath, 'b', 'baz', 'foo-1.0.tar.gz')
+        write_file(other_path, "this is another file\n")
+        self.assertEqual(link_from_source_store(entry, other_path), entry)
+        self.assertEqual(read_file(other_path), "this is another file\n")
+
+        # broken symlinks are replaced
+        broken_link = os.path.join(srcpath, 'b', 'baz', 'broken.tar.gz')
+        os.symlink(os.path.join(self.test_prefix, 'nosuchfile'), broken_link)
+        self.assertEqual(link_from_source_store(entry, broken_link), broken_link)
+        self.assertTrue(os.path.samefile(broken_link, entry))
+
+        # failing to add a file to the store is not fatal
+        self.assertEqual(add_to_source_store(os.path.join(self.test_prefix, 'nosuchfile')), None)
+
+
+def suite():
+    """ returns all the testcases in this module """
+    return TestLoaderFiltered().loadTestsFromTestCase(SourceStoreTest, sys.argv[1:])
+
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=1).run(suite())
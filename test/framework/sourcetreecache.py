@@ -0,0 +1,114 @@
+# #
+# Copyright 2017-2017 Ghent University
+#
+# This file is part of EasyBuild,
+# originally created by the HPC team of Ghent University (http://ugent.be/hpc/en),
+# with support of Ghent University (http://ugent.be/hpc),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+# http://github.com/hpcugent/easybuild
+#
+# EasyBuild is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation v2.
+#
+# EasyBuild is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with EasyBuild.  If not, see <http://www.gnu.org/licenses/>.
+# #
+"""
+Unit tests for tools/sourcetreecache.py.
+"""
+import os
+import sys
+from test.framework.utilities import EnhancedTestCase, TestLoaderFiltered, init_config
+from unittest import TextTestRunner
+
+from easybuild.tools.filetools import mkdir, read_file, write_file
+from easybuild.tools.sourcetreecache import SOURCE_TREE_CACHE_SUBDIR, SourceTreeCache, source_tree_cache
+
+
+class SourceTreeCacheTest(EnhancedTestCase):
+    """Tests for cache of extracted and patched source trees."""
+
+    def test_source_tree_cache(self):
+        """Test storing source trees in cache, and cloning them from it."""
+        cachepath = os.path.join(self.test_prefix, 'cache')
+
+        # source tree cache is only used when enabled, and when a location for persistent caches is set
+        init_config()
+        self.assertEqual(source_tree_cache(), None)
+        init_config(build_options={'cachepath': cachepath})
+        self.assertEqual(source_tree_cache(), None)
+        init_config(build_options={'cache_source_trees': True})
+        self.assertEqual(source_tree_cache(), None)
+
+        init_config(build_options={'cache_source_trees': True, 'cachepath': cachepath})
+        cache = source_tree_cache()
+        self.assertTrue(isinstance(cache, SourceTreeCache))
+        self.assertEqual(cache.path, os.path.join(cachepath, SOURCE_TREE_CACHE_SUBDIR))
+        self.assertEqual(cache.max_size, None)
+        self.assertTrue(source_tree_cache() is cache)
+
+        builddir = os.path.join(self.test_prefix, 'build')
+        write_file(os.path.join(builddir, 'foo-1.0', 'foo.c'), "int main() { return 0; }\n")
+        os.symlink('foo.c', os.path.join(builddir, 'foo-1.0', 'main.c'))
+
+        target = os.path.join(self.test_prefix, 'target')
+        mkdir(target)
+        self.assertEqual(cache.load('foo', target), None)
+        self.assertEqual(os.listdir(target), [])
+
+        cache.store('foo', builddir, ['foo-1.0'])
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 1, 'stores': 1, 'evictions': 0})
+        # storing a source tree again is harmless
+        cache.store('foo', builddir, ['foo-1.0'])
+        self.assertEqual(cache.stats['stores'], 1)
+        self.assertEqual(len(cache.entries()), 1)
+
+        self.assertEqual(cache.load('foo', target), ['foo-1.0'])
+        self.assertEqual(cache.stats, {'hits': 1, 'misses': 1, 'stores': 1, 'evictions': 0})
+        self.assertEqual(read_file(os.path.join(target, 'foo-1.0', 'foo.c')), "int main() { return 0; }\n")
+        self.assertEqual(os.readlink(os.path.join(target, 'foo-1.0', 'main.c')), 'foo.c')
+        # cached source tree is a copy
+        self.assertFalse(os.path.samefile(os.path.join(target, 'foo-1.0', 'foo.c'),
+                                          os.path.join(builddir, 'foo-1.0', 'foo.c')))
+
+        # keys must match exactly
+        self.assertEqual(cache.load('foo ', os.path.join(self.test_prefix, 'target2')), None)
+
+        # least recently used source trees are evicted when the cache exceeds its maximum size
+        cache = SourceTreeCache(os.path.join(self.test_prefix, 'lru'), max_size=3000)
+        for key in ['one', 'two', 'three']:
+            write_file(os.path.join(builddir, 'foo-1.0', 'foo.c'), key * (1000 / len(key)))
+            cache.store(key, builddir, ['foo-1.0'])
+            # make sure last use time is different for each entry
+            for path, _, last_use in cache.entries():
+                os.utime(os.path.join(path, 'metadata'), (last_use - 10, last_use - 10))
+
+            # make sure first entry is used more recently than second entry
+            if key == 'two':
+                self.assertEqual(cache.load('one', os.path.join(self.test_prefix, 'lru_one')), ['foo-1.0'])
+
+        self.assertEqual(cache.stats['evictions'], 1)
+        self.assertEqual(len(cache.entries()), 2)
+        for key, size in [('one', 999), ('three', 1000)]:
+            target = os.path.join(self.test_prefix, 'target_%s' % key)
+            self.assertEqual(cache.load(key, target), ['foo-1.0'])
+            self.assertEqual(os.path.getsize(os.path.join(target, 'foo-1.0', 'foo.c')), size)
+        self.assertEqual(cache.load('two', os.path.join(self.test_prefix, 'target_two')), None)
+
+
+def suite():
+    """ returns all the testcases in this module """
+    return TestLoaderFiltered().loadTestsFromTestCase(SourceTreeCacheTest, sys.argv[1:])
+
+
+if __name__ == '__main__':
+    TextTestRunner(verbosity=1).run(suite())
@@ -55,6 +55,7 @@ fancylogger.setLogLevelError()
 # toolkit should be first to allow hacks to work
 import test.framework.asyncprocess as a
 import test.framework.build_log as bl
+import test.framework.cache as cache
 import test.framework.config as c
 import test.framework.easyblock as b
 import test.framework.easyconfig as e
@@ -70,6 +71,7 @@ import test.framework.general as gen
 import test.framework.github as g
 import test.framework.include as i
 import test.framework.license as l
+import test.framework.module_evaluator as me
 import test.framework.module_generator as mg
 import test.framework.modules as m
 import test.framework.modulestool as mt
@@ -80,6 +82,8 @@ import test.framework.repository as r
 import test.framework.robot as robot
 import test.framework.run as run
 import test.framework.scripts as sc
+import test.framework.sourcestore as ss
+import test.framework.sourcetreecache as stc
 import test.framework.style as st
 import test.framework.systemtools as s
 import test.framework.toolchain as tc
@@ -108,7 +112,7 @@ log = fancylogger.getLogger()
 # call suite() for each module and then run them all
 # note: make sure the options unit tests run first, to avoid running some of them with a readily initialized config
 tests = [gen, bl, o, r, ef, ev, ebco, ep, e, mg, m, mt, f, run, a, robot, b, v, g, tcv, tc, t, c, s, l, f_c, sc,
-         tw, p, i, pkg, d, env, et, y, st]
+         tw, p, i, pkg, d, env, et, y, st, cache, me, ss, stc]
 
 SUITE = unittest.TestSuite([x.suite() for x in tests])
 
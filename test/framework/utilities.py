@@ -41,8 +41,11 @@ from vsc.utils import fancylogger
 from vsc.utils.patterns import Singleton
 from vsc.utils.testing import EnhancedTestCase as _EnhancedTestCase
 
+import easybuild.framework.easyconfig.index as ec_index
 import easybuild.tools.build_log as eb_build_log
+import easybuild.tools.filetools as filetools
 import easybuild.tools.options as eboptions
+import easybuild.tools.sourcetreecache as sourcetreecache
 import easybuild.tools.toolchain.utilities as tc_utils
 import easybuild.tools.module_naming_scheme.toolchain as mns_toolchain
 from easybuild.framework.easyconfig import easyconfig
@@ -407,7 +410,11 @@ def cleanup():
     tc_utils._initial_toolchain_instances.clear()
     easyconfig._easyconfigs_cache.clear()
     easyconfig._easyconfig_files_cache.clear()
+    easyconfig._easyblocks_fingerprints.clear()
+    ec_index._indexes.clear()
+    filetools._checksums_cache.clear()
     mns_toolchain._toolchain_details_cache.clear()
+    sourcetreecache._source_tree_caches.clear()
 
     # reset to make sure tempfile picks up new temporary directory to use
     tempfile.tempdir = None